@@ -0,0 +1,81 @@
+"""maintained advance balances with monthly checkpoints
+
+Revision ID: advance_balances_20260501
+Revises: silk_collections_unique_20260420
+Create Date: 2026-05-01
+
+advance_balances and advance_balance_checkpoints are filled from the
+advances table here and kept current by the flush hooks in
+app.core.advance_balances. ``python manage_advances.py verify`` compares them
+with the advances table again.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'advance_balances_20260501'
+down_revision = 'silk_collections_unique_20260420'
+branch_labels = None
+depends_on = None
+
+
+MONTHLY = """
+    WITH monthly AS (
+        SELECT farmer_id, vendor_id, date_trunc('month', created_at)::date AS month,
+               SUM(GREATEST(amount, 0)) AS given,
+               SUM(GREATEST(-amount, 0)) AS deducted
+        FROM advances
+        GROUP BY farmer_id, vendor_id, date_trunc('month', created_at)::date
+        -- Zero amounts move nothing; the flush hooks keep no checkpoint for them
+        HAVING SUM(ABS(amount)) <> 0
+    )
+"""
+
+
+def upgrade():
+    op.create_table(
+        'advance_balances',
+        sa.Column('farmer_id', sa.Integer(), sa.ForeignKey('farmers.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('vendor_id', sa.Integer(), sa.ForeignKey('vendors.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('given', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('deducted', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('balance', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.func.now()),
+    )
+    op.create_index('ix_advance_balances_vendor_id', 'advance_balances', ['vendor_id'])
+
+    op.create_table(
+        'advance_balance_checkpoints',
+        sa.Column('farmer_id', sa.Integer(), sa.ForeignKey('farmers.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('month', sa.DATE(), primary_key=True),
+        sa.Column('vendor_id', sa.Integer(), sa.ForeignKey('vendors.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('given', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('deducted', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('closing_balance', sa.Numeric(14, 2), nullable=False, server_default='0'),
+    )
+    op.create_index('ix_advance_checkpoints_vendor_month', 'advance_balance_checkpoints', ['vendor_id', 'month'])
+
+    # Balance as of a date reads one month of a farmer's advances
+    op.create_index('ix_advances_farmer_created', 'advances', ['farmer_id', 'created_at'])
+
+    op.execute(MONTHLY + """
+        INSERT INTO advance_balances (farmer_id, vendor_id, given, deducted, balance)
+        SELECT farmer_id, vendor_id, SUM(given), SUM(deducted), SUM(given - deducted)
+        FROM monthly
+        GROUP BY farmer_id, vendor_id
+    """)
+    op.execute(MONTHLY + """
+        INSERT INTO advance_balance_checkpoints (farmer_id, month, vendor_id, given, deducted, closing_balance)
+        SELECT farmer_id, month, vendor_id, given, deducted,
+               SUM(given - deducted) OVER (PARTITION BY farmer_id ORDER BY month)
+        FROM monthly
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_advances_farmer_created', table_name='advances')
+    op.drop_index('ix_advance_checkpoints_vendor_month', table_name='advance_balance_checkpoints')
+    op.drop_table('advance_balance_checkpoints')
+    op.drop_index('ix_advance_balances_vendor_id', table_name='advance_balances')
+    op.drop_table('advance_balances')
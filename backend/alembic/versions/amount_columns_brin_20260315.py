@@ -0,0 +1,97 @@
+"""generated amount columns, BRIN date indexes and INCLUDE covering indexes
+
+Revision ID: amount_columns_brin_20260315
+Revises: monthly_partitions_20260301
+Create Date: 2026-03-15
+
+collection_items gets two stored generated columns, exact (4 decimals, not
+rounded) so sums over them equal the sums of the per-row products:
+- gross_amount   = qty_kg * rate_per_kg
+- luggage_amount = qty_kg * labour_per_kg + transport_cost (NULLs as 0)
+
+The six-column covering index (vendor_id, date, qty_kg, rate_per_kg,
+labour_per_kg, coolie_cost) and the plain (vendor_id, date) /
+(farmer_id, date) btrees are replaced by btrees on the same keys that
+INCLUDE the summed columns, so per-vendor and per-farmer date-range SUMs can
+be answered by index-only scans.
+
+Rows are inserted roughly in date order, so the date columns of
+collection_items, audits and sms_logs get BRIN indexes (a few pages per
+partition). They replace the btrees on audits.created_at and
+sms_logs.created_at.
+
+Compare before/after with ``python benchmark_amount_indexes.py``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'amount_columns_brin_20260315'
+down_revision = 'monthly_partitions_20260301'
+branch_labels = None
+depends_on = None
+
+
+# Must match CollectionItem.gross_amount / luggage_amount
+GROSS_AMOUNT = 'qty_kg * rate_per_kg'
+LUGGAGE_AMOUNT = 'coalesce(qty_kg * labour_per_kg, 0) + coalesce(transport_cost, 0)'
+
+# Columns summed by the reports, settlements and silk reconciliation
+SUMMED_COLUMNS = ['gross_amount', 'luggage_amount', 'coolie_cost', 'paid_amount', 'qty_kg']
+
+BRIN_INDEXES = [
+    # (index, table, column, pages_per_range)
+    ('brin_collection_items_date', 'collection_items', 'date', 32),
+    ('brin_audits_created_at', 'audits', 'created_at', 128),
+    ('brin_sms_logs_created_at', 'sms_logs', 'created_at', 128),
+]
+
+
+def upgrade():
+    op.add_column('collection_items', sa.Column(
+        'gross_amount', sa.Numeric(26, 4), sa.Computed(GROSS_AMOUNT, persisted=True)
+    ))
+    op.add_column('collection_items', sa.Column(
+        'luggage_amount', sa.Numeric(26, 4), sa.Computed(LUGGAGE_AMOUNT, persisted=True)
+    ))
+
+    op.drop_index('ix_collection_items_vendor_date_covering', table_name='collection_items')
+    op.drop_index('ix_collection_items_vendor_date', table_name='collection_items')
+    op.drop_index('ix_collection_items_farmer_date', table_name='collection_items')
+    op.create_index(
+        'ix_collection_items_vendor_date', 'collection_items', ['vendor_id', 'date'],
+        postgresql_include=SUMMED_COLUMNS,
+    )
+    op.create_index(
+        'ix_collection_items_farmer_date', 'collection_items', ['farmer_id', 'date'],
+        postgresql_include=SUMMED_COLUMNS,
+    )
+
+    op.drop_index('ix_audits_created_at', table_name='audits')
+    op.drop_index('ix_sms_logs_created_at', table_name='sms_logs')
+    for name, table, column, pages_per_range in BRIN_INDEXES:
+        op.create_index(
+            name, table, [column],
+            postgresql_using='brin', postgresql_with={'pages_per_range': pages_per_range},
+        )
+
+
+def downgrade():
+    for name, table, _column, _pages in reversed(BRIN_INDEXES):
+        op.drop_index(name, table_name=table)
+    op.create_index('ix_sms_logs_created_at', 'sms_logs', ['created_at'])
+    op.create_index('ix_audits_created_at', 'audits', ['created_at'])
+
+    op.drop_index('ix_collection_items_farmer_date', table_name='collection_items')
+    op.drop_index('ix_collection_items_vendor_date', table_name='collection_items')
+    op.create_index('ix_collection_items_farmer_date', 'collection_items', ['farmer_id', 'date'])
+    op.create_index('ix_collection_items_vendor_date', 'collection_items', ['vendor_id', 'date'])
+    op.create_index(
+        'ix_collection_items_vendor_date_covering',
+        'collection_items',
+        ['vendor_id', 'date', 'qty_kg', 'rate_per_kg', 'labour_per_kg', 'coolie_cost']
+    )
+
+    op.drop_column('collection_items', 'luggage_amount')
+    op.drop_column('collection_items', 'gross_amount')
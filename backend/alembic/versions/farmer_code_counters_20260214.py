@@ -0,0 +1,37 @@
+"""add farmer_code_counters for atomic farmer code allocation
+
+Revision ID: farmer_code_counters_20260214
+Revises: trigram_search_indexes_20260212
+Create Date: 2026-02-14
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'farmer_code_counters_20260214'
+down_revision = 'trigram_search_indexes_20260212'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'farmer_code_counters',
+        sa.Column('vendor_id', sa.Integer(), sa.ForeignKey('vendors.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('last_value', sa.BigInteger(), nullable=False, server_default='0'),
+    )
+
+    # Seed each vendor's counter from the highest F{vendor}-{NNNN} already issued
+    op.execute("""
+        INSERT INTO farmer_code_counters (vendor_id, last_value)
+        SELECT vendor_id, MAX(CAST(substring(farmer_code FROM '-([0-9]+)$') AS BIGINT))
+        FROM farmers
+        WHERE farmer_code ~ ('^F' || CAST(vendor_id AS TEXT) || '-[0-9]+$')
+        GROUP BY vendor_id
+    """)
+
+
+def downgrade():
+    op.drop_table('farmer_code_counters')
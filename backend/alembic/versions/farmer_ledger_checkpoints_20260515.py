@@ -0,0 +1,55 @@
+"""monthly farmer ledger checkpoints
+
+Revision ID: farmer_ledger_checkpoints_20260515
+Revises: advance_balances_20260501
+Create Date: 2026-05-15
+
+farmer_ledger_checkpoints is filled here and kept current by the flush hooks
+in app.core.ledger_checkpoints. The backfill goes through that module's
+``rebuild`` rather than SQL: the figures must be the ledger report's own
+(per-line rounding to the paisa, commission at each farmer's effective rate)
+and include archived seasons, which live in Parquet files, not Postgres.
+``python manage_ledger_checkpoints.py verify`` compares them again.
+
+stale_ledger_farmers marks farmers whose commission rate changed until a
+background job has rebuilt their checkpoints.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'farmer_ledger_checkpoints_20260515'
+down_revision = 'advance_balances_20260501'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'farmer_ledger_checkpoints',
+        sa.Column('farmer_id', sa.Integer(), sa.ForeignKey('farmers.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('month', sa.DATE(), primary_key=True),
+        sa.Column('vendor_id', sa.Integer(), sa.ForeignKey('vendors.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('line_count', sa.Integer(), nullable=False, server_default='0'),
+        *[
+            sa.Column(name, sa.Numeric(14, 2), nullable=False, server_default='0')
+            for name in ('qty', 'gross', 'commission', 'luggage', 'coolie', 'paid', 'net')
+        ],
+    )
+    op.create_index('ix_ledger_checkpoints_vendor_month', 'farmer_ledger_checkpoints', ['vendor_id', 'month'])
+    op.create_table(
+        'stale_ledger_farmers',
+        sa.Column('farmer_id', sa.Integer(), sa.ForeignKey('farmers.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('vendor_id', sa.Integer(), sa.ForeignKey('vendors.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('marked_at', sa.TIMESTAMP(), server_default=sa.func.now(), nullable=False),
+    )
+
+    from app.core.ledger_checkpoints import rebuild
+    rebuild(op.get_bind())
+
+
+def downgrade():
+    op.drop_table('stale_ledger_farmers')
+    op.drop_index('ix_ledger_checkpoints_vendor_month', table_name='farmer_ledger_checkpoints')
+    op.drop_table('farmer_ledger_checkpoints')
@@ -0,0 +1,51 @@
+"""add jobs table for the in-process background job pool
+
+Revision ID: jobs_20260401
+Revises: amount_columns_brin_20260315
+Create Date: 2026-04-01
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'jobs_20260401'
+down_revision = 'amount_columns_brin_20260315'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('vendor_id', sa.Integer(), sa.ForeignKey('vendors.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('kind', sa.String(50), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='QUEUED'),
+        sa.Column('progress', sa.Integer(), nullable=True),
+        sa.Column('progress_message', sa.String(255), nullable=True),
+        sa.Column('cancel_requested', sa.Boolean(), nullable=False, server_default=sa.text('false')),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('artifact_path', sa.String(500), nullable=True),
+        sa.Column('artifact_media_type', sa.String(100), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('worker', sa.String(100), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.func.now(), nullable=False),
+        sa.Column('started_at', sa.TIMESTAMP(), nullable=True),
+        sa.Column('heartbeat_at', sa.TIMESTAMP(), nullable=True),
+        sa.Column('finished_at', sa.TIMESTAMP(), nullable=True),
+    )
+    # Workers scan only the queue: a partial index keeps the claim query
+    # cheap however many finished jobs are kept
+    op.create_index('ix_jobs_queued', 'jobs', ['id'], postgresql_where=sa.text("status = 'QUEUED'"))
+    op.create_index('ix_jobs_vendor_created', 'jobs', ['vendor_id', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_jobs_vendor_created', table_name='jobs')
+    op.drop_index('ix_jobs_queued', table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,151 @@
+"""range-partition collection_items, audits and sms_logs by month
+
+Revision ID: monthly_partitions_20260301
+Revises: farmer_code_counters_20260214
+Create Date: 2026-03-01
+
+Each table is rebuilt as a declaratively partitioned table (PARTITION BY
+RANGE on its date column) with one partition per month, from the oldest row
+to MONTHS_AHEAD months past the current one, plus a DEFAULT partition for
+anything outside those bounds. Rows are copied across, the existing indexes
+and outgoing foreign keys are replayed on the new parent (so every current
+and future partition gets them), and the id sequence is kept.
+
+Postgres requires the partition key in every unique constraint, so the
+primary keys become (id, <key>) and the foreign key from
+settlement_items.collection_item_id is dropped (ids stay unique through the
+sequence). audits.created_at and sms_logs.created_at become NOT NULL.
+
+Later months are created by ``python manage_partitions.py create``
+(app.core.partitions).
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'monthly_partitions_20260301'
+down_revision = 'farmer_code_counters_20260214'
+branch_labels = None
+depends_on = None
+
+
+# Must match app.core.partitions.PARTITIONED_TABLES
+PARTITIONED_TABLES = {
+    'collection_items': 'date',
+    'audits': 'created_at',
+    'sms_logs': 'created_at',
+}
+MONTHS_AHEAD = 3
+
+# Foreign keys into the partitioned tables that Postgres cannot keep
+INCOMING_FOREIGN_KEYS = [
+    # (table, constraint, definition)
+    ('settlement_items', 'settlement_items_collection_item_id_fkey',
+     'FOREIGN KEY (collection_item_id) REFERENCES collection_items(id) ON DELETE CASCADE'),
+]
+
+
+def _month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _table_objects(conn, table):
+    """Index definitions (except the primary key) and outgoing FK definitions of ``table``."""
+    indexes = conn.execute(sa.text("""
+        SELECT i.indexname, i.indexdef
+        FROM pg_indexes i
+        WHERE i.schemaname = current_schema() AND i.tablename = :table
+          AND i.indexname NOT IN (
+              SELECT conname FROM pg_constraint
+              WHERE conrelid = CAST(:table AS regclass) AND contype = 'p'
+          )
+    """), {'table': table}).fetchall()
+    foreign_keys = conn.execute(sa.text("""
+        SELECT conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'
+    """), {'table': table}).fetchall()
+    sequence = conn.execute(
+        sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': table}
+    ).scalar()
+    return indexes, foreign_keys, sequence
+
+
+def _rebuild(conn, table, partition_by, primary_key, partitions):
+    """
+    Replace ``table`` with a copy created ``PARTITION BY <partition_by>`` (or a
+    plain table when None), keeping rows, indexes, foreign keys and the id
+    sequence. ``partitions`` is a list of (name, FOR VALUES clause).
+    """
+    indexes, foreign_keys, sequence = _table_objects(conn, table)
+    old = f'{table}_old'
+
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    if sequence:
+        op.execute(f'ALTER SEQUENCE {sequence} OWNED BY NONE')
+    suffix = f' PARTITION BY {partition_by}' if partition_by else ''
+    op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS){suffix}')
+    for name, bounds in partitions:
+        op.execute(f'CREATE TABLE {name} PARTITION OF {table} {bounds}')
+    op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    op.execute(f'DROP TABLE {old} CASCADE')
+
+    op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key})')
+    for _name, definition in indexes:
+        op.execute(definition)
+    for name, definition in foreign_keys:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+    if sequence:
+        op.execute(f'ALTER SEQUENCE {sequence} OWNED BY {table}.id')
+
+
+def upgrade():
+    conn = op.get_bind()
+
+    for table, constraint, _definition in INCOMING_FOREIGN_KEYS:
+        op.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {constraint}')
+
+    today = date.today()
+    for table, key in PARTITIONED_TABLES.items():
+        if key == 'created_at':
+            op.execute(f'UPDATE {table} SET created_at = now() WHERE created_at IS NULL')
+            op.execute(f'ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL')
+
+        oldest = conn.execute(sa.text(f'SELECT min({key}) FROM {table}')).scalar()
+        month = _month_start(oldest or today)
+        last = _month_start(today)
+        for _ in range(MONTHS_AHEAD):
+            last = _next_month(last)
+
+        partitions = []
+        while month <= last:
+            end = _next_month(month)
+            partitions.append((
+                f'{table}_y{month.year:04d}m{month.month:02d}',
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')",
+            ))
+            month = end
+        partitions.append((f'{table}_default', 'DEFAULT'))
+
+        _rebuild(conn, table, f'RANGE ({key})', f'id, {key}', partitions)
+
+
+def downgrade():
+    conn = op.get_bind()
+
+    for table in PARTITIONED_TABLES:
+        # Rows of attached partitions are copied back; detached/archived partitions are left alone
+        _rebuild(conn, table, None, 'id', [])
+
+    for table in ('audits', 'sms_logs'):
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN created_at DROP NOT NULL')
+
+    for table, constraint, definition in INCOMING_FOREIGN_KEYS:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {constraint} {definition}')
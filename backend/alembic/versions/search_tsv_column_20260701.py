@@ -0,0 +1,58 @@
+"""stored search_tsv column for the transaction search
+
+Revision ID: search_tsv_column_20260701
+Revises: vendor_source_versions_20260601
+Create Date: 2026-07-01
+
+GET /transactions/search orders matches by date and stops at one page. For
+common words Postgres walks ix_collection_items_vendor_date backwards and
+filters every row it passes, which with the expression index meant running
+to_tsvector() on each of them (over a second for two-word queries on 1M
+rows). collection_items gets the tsvector as a stored generated column, and
+the (vendor_id, tsvector) GIN index moves onto it.
+
+Adding a stored column rewrites the table, and indexes on a partitioned
+table cannot be built CONCURRENTLY, so run this in a quiet window.
+
+Compare before/after with ``python benchmark_transaction_search.py``.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'search_tsv_column_20260701'
+down_revision = 'vendor_source_versions_20260601'
+branch_labels = None
+depends_on = None
+
+
+# Must match CollectionItem.search_tsv
+SEARCH_TSV = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(vehicle_name, '') || ' ' || "
+    "coalesce(vehicle_number, '') || ' ' || "
+    "coalesce(item_name, '') || ' ' || "
+    "coalesce(remarks, ''))"
+)
+
+
+def upgrade():
+    op.drop_index('ix_collection_items_search_tsv', table_name='collection_items')
+    op.add_column('collection_items', sa.Column(
+        'search_tsv', postgresql.TSVECTOR(), sa.Computed(SEARCH_TSV, persisted=True)
+    ))
+    op.create_index(
+        'ix_collection_items_search_tsv', 'collection_items', ['vendor_id', 'search_tsv'],
+        postgresql_using='gin',
+    )
+
+
+def downgrade():
+    op.drop_index('ix_collection_items_search_tsv', table_name='collection_items')
+    op.drop_column('collection_items', 'search_tsv')
+    op.execute(
+        "CREATE INDEX ix_collection_items_search_tsv ON collection_items "
+        f"USING gin (vendor_id, ({SEARCH_TSV}))"
+    )
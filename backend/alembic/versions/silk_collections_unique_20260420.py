@@ -0,0 +1,37 @@
+"""one silk collection per vendor and date
+
+Revision ID: silk_collections_unique_20260420
+Revises: silk_sync_state_20260415
+Create Date: 2026-04-20
+
+Range reconciliation upserts silk_collections with ON CONFLICT (vendor_id,
+date). The single-date endpoint already kept one row per date; any duplicates
+left from before are removed, keeping the most recently written one.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'silk_collections_unique_20260420'
+down_revision = 'silk_sync_state_20260415'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        DELETE FROM silk_collections s
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY vendor_id, date
+                ORDER BY updated_at DESC NULLS LAST, id DESC
+            ) AS n
+            FROM silk_collections
+        ) ranked
+        WHERE s.id = ranked.id AND ranked.n > 1
+    """)
+    op.create_unique_constraint('uq_silk_collections_vendor_date', 'silk_collections', ['vendor_id', 'date'])
+
+
+def downgrade():
+    op.drop_constraint('uq_silk_collections_vendor_date', 'silk_collections', type_='unique')
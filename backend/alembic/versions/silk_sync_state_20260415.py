@@ -0,0 +1,64 @@
+"""link silk ledger entries to their collection line and track the sync high-water mark
+
+Revision ID: silk_sync_state_20260415
+Revises: jobs_20260401
+Create Date: 2026-04-15
+
+silk_ledger_entries.collection_item_id is unique, so the sync can insert with
+ON CONFLICT DO NOTHING (no FK: collection_items is partitioned). Existing
+entries are linked to the line they were created from, pairing entries and
+lines with the same vendor, farmer, date, kg and rate in id order; entries
+without a matching line keep a NULL link. silk_sync_state starts empty, so
+each vendor's first sync scans its whole window once.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'silk_sync_state_20260415'
+down_revision = 'jobs_20260401'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('silk_ledger_entries', sa.Column('collection_item_id', sa.Integer(), nullable=True))
+    op.execute("""
+        WITH entries AS (
+            SELECT id, vendor_id, customer_id, date, kg, rate,
+                   row_number() OVER (PARTITION BY vendor_id, customer_id, date, kg, rate ORDER BY id) AS n
+            FROM silk_ledger_entries
+        ),
+        lines AS (
+            SELECT id, vendor_id, farmer_id, date, qty_kg, rate_per_kg,
+                   row_number() OVER (PARTITION BY vendor_id, farmer_id, date, qty_kg, rate_per_kg ORDER BY id) AS n
+            FROM collection_items
+            WHERE farmer_id IS NOT NULL
+        )
+        UPDATE silk_ledger_entries s
+        SET collection_item_id = lines.id
+        FROM entries
+        JOIN lines
+          ON lines.vendor_id = entries.vendor_id
+         AND lines.farmer_id = entries.customer_id
+         AND lines.date = entries.date
+         AND lines.qty_kg = entries.kg
+         AND lines.rate_per_kg = entries.rate
+         AND lines.n = entries.n
+        WHERE s.id = entries.id
+    """)
+    op.create_unique_constraint('uq_silk_ledger_collection_item', 'silk_ledger_entries', ['collection_item_id'])
+
+    op.create_table(
+        'silk_sync_state',
+        sa.Column('vendor_id', sa.Integer(), sa.ForeignKey('vendors.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('last_collection_item_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('synced_at', sa.TIMESTAMP(), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table('silk_sync_state')
+    op.drop_constraint('uq_silk_ledger_collection_item', 'silk_ledger_entries', type_='unique')
+    op.drop_column('silk_ledger_entries', 'collection_item_id')
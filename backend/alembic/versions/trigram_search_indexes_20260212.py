@@ -0,0 +1,84 @@
+"""pg_trgm and full-text indexes for search endpoints
+
+Revision ID: trigram_search_indexes_20260212
+Revises: vendor_data_versions_20260210
+Create Date: 2026-02-12
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'trigram_search_indexes_20260212'
+down_revision = 'vendor_data_versions_20260210'
+branch_labels = None
+depends_on = None
+
+
+# Replaced by the stored search_tsv column in search_tsv_column_20260701.
+COLLECTION_ITEM_SEARCH_SQL = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(collection_items.vehicle_name, '') || ' ' || "
+    "coalesce(collection_items.vehicle_number, '') || ' ' || "
+    "coalesce(collection_items.item_name, '') || ' ' || "
+    "coalesce(collection_items.remarks, ''))"
+)
+
+TRIGRAM_INDEXES = [
+    # (index name, table, column)
+    ('ix_farmers_name_trgm', 'farmers', 'name'),
+    ('ix_farmers_farmer_code_trgm', 'farmers', 'farmer_code'),
+    ('ix_saala_customers_name_trgm', 'saala_customers', 'name'),
+    ('ix_saala_customers_contact_trgm', 'saala_customers', 'contact'),
+    ('ix_catalog_name_trgm', 'catalog', 'name'),
+    ('ix_catalog_code_trgm', 'catalog', 'code'),
+    ('ix_collection_items_item_name_trgm', 'collection_items', 'item_name'),
+]
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # btree_gin lets vendor_id live in the same GIN index as the tsvector
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+
+    # CONCURRENTLY keeps collection_items writable while the indexes build;
+    # it cannot run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        # ILIKE '%q%' lookups (farmers by-group/select2, SAALA customers, catalog,
+        # daily-sales item dropdown)
+        for name, table, column in TRIGRAM_INDEXES:
+            op.create_index(
+                name,
+                table,
+                [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+
+        # Daily-sales item filter (exact match) and distinct item list
+        op.create_index(
+            'ix_collection_items_vendor_item_date',
+            'collection_items',
+            ['vendor_id', 'item_name', 'date'],
+            postgresql_concurrently=True,
+        )
+
+        # Transaction search over vehicle / item / remarks
+        op.execute(
+            "CREATE INDEX CONCURRENTLY ix_collection_items_search_tsv ON collection_items "
+            f"USING gin (vendor_id, ({COLLECTION_ITEM_SEARCH_SQL}))"
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_collection_items_search_tsv")
+        op.drop_index(
+            'ix_collection_items_vendor_item_date',
+            table_name='collection_items',
+            postgresql_concurrently=True,
+        )
+        for name, table, _column in reversed(TRIGRAM_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    # Extensions are left installed; other objects may depend on them.
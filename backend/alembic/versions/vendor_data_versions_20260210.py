@@ -0,0 +1,29 @@
+"""add vendor_data_versions table for ETag / cache invalidation
+
+Revision ID: vendor_data_versions_20260210
+Revises: add_is_active_to_users_20260129
+Create Date: 2026-02-10
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'vendor_data_versions_20260210'
+down_revision = 'add_is_active_to_users_20260129'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'vendor_data_versions',
+        sa.Column('vendor_id', sa.Integer(), sa.ForeignKey('vendors.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table('vendor_data_versions')
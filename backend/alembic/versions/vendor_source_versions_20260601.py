@@ -0,0 +1,30 @@
+"""add vendor_source_versions: per-table counters for master-data caches
+
+Revision ID: vendor_source_versions_20260601
+Revises: farmer_ledger_checkpoints_20260515
+Create Date: 2026-06-01
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'vendor_source_versions_20260601'
+down_revision = 'farmer_ledger_checkpoints_20260515'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'vendor_source_versions',
+        sa.Column('vendor_id', sa.Integer(), sa.ForeignKey('vendors.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('source', sa.String(32), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table('vendor_source_versions')
@@ -0,0 +1,330 @@
+"""
+Maintained advance balances (app.models.advance_balance).
+
+The ``advances`` table stays the ledger; every flush that inserts, updates or
+deletes Advance rows also applies the change, in the same transaction, to
+
+    advance_balances             given / deducted / balance per farmer
+    advance_balance_checkpoints  per farmer and month: the month's given /
+                                 deducted and the closing balance
+
+so the current balance is one primary key read, and the balance as of any
+date is the closing balance of the last checkpoint before that month plus
+at most one month of advances.
+
+Only ORM writes are seen. Anything that changes ``advances`` with Core
+statements calls ``rebuild`` for the farmers it touched. ``find_drift`` and
+``rebuild`` back ``python manage_advances.py verify [--fix]``.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, event, func, inspect, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models.advance import Advance
+from app.models.advance_balance import AdvanceBalance, AdvanceBalanceCheckpoint
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0")
+TRACKED_ATTRS = ("farmer_id", "vendor_id", "created_at", "amount")
+
+_PREVIOUS = "advance_balances_previous"
+
+
+def month_start(value) -> date:
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+
+# ---------- flush hook ----------
+def _movement(amount) -> Tuple[Decimal, Decimal]:
+    """(given, deducted) of one advance amount."""
+    amount = Decimal(str(amount or 0))
+    return (amount, ZERO) if amount >= 0 else (ZERO, -amount)
+
+
+def collect_changes(session: Session, previous: Dict[int, tuple]) -> Dict[Tuple[int, int, date], List[Decimal]]:
+    """
+    {(farmer_id, vendor_id, month): [given, deducted]} change made by the
+    flush; ``previous`` holds the updated/deleted rows as they were before it.
+    """
+    changes: Dict[Tuple[int, int, date], List[Decimal]] = {}
+
+    def add(sign: int, farmer_id, vendor_id, created_at, amount) -> None:
+        given, deducted = _movement(amount)
+        # created_at is only missing if it was explicitly set to NULL
+        month = month_start(created_at or datetime.utcnow())
+        current = changes.setdefault((farmer_id, vendor_id, month), [ZERO, ZERO])
+        current[0] += sign * given
+        current[1] += sign * deducted
+
+    def remove_previous(obj) -> None:
+        # No row was read if it was already gone (deleted by another
+        # transaction) or the object only became dirty after before_flush
+        row = previous.get(inspect(obj).identity[0])
+        if row is not None:
+            add(-1, *row)
+
+    for obj in session.new:
+        if isinstance(obj, Advance):
+            add(1, obj.farmer_id, obj.vendor_id, obj.created_at, obj.amount)
+    for obj in session.dirty:
+        if isinstance(obj, Advance) and session.is_modified(obj, include_collections=False):
+            remove_previous(obj)
+            add(1, obj.farmer_id, obj.vendor_id, obj.created_at, obj.amount)
+    for obj in session.deleted:
+        if isinstance(obj, Advance):
+            remove_previous(obj)
+
+    return {key: value for key, value in changes.items() if any(value)}
+
+
+def apply_changes(connection: Connection, changes: Dict[Tuple[int, int, date], List[Decimal]]) -> None:
+    """
+    Add ``changes`` to the balances and checkpoints. Farmers are locked in id
+    order (and months in order) so concurrent writers cannot deadlock.
+    """
+    balances = AdvanceBalance.__table__
+    checkpoints = AdvanceBalanceCheckpoint.__table__
+
+    for (farmer_id, vendor_id, month), (given, deducted) in sorted(changes.items()):
+        net = given - deducted
+
+        stmt = pg_insert(balances).values(
+            farmer_id=farmer_id, vendor_id=vendor_id, given=given, deducted=deducted, balance=net
+        )
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[balances.c.farmer_id],
+            set_={
+                "given": balances.c.given + given,
+                "deducted": balances.c.deducted + deducted,
+                "balance": balances.c.balance + net,
+                "updated_at": func.now(),
+            },
+        ))
+
+        previous_closing = (
+            select(checkpoints.c.closing_balance)
+            .where(checkpoints.c.farmer_id == farmer_id, checkpoints.c.month < month)
+            .order_by(checkpoints.c.month.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        stmt = pg_insert(checkpoints).values(
+            farmer_id=farmer_id,
+            month=month,
+            vendor_id=vendor_id,
+            given=given,
+            deducted=deducted,
+            closing_balance=func.coalesce(previous_closing, 0) + net,
+        )
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[checkpoints.c.farmer_id, checkpoints.c.month],
+            set_={
+                "given": checkpoints.c.given + given,
+                "deducted": checkpoints.c.deducted + deducted,
+                "closing_balance": checkpoints.c.closing_balance + net,
+            },
+        ))
+
+        # A month whose advances were all removed keeps no checkpoint
+        if given < 0 or deducted < 0:
+            connection.execute(
+                delete(checkpoints).where(
+                    checkpoints.c.farmer_id == farmer_id,
+                    checkpoints.c.month == month,
+                    checkpoints.c.given == 0,
+                    checkpoints.c.deducted == 0,
+                )
+            )
+
+        # Later months close on top of this one
+        if net:
+            connection.execute(
+                update(checkpoints)
+                .where(checkpoints.c.farmer_id == farmer_id, checkpoints.c.month > month)
+                .values(closing_balance=checkpoints.c.closing_balance + net)
+            )
+
+
+@event.listens_for(Session, "before_flush")
+def _read_previous_advances(session, flush_context, instances):
+    # Attribute history has no old value for attributes set after the object
+    # was expired (e.g. by a commit), so read the rows while they are unchanged
+    ids = [
+        inspect(obj).identity[0]
+        for obj in list(session.dirty) + list(session.deleted)
+        if isinstance(obj, Advance)
+    ]
+    previous = {}
+    if ids:
+        table = Advance.__table__
+        rows = session.connection().execute(
+            select(table.c.id, *(table.c[attr] for attr in TRACKED_ATTRS)).where(table.c.id.in_(ids))
+        )
+        previous = {row[0]: tuple(row[1:]) for row in rows}
+    session.info[_PREVIOUS] = previous
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_advance_balances(session, flush_context):
+    changes = collect_changes(session, session.info.pop(_PREVIOUS, {}))
+    if changes:
+        apply_changes(session.connection(), changes)
+
+
+# ---------- reads ----------
+def current_balances(db: Session, vendor_id: int, farmer_ids: Iterable[int]) -> Dict[int, Decimal]:
+    """Current advance balance per farmer (farmers without advances are left out)."""
+    farmer_ids = list(farmer_ids)
+    if not farmer_ids:
+        return {}
+    return dict(db.execute(
+        select(AdvanceBalance.farmer_id, AdvanceBalance.balance).where(
+            AdvanceBalance.vendor_id == vendor_id,
+            AdvanceBalance.farmer_id.in_(farmer_ids),
+        )
+    ).all())
+
+
+def advance_summary(db: Session, vendor_id: int, farmer_id: int) -> Tuple[Decimal, Decimal, Decimal]:
+    """(given, deducted, balance) for one farmer."""
+    row = db.execute(
+        select(AdvanceBalance.given, AdvanceBalance.deducted, AdvanceBalance.balance).where(
+            AdvanceBalance.vendor_id == vendor_id,
+            AdvanceBalance.farmer_id == farmer_id,
+        )
+    ).first()
+    return tuple(row) if row else (ZERO, ZERO, ZERO)
+
+
+def balance_as_of(db: Session, vendor_id: int, farmer_id: int, day: date) -> Decimal:
+    """Advance balance at the end of ``day``: last earlier checkpoint plus this month's advances so far."""
+    month = month_start(day)
+    opening = db.execute(
+        select(AdvanceBalanceCheckpoint.closing_balance)
+        .where(
+            AdvanceBalanceCheckpoint.vendor_id == vendor_id,
+            AdvanceBalanceCheckpoint.farmer_id == farmer_id,
+            AdvanceBalanceCheckpoint.month < month,
+        )
+        .order_by(AdvanceBalanceCheckpoint.month.desc())
+        .limit(1)
+    ).scalar()
+    in_month = db.execute(
+        select(func.coalesce(func.sum(Advance.amount), 0)).where(
+            Advance.vendor_id == vendor_id,
+            Advance.farmer_id == farmer_id,
+            Advance.created_at >= month,
+            Advance.created_at < day + timedelta(days=1),
+        )
+    ).scalar()
+    return Decimal(str(opening or 0)) + Decimal(str(in_month or 0))
+
+
+# ---------- verify / rebuild ----------
+VENDOR_CONDITION = "(CAST(:vendor_id AS integer) IS NULL OR vendor_id = :vendor_id)"
+
+
+def _expected(condition: str) -> str:
+    """CTEs: balances and checkpoints as the advances rows matching ``condition`` say they should be."""
+    return f"""
+    WITH monthly AS (
+        SELECT farmer_id, vendor_id, date_trunc('month', created_at)::date AS month,
+               SUM(GREATEST(amount, 0)) AS given,
+               SUM(GREATEST(-amount, 0)) AS deducted
+        FROM advances
+        WHERE {condition}
+        GROUP BY farmer_id, vendor_id, date_trunc('month', created_at)::date
+        -- Zero amounts move nothing; the flush hooks keep no checkpoint for them
+        HAVING SUM(ABS(amount)) <> 0
+    ),
+    expected_checkpoints AS (
+        SELECT farmer_id, vendor_id, month, given, deducted,
+               SUM(given - deducted) OVER (PARTITION BY farmer_id ORDER BY month) AS closing_balance
+        FROM monthly
+    ),
+    expected_balances AS (
+        SELECT farmer_id, vendor_id, SUM(given) AS given, SUM(deducted) AS deducted,
+               SUM(given - deducted) AS balance
+        FROM monthly
+        GROUP BY farmer_id, vendor_id
+    )
+"""
+
+
+DRIFT_SQL = text(_expected(VENDOR_CONDITION) + """
+    SELECT 'balance' AS kind, COALESCE(e.farmer_id, b.farmer_id) AS farmer_id, NULL::date AS month,
+           e.balance AS expected, b.balance AS stored
+    FROM expected_balances e
+    FULL JOIN (
+        SELECT * FROM advance_balances WHERE """ + VENDOR_CONDITION + """
+    ) b ON b.farmer_id = e.farmer_id
+    WHERE COALESCE(e.given, 0) <> COALESCE(b.given, 0)
+       OR COALESCE(e.deducted, 0) <> COALESCE(b.deducted, 0)
+       OR COALESCE(e.balance, 0) <> COALESCE(b.balance, 0)
+    UNION ALL
+    SELECT 'checkpoint', COALESCE(e.farmer_id, c.farmer_id), COALESCE(e.month, c.month),
+           e.closing_balance, c.closing_balance
+    FROM expected_checkpoints e
+    FULL JOIN (
+        SELECT * FROM advance_balance_checkpoints WHERE """ + VENDOR_CONDITION + """
+    ) c ON c.farmer_id = e.farmer_id AND c.month = e.month
+    WHERE e.farmer_id IS NULL OR c.farmer_id IS NULL
+       OR e.given <> c.given OR e.deducted <> c.deducted OR e.closing_balance <> c.closing_balance
+    ORDER BY farmer_id, month NULLS FIRST
+""")
+
+
+def find_drift(db: Session, vendor_id: Optional[int] = None) -> List[dict]:
+    """Stored balances/checkpoints that disagree with the advances table."""
+    return [
+        {
+            "kind": row.kind,
+            "farmer_id": row.farmer_id,
+            "month": row.month,
+            "expected": row.expected,
+            "stored": row.stored,
+        }
+        for row in db.execute(DRIFT_SQL, {"vendor_id": vendor_id})
+    ]
+
+
+def rebuild(db: Session, farmer_ids: Optional[List[int]] = None, vendor_id: Optional[int] = None) -> None:
+    """
+    Recompute balances and checkpoints from the advances table for
+    ``farmer_ids`` (or every farmer of ``vendor_id``, or everyone). The
+    farmers' advances are locked first so no writer changes them meanwhile.
+    The caller commits.
+    """
+    where = [VENDOR_CONDITION]
+    params = {"vendor_id": vendor_id}
+    if farmer_ids is not None:
+        where.append("farmer_id = ANY(:farmer_ids)")
+        params["farmer_ids"] = list(farmer_ids)
+    condition = " AND ".join(where)
+
+    db.execute(text(f"SELECT 1 FROM advances WHERE {condition} FOR UPDATE"), params)
+    db.execute(text(f"DELETE FROM advance_balances WHERE {condition}"), params)
+    db.execute(text(f"DELETE FROM advance_balance_checkpoints WHERE {condition}"), params)
+
+    scoped = _expected(condition)
+    db.execute(text(scoped + """
+        INSERT INTO advance_balances (farmer_id, vendor_id, given, deducted, balance)
+        SELECT farmer_id, vendor_id, given, deducted, balance FROM expected_balances
+    """), params)
+    db.execute(text(scoped + """
+        INSERT INTO advance_balance_checkpoints (farmer_id, month, vendor_id, given, deducted, closing_balance)
+        SELECT farmer_id, month, vendor_id, given, deducted, closing_balance FROM expected_checkpoints
+    """), params)
+    logger.info(
+        f"Rebuilt advance balances for "
+        f"{f'{len(farmer_ids)} farmer(s)' if farmer_ids is not None else f'vendor {vendor_id}' if vendor_id else 'all vendors'}"
+    )
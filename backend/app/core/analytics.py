@@ -0,0 +1,289 @@
+"""
+Optional DuckDB analytics over a Parquet snapshot of the OLTP data.
+
+Season-over-season and item-wise trend queries scan years of collection
+lines; run on Postgres they compete with data entry. Instead
+``python manage_analytics.py export`` (from cron, e.g. nightly) streams the
+tables below into Parquet files under settings.ANALYTICS_DIR, and the
+/api/analytics endpoints query them with an in-process DuckDB engine
+(columnar, vectorized, multi-threaded), never touching Postgres:
+
+    <ANALYTICS_DIR>/snapshot.json                   current snapshot
+    <ANALYTICS_DIR>/snapshot_<run>/<table>.parquet
+
+collection_items in the snapshot is the hot table plus the cold archive
+files (app.core.archive) registered when the export started, so analytics
+cover every season.
+
+duckdb is not a hard dependency: without it (or without a snapshot) the
+endpoints answer 503 and nothing else is affected. Each worker process opens
+the current snapshot on first use and reopens it when snapshot.json changes.
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from app.core.archive import ARCHIVED_COLUMNS, TABLE as ARCHIVE_TABLE, arrow_field, load_manifest, vendor_dir
+from app.core.config import settings
+from app.models.collection_item import CollectionItem
+from app.models.farmer import Farmer
+from app.models.farmer_group import FarmerGroup
+from app.models.saala_customer import SaalaCustomer, SaalaTransaction
+from app.models.settlement import Settlement
+from app.models.vendor import Vendor
+
+logger = logging.getLogger(__name__)
+
+_EXPORT_BATCH = 50_000
+_KEEP_SNAPSHOTS = 2
+
+
+class AnalyticsUnavailable(Exception):
+    """duckdb is not installed or no snapshot has been exported yet."""
+
+
+# ---------- snapshot export ----------
+def _snapshot_statements():
+    """table -> statement; rows sorted by vendor so per-vendor reads skip row groups."""
+    return {
+        "collection_items": select(*ARCHIVED_COLUMNS).order_by(CollectionItem.vendor_id, CollectionItem.date),
+        "farmers": select(
+            Farmer.id, Farmer.vendor_id, Farmer.group_id, Farmer.farmer_code, Farmer.name
+        ).order_by(Farmer.vendor_id, Farmer.id),
+        "farmer_groups": select(
+            FarmerGroup.id, FarmerGroup.vendor_id, FarmerGroup.name
+        ).order_by(FarmerGroup.vendor_id, FarmerGroup.id),
+        "settlements": select(
+            Settlement.id, Settlement.vendor_id, Settlement.farmer_id, Settlement.date_from, Settlement.date_to,
+            Settlement.total_qty, Settlement.total_amount, Settlement.total_commission,
+            Settlement.net_payable, Settlement.status,
+        ).order_by(Settlement.vendor_id, Settlement.date_to),
+        "saala_transactions": select(
+            SaalaCustomer.vendor_id, SaalaTransaction.id, SaalaTransaction.customer_id, SaalaTransaction.date,
+            SaalaTransaction.item_code, SaalaTransaction.item_name, SaalaTransaction.qty, SaalaTransaction.rate,
+            SaalaTransaction.total_amount, SaalaTransaction.paid_amount,
+        ).join(SaalaCustomer, SaalaCustomer.id == SaalaTransaction.customer_id).order_by(
+            SaalaCustomer.vendor_id, SaalaTransaction.date
+        ),
+    }
+
+
+def _archive_files(vendor_ids: List[int]) -> List[str]:
+    files = []
+    for vendor_id in vendor_ids:
+        manifest = load_manifest(vendor_id)
+        if manifest:
+            files += [
+                str((vendor_dir(vendor_id) / entry["file"]).resolve())
+                for entry in manifest["tables"][ARCHIVE_TABLE]["files"]
+            ]
+    return files
+
+
+def _export_table(conn, statement, path: Path) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([arrow_field(column.name, column.type) for column in statement.selected_columns])
+    rows = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        result = conn.execution_options(stream_results=True, yield_per=_EXPORT_BATCH).execute(statement)
+        for batch in result.mappings().partitions():
+            writer.write_table(pa.Table.from_pylist([dict(row) for row in batch], schema))
+            rows += len(batch)
+    return rows
+
+
+def export_snapshot(engine: Engine) -> Dict[str, Any]:
+    """Write a new snapshot and make it current. Returns its description (snapshot.json)."""
+    root = Path(settings.ANALYTICS_DIR)
+    run = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    directory = root / f"snapshot_{run}"
+    directory.mkdir(parents=True)
+
+    with engine.connect() as conn:
+        # One REPEATABLE READ transaction so the tables are mutually consistent
+        conn = conn.execution_options(isolation_level="REPEATABLE READ")
+        with conn.begin():
+            vendor_ids = list(conn.execute(select(Vendor.id)).scalars())
+            archive_files = _archive_files(vendor_ids)
+            tables = {}
+            for table, statement in _snapshot_statements().items():
+                tables[table] = _export_table(conn, statement, directory / f"{table}.parquet")
+                logger.info(f"Analytics snapshot {run}: {table} {tables[table]} rows")
+
+    snapshot = {
+        "path": directory.name,
+        "exported_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "tables": tables,
+        "archive_files": archive_files,
+    }
+    tmp = root / "snapshot.json.tmp"
+    with open(tmp, "w") as f:
+        json.dump(snapshot, f, indent=2)
+    os.replace(tmp, root / "snapshot.json")
+
+    # Older snapshots; workers still reading one reopen on their next query
+    previous = sorted(p for p in root.glob("snapshot_*") if p.is_dir() and p != directory)
+    for old in previous[:max(len(previous) - (_KEEP_SNAPSHOTS - 1), 0)]:
+        shutil.rmtree(old, ignore_errors=True)
+    return snapshot
+
+
+# ---------- engine ----------
+class AnalyticsEngine:
+    """A DuckDB database with one view per snapshot table, reopened when the snapshot changes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connection = None
+        self._mtime = None
+        self.snapshot: Optional[Dict[str, Any]] = None
+
+    def _open(self):
+        try:
+            import duckdb
+        except ImportError:
+            raise AnalyticsUnavailable("Analytics requires the duckdb package")
+
+        root = Path(settings.ANALYTICS_DIR)
+        try:
+            mtime = (root / "snapshot.json").stat().st_mtime
+        except FileNotFoundError:
+            raise AnalyticsUnavailable("No analytics snapshot yet; run manage_analytics.py export")
+        if self._connection is not None and mtime == self._mtime:
+            return self._connection
+
+        with open(root / "snapshot.json") as f:
+            snapshot = json.load(f)
+        directory = (root / snapshot["path"]).resolve()
+        connection = duckdb.connect(":memory:")
+        for table in snapshot["tables"]:
+            files = [str(directory / f"{table}.parquet")]
+            if table == "collection_items":
+                files += snapshot["archive_files"]
+            connection.execute(
+                f"CREATE VIEW {table} AS SELECT * FROM read_parquet({files!r}, union_by_name = true)"
+            )
+        # The previous database is released once queries still using it finish
+        self._connection, self._mtime, self.snapshot = connection, mtime, snapshot
+        logger.info(f"Opened analytics snapshot {snapshot['path']} ({snapshot['exported_at']})")
+        return connection
+
+    def query(self, sql: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            # A cursor per query: DuckDB connections are not shared across threads
+            cursor = self._open().cursor()
+        try:
+            result = cursor.execute(sql, params)
+            columns = [d[0] for d in result.description]
+            return [dict(zip(columns, row)) for row in result.fetchall()]
+        finally:
+            cursor.close()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            self._open()
+            return self.snapshot
+
+
+analytics = AnalyticsEngine()
+
+
+# ---------- queries ----------
+BUCKETS = ("week", "month", "quarter", "year")
+_SEASON = f"""CASE WHEN month(date) >= {int(settings.ARCHIVE_SEASON_START_MONTH)}
+    THEN year(date) ELSE year(date) - 1 END"""
+
+
+def item_price_trends(
+    vendor_id: int, from_date: date, to_date: date, bucket: str = "month", item_name: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Per item and period (one of BUCKETS): quantity, amount, weighted average and min/max rate."""
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}")
+    return analytics.query(f"""
+        SELECT coalesce(item_name, '') AS item_name,
+               CAST(date_trunc('{bucket}', date) AS DATE) AS period,
+               count(*) AS lines,
+               CAST(sum(qty_kg) AS DOUBLE) AS qty,
+               round(CAST(sum(qty_kg * rate_per_kg) AS DOUBLE), 2) AS amount,
+               round(CAST(sum(qty_kg * rate_per_kg) / nullif(sum(qty_kg), 0) AS DOUBLE), 2) AS avg_rate,
+               CAST(min(rate_per_kg) AS DOUBLE) AS min_rate,
+               CAST(max(rate_per_kg) AS DOUBLE) AS max_rate
+        FROM collection_items
+        WHERE vendor_id = $vendor_id AND date BETWEEN $from_date AND $to_date
+          AND ($item_name IS NULL OR item_name = $item_name)
+        GROUP BY ALL
+        ORDER BY item_name, period
+    """, {"vendor_id": vendor_id, "from_date": from_date, "to_date": to_date, "item_name": item_name})
+
+
+def farmer_volume_ranking(vendor_id: int, from_date: date, to_date: date, limit: int = 50) -> List[Dict[str, Any]]:
+    """Farmers ranked by quantity supplied, with their share and settlements in the period."""
+    return analytics.query("""
+        WITH volume AS (
+            SELECT farmer_id, count(*) AS lines, count(DISTINCT date) AS active_days,
+                   sum(qty_kg) AS qty, sum(qty_kg * rate_per_kg) AS amount
+            FROM collection_items
+            WHERE vendor_id = $vendor_id AND date BETWEEN $from_date AND $to_date AND farmer_id IS NOT NULL
+            GROUP BY farmer_id
+        ), settled AS (
+            SELECT farmer_id, count(*) AS settlements, sum(net_payable) AS settled
+            FROM settlements
+            WHERE vendor_id = $vendor_id AND date_to BETWEEN $from_date AND $to_date AND status <> 'VOIDED'
+            GROUP BY farmer_id
+        )
+        SELECT CAST(rank() OVER (ORDER BY v.qty DESC) AS INTEGER) AS rank,
+               v.farmer_id, f.farmer_code, f.name AS farmer_name, g.name AS group_name,
+               v.lines, v.active_days,
+               CAST(v.qty AS DOUBLE) AS qty,
+               round(CAST(v.amount AS DOUBLE), 2) AS amount,
+               round(CAST(100 * v.qty / sum(v.qty) OVER () AS DOUBLE), 2) AS qty_share_percent,
+               coalesce(s.settlements, 0) AS settlements,
+               CAST(coalesce(s.settled, 0) AS DOUBLE) AS settled_amount
+        FROM volume v
+        LEFT JOIN farmers f ON f.id = v.farmer_id
+        LEFT JOIN farmer_groups g ON g.id = f.group_id
+        LEFT JOIN settled s ON s.farmer_id = v.farmer_id
+        ORDER BY rank, v.farmer_id
+        LIMIT $limit
+    """, {"vendor_id": vendor_id, "from_date": from_date, "to_date": to_date, "limit": limit})
+
+
+def group_growth(vendor_id: int, first_season: int, last_season: int) -> List[Dict[str, Any]]:
+    """Per farmer group and season: volume, amount, active farmers and growth over the previous season."""
+    return analytics.query(f"""
+        WITH seasons AS (
+            SELECT f.group_id, {_SEASON} AS season,
+                   sum(c.qty_kg) AS qty, sum(c.qty_kg * c.rate_per_kg) AS amount,
+                   count(DISTINCT c.farmer_id) AS farmers
+            FROM collection_items c
+            JOIN farmers f ON f.id = c.farmer_id
+            WHERE c.vendor_id = $vendor_id AND {_SEASON} BETWEEN $first_season - 1 AND $last_season
+            GROUP BY ALL
+        ), growth AS (
+            SELECT *,
+                   lag(qty) OVER (PARTITION BY group_id ORDER BY season) AS previous_qty,
+                   lag(amount) OVER (PARTITION BY group_id ORDER BY season) AS previous_amount
+            FROM seasons
+        )
+        SELECT g.group_id, coalesce(fg.name, 'No group') AS group_name, g.season, g.farmers,
+               CAST(g.qty AS DOUBLE) AS qty,
+               round(CAST(g.amount AS DOUBLE), 2) AS amount,
+               round(CAST(100 * (g.qty - g.previous_qty) / nullif(g.previous_qty, 0) AS DOUBLE), 2) AS qty_growth_percent,
+               round(CAST(100 * (g.amount - g.previous_amount) / nullif(g.previous_amount, 0) AS DOUBLE), 2)
+                   AS amount_growth_percent
+        FROM growth g
+        LEFT JOIN farmer_groups fg ON fg.id = g.group_id
+        WHERE g.season BETWEEN $first_season AND $last_season
+        ORDER BY group_name, g.season
+    """, {"vendor_id": vendor_id, "first_season": first_season, "last_season": last_season})
@@ -0,0 +1,377 @@
+"""
+Cold archive of closed seasons of collection_items.
+
+``python manage_archive.py archive --through <season>`` moves a vendor's
+collection lines up to the end of a closed season out of Postgres into
+zstd-compressed Parquet files under settings.ARCHIVE_DIR:
+
+    <ARCHIVE_DIR>/vendor_<id>/manifest.json
+    <ARCHIVE_DIR>/vendor_<id>/collection_items/<season start>_<season end>_<run>.parquet
+
+Files hold one season each, sorted by date with one row group per month, so
+a date-range read skips whole row groups on their statistics and reads only
+the columns a query uses. The manifest lists the files and how far the
+vendor is archived (``archived_through``).
+
+Reports do not change: ``with_archive`` rewrites a report statement whose
+date range reaches into the archive so that collection_items is read as
+``collection_items UNION ALL unnest(<archived columns>)``, with the archived
+values sent as one typed array parameter per column. Ranges after the
+boundary, and vendors with no archive, get the statement unchanged. The
+statement grows with the archived rows it carries, so a range holding more
+than settings.ARCHIVE_MAX_ROWS_PER_STATEMENT of them is refused (413) rather
+than shipped. Aggregations over whole histories (the ledger checkpoints) do
+not go through Postgres: they add ``archived_money_rows`` to the hot rows
+in Python.
+
+Archiving is restartable: a file is written completely (temporary name,
+then rename) before the rows it holds are deleted from Postgres, and is
+added to the manifest only after that delete commits. A file left out of
+the manifest by a crash is finished on the next run (its rows deleted by id,
+then registered), so rows are never visible from both tiers.
+
+Lines entered later with a date inside an archived season stay in Postgres
+and are picked up by the next archive run. Settlement items keep pointing at
+archived ids (there is no foreign key since collection_items was
+partitioned).
+"""
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from collections import namedtuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import sqlalchemy as sa
+from fastapi import HTTPException
+from sqlalchemy import bindparam, delete, func, select, union_all
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.util import ClauseAdapter
+
+from app.core.config import settings
+from app.core.live_events import publish_resync
+from app.models.collection_item import CollectionItem
+from app.utils.money_columns import LINE_MONEY_COLUMNS, to_scaled
+
+logger = logging.getLogger(__name__)
+
+TABLE = "collection_items"
+_items = CollectionItem.__table__
+# Everything but the generated amount columns, which are recomputed from these
+ARCHIVED_COLUMNS = [c for c in _items.columns if c.computed is None]
+
+_DELETE_BATCH = 5000
+
+# Source column of each scaled money column (qty_kg -> qty_kg, coolie -> coolie_cost, ...)
+_MONEY_SOURCES = {
+    label.name: next(e.key for e in visitors.iterate(label) if isinstance(e, sa.Column) and e.table is _items)
+    for label in LINE_MONEY_COLUMNS
+}
+ArchivedLine = namedtuple("ArchivedLine", ["farmer_id", "date", *_MONEY_SOURCES])
+
+
+# ---------- seasons ----------
+def season_bounds(season: int) -> Tuple[date, date]:
+    """First and last day of the season starting in ``season`` (e.g. 2024 -> 2024-04-01..2025-03-31)."""
+    start_month = settings.ARCHIVE_SEASON_START_MONTH
+    start = date(season, start_month, 1)
+    end = date(season + 1, start_month, 1) if start_month > 1 else date(season + 1, 1, 1)
+    return start, date.fromordinal(end.toordinal() - 1)
+
+
+def season_of(day: date) -> int:
+    return day.year if day.month >= settings.ARCHIVE_SEASON_START_MONTH else day.year - 1
+
+
+# ---------- manifests ----------
+def vendor_dir(vendor_id: int) -> Path:
+    return Path(settings.ARCHIVE_DIR) / f"vendor_{vendor_id}"
+
+
+def _manifest_path(vendor_id: int) -> Path:
+    return vendor_dir(vendor_id) / "manifest.json"
+
+
+def _empty_manifest(vendor_id: int) -> Dict[str, Any]:
+    return {"vendor_id": vendor_id, "tables": {TABLE: {"archived_through": None, "files": []}}}
+
+
+_manifests: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+_lock = threading.Lock()
+
+
+def load_manifest(vendor_id: int) -> Optional[Dict[str, Any]]:
+    """The vendor's manifest, or None when nothing is archived. Re-read only when the file changes."""
+    path = _manifest_path(vendor_id)
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+    with _lock:
+        cached = _manifests.get(vendor_id)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(path) as f:
+        manifest = json.load(f)
+    with _lock:
+        _manifests[vendor_id] = (mtime, manifest)
+    return manifest
+
+
+def _save_manifest(vendor_id: int, manifest: Dict[str, Any]) -> None:
+    path = _manifest_path(vendor_id)
+    tmp = path.with_suffix(".json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def archived_through(vendor_id: int) -> Optional[date]:
+    manifest = load_manifest(vendor_id)
+    through = manifest and manifest["tables"].get(TABLE, {}).get("archived_through")
+    return date.fromisoformat(through) if through else None
+
+
+# ---------- reading ----------
+def read_archived(
+    vendor_id: int,
+    from_date: date,
+    to_date: date,
+    columns: Iterable[str],
+    farmer_ids: Optional[List[int]] = None,
+):
+    """
+    Archived rows of the vendor dated ``from_date``..``to_date`` as a
+    pyarrow Table of ``columns`` (only those columns and the row groups
+    whose date range overlaps are read).
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    manifest = load_manifest(vendor_id)
+    columns = list(columns)
+    files = [
+        str(vendor_dir(vendor_id) / entry["file"])
+        for entry in (manifest["tables"][TABLE]["files"] if manifest else [])
+        if entry["from"] <= to_date.isoformat() and entry["to"] >= from_date.isoformat()
+    ]
+    if not files:
+        return pa.schema([arrow_field(name, _items.c[name].type) for name in columns]).empty_table()
+
+    condition = (ds.field("date") >= from_date) & (ds.field("date") <= to_date)
+    if farmer_ids is not None:
+        condition &= ds.field("farmer_id").isin(farmer_ids)
+    return ds.dataset(files, format="parquet").to_table(columns=columns, filter=condition)
+
+
+def with_archive(statement, vendor_id: int, from_date: date, to_date: date, farmer_ids: Optional[List[int]] = None):
+    """
+    ``statement`` reading collection_items from both tiers when
+    ``from_date`` is on or before the vendor's archive boundary; otherwise
+    ``statement`` itself. ``farmer_ids`` narrows the archived rows sent.
+    """
+    through = archived_through(vendor_id)
+    if through is None or from_date > through:
+        return statement
+
+    names = sorted({
+        element.key for element in visitors.iterate(statement)
+        if isinstance(element, sa.Column) and element.table is _items
+    })
+    archived = read_archived(vendor_id, from_date, min(to_date, through), names, farmer_ids)
+    if archived.num_rows == 0:
+        return statement
+    if archived.num_rows > settings.ARCHIVE_MAX_ROWS_PER_STATEMENT:
+        raise HTTPException(
+            status_code=413,
+            detail=(
+                f"The range includes {archived.num_rows} archived collection lines, more than the "
+                f"{settings.ARCHIVE_MAX_ROWS_PER_STATEMENT} a report can read; narrow the date range"
+            ),
+        )
+
+    cold = func.unnest(*[
+        bindparam(f"archived_{name}", archived.column(name).to_pylist(), type_=ARRAY(_items.c[name].type))
+        for name in names
+    ]).table_valued(*names).render_derived()
+    both = union_all(
+        select(*[_items.c[name] for name in names]),
+        select(*[cold.c[name] for name in names]),
+    ).subquery(TABLE)
+    return ClauseAdapter(both).traverse(statement)
+
+
+def archived_money_rows(
+    vendor_id: int, from_date: date, to_date: date, farmer_ids: Optional[List[int]] = None,
+) -> List[ArchivedLine]:
+    """
+    Archived lines of the vendor dated ``from_date``..``to_date`` as rows of
+    farmer_id, date and the LINE_MONEY_COLUMNS (in hundredths), to add to
+    the hot rows of the same range in Python.
+    """
+    through = archived_through(vendor_id)
+    if through is None or from_date > through:
+        return []
+    archived = read_archived(
+        vendor_id, from_date, min(to_date, through), ["farmer_id", "date", *_MONEY_SOURCES.values()], farmer_ids,
+    )
+    columns = [archived.column(name).to_pylist() for name in ("farmer_id", "date")]
+    columns += [[to_scaled(v) for v in archived.column(source).to_pylist()] for source in _MONEY_SOURCES.values()]
+    return [ArchivedLine(*values) for values in zip(*columns)]
+
+
+# ---------- writing ----------
+def arrow_field(name: str, kind):
+    """pyarrow field for a column of SQLAlchemy type ``kind``."""
+    import pyarrow as pa
+
+    if isinstance(kind, sa.Boolean):
+        arrow_type = pa.bool_()
+    elif isinstance(kind, sa.Integer):
+        arrow_type = pa.int64()
+    elif isinstance(kind, sa.Numeric):
+        arrow_type = pa.decimal128(kind.precision, kind.scale)
+    elif isinstance(kind, sa.DateTime):
+        arrow_type = pa.timestamp("us", tz="UTC" if kind.timezone else None)
+    elif isinstance(kind, sa.Date):
+        arrow_type = pa.date32()
+    else:
+        arrow_type = pa.string()
+    return pa.field(name, arrow_type)
+
+
+def _archive_schema(vendor_id: int, season: int):
+    import pyarrow as pa
+
+    start, end = season_bounds(season)
+    return pa.schema([arrow_field(c.key, c.type) for c in ARCHIVED_COLUMNS], metadata={
+        "vendor_id": str(vendor_id), "table": TABLE, "from": start.isoformat(), "to": end.isoformat(),
+    })
+
+
+def _write_season(vendor_id: int, season: int, rows: List[Dict[str, Any]], run: str) -> Path:
+    """Write one season's rows (sorted by date) as a Parquet file, one row group per month."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    start, end = season_bounds(season)
+    directory = vendor_dir(vendor_id) / TABLE
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{start.isoformat()}_{end.isoformat()}_{run}.parquet"
+    tmp = path.with_suffix(".parquet.tmp")
+
+    schema = _archive_schema(vendor_id, season)
+    with pq.ParquetWriter(tmp, schema, compression="zstd") as writer:
+        month_rows: List[Dict[str, Any]] = []
+        for row in rows:
+            if month_rows and (row["date"].year, row["date"].month) != (month_rows[0]["date"].year, month_rows[0]["date"].month):
+                writer.write_table(pa.Table.from_pylist(month_rows, schema))
+                month_rows = []
+            month_rows.append(row)
+        if month_rows:
+            writer.write_table(pa.Table.from_pylist(month_rows, schema))
+    os.replace(tmp, path)
+    return path
+
+
+def _finish_file(db: Session, vendor_id: int, path: Path) -> Dict[str, Any]:
+    """Delete the file's rows from Postgres, commit, then add the file to the manifest."""
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(path)
+    meta = {k.decode(): v.decode() for k, v in parquet.schema_arrow.metadata.items()}
+    ids = pq.read_table(path, columns=["id"]).column("id").to_pylist()
+    to_date = date.fromisoformat(meta["to"])
+
+    deleted = 0
+    for start in range(0, len(ids), _DELETE_BATCH):
+        deleted += db.execute(delete(_items).where(
+            _items.c.vendor_id == vendor_id,
+            _items.c.date <= to_date,  # lets Postgres skip later partitions
+            _items.c.id.in_(ids[start:start + _DELETE_BATCH]),
+        )).rowcount
+    if deleted:
+        # The Core delete bypasses the live dashboard's flush hooks
+        publish_resync(db, vendor_id)
+    db.commit()
+
+    manifest = load_manifest(vendor_id) or _empty_manifest(vendor_id)
+    table = manifest["tables"].setdefault(TABLE, {"archived_through": None, "files": []})
+    entry = {
+        "file": path.relative_to(vendor_dir(vendor_id)).as_posix(),
+        "from": meta["from"],
+        "to": meta["to"],
+        "rows": parquet.metadata.num_rows,
+        "row_groups": parquet.metadata.num_row_groups,
+        "bytes": path.stat().st_size,
+        "archived_at": datetime.utcnow().isoformat(timespec="seconds"),
+    }
+    table["files"] = [f for f in table["files"] if f["file"] != entry["file"]] + [entry]
+    table["files"].sort(key=lambda f: (f["from"], f["file"]))
+    if table["archived_through"] is None or meta["to"] > table["archived_through"]:
+        table["archived_through"] = meta["to"]
+    _save_manifest(vendor_id, manifest)
+    logger.info(f"Archived {entry['rows']} {TABLE} rows of vendor {vendor_id} to {entry['file']} ({deleted} deleted)")
+    return entry
+
+
+def _unregistered_files(vendor_id: int) -> List[Path]:
+    directory = vendor_dir(vendor_id) / TABLE
+    if not directory.exists():
+        return []
+    manifest = load_manifest(vendor_id)
+    registered = {f["file"] for f in manifest["tables"].get(TABLE, {}).get("files", [])} if manifest else set()
+    return sorted(
+        path for path in directory.glob("*.parquet")
+        if path.relative_to(vendor_dir(vendor_id)).as_posix() not in registered
+    )
+
+
+def archive_vendor(db: Session, vendor_id: int, through_season: int, today: date = None) -> List[Dict[str, Any]]:
+    """
+    Move the vendor's collection lines dated up to the end of
+    ``through_season`` into the archive. The season must have ended.
+    Returns the manifest entries of the files written (or finished).
+    """
+    through = season_bounds(through_season)[1]
+    if through >= (today or date.today()):
+        raise ValueError(f"Season {through_season} has not ended yet (ends {through.isoformat()})")
+
+    # Finish files an interrupted run wrote but did not register
+    entries = [_finish_file(db, vendor_id, path) for path in _unregistered_files(vendor_id)]
+
+    run = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    result = db.execute(
+        select(*ARCHIVED_COLUMNS).where(_items.c.vendor_id == vendor_id, _items.c.date <= through)
+        .order_by(_items.c.date, _items.c.id)
+        .execution_options(yield_per=_DELETE_BATCH)
+    )
+    season, rows = None, []
+    written = []
+    for row in result.mappings():
+        row_season = season_of(row["date"])
+        if rows and row_season != season:
+            written.append(_write_season(vendor_id, season, rows, run))
+            rows = []
+        season = row_season
+        rows.append(dict(row))
+    if rows:
+        written.append(_write_season(vendor_id, season, rows, run))
+    result.close()
+
+    entries += [_finish_file(db, vendor_id, path) for path in written]
+    return entries
+
+
+def clear_manifests() -> None:
+    """Drop every cached manifest (tests / admin tooling)."""
+    with _lock:
+        _manifests.clear()
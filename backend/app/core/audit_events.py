@@ -2,6 +2,7 @@ from sqlalchemy import event
 from sqlalchemy.orm import Session
 
 from app.models.audit import Audit
+from app.core.data_version import collect_vendor_ids, bump_versions, collect_source_keys, bump_source_versions
 from app.utils.serializer import serialize_model
 
 
@@ -27,6 +28,13 @@ def after_flush(session, flush_context):
     """
     Create audit logs AFTER DB flush
     """
+    vendor_ids = collect_vendor_ids(session)
+    if vendor_ids:
+        bump_versions(session, vendor_ids)
+    source_keys = collect_source_keys(session)
+    if source_keys:
+        bump_source_versions(session, source_keys)
+
     for obj in session.new:
         create_audit(session, obj, action="INSERT")
 
@@ -1,6 +1,7 @@
 """
 Middleware to manage per-request cache lifecycle.
-Clears the per-request cache after each request completes.
+Clears the per-request cache after each request completes and stamps the
+ETag / Cache-Control computed by app.core.conditional_get on 200 responses.
 """
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -10,6 +11,10 @@ class CacheMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         try:
             response = await call_next(request)
+            etag = getattr(request.state, "etag", None)
+            if etag and response.status_code == 200:
+                response.headers["ETag"] = etag
+                response.headers["Cache-Control"] = request.state.cache_control
             return response
         except Exception:
             return Response(
@@ -0,0 +1,87 @@
+"""
+Conditional GET support (ETag / If-None-Match) for vendor-scoped reads.
+
+The ETag is derived from the vendor's data version plus the request URL, so
+it can be computed before any report or list query runs. When the client
+already holds the current representation the dependency short-circuits with
+304 Not Modified; otherwise it leaves the headers on ``request.state`` and
+CacheMiddleware stamps them on the outgoing 200 response.
+
+Report ETags also carry the server's current date: reports fill missing
+from/to dates from ``date.today()`` and print it, so the same URL means
+different content tomorrow even when no data changed.
+
+Usage:
+    @router.get("/", dependencies=[Depends(reference_data_etag)])
+"""
+from datetime import date
+from hashlib import md5
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.data_version import get_data_version
+from app.core.db import get_db
+from app.dependencies import get_current_user
+
+
+def make_etag(vendor_id: int, version: int, request: Request, day: Optional[date] = None) -> str:
+    """Weak ETag for this vendor's data at ``version`` as seen through this URL (on ``day``)."""
+    variant = f"{request.url.path}?{request.url.query}"
+    if day is not None:
+        variant = f"{variant}@{day.isoformat()}"
+    digest = md5(variant.encode("utf-8")).hexdigest()[:12]
+    return f'W/"{vendor_id}-{version}-{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag`` (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def _conditional_get(max_age: int | None, dated: bool = False):
+    def dependency(
+        request: Request,
+        db: Session = Depends(get_db),
+        user=Depends(get_current_user),
+    ) -> None:
+        # Diagnostics runs measure the queries themselves; never answer them from cache
+        if request.query_params.get("diagnostics", "").lower() in ("1", "true"):
+            return
+
+        version = get_data_version(db, user.vendor_id)
+        etag = make_etag(user.vendor_id, version, request, date.today() if dated else None)
+        cache_control = f"private, max-age={max_age}" if max_age else "private, no-cache"
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(
+                status_code=304,
+                headers={"ETag": etag, "Cache-Control": cache_control},
+            )
+
+        request.state.etag = etag
+        request.state.cache_control = cache_control
+
+    return dependency
+
+
+# Master data (farmers, groups, vehicles, catalog) changes rarely; let the
+# browser reuse it briefly without even revalidating.
+reference_data_etag = _conditional_get(settings.REFERENCE_DATA_MAX_AGE)
+
+# Reports must always revalidate, but a 304 still skips all report queries.
+# Their default date range is "today", so the ETag changes with the date too.
+report_etag = _conditional_get(None, dated=True)
@@ -37,6 +37,12 @@ class Settings(BaseModel):
     DB_POOL_TIMEOUT: int = 30
     DB_POOL_RECYCLE: int = 3600
 
+    # Optional read replica for report traffic (app.core.read_routing)
+    DATABASE_REPLICA_URL: str | None = None
+    DB_REPLICA_POOL_SIZE: int = 10
+    DB_REPLICA_MAX_LAG_SECONDS: float = 30
+    DB_REPLICA_LAG_CHECK_SECONDS: float = 5
+
     # =========================
     # 🚦 RATE LIMITING
     # =========================
@@ -63,6 +69,69 @@ class Settings(BaseModel):
     SMS_DLT_ROUTE: str = "dlt"
     SMS_MAX_RETRY: int = 3
 
+    # =========================
+    # 🧊 HTTP CACHING
+    # =========================
+    REFERENCE_DATA_MAX_AGE: int = 30
+
+    # =========================
+    # 🔎 SEARCH
+    # =========================
+    # "memory" = per-worker in-process index, "database" = pg_trgm queries
+    SEARCH_BACKEND: str = "memory"
+
+    # =========================
+    # 🖨️ RENDER POOL
+    # =========================
+    # Worker processes for HTML/DOCX/PDF rendering; 0 renders in-process
+    RENDER_POOL_WORKERS: int = 2
+    RENDER_POOL_MAX_QUEUE: int = 16
+    RENDER_TIMEOUT_SECONDS: int = 60
+
+    # =========================
+    # ⏱️ QUERY TIMEOUTS
+    # =========================
+    # SET LOCAL statement_timeout per route class (app.core.statement_timeouts)
+    STATEMENT_TIMEOUT_INTERACTIVE_SECONDS: int = 15
+    STATEMENT_TIMEOUT_REPORT_SECONDS: int = 60
+    STATEMENT_TIMEOUT_EXPORT_SECONDS: int = 300
+    STATEMENT_TIMEOUT_ADMIN_SECONDS: int = 600
+
+    # =========================
+    # 🧵 BACKGROUND JOBS
+    # =========================
+    # Worker threads per API process (app.core.jobs); 0 leaves jobs queued
+    JOB_WORKERS: int = 2
+    JOB_POLL_SECONDS: float = 2
+    # RUNNING jobs without a heartbeat for this long are requeued
+    JOB_STALE_SECONDS: int = 900
+    JOB_MAX_ATTEMPTS: int = 3
+    # Result artifacts (exports) and how long finished jobs are kept
+    JOBS_DIR: str = "data/jobs"
+    JOB_RETENTION_DAYS: int = 7
+
+    # =========================
+    # 💰 COMMISSION
+    # =========================
+    # Vendor default for farmers with no rate of their own or of their group
+    DEFAULT_COMMISSION_PERCENT: float = 12.0
+
+    # =========================
+    # 🗄️ COLD ARCHIVE
+    # =========================
+    # Parquet files and per-vendor manifests of archived seasons
+    ARCHIVE_DIR: str = "data/archive"
+    # Seasons run from the 1st of this month (4 = April-March financial year)
+    ARCHIVE_SEASON_START_MONTH: int = 4
+    # Archived lines one report statement may carry (they are sent as arrays)
+    ARCHIVE_MAX_ROWS_PER_STATEMENT: int = 100000
+
+    # =========================
+    # 📊 ANALYTICS (OPTIONAL, needs duckdb)
+    # =========================
+    # Parquet snapshots written by manage_analytics.py export
+    ANALYTICS_DIR: str = "data/analytics"
+
     # =========================
     # 🌐 CORS
     # =========================
@@ -91,6 +160,13 @@ class Settings(BaseModel):
 
         return v
 
+    @field_validator("DATABASE_REPLICA_URL")
+    @classmethod
+    def fix_render_replica_url(cls, v: str | None) -> str | None:
+        if v and v.startswith("postgres://"):
+            v = v.replace("postgres://", "postgresql://", 1)
+        return v or None
+
     @field_validator("SECRET_KEY")
     @classmethod
     def validate_secret_key(cls, v: str) -> str:
@@ -127,6 +203,10 @@ settings = Settings(
     DB_MAX_OVERFLOW=int(os.getenv("DB_MAX_OVERFLOW", "20")),
     DB_POOL_TIMEOUT=int(os.getenv("DB_POOL_TIMEOUT", "30")),
     DB_POOL_RECYCLE=int(os.getenv("DB_POOL_RECYCLE", "3600")),
+    DATABASE_REPLICA_URL=os.getenv("DATABASE_REPLICA_URL"),
+    DB_REPLICA_POOL_SIZE=int(os.getenv("DB_REPLICA_POOL_SIZE", "10")),
+    DB_REPLICA_MAX_LAG_SECONDS=float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "30")),
+    DB_REPLICA_LAG_CHECK_SECONDS=float(os.getenv("DB_REPLICA_LAG_CHECK_SECONDS", "5")),
 
     AUTH_RATE_LIMIT=int(os.getenv("AUTH_RATE_LIMIT", "100")),
     AUTH_RATE_WINDOW_SECONDS=int(os.getenv("AUTH_RATE_WINDOW_SECONDS", "60")),
@@ -147,5 +227,26 @@ settings = Settings(
     SMS_DLT_ROUTE=os.getenv("SMS_DLT_ROUTE", "dlt"),
     SMS_MAX_RETRY=int(os.getenv("SMS_MAX_RETRY", "3")),
 
+    REFERENCE_DATA_MAX_AGE=int(os.getenv("REFERENCE_DATA_MAX_AGE", "30")),
+    SEARCH_BACKEND=os.getenv("SEARCH_BACKEND", "memory").lower(),
+    RENDER_POOL_WORKERS=int(os.getenv("RENDER_POOL_WORKERS", "2")),
+    RENDER_POOL_MAX_QUEUE=int(os.getenv("RENDER_POOL_MAX_QUEUE", "16")),
+    RENDER_TIMEOUT_SECONDS=int(os.getenv("RENDER_TIMEOUT_SECONDS", "60")),
+    STATEMENT_TIMEOUT_INTERACTIVE_SECONDS=int(os.getenv("STATEMENT_TIMEOUT_INTERACTIVE_SECONDS", "15")),
+    STATEMENT_TIMEOUT_REPORT_SECONDS=int(os.getenv("STATEMENT_TIMEOUT_REPORT_SECONDS", "60")),
+    STATEMENT_TIMEOUT_EXPORT_SECONDS=int(os.getenv("STATEMENT_TIMEOUT_EXPORT_SECONDS", "300")),
+    STATEMENT_TIMEOUT_ADMIN_SECONDS=int(os.getenv("STATEMENT_TIMEOUT_ADMIN_SECONDS", "600")),
+    JOB_WORKERS=int(os.getenv("JOB_WORKERS", "2")),
+    JOB_POLL_SECONDS=float(os.getenv("JOB_POLL_SECONDS", "2")),
+    JOB_STALE_SECONDS=int(os.getenv("JOB_STALE_SECONDS", "900")),
+    JOB_MAX_ATTEMPTS=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+    JOBS_DIR=os.getenv("JOBS_DIR", "data/jobs"),
+    JOB_RETENTION_DAYS=int(os.getenv("JOB_RETENTION_DAYS", "7")),
+    DEFAULT_COMMISSION_PERCENT=float(os.getenv("DEFAULT_COMMISSION_PERCENT", "12")),
+    ARCHIVE_DIR=os.getenv("ARCHIVE_DIR", "data/archive"),
+    ARCHIVE_SEASON_START_MONTH=int(os.getenv("ARCHIVE_SEASON_START_MONTH", "4")),
+    ARCHIVE_MAX_ROWS_PER_STATEMENT=int(os.getenv("ARCHIVE_MAX_ROWS_PER_STATEMENT", "100000")),
+    ANALYTICS_DIR=os.getenv("ANALYTICS_DIR", "data/analytics"),
+
     CORS_ALLOWED_ORIGINS=os.getenv("CORS_ALLOWED_ORIGINS", Settings.model_fields["CORS_ALLOWED_ORIGINS"].default),
 )
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+Per-vendor data version counters.
+
+Every flush that touches vendor-scoped rows bumps the owning vendor's counter
+(wired in app.core.audit_events). Anything that wants to know "has this
+vendor's data changed since X" - HTTP ETags, in-process caches - compares
+against the counter instead of re-running its queries.
+
+Master-data tables (SOURCE_TABLES) also get a counter of their own per
+vendor, bumped only when that table is written. Caches built from them (the
+autocomplete indexes in app.utils.search_index) key on those, so a vendor
+entering collection lines all day does not keep invalidating them.
+"""
+import logging
+from typing import Iterable, Sequence, Set, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.vendor_data_version import VendorDataVersion, VendorSourceVersion
+
+logger = logging.getLogger(__name__)
+
+# Tables whose writes never change what read endpoints return.
+UNVERSIONED_TABLES = {"audits", "sms_logs", "vendor_data_versions", "vendor_source_versions", "users", "jobs"}
+
+# Tables that additionally keep a per-vendor counter of their own.
+SOURCE_TABLES = {"farmers", "farmer_groups", "catalog", "saala_customers"}
+
+
+def _changed_rows(session: Session):
+    """(table name, vendor id) for every row the pending flush writes."""
+    context_vendor_id = getattr(session.info.get("vendor"), "id", None)
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        vendor_id = getattr(obj, "vendor_id", None) or context_vendor_id
+        if vendor_id:
+            yield getattr(obj, "__tablename__", None), vendor_id
+
+
+def collect_vendor_ids(session: Session) -> Set[int]:
+    """
+    Return the vendor ids touched by the pending flush.
+
+    Most routes resolve the user without attaching it to ``session.info``, so
+    the row's own ``vendor_id`` is preferred and the session context is only a
+    fallback.
+    """
+    return {vendor_id for table, vendor_id in _changed_rows(session) if table not in UNVERSIONED_TABLES}
+
+
+def collect_source_keys(session: Session) -> Set[Tuple[int, str]]:
+    """Return the (vendor id, table) pairs of SOURCE_TABLES touched by the pending flush."""
+    return {(vendor_id, table) for table, vendor_id in _changed_rows(session) if table in SOURCE_TABLES}
+
+
+def bump_versions(session: Session, vendor_ids: Iterable[int]) -> None:
+    """
+    Increment the counters for ``vendor_ids`` inside the current transaction.
+
+    Vendors are bumped in id order so concurrent writers touching several
+    vendors always lock the counter rows in the same order.
+    """
+    connection = session.connection()
+    table = VendorDataVersion.__table__
+
+    for vendor_id in sorted(vendor_ids):
+        stmt = pg_insert(table).values(vendor_id=vendor_id, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.vendor_id],
+            set_={"version": table.c.version + 1, "updated_at": func.now()},
+        )
+        connection.execute(stmt)
+
+
+def bump_source_versions(session: Session, keys: Iterable[Tuple[int, str]]) -> None:
+    """Increment the per-table counters for ``(vendor_id, table)`` pairs, in key order."""
+    connection = session.connection()
+    table = VendorSourceVersion.__table__
+
+    for vendor_id, source in sorted(keys):
+        stmt = pg_insert(table).values(vendor_id=vendor_id, source=source, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.vendor_id, table.c.source],
+            set_={"version": table.c.version + 1, "updated_at": func.now()},
+        )
+        connection.execute(stmt)
+
+
+def get_data_version(db: Session, vendor_id: int) -> int:
+    """Current data version for a vendor (0 if it has never written anything)."""
+    version = db.execute(
+        select(VendorDataVersion.version).where(VendorDataVersion.vendor_id == vendor_id)
+    ).scalar()
+    return int(version or 0)
+
+
+def get_source_versions(db: Session, vendor_id: int, sources: Sequence[str]) -> Tuple[int, ...]:
+    """Current counters for ``sources`` (in that order; 0 for never-written tables)."""
+    versions = dict(db.execute(
+        select(VendorSourceVersion.source, VendorSourceVersion.version).where(
+            VendorSourceVersion.vendor_id == vendor_id,
+            VendorSourceVersion.source.in_(sources),
+        )
+    ).all())
+    return tuple(int(versions.get(source) or 0) for source in sources)
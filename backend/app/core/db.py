@@ -14,13 +14,23 @@ DATABASE_URL = settings.DATABASE_URL
 # 🔌 RENDER + POSTGRES CONNECTION
 # ===============================
 
-connect_args = {
-    "connect_timeout": 10,
-}
+def _connect_args(url: str) -> dict:
+    # SQLite files (local replica testing) take none of the libpq options
+    if url.startswith("sqlite"):
+        return {}
 
-# Render Postgres requires SSL
-if "render.com" in DATABASE_URL:
-    connect_args["sslmode"] = "require"
+    connect_args = {
+        "connect_timeout": 10,
+    }
+
+    # Render Postgres requires SSL
+    if "render.com" in url:
+        connect_args["sslmode"] = "require"
+
+    return connect_args
+
+
+connect_args = _connect_args(DATABASE_URL)
 
 
 engine = create_engine(
@@ -57,6 +67,38 @@ SessionLocal = sessionmaker(
 Base = declarative_base()
 
 
+# ===============================
+# 📚 READ REPLICA (optional)
+# ===============================
+# Report, silk aggregation and export GETs read from DATABASE_REPLICA_URL
+# when it is set; app.core.read_routing decides per request whether the
+# replica is fresh enough. Without it both names point at the primary.
+
+DATABASE_REPLICA_URL = settings.DATABASE_REPLICA_URL
+
+if DATABASE_REPLICA_URL:
+    replica_engine = create_engine(
+        DATABASE_REPLICA_URL,
+        pool_size=settings.DB_REPLICA_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        pool_reset_on_return="rollback",
+        echo=False,
+        connect_args=_connect_args(DATABASE_REPLICA_URL),
+    )
+    ReplicaSessionLocal = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=replica_engine,
+        expire_on_commit=True,
+    )
+else:
+    replica_engine = None
+    ReplicaSessionLocal = None
+
+
 # ===============================
 # 🔁 DB RETRY (for Render startup race)
 # ===============================
@@ -0,0 +1,392 @@
+"""
+Database-backed background jobs, run by a worker pool inside each API process.
+
+- A job is a row in ``jobs`` (app.models.job) naming a handler from
+  JOB_HANDLERS plus its JSON params; ``enqueue`` adds one. No broker.
+- JOB_WORKERS threads per process poll for QUEUED rows and claim one with
+  SELECT ... FOR UPDATE SKIP LOCKED, so processes never run the same job and
+  never wait on each other's claims.
+- Handlers are called as ``handler(ctx, db, **params)``:
+    * ``db`` is committed when the handler returns and rolled back if it
+      raises; writes are audited as the user who queued the job.
+    * ``ctx.progress(percent, message)`` publishes progress and raises
+      JobCancelled once cancellation was requested.
+    * ``ctx.artifact(filename, media_type)`` opens the job's result file.
+  The return value (a JSON-able dict) becomes the job's result.
+- While a handler runs, a timer thread refreshes the job's heartbeat every
+  HEARTBEAT_FRACTION of JOB_STALE_SECONDS, whether or not the handler
+  reports progress. A RUNNING job whose heartbeat is older than
+  JOB_STALE_SECONDS therefore died with its process: it is requeued, or failed after JOB_MAX_ATTEMPTS. Finished jobs and
+  their artifacts are deleted after JOB_RETENTION_DAYS.
+- JOB_WORKERS=0 starts no workers (one-off scripts): jobs stay queued until
+  another process or ``run_pending`` picks them up.
+"""
+import importlib
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS = {
+    "silk_sync": "app.services.job_tasks:silk_sync",
+    "report_export": "app.services.job_tasks:report_export",
+    "ledger_checkpoints_rebuild": "app.services.job_tasks:ledger_checkpoints_rebuild",
+}
+
+QUEUED = "QUEUED"
+RUNNING = "RUNNING"
+SUCCEEDED = "SUCCEEDED"
+FAILED = "FAILED"
+CANCELLED = "CANCELLED"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# Progress calls within this interval of the previous one are not written
+PROGRESS_INTERVAL_SECONDS = 1.0
+MAINTENANCE_INTERVAL_SECONDS = 60
+# The heartbeat is refreshed this often, as a fraction of JOB_STALE_SECONDS
+HEARTBEAT_FRACTION = 1 / 3
+
+_resolved: Dict[str, Callable] = {}
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler once cancellation of its job was requested."""
+
+
+def _resolve(kind: str) -> Callable:
+    handler = _resolved.get(kind)
+    if handler is None:
+        module_name, attr = JOB_HANDLERS[kind].split(":")
+        handler = getattr(importlib.import_module(module_name), attr)
+        _resolved[kind] = handler
+    return handler
+
+
+def artifact_file(job: Job) -> Optional[Path]:
+    if not job.artifact_path:
+        return None
+    return Path(settings.JOBS_DIR) / job.artifact_path
+
+
+# ---------- queue ----------
+def enqueue(db: Session, vendor_id: int, user_id: Optional[int], kind: str, params: Optional[dict] = None) -> Job:
+    """Add a QUEUED job; the caller commits."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind {kind!r}; expected one of {', '.join(sorted(JOB_HANDLERS))}")
+    job = Job(vendor_id=vendor_id, user_id=user_id, kind=kind, params=params or {}, status=QUEUED)
+    db.add(job)
+    db.flush()
+    logger.info(f"Queued job {job.id} ({kind}) for vendor {vendor_id}")
+    return job
+
+
+def enqueue_in_flush(connection: Connection, vendor_id: int, user_id: Optional[int], kind: str, params: Optional[dict] = None) -> int:
+    """
+    Add a QUEUED job from a flush hook, where no ORM objects can be added.
+    It commits (or rolls back) with the flush's transaction; returns its id.
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind {kind!r}; expected one of {', '.join(sorted(JOB_HANDLERS))}")
+    job_id = connection.execute(
+        insert(Job)
+        .values(vendor_id=vendor_id, user_id=user_id, kind=kind, params=params or {}, status=QUEUED)
+        .returning(Job.id)
+    ).scalar()
+    logger.info(f"Queued job {job_id} ({kind}) for vendor {vendor_id}")
+    return job_id
+
+
+def cancel(db: Session, job_id: int) -> None:
+    """
+    Cancel a queued job outright, or flag a running one for its handler to
+    stop at the next progress call. The caller commits.
+    """
+    db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == QUEUED)
+        .values(status=CANCELLED, cancel_requested=True, finished_at=func.now())
+    )
+    db.execute(update(Job).where(Job.id == job_id, Job.status == RUNNING).values(cancel_requested=True))
+
+
+def claim_next(worker: str) -> Optional[int]:
+    """Mark the oldest QUEUED job RUNNING for ``worker``; rows other workers hold are skipped."""
+    with SessionLocal() as db:
+        job = db.execute(
+            select(Job)
+            .where(Job.status == QUEUED)
+            .order_by(Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).scalar_one_or_none()
+        if job is None:
+            return None
+        job_id = job.id
+        job.status = RUNNING
+        job.worker = worker
+        job.attempts = Job.attempts + 1
+        job.started_at = func.now()
+        job.heartbeat_at = func.now()
+        db.commit()
+    return job_id
+
+
+def requeue_stale(db: Session) -> int:
+    """Requeue (or fail, after JOB_MAX_ATTEMPTS) RUNNING jobs whose worker stopped heartbeating."""
+    cutoff = db.scalar(select(func.now())) - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    stale = (Job.status == RUNNING, Job.heartbeat_at < cutoff)
+    requeued = db.execute(
+        update(Job)
+        .where(*stale, Job.attempts < settings.JOB_MAX_ATTEMPTS)
+        .values(status=QUEUED, worker=None)
+    ).rowcount
+    failed = db.execute(
+        update(Job)
+        .where(*stale, Job.attempts >= settings.JOB_MAX_ATTEMPTS)
+        .values(status=FAILED, error="Worker stopped responding", finished_at=func.now())
+    ).rowcount
+    db.commit()
+    if requeued or failed:
+        logger.warning(f"Stale jobs: {requeued} requeued, {failed} failed")
+    return requeued + failed
+
+
+def purge_finished(db: Session) -> int:
+    """Delete finished jobs older than JOB_RETENTION_DAYS together with their artifacts."""
+    cutoff = db.scalar(select(func.now())) - timedelta(days=settings.JOB_RETENTION_DAYS)
+    job_ids = list(db.execute(
+        select(Job.id).where(Job.status.in_(FINISHED), Job.finished_at < cutoff)
+    ).scalars())
+    if not job_ids:
+        return 0
+    for job_id in job_ids:
+        shutil.rmtree(Path(settings.JOBS_DIR) / str(job_id), ignore_errors=True)
+    db.execute(Job.__table__.delete().where(Job.id.in_(job_ids)))
+    db.commit()
+    logger.info(f"Purged {len(job_ids)} finished jobs")
+    return len(job_ids)
+
+
+# ---------- running ----------
+class JobContext:
+    """What a handler sees of its job: identity, progress/cancellation and the artifact."""
+
+    def __init__(self, job_id: int, vendor_id: int, user_id: Optional[int]):
+        self.job_id = job_id
+        self.vendor_id = vendor_id
+        self.user_id = user_id
+        self.artifact_path: Optional[str] = None
+        self.artifact_media_type: Optional[str] = None
+        self._reported_at = 0.0
+
+    def progress(self, percent: Optional[float] = None, message: Optional[str] = None, force: bool = False) -> None:
+        """
+        Publish progress (0-100 and/or a short message) in its own transaction
+        so pollers see it while the handler's work is uncommitted. Raises
+        JobCancelled if the job was cancelled.
+        """
+        now = time.monotonic()
+        if not force and now - self._reported_at < PROGRESS_INTERVAL_SECONDS:
+            return
+        self._reported_at = now
+
+        values: Dict[str, Any] = {"heartbeat_at": func.now()}
+        if percent is not None:
+            values["progress"] = max(0, min(100, int(percent)))
+        if message is not None:
+            values["progress_message"] = message[:255]
+        with SessionLocal() as db:
+            cancel_requested = db.execute(
+                update(Job).where(Job.id == self.job_id).values(**values).returning(Job.cancel_requested)
+            ).scalar()
+            db.commit()
+        if cancel_requested:
+            raise JobCancelled()
+
+    @contextmanager
+    def artifact(self, filename: str, media_type: str):
+        """Binary file for the job's result; it only becomes visible once fully written."""
+        directory = Path(settings.JOBS_DIR) / str(self.job_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / filename
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            yield f
+        os.replace(tmp, path)
+        self.artifact_path = f"{self.job_id}/{filename}"
+        self.artifact_media_type = media_type
+
+
+def _finish(ctx: JobContext, status: str, result: Optional[dict], error: Optional[str]) -> None:
+    values: Dict[str, Any] = {
+        "status": status,
+        "result": result,
+        "error": error,
+        "finished_at": func.now(),
+        "artifact_path": ctx.artifact_path,
+        "artifact_media_type": ctx.artifact_media_type,
+    }
+    if status == SUCCEEDED:
+        values["progress"] = 100
+    with SessionLocal() as db:
+        updated = db.execute(
+            update(Job).where(Job.id == ctx.job_id, Job.status == RUNNING).values(**values)
+        ).rowcount
+        db.commit()
+    if not updated:
+        logger.warning(f"Job {ctx.job_id} was no longer RUNNING when it finished ({status}); result dropped")
+
+
+def _beat(job_id: int) -> None:
+    with SessionLocal() as db:
+        db.execute(update(Job).where(Job.id == job_id, Job.status == RUNNING).values(heartbeat_at=func.now()))
+        db.commit()
+
+
+@contextmanager
+def _heartbeat(job_id: int):
+    """Keep ``job_id``'s heartbeat fresh from a timer thread for the duration of the block."""
+    stop = threading.Event()
+    interval = settings.JOB_STALE_SECONDS * HEARTBEAT_FRACTION
+
+    def loop():
+        while not stop.wait(interval):
+            try:
+                _beat(job_id)
+            except Exception as e:
+                # Retried next interval; the job only goes stale after JOB_STALE_SECONDS without a beat
+                logger.error(f"Heartbeat for job {job_id} failed: {e}")
+
+    thread = threading.Thread(target=loop, name=f"job-heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job_id: int) -> str:
+    """Run a claimed job to completion and record the outcome; returns the final status."""
+    from app.models.user import User
+    from app.models.vendor import Vendor
+
+    with SessionLocal() as db:
+        job = db.get(Job, job_id)
+        kind, params = job.kind, dict(job.params or {})
+        ctx = JobContext(job.id, job.vendor_id, job.user_id)
+
+    started = time.perf_counter()
+    status, result, error = SUCCEEDED, None, None
+    db = SessionLocal()
+    try:
+        # Audit the job's writes as the user who queued it (app.core.audit_events)
+        db.info["vendor"] = db.get(Vendor, ctx.vendor_id)
+        if ctx.user_id:
+            db.info["user"] = db.get(User, ctx.user_id)
+        with _heartbeat(job_id):
+            result = _resolve(kind)(ctx, db, **params)
+            db.commit()
+    except JobCancelled:
+        db.rollback()
+        status = CANCELLED
+    except Exception as e:
+        db.rollback()
+        status, error = FAILED, f"{type(e).__name__}: {e}"
+        logger.exception(f"Job {job_id} ({kind}) failed")
+    finally:
+        db.close()
+
+    _finish(ctx, status, result, error)
+    logger.info(f"Job {job_id} ({kind}) {status.lower()} in {time.perf_counter() - started:.1f}s")
+    return status
+
+
+def run_pending(worker: str = "inline", limit: Optional[int] = None) -> int:
+    """Claim and run queued jobs in the calling thread until none are left; returns how many ran."""
+    ran = 0
+    while limit is None or ran < limit:
+        job_id = claim_next(worker)
+        if job_id is None:
+            break
+        run_job(job_id)
+        ran += 1
+    return ran
+
+
+# ---------- pool ----------
+class JobWorkerPool:
+    def __init__(self):
+        self._threads = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._maintained_at = 0.0
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    @property
+    def enabled(self) -> bool:
+        return settings.JOB_WORKERS > 0
+
+    def start(self) -> None:
+        if not self.enabled or self._threads:
+            return
+        self._stop.clear()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        for i in range(settings.JOB_WORKERS):
+            thread = threading.Thread(target=self._loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Started {settings.JOB_WORKERS} job workers ({self.worker_id})")
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop polling; a job still running is requeued by another process once its heartbeat goes stale."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _maintain(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._maintained_at < MAINTENANCE_INTERVAL_SECONDS:
+                return
+            self._maintained_at = now
+        with SessionLocal() as db:
+            requeue_stale(db)
+            purge_finished(db)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._maintain()
+                job_id = claim_next(self.worker_id)
+            except Exception as e:
+                logger.error(f"Job poll failed: {e}")
+                job_id = None
+            if job_id is None:
+                self._stop.wait(settings.JOB_POLL_SECONDS)
+                continue
+            try:
+                run_job(job_id)
+            except Exception as e:
+                # Recording the outcome failed; the heartbeat check requeues the job
+                logger.error(f"Job {job_id} could not be finished: {e}")
+
+
+job_pool = JobWorkerPool()
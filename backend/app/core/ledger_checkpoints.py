@@ -0,0 +1,486 @@
+"""
+Monthly ledger checkpoints per farmer (app.models.ledger_checkpoint).
+
+``farmer_ledger_checkpoints`` holds, for every farmer and month with
+collection lines, the farmer's ledger totals from the first line through the
+end of that month: qty, gross, commission, luggage, coolie, paid and net,
+computed as the ledger report computes them (per-line rounding, commission
+per line at the farmer's current rate; app.utils.report_rows). The opening
+balance on any date is the last checkpoint before that month plus the
+month's lines before the date, so ledger, group patti and settlement views
+read at most one month of raw lines however long the farmer has traded.
+
+Every flush that inserts, updates or deletes CollectionItem rows applies the
+lines' values, in the same transaction, to their month's checkpoint and all
+later ones. A flush that changes a farmer's or group's commission rate
+changes every line's commission, which only a full-history rebuild can
+follow; rather than run that inside the writer's transaction it marks the
+farmers concerned stale (app.models.ledger_checkpoint.StaleLedgerFarmer) and
+queues a ``ledger_checkpoints_rebuild`` job (app.core.jobs). Until the job
+has run, ``opening_totals`` reads those farmers' lines instead of their
+checkpoints.
+
+Only ORM writes are seen. Anything that changes collection lines with Core
+statements calls ``rebuild`` for the farmers it touched; archiving
+(app.core.archive) deliberately does not, as archived lines still count, and
+``rebuild`` reads both tiers. ``find_drift`` and ``rebuild`` back
+``python manage_ledger_checkpoints.py verify [--fix]``.
+"""
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, event, func, inspect, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.archive import archived_money_rows
+from app.core.jobs import enqueue_in_flush
+from app.models.collection_item import CollectionItem
+from app.models.farmer import Farmer
+from app.models.farmer_group import FarmerGroup
+from app.models.ledger_checkpoint import FarmerLedgerCheckpoint, StaleLedgerFarmer
+from app.utils.commission_rates import CommissionRates, load_commission_rates
+from app.utils.money_columns import LINE_MONEY_COLUMNS, MoneyLines, column, group_index, sum_by, to_scaled
+from app.utils.report_rows import TOTAL_FIELDS, FarmerTotalsBuilder, Totals
+
+logger = logging.getLogger(__name__)
+
+TRACKED_ATTRS = (
+    "farmer_id", "vendor_id", "date",
+    "qty_kg", "rate_per_kg", "labour_per_kg", "transport_cost", "coolie_cost", "paid_amount",
+)
+# Running totals of a checkpoint, in the order _month_totals returns them after the line count
+FIELDS = ("qty", "gross", "commission", "luggage", "coolie", "paid", "net")
+REBUILD_CHUNK = 500  # farmers whose full history is loaded at once by rebuild / find_drift
+
+_PREVIOUS = "ledger_checkpoints_previous"
+
+Key = Tuple[int, date]  # (farmer_id, month)
+
+
+def month_start(value) -> date:
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+
+class _Line(NamedTuple):
+    """A collection line's money columns in hundredths, named as LINE_MONEY_COLUMNS."""
+    farmer_id: int
+    vendor_id: int
+    date: date
+    qty_kg: int
+    rate_per_kg: int
+    labour_per_kg: int
+    transport_cost: int
+    coolie: int
+    paid_amount: int
+
+    @classmethod
+    def of(cls, farmer_id, vendor_id, day, *money) -> "_Line":
+        return cls(farmer_id, vendor_id, day, *(to_scaled(value) for value in money))
+
+
+def _month_totals(rows: List[Any], rates: CommissionRates, signs: Optional[List[int]] = None) -> Dict[Key, List[int]]:
+    """
+    {(farmer_id, month): [line count, *FIELDS]} in hundredths for rows with
+    farmer_id, date and LINE_MONEY_COLUMNS; ``signs`` (+1/-1 per row) turns
+    rows into additions and removals.
+    """
+    if not rows:
+        return {}
+    keys, inverse = group_index([(row.farmer_id, month_start(row.date)) for row in rows])
+    size = len(keys)
+    money = MoneyLines.from_rows(rows)
+    farmer_rates = np.fromiter((rates.for_farmer(farmer_id) for farmer_id, _ in keys), dtype=np.int64, count=size)
+    commission = money.commission(farmer_rates[inverse])
+    sign = np.ones(len(rows), dtype=np.int64) if signs is None else column(signs, len(rows))
+    values = (money.qty, money.amount, commission, money.luggage, money.coolie, money.paid, money.amount - commission)
+    sums = [sum_by(inverse, size, sign).tolist()] + [sum_by(inverse, size, sign * value).tolist() for value in values]
+    return {key: [int(total[i]) for total in sums] for i, key in enumerate(keys)}
+
+
+def _money(hundredths: int) -> Decimal:
+    return Decimal(hundredths).scaleb(-2)
+
+
+# ---------- flush hook ----------
+def _rate_changes(session: Session) -> Tuple[set, set]:
+    """(farmer ids, group ids) whose commission rate may change in this flush."""
+    farmer_ids, group_ids = set(), set()
+    for obj in session.dirty:
+        if isinstance(obj, Farmer):
+            attrs = inspect(obj).attrs
+            if any(attrs[name].history.has_changes() for name in ("commission_percent", "group_id", "group")):
+                farmer_ids.add(obj.id)
+        elif isinstance(obj, FarmerGroup) and inspect(obj).attrs.commission_percent.history.has_changes():
+            group_ids.add(obj.id)
+    return farmer_ids, group_ids
+
+
+def collect_changes(session: Session, previous: Dict[int, tuple]) -> Tuple[List[_Line], List[int]]:
+    """
+    Lines added (+1) and removed (-1) by the flush, as (lines, signs);
+    ``previous`` holds the updated/deleted rows as they were before it. An
+    update is a removal of the old line and an addition of the new one.
+    """
+    lines: List[_Line] = []
+    signs: List[int] = []
+
+    def add(sign: int, line: _Line) -> None:
+        if line.farmer_id is not None:
+            lines.append(line)
+            signs.append(sign)
+
+    def current(obj) -> _Line:
+        return _Line.of(*(getattr(obj, attr) for attr in TRACKED_ATTRS))
+
+    def before(obj) -> Optional[_Line]:
+        # None if the row was already gone (deleted by another transaction)
+        # or the object only became dirty after before_flush read the rows
+        row = previous.get(inspect(obj).identity[0])
+        return _Line.of(*row) if row is not None else None
+
+    for obj in session.new:
+        if isinstance(obj, CollectionItem):
+            add(1, current(obj))
+    for obj in session.dirty:
+        if isinstance(obj, CollectionItem) and session.is_modified(obj, include_collections=False):
+            old, new = before(obj), current(obj)
+            if old != new:  # e.g. only is_locked changed
+                if old is not None:
+                    add(-1, old)
+                add(1, new)
+    for obj in session.deleted:
+        if isinstance(obj, CollectionItem):
+            old = before(obj)
+            if old is not None:
+                add(-1, old)
+
+    return lines, signs
+
+
+def line_changes(connection: Connection, lines: List[_Line], signs: List[int]) -> Dict[Tuple[int, int, date], List[int]]:
+    """{(farmer_id, vendor_id, month): [line count, *FIELDS]} change in hundredths, at current rates."""
+    by_vendor: Dict[int, List[int]] = defaultdict(list)
+    for i, line in enumerate(lines):
+        by_vendor[line.vendor_id].append(i)
+
+    changes: Dict[Tuple[int, int, date], List[int]] = {}
+    for vendor_id, positions in by_vendor.items():
+        rows = [lines[i] for i in positions]
+        rates = load_commission_rates(connection, vendor_id, {row.farmer_id for row in rows})
+        for (farmer_id, month), values in _month_totals(rows, rates, [signs[i] for i in positions]).items():
+            if any(values):
+                changes[(farmer_id, vendor_id, month)] = values
+    return changes
+
+
+def apply_changes(connection: Connection, changes: Dict[Tuple[int, int, date], List[int]]) -> None:
+    """
+    Add ``changes`` to the checkpoints. Farmers are locked in id order (and
+    months in order) so concurrent writers cannot deadlock.
+    """
+    checkpoints = FarmerLedgerCheckpoint.__table__
+
+    for (farmer_id, vendor_id, month), (count, *values) in sorted(changes.items()):
+        amounts = dict(zip(FIELDS, (_money(value) for value in values)))
+
+        def previous_closing(field: str):
+            return (
+                select(checkpoints.c[field])
+                .where(checkpoints.c.farmer_id == farmer_id, checkpoints.c.month < month)
+                .order_by(checkpoints.c.month.desc())
+                .limit(1)
+                .scalar_subquery()
+            )
+
+        stmt = pg_insert(checkpoints).values(
+            farmer_id=farmer_id,
+            month=month,
+            vendor_id=vendor_id,
+            line_count=count,
+            **{field: func.coalesce(previous_closing(field), 0) + amount for field, amount in amounts.items()},
+        )
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[checkpoints.c.farmer_id, checkpoints.c.month],
+            set_={
+                "line_count": checkpoints.c.line_count + count,
+                **{field: checkpoints.c[field] + amount for field, amount in amounts.items()},
+            },
+        ))
+
+        # A month whose lines were all removed keeps no checkpoint
+        if count < 0:
+            connection.execute(
+                delete(checkpoints).where(
+                    checkpoints.c.farmer_id == farmer_id,
+                    checkpoints.c.month == month,
+                    checkpoints.c.line_count == 0,
+                )
+            )
+
+        # Later months close on top of this one
+        if any(values):
+            connection.execute(
+                update(checkpoints)
+                .where(checkpoints.c.farmer_id == farmer_id, checkpoints.c.month > month)
+                .values({field: checkpoints.c[field] + amount for field, amount in amounts.items()})
+            )
+
+
+def mark_stale(session: Session, connection: Connection, farmer_ids: List[int]) -> None:
+    """
+    Mark ``farmer_ids`` stale and queue one rebuild job per vendor, in the
+    flush's transaction. The marks are upserted (locking them), so a mark
+    made while a rebuild runs is either seen by it or survives it.
+    """
+    stale = StaleLedgerFarmer.__table__
+    user_id = getattr(session.info.get("user"), "id", None)
+    for vendor, farmers in sorted(_vendor_farmers(connection, farmer_ids, None, lock=False).items()):
+        stmt = pg_insert(stale)
+        connection.execute(
+            stmt.on_conflict_do_update(index_elements=[stale.c.farmer_id], set_={"marked_at": func.now()}),
+            [{"farmer_id": farmer_id, "vendor_id": vendor} for farmer_id in farmers],
+        )
+        enqueue_in_flush(connection, vendor, user_id, "ledger_checkpoints_rebuild", {"farmer_ids": farmers})
+
+
+@event.listens_for(Session, "before_flush")
+def _read_previous_lines(session, flush_context, instances):
+    # Attribute history has no old value for attributes set after the object
+    # was expired (e.g. by a commit), so read the rows while they are unchanged
+    ids = [
+        inspect(obj).identity[0]
+        for obj in list(session.dirty) + list(session.deleted)
+        if isinstance(obj, CollectionItem)
+    ]
+    previous = {}
+    if ids:
+        table = CollectionItem.__table__
+        rows = session.connection().execute(
+            select(table.c.id, *(table.c[attr] for attr in TRACKED_ATTRS)).where(table.c.id.in_(ids))
+        )
+        previous = {row[0]: tuple(row[1:]) for row in rows}
+    session.info[_PREVIOUS] = previous
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_ledger_checkpoints(session, flush_context):
+    previous = session.info.pop(_PREVIOUS, {})
+    lines, signs = collect_changes(session, previous)
+    farmer_ids, group_ids = _rate_changes(session)
+    if not lines and not farmer_ids and not group_ids:
+        return
+
+    connection = session.connection()
+    if group_ids:
+        # Farmers with their own rate are not affected by their group's
+        farmer_ids.update(connection.execute(
+            select(Farmer.id).where(Farmer.group_id.in_(group_ids), Farmer.commission_percent.is_(None))
+        ).scalars())
+    # Checkpoints of deleted farmers go with them (ON DELETE CASCADE)
+    skipped = farmer_ids | {obj.id for obj in session.deleted if isinstance(obj, Farmer)}
+
+    kept = [i for i, line in enumerate(lines) if line.farmer_id not in skipped]
+    if kept:
+        apply_changes(connection, line_changes(connection, [lines[i] for i in kept], [signs[i] for i in kept]))
+    if farmer_ids:
+        mark_stale(session, connection, sorted(farmer_ids))
+
+
+# ---------- reads ----------
+def stale_farmer_ids(db, farmer_ids: Iterable[int]) -> set:
+    """The farmers among ``farmer_ids`` whose checkpoints await a rebuild."""
+    farmer_ids = list(farmer_ids)
+    if not farmer_ids:
+        return set()
+    return set(db.execute(
+        select(StaleLedgerFarmer.farmer_id).where(StaleLedgerFarmer.farmer_id.in_(farmer_ids))
+    ).scalars())
+
+
+def latest_checkpoints(db: Session, vendor_id: int, farmer_ids: Iterable[int], before: date) -> Dict[int, Any]:
+    """Each farmer's last checkpoint for a month before ``before`` (farmers without one are left out)."""
+    farmer_ids = list(farmer_ids)
+    if not farmer_ids:
+        return {}
+    rows = db.execute(
+        select(FarmerLedgerCheckpoint)
+        .where(
+            FarmerLedgerCheckpoint.vendor_id == vendor_id,
+            FarmerLedgerCheckpoint.farmer_id.in_(farmer_ids),
+            FarmerLedgerCheckpoint.month < before,
+        )
+        .distinct(FarmerLedgerCheckpoint.farmer_id)
+        .order_by(FarmerLedgerCheckpoint.farmer_id, FarmerLedgerCheckpoint.month.desc())
+    ).scalars()
+    return {row.farmer_id: row for row in rows}
+
+
+def opening_totals(
+    db: Session,
+    vendor_id: int,
+    farmer_ids: Iterable[int],
+    day: date,
+    rates: CommissionRates,
+) -> Dict[int, Totals]:
+    """
+    Ledger Totals of every line dated before ``day``, per farmer: the last
+    checkpoint before ``day``'s month plus that month's earlier lines (one
+    query each). Farmers marked stale are summed from all their earlier
+    lines instead. ``count`` is left at 0; farmers with no earlier lines get
+    zero Totals.
+    """
+    farmer_ids = list(farmer_ids)
+    month = month_start(day)
+    openings = {farmer_id: Totals() for farmer_id in farmer_ids}
+    if not farmer_ids:
+        return openings
+
+    stale = stale_farmer_ids(db, farmer_ids)
+    current = [farmer_id for farmer_id in farmer_ids if farmer_id not in stale]
+    for farmer_id, checkpoint in latest_checkpoints(db, vendor_id, current, month).items():
+        values = {field: to_scaled(getattr(checkpoint, field)) for field in FIELDS}
+        _add(openings[farmer_id], values["qty"], values["gross"], values["commission"],
+             values["luggage"], values["coolie"], values["paid"])
+
+    # (farmers, first day) whose lines from that day up to ``day`` are added
+    windows = [(ids, start) for ids, start in ((current, month), (sorted(stale), date.min)) if ids and start < day]
+    for ids, start in windows:
+        statement = select(CollectionItem.farmer_id, *LINE_MONEY_COLUMNS).where(
+            CollectionItem.vendor_id == vendor_id,
+            CollectionItem.farmer_id.in_(ids),
+            CollectionItem.date >= start,
+            CollectionItem.date < day,
+        )
+        builder = FarmerTotalsBuilder(rates)
+        builder.add(db.execute(statement).all())
+        builder.add(archived_money_rows(vendor_id, start, day - timedelta(days=1), ids))
+        for total in builder.finish():
+            _add(openings[total.farmer_id], total.qty, total.amount, total.commission,
+                 total.luggage, total.coolie, total.paid)
+    return openings
+
+
+def _add(totals: Totals, qty: int, amount: int, commission: int, luggage: int, coolie: int, paid: int) -> None:
+    due = amount - paid - luggage - coolie
+    totals.add(0, {
+        "qty": qty, "amount": amount, "luggage": luggage, "coolie": coolie, "paid": paid,
+        "commission": commission, "net": amount - commission, "due": due, "balance": due - commission,
+    })
+
+
+def closing_totals(opening: Totals, period: Totals) -> Totals:
+    """Opening plus a window's totals (``count`` is the window's)."""
+    closing = Totals()
+    closing.add(period.count, {name: getattr(opening, name) + getattr(period, name) for name in TOTAL_FIELDS})
+    return closing
+
+
+# ---------- verify / rebuild ----------
+def _vendor_farmers(db, farmer_ids: Optional[List[int]], vendor_id: Optional[int], lock: bool) -> Dict[int, List[int]]:
+    """{vendor_id: farmer ids} in scope, optionally locking the farmer rows (in id order)."""
+    statement = select(Farmer.vendor_id, Farmer.id).order_by(Farmer.id)
+    if vendor_id is not None:
+        statement = statement.where(Farmer.vendor_id == vendor_id)
+    if farmer_ids is not None:
+        statement = statement.where(Farmer.id.in_(list(farmer_ids)))
+    if lock:
+        statement = statement.with_for_update()
+    farmers: Dict[int, List[int]] = defaultdict(list)
+    for vendor, farmer_id in db.execute(statement):
+        farmers[vendor].append(farmer_id)
+    return farmers
+
+
+def expected_checkpoints(db, vendor_id: int, farmer_ids: List[int]) -> Dict[Key, dict]:
+    """Checkpoint rows as the farmers' lines in both tiers say they should be."""
+    statement = select(CollectionItem.farmer_id, CollectionItem.date, *LINE_MONEY_COLUMNS).where(
+        CollectionItem.vendor_id == vendor_id,
+        CollectionItem.farmer_id.in_(farmer_ids),
+    )
+    rows = db.execute(statement).all() + archived_money_rows(vendor_id, date.min, date.max, farmer_ids)
+    monthly = _month_totals(rows, load_commission_rates(db, vendor_id, farmer_ids))
+
+    expected: Dict[Key, dict] = {}
+    running: Dict[int, List[int]] = {}
+    for farmer_id, month in sorted(monthly):
+        count, *values = monthly[(farmer_id, month)]
+        totals = running.setdefault(farmer_id, [0] * len(FIELDS))
+        for i, value in enumerate(values):
+            totals[i] += value
+        expected[(farmer_id, month)] = {
+            "farmer_id": farmer_id,
+            "month": month,
+            "vendor_id": vendor_id,
+            "line_count": count,
+            **{field: _money(total) for field, total in zip(FIELDS, totals)},
+        }
+    return expected
+
+
+def find_drift(db: Session, vendor_id: Optional[int] = None) -> List[dict]:
+    """Stored checkpoints that disagree with the collection lines (first differing column per checkpoint)."""
+    drift = []
+    for vendor, farmers in sorted(_vendor_farmers(db, None, vendor_id, lock=False).items()):
+        for start in range(0, len(farmers), REBUILD_CHUNK):
+            chunk = farmers[start:start + REBUILD_CHUNK]
+            expected = expected_checkpoints(db, vendor, chunk)
+            stored = {
+                (row.farmer_id, row.month): row
+                for row in db.execute(
+                    select(FarmerLedgerCheckpoint).where(FarmerLedgerCheckpoint.farmer_id.in_(chunk))
+                ).scalars()
+            }
+            for key in sorted(expected.keys() | stored.keys()):
+                want, have = expected.get(key), stored.get(key)
+                for field in ("line_count",) + FIELDS:
+                    want_value = want[field] if want else None
+                    have_value = getattr(have, field) if have is not None else None
+                    if want_value != have_value:
+                        drift.append({
+                            "farmer_id": key[0],
+                            "month": key[1],
+                            "field": field,
+                            "expected": want_value,
+                            "stored": have_value,
+                        })
+                        break
+    return drift
+
+
+def rebuild(db, farmer_ids: Optional[List[int]] = None, vendor_id: Optional[int] = None) -> None:
+    """
+    Recompute checkpoints from the collection lines (both tiers) for
+    ``farmer_ids`` (or every farmer of ``vendor_id``, or everyone) and clear
+    their stale marks. The farmers are locked and their checkpoints and marks
+    deleted before rates and lines are read, so a concurrent line change
+    either is read here or waits and is applied on top, and a concurrent rate
+    change either is read here or marks the farmer again. Takes a Session or
+    a Connection; the caller commits.
+    """
+    checkpoints = FarmerLedgerCheckpoint.__table__
+    stale = StaleLedgerFarmer.__table__
+    insert = pg_insert(checkpoints)
+    upsert = insert.on_conflict_do_update(
+        index_elements=[checkpoints.c.farmer_id, checkpoints.c.month],
+        set_={name: insert.excluded[name] for name in ("vendor_id", "line_count") + FIELDS},
+    )
+    count = 0
+    for vendor, farmers in sorted(_vendor_farmers(db, farmer_ids, vendor_id, lock=True).items()):
+        for start in range(0, len(farmers), REBUILD_CHUNK):
+            chunk = farmers[start:start + REBUILD_CHUNK]
+            db.execute(delete(stale).where(stale.c.farmer_id.in_(chunk)))
+            db.execute(delete(checkpoints).where(checkpoints.c.farmer_id.in_(chunk)))
+            rows = list(expected_checkpoints(db, vendor, chunk).values())
+            if rows:
+                # Updating an existing line takes no farmer lock and may re-create a checkpoint meanwhile
+                db.execute(upsert, rows)
+            count += len(chunk)
+    logger.info(f"Rebuilt ledger checkpoints for {count} farmer(s)")
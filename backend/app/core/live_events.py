@@ -0,0 +1,430 @@
+"""
+Live silk dashboard deltas for Server-Sent Events subscribers (GET /silk/live).
+
+Flush hooks turn every change to
+
+    collection_items        -> silk ledger kg / amount per date and group
+    saala_transactions      -> credit (total - paid) per date and customer
+    silk_daily_collections  -> cash / UPI per date
+
+into one delta per vendor. On Postgres the delta is sent with pg_notify from
+inside the writing transaction, so it is delivered only if that transaction
+commits, and it reaches every API process: each process LISTENs on one
+dedicated connection and fans events out to its own subscribers. On other
+databases (local SQLite) deltas are published in-process after commit.
+
+A subscriber first registers, then reads a snapshot for its date in one
+REPEATABLE READ transaction together with txid_current_snapshot(). Deltas
+carry the writer's transaction id, and the ones the snapshot already contains
+are dropped, so nothing is missed or counted twice. A subscriber that falls
+behind (or a listener that had to reconnect) gets a ``resync`` event and
+should reconnect for a fresh snapshot.
+
+Bulk Core statements (INSERT ... SELECT, UPDATE ... WHERE) bypass the flush
+hooks; code that uses them on these tables calls ``publish_resync`` (the
+archive delete in app.core.archive does).
+"""
+import asyncio
+import json
+import logging
+import select as select_module
+import threading
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, time as time_of_day
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.orm import Session
+
+from app.core.db import connect_args, engine
+from app.models.collection_item import CollectionItem
+from app.models.farmer_group import FarmerGroup
+from app.models.saala_customer import SaalaCustomer, SaalaTransaction
+from app.models.silk_daily_collection import SilkDailyCollection
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "live_silk"
+# pg_notify payloads are limited to 8000 bytes; larger deltas become a resync
+MAX_PAYLOAD_BYTES = 7900
+QUEUE_SIZE = 256
+KEEPALIVE_SECONDS = 15
+RECONNECT_SECONDS = 5
+
+_PENDING = "live_events_pending"
+_PREVIOUS = "live_events_previous"
+
+
+# ---------- deltas from the flush ----------
+def _money(value) -> Decimal:
+    return Decimal(str(value)) if value is not None else Decimal("0")
+
+
+def _day(value) -> Optional[date]:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _collection_item(session: Session, get):
+    kg = _money(get("qty_kg"))
+    return [(get("vendor_id"), get("date"), "ledger", get("group_id"), (kg, kg * _money(get("rate_per_kg"))))]
+
+
+def _saala_transaction(session: Session, get):
+    customer_id = get("customer_id")
+    customer = session.get(SaalaCustomer, customer_id) if customer_id else None
+    total, paid = get("total_amount"), get("paid_amount")
+    # As in SQL (and GET /silk/credit): a missing amount leaves the row out
+    credit = _money(total) - _money(paid) if total is not None and paid is not None else Decimal("0")
+    return [(getattr(customer, "vendor_id", None), _day(get("date")), "credit", customer_id, (credit,))]
+
+
+def _daily_collection(session: Session, get):
+    return [(get("vendor_id"), get("date"), "collections", None, (_money(get("cash")), _money(get("upi"))))]
+
+
+# table -> (columns the figures depend on, contribution of one row)
+TRACKED = {
+    "collection_items": (("vendor_id", "date", "group_id", "qty_kg", "rate_per_kg"), _collection_item),
+    "saala_transactions": (("customer_id", "date", "total_amount", "paid_amount"), _saala_transaction),
+    "silk_daily_collections": (("vendor_id", "date", "cash", "upi"), _daily_collection),
+}
+
+
+def _current(obj):
+    return lambda attr: getattr(obj, attr)
+
+
+def _key(obj):
+    return obj.__tablename__, inspect(obj).identity[0]
+
+
+def _changed(obj, columns) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[column].history.has_changes() for column in columns)
+
+
+def collect_deltas(session: Session, previous: Dict[tuple, dict]) -> Dict[int, dict]:
+    """
+    Per vendor: the change this flush makes to each live figure (zero changes
+    left out). ``previous`` holds the updated/deleted rows as they were before it.
+    """
+    totals: Dict[tuple, List[Decimal]] = {}
+
+    def add(sign: int, rows: Iterable[tuple]) -> None:
+        for vendor_id, day, section, key, amounts in rows:
+            if not vendor_id or not day:
+                continue
+            current = totals.setdefault((vendor_id, day, section, key), [Decimal("0")] * len(amounts))
+            for i, amount in enumerate(amounts):
+                current[i] += sign * amount
+
+    def remove_previous(obj, tracked) -> None:
+        # No row was read if it was already gone (deleted by another
+        # transaction) or the object only became dirty after before_flush
+        row = previous.get(_key(obj))
+        if row is not None:
+            add(-1, tracked[1](session, row.get))
+
+    for obj in session.new:
+        tracked = TRACKED.get(getattr(obj, "__tablename__", None))
+        if tracked:
+            add(1, tracked[1](session, _current(obj)))
+    for obj in session.dirty:
+        tracked = TRACKED.get(getattr(obj, "__tablename__", None))
+        if tracked and _changed(obj, tracked[0]):
+            remove_previous(obj, tracked)
+            add(1, tracked[1](session, _current(obj)))
+    for obj in session.deleted:
+        tracked = TRACKED.get(getattr(obj, "__tablename__", None))
+        if tracked:
+            remove_previous(obj, tracked)
+
+    changes: Dict[int, Dict[date, dict]] = defaultdict(dict)
+    for (vendor_id, day, section, key), amounts in totals.items():
+        if not any(amounts):
+            continue
+        change = changes[vendor_id].setdefault(day, {"date": day.isoformat()})
+        if section == "ledger":
+            change.setdefault("ledger", []).append(
+                {"group_id": key, "kg": float(amounts[0]), "amount": float(amounts[1])}
+            )
+        elif section == "credit":
+            change.setdefault("credit", []).append({"customer_id": key, "amount": float(amounts[0])})
+        else:
+            change["cash"], change["upi"] = float(amounts[0]), float(amounts[1])
+
+    return {
+        vendor_id: {"id": uuid.uuid4().hex, "vendor_id": vendor_id, "changes": list(days.values())}
+        for vendor_id, days in changes.items()
+    }
+
+
+def _encode(payload: dict) -> str:
+    encoded = json.dumps(payload, separators=(",", ":"))
+    if len(encoded.encode("utf-8")) > MAX_PAYLOAD_BYTES:
+        return json.dumps({"id": payload["id"], "vendor_id": payload["vendor_id"], "type": "resync"})
+    return encoded
+
+
+@event.listens_for(Session, "before_flush")
+def _read_previous_rows(session, flush_context, instances):
+    # Attribute history has no old value for attributes set after the object
+    # was expired (e.g. by a commit), so read the rows while they are unchanged
+    wanted: Dict[type, List[int]] = defaultdict(list)
+    for obj in list(session.dirty) + list(session.deleted):
+        if getattr(obj, "__tablename__", None) in TRACKED:
+            wanted[type(obj)].append(inspect(obj).identity[0])
+    previous: Dict[tuple, dict] = {}
+    for cls, ids in wanted.items():
+        table, columns = cls.__table__, TRACKED[cls.__tablename__][0]
+        rows = session.connection().execute(
+            select(table.c.id, *(table.c[column] for column in columns)).where(table.c.id.in_(ids))
+        )
+        for row in rows:
+            previous[(cls.__tablename__, row[0])] = dict(zip(columns, row[1:]))
+    session.info[_PREVIOUS] = previous
+
+
+@event.listens_for(Session, "after_flush")
+def _send_live_deltas(session, flush_context):
+    deltas = collect_deltas(session, session.info.pop(_PREVIOUS, {}))
+    if not deltas:
+        return
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        txid = connection.execute(text("SELECT txid_current()")).scalar()
+        for payload in deltas.values():
+            payload["txid"] = txid
+            connection.execute(select(func.pg_notify(CHANNEL, _encode(payload))))
+    else:
+        session.info.setdefault(_PENDING, []).extend(deltas.values())
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    for payload in session.info.pop(_PENDING, ()):
+        live_events.publish(json.loads(_encode(payload)))
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session):
+    session.info.pop(_PENDING, None)
+
+
+def publish_resync(session: Session, vendor_id: int) -> None:
+    """Tell ``vendor_id``'s subscribers to reload once the current transaction commits."""
+    payload = {"id": uuid.uuid4().hex, "vendor_id": vendor_id, "type": "resync"}
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        connection.execute(select(func.pg_notify(CHANNEL, json.dumps(payload))))
+    else:
+        session.info.setdefault(_PENDING, []).append(payload)
+
+
+# ---------- snapshot ----------
+class TxidSnapshot:
+    """Parsed txid_current_snapshot(): which transactions a snapshot already sees."""
+
+    def __init__(self, value: str):
+        xmin, xmax, xip = value.split(":")
+        self.xmin, self.xmax = int(xmin), int(xmax)
+        self.in_progress = {int(x) for x in xip.split(",") if x}
+
+    def includes(self, txid: int) -> bool:
+        return txid < self.xmin or (txid < self.xmax and txid not in self.in_progress)
+
+
+def take_snapshot(vendor_id: int, day: date):
+    """Current live figures for ``day`` plus the txid snapshot they were read at."""
+    start_of_day, end_of_day = datetime.combine(day, time_of_day.min), datetime.combine(day, time_of_day.max)
+    with engine.connect() as conn:
+        postgres = conn.dialect.name == "postgresql"
+        if postgres:
+            conn = conn.execution_options(isolation_level="REPEATABLE READ")
+            txids = TxidSnapshot(conn.execute(text("SELECT txid_current_snapshot()::text")).scalar())
+        else:
+            txids = None
+
+        ledger = conn.execute(
+            select(
+                CollectionItem.group_id,
+                FarmerGroup.name,
+                func.sum(CollectionItem.qty_kg),
+                func.sum(CollectionItem.qty_kg * CollectionItem.rate_per_kg),
+            )
+            .outerjoin(FarmerGroup, CollectionItem.group_id == FarmerGroup.id)
+            .where(CollectionItem.vendor_id == vendor_id, CollectionItem.date == day)
+            .group_by(CollectionItem.group_id, FarmerGroup.name)
+        ).all()
+        credit = conn.execute(
+            select(
+                SaalaTransaction.customer_id,
+                func.sum(SaalaTransaction.total_amount - SaalaTransaction.paid_amount),
+            )
+            .join(SaalaCustomer, SaalaTransaction.customer_id == SaalaCustomer.id)
+            .where(
+                SaalaCustomer.vendor_id == vendor_id,
+                SaalaTransaction.date >= start_of_day,
+                SaalaTransaction.date <= end_of_day,
+            )
+            .group_by(SaalaTransaction.customer_id)
+        ).all()
+        collection = conn.execute(
+            select(SilkDailyCollection.cash, SilkDailyCollection.upi)
+            .where(SilkDailyCollection.vendor_id == vendor_id, SilkDailyCollection.date == day)
+        ).first()
+        conn.rollback()
+
+    credit_rows = [{"customer_id": customer_id, "amount": float(amount or 0)} for customer_id, amount in credit]
+    snapshot = {
+        "date": day.isoformat(),
+        "ledger": [
+            {"group_id": group_id, "group_name": name or "Unassigned", "kg": float(kg or 0), "amount": float(amount or 0)}
+            for group_id, name, kg, amount in ledger
+        ],
+        "credit": credit_rows,
+        # Same rule as GET /silk/credit: overpaid customers count as zero
+        "credit_total": sum((max(row["amount"], 0) for row in credit_rows), 0.0),
+        "cash": float(collection.cash) if collection else 0.0,
+        "upi": float(collection.upi) if collection else 0.0,
+    }
+    return snapshot, txids
+
+
+# ---------- fan-out ----------
+class Subscription:
+    def __init__(self, vendor_id: int, loop: asyncio.AbstractEventLoop):
+        self.vendor_id = vendor_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def offer(self, payload: dict) -> None:
+        """Runs on the subscriber's loop. A subscriber that cannot keep up is told to resync."""
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"vendor_id": self.vendor_id, "type": "resync"})
+
+
+def _sse(name: str, data: dict) -> str:
+    return f"event: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class LiveEventHub:
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # subscribers
+    def subscribe(self, vendor_id: int) -> Subscription:
+        """Call from the event loop that will consume the subscription."""
+        subscription = Subscription(vendor_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[vendor_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.vendor_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.vendor_id]
+
+    def publish(self, payload: dict) -> None:
+        """Hand a delta to the vendor's subscribers in this process; safe from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(payload.get("vendor_id"), ()))
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.offer, payload)
+
+    def _resync_all(self) -> None:
+        with self._lock:
+            vendor_ids = list(self._subscribers)
+        for vendor_id in vendor_ids:
+            self.publish({"vendor_id": vendor_id, "type": "resync"})
+
+    async def stream(self, subscription: Subscription, snapshot: dict, txids: Optional[TxidSnapshot]):
+        """SSE body: the snapshot, then deltas for its date, with keepalive comments."""
+        day = snapshot["date"]
+        try:
+            yield f"retry: {RECONNECT_SECONDS * 1000}\n\n"
+            yield _sse("snapshot", snapshot)
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscription.queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if payload.get("type") == "resync":
+                    yield _sse("resync", {"date": day})
+                    continue
+                if txids is not None and "txid" in payload and txids.includes(payload["txid"]):
+                    continue
+                for change in payload["changes"]:
+                    if change["date"] == day:
+                        yield _sse("delta", change)
+        finally:
+            self.unsubscribe(subscription)
+
+    # Postgres listener
+    @property
+    def enabled(self) -> bool:
+        return engine.dialect.name == "postgresql"
+
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="live-events", daemon=True)
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(RECONNECT_SECONDS + 1)
+            self._thread = None
+
+    def _connect(self):
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        connection = engine.dialect.loaded_dbapi.connect(*cargs, **{**cparams, **connect_args})
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return connection
+
+    def _listen(self) -> None:
+        reconnecting = False
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                if reconnecting:
+                    # Notifications sent while disconnected are gone
+                    self._resync_all()
+                logger.info(f"Listening for live events on {CHANNEL}")
+                while not self._stop.is_set():
+                    if select_module.select([connection], [], [], RECONNECT_SECONDS) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self.publish(json.loads(connection.notifies.pop(0).payload))
+            except Exception as e:
+                logger.warning(f"Live event listener error: {e}; reconnecting")
+                reconnecting = True
+                self._stop.wait(RECONNECT_SECONDS)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+
+live_events = LiveEventHub()
@@ -0,0 +1,233 @@
+"""
+Monthly range partitions of the append-heavy tables.
+
+collection_items (by ``date``), audits and sms_logs (by ``created_at``) are
+partitioned by month (alembic revision monthly_partitions_20260301). Each
+month lives in ``<table>_yYYYYmMM``; ``<table>_default`` catches rows
+outside every bound. This module is the maintenance side, driven by
+``python manage_partitions.py`` from a scheduler:
+
+- ``create_partitions`` adds the coming months. A month whose rows already
+  landed in the default partition is built as a standalone table, the rows
+  are moved into it, and it is then attached.
+- ``detach_partitions`` detaches months older than a cutoff, leaving them as
+  plain tables, or with ``archive=True`` moving them into the ``archive``
+  schema. Detached data no longer appears in the application.
+- ``pruning_report`` plans the report queries of app.utils.reports_db for a
+  date range and shows which collection_items partitions each one reads.
+"""
+import logging
+import re
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# table -> partition key; must match the alembic migration
+PARTITIONED_TABLES = {
+    "collection_items": "date",
+    "audits": "created_at",
+    "sms_logs": "created_at",
+}
+MONTHS_AHEAD = 3
+ARCHIVE_SCHEMA = "archive"
+
+_PARTITION_NAME = re.compile(r"_y(\d{4})m(\d{2})$")
+
+
+# ---------- months ----------
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def iter_months(first: date, last: date) -> Iterator[date]:
+    """Month starts from ``first`` through ``last`` inclusive."""
+    month = month_start(first)
+    while month <= last:
+        yield month
+        month = next_month(month)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Month of a monthly partition from its name; None for the default partition."""
+    match = _PARTITION_NAME.search(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+# ---------- inspection ----------
+def list_partitions(db: Session, table: str) -> List[Dict[str, Any]]:
+    """Attached partitions of ``table`` with their bounds and estimated row counts, oldest first."""
+    rows = db.execute(text("""
+        SELECT c.relname AS name,
+               pg_get_expr(c.relpartbound, c.oid) AS bounds,
+               c.reltuples::bigint AS estimated_rows
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:table AS regclass)
+        ORDER BY c.relname
+    """), {"table": table}).fetchall()
+    return [
+        {"name": r.name, "bounds": r.bounds, "estimated_rows": max(r.estimated_rows, 0), "month": partition_month(r.name)}
+        for r in rows
+    ]
+
+
+def insertable_columns(db: Session, table: str) -> List[str]:
+    """Columns of ``table`` in order, without generated columns (which cannot be inserted)."""
+    return list(db.execute(text("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = :table AND is_generated = 'NEVER'
+        ORDER BY ordinal_position
+    """), {"table": table}).scalars())
+
+
+def is_partitioned(db: Session, table: str) -> bool:
+    return bool(db.execute(text("""
+        SELECT 1 FROM pg_partitioned_table WHERE partrelid = CAST(:table AS regclass)
+    """), {"table": table}).scalar())
+
+
+# ---------- maintenance ----------
+def create_partitions(db: Session, table: str, months_ahead: int = MONTHS_AHEAD, today: date = None) -> List[str]:
+    """
+    Make sure every month up to ``months_ahead`` past the current one has a
+    partition. Returns the names created. Commit is left to the caller.
+    """
+    key = PARTITIONED_TABLES[table]
+    today = today or date.today()
+    existing = {p["month"] for p in list_partitions(db, table) if p["month"]}
+    last = month_start(today)
+    for _ in range(months_ahead):
+        last = next_month(last)
+    first = min(existing) if existing else month_start(today)
+    columns = ", ".join(insertable_columns(db, table))
+
+    created = []
+    for month in iter_months(first, last):
+        if month in existing:
+            continue
+        name = partition_name(table, month)
+        lower, upper = month.isoformat(), next_month(month).isoformat()
+        # Build standalone, move any rows the default partition caught for
+        # this month, then attach (attaching validates against the default).
+        db.execute(text(
+            f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)"
+        ))
+        moved = db.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {table}_default WHERE {key} >= :lower AND {key} < :upper RETURNING {columns}
+            )
+            INSERT INTO {name} ({columns}) SELECT {columns} FROM moved
+        """), {"lower": lower, "upper": upper}).rowcount
+        db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"))
+        created.append(name)
+        logger.info(f"Created partition {name}" + (f" ({moved} rows moved from {table}_default)" if moved else ""))
+    return created
+
+
+def detach_partitions(db: Session, table: str, before: date, archive: bool = False) -> List[str]:
+    """
+    Detach monthly partitions of ``table`` that end on or before ``before``
+    (a month start). With ``archive`` they are moved to the archive schema.
+    Returns the detached names. Commit is left to the caller.
+    """
+    before = month_start(before)
+    if archive:
+        db.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+
+    detached = []
+    for partition in list_partitions(db, table):
+        month = partition["month"]
+        if month is None or next_month(month) > before:
+            continue
+        name = partition["name"]
+        db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        if archive:
+            db.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        detached.append(name)
+        logger.info(f"Detached partition {name}" + (f" into {ARCHIVE_SCHEMA}" if archive else ""))
+    return detached
+
+
+# ---------- pruning report ----------
+def _scanned_relations(plan: Dict[str, Any]) -> Tuple[List[str], int]:
+    """Relations read anywhere in a JSON plan, and the partitions removed at run time."""
+    relations: List[str] = []
+    removed = 0
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if "Relation Name" in node:
+            relations.append(node["Relation Name"])
+        removed += node.get("Subplans Removed", 0)
+        stack.extend(node.get("Plans", []))
+    return relations, removed
+
+
+def report_statements(vendor_id: int, from_date: date, to_date: date, group_id: Optional[int] = None):
+    """(label, statement) for every collection_items report query over the range."""
+    from app.utils.reports_db import (
+        daily_sales_statement,
+        group_patti_statement,
+        group_total_by_group_statement,
+        group_total_statement,
+        ledger_lines_statement,
+    )
+
+    statements = [
+        ("ledger", ledger_lines_statement(vendor_id, [0], from_date, to_date)),
+        ("group_total", group_total_statement(vendor_id, from_date, to_date)),
+        ("daily_sales", daily_sales_statement(vendor_id, from_date, to_date)),
+    ]
+    if group_id is not None:
+        statements += [
+            ("group_total_by_group", group_total_by_group_statement(vendor_id, group_id, from_date, to_date)),
+            ("group_patti", group_patti_statement(vendor_id, group_id, from_date, to_date)),
+        ]
+    return statements
+
+
+def pruning_report(
+    db: Session,
+    vendor_id: int,
+    from_date: date,
+    to_date: date,
+    group_id: Optional[int] = None,
+    analyze: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    For each report query over ``from_date``..``to_date``: how many
+    collection_items partitions exist, which ones the plan reads, and how
+    many were removed at run time (``analyze`` runs the queries).
+    """
+    from app.utils.query_diagnostics import explain_plan
+
+    partitions = {p["name"] for p in list_partitions(db, "collection_items")}
+    expected = {partition_name("collection_items", m) for m in iter_months(from_date, to_date)} & partitions
+
+    report = []
+    for label, statement in report_statements(vendor_id, from_date, to_date, group_id):
+        plan = explain_plan(db, statement, analyze=analyze)
+        relations, removed = _scanned_relations(plan["Plan"])
+        scanned = sorted({r for r in relations if r in partitions})
+        report.append({
+            "query": label,
+            "partitions": len(partitions),
+            "scanned": scanned,
+            "pruned": len(partitions) - len(scanned),
+            "runtime_removed": removed,
+            "only_range": set(scanned) <= expected | {"collection_items_default"},
+            "execution_ms": plan.get("Execution Time"),
+        })
+    return report
@@ -0,0 +1,153 @@
+"""
+Read-replica routing for report traffic.
+
+GET report, silk aggregation and export endpoints take their session from
+``get_read_db`` instead of ``get_db``. When DATABASE_REPLICA_URL is set the
+session is bound to the replica unless
+
+  - the replica is unreachable or more than DB_REPLICA_MAX_LAG_SECONDS
+    behind (probed at most every DB_REPLICA_LAG_CHECK_SECONDS per worker), or
+  - the replica has not replayed the vendor's latest write yet: its
+    vendor_data_versions counter is behind the primary's. The counter is
+    bumped in the same transaction as every vendor-scoped write
+    (app.core.data_version), so equal counters mean the replica already shows
+    everything the vendor has committed - read-your-writes across workers
+    without sticky sessions.
+
+In either case the request silently falls back to the primary. Writes, and
+reads that feed a write, keep using ``get_db``. Without a replica
+``get_read_db`` is simply the primary session.
+
+Usage:
+    @router.get("/group-total", dependencies=[Depends(report_etag)])
+    def get_group_total(..., db: Session = Depends(get_read_db), user = Depends(get_current_user)):
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+from fastapi import Depends
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.data_version import get_data_version
+from app.core.db import ReplicaSessionLocal, get_db, replica_engine
+from app.dependencies import get_current_user
+
+logger = logging.getLogger(__name__)
+
+# Seconds since the last replayed transaction, or 0 when the replica has
+# replayed everything it received (an idle primary must not look like lag).
+REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class ReplicaMonitor:
+    """
+    Per-worker view of the replica's replication lag.
+
+    One request probes when the last reading is older than ``check_interval``;
+    concurrent requests keep using the previous reading instead of queueing
+    behind the probe.
+    """
+
+    def __init__(self, engine: Engine, max_lag: float, check_interval: float):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked_at: Optional[float] = None
+        self._lag: Optional[float] = None
+        self._usable = False
+
+    def _probe(self) -> Optional[float]:
+        """Lag in seconds, or None when the replica cannot be reached."""
+        try:
+            with self.engine.connect() as conn:
+                if conn.dialect.name != "postgresql":
+                    conn.execute(text("SELECT 1"))
+                    return 0.0
+                return float(conn.execute(REPLICA_LAG_SQL).scalar() or 0)
+        except Exception as e:
+            logger.warning(f"Read replica probe failed: {e}")
+            return None
+
+    @property
+    def lag(self) -> Optional[float]:
+        with self._lock:
+            now = time.monotonic()
+            due = self._checked_at is None or now - self._checked_at >= self.check_interval
+            if due:
+                self._checked_at = now
+        if due:
+            self._lag = self._probe()
+        return self._lag
+
+    def usable(self) -> bool:
+        lag = self.lag
+        usable = lag is not None and lag <= self.max_lag
+        if usable != self._usable:
+            self._usable = usable
+            if usable:
+                logger.info(f"Read replica in use (lag {lag:.1f}s)")
+            else:
+                reason = "unreachable" if lag is None else f"lag {lag:.1f}s > {self.max_lag:.0f}s"
+                logger.warning(f"Read replica {reason}; routing reads to the primary")
+        return usable
+
+    def status(self) -> dict:
+        return {"configured": True, "lag_seconds": self._lag, "in_use": self._usable}
+
+
+replica_monitor = (
+    ReplicaMonitor(replica_engine, settings.DB_REPLICA_MAX_LAG_SECONDS, settings.DB_REPLICA_LAG_CHECK_SECONDS)
+    if replica_engine is not None
+    else None
+)
+
+
+def open_read_session(primary: Session, vendor_id: int) -> Optional[Session]:
+    """
+    A replica session that is fresh enough for ``vendor_id``'s reads, or None
+    when the request has to stay on ``primary``.
+    """
+    if replica_monitor is None or not replica_monitor.usable():
+        return None
+
+    replica = ReplicaSessionLocal()
+    try:
+        if get_data_version(replica, vendor_id) >= get_data_version(primary, vendor_id):
+            return replica
+        logger.debug(f"Vendor {vendor_id} has writes the replica has not replayed; reading from the primary")
+    except Exception as e:
+        logger.warning(f"Read replica unusable for vendor {vendor_id}: {e}")
+    replica.close()
+    return None
+
+
+def get_read_db(db: Session = Depends(get_db), user=Depends(get_current_user)):
+    replica = open_read_session(db, user.vendor_id)
+    if replica is None:
+        yield db
+        return
+
+    # Auth and the ETag check are done with the primary session; hand its
+    # connection back to the pool for the rest of the request.
+    db.close()
+    try:
+        yield replica
+    except Exception:
+        replica.rollback()
+        raise
+    finally:
+        replica.close()
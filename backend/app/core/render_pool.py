@@ -0,0 +1,263 @@
+"""
+Process pool for CPU-bound document rendering.
+
+Jinja HTML for big reports, docxtpl and reportlab all hold the GIL for the
+whole render, so running them in the request threadpool stalls every other
+request served by the same worker. ``render_pool.run(task, ...)`` ships the
+render to a small pool of warm worker processes instead and blocks only the
+calling thread while it waits.
+
+- Tasks are referenced by name (RENDER_TASKS) and resolved inside the worker.
+- Lists of uniform dicts in the arguments (report rows) are sent as
+  ``PackedRows`` - one column tuple plus value tuples - instead of repeating
+  every key for every row.
+- At most RENDER_POOL_MAX_QUEUE jobs may be queued or running per process;
+  beyond that callers get 503 with Retry-After. Jobs that exceed
+  RENDER_TIMEOUT_SECONDS return 504.
+- RENDER_POOL_WORKERS=0 renders in-process (development, one-off scripts).
+"""
+import importlib
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RENDER_TASKS = {
+    "html": "app.services.render_tasks:render_html",
+    "html_batch": "app.services.render_tasks:render_html_batch",
+    "print_html": "app.services.render_tasks:render_print_html",
+    "pdf": "app.services.render_tasks:render_pdf",
+    "docx": "app.services.render_tasks:render_docx",
+    "settlement_pdf": "app.services.pdf_service:draw_settlement_pdf",
+}
+
+RETRY_AFTER_SECONDS = 5
+
+# True inside pool workers, so nested render calls run inline.
+_IN_WORKER = False
+_resolved: Dict[str, Callable] = {}
+
+
+# ---------- compact row transport ----------
+class PackedRows:
+    """A list of same-keyed dicts stored as one column tuple plus value tuples."""
+
+    __slots__ = ("columns", "values")
+
+    def __init__(self, columns: tuple, values: list):
+        self.columns = columns
+        self.values = values
+
+    def __getstate__(self):
+        return self.columns, self.values
+
+    def __setstate__(self, state):
+        self.columns, self.values = state
+
+
+def pack(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: pack(v) for k, v in value.items()}
+    if isinstance(value, list):
+        if value and all(type(item) is dict for item in value):
+            keys = value[0].keys()
+            if all(item.keys() == keys for item in value):
+                columns = tuple(keys)
+                return PackedRows(columns, [tuple(pack(item[c]) for c in columns) for item in value])
+        return [pack(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(pack(item) for item in value)
+    return value
+
+
+def unpack(value: Any) -> Any:
+    if isinstance(value, PackedRows):
+        return [dict(zip(value.columns, (unpack(v) for v in row))) for row in value.values]
+    if isinstance(value, dict):
+        return {k: unpack(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [unpack(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(unpack(item) for item in value)
+    return value
+
+
+# ---------- worker side ----------
+def _resolve(task: str) -> Callable:
+    func = _resolved.get(task)
+    if func is None:
+        module_name, attr = RENDER_TASKS[task].split(":")
+        func = getattr(importlib.import_module(module_name), attr)
+        _resolved[task] = func
+    return func
+
+
+def _init_worker() -> None:
+    """Import every task module and prime template/font caches before the first job."""
+    global _IN_WORKER
+    _IN_WORKER = True
+    for task in RENDER_TASKS:
+        _resolve(task)
+    from app.services.render_tasks import warm_up
+    warm_up()
+
+
+def _execute(task: str, args: tuple, kwargs: dict) -> Any:
+    return _resolve(task)(*unpack(args), **unpack(kwargs))
+
+
+def _ping() -> int:
+    return multiprocessing.current_process().pid
+
+
+# ---------- pool ----------
+class RenderPool:
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return settings.RENDER_POOL_WORKERS > 0 and not _IN_WORKER
+
+    def start(self) -> None:
+        """Create the pool and spawn every worker now rather than on the first render."""
+        if not self.enabled:
+            return
+        executor = self._ensure_executor()
+        for _ in range(settings.RENDER_POOL_WORKERS):
+            executor.submit(_ping)
+        logger.info(f"Render pool started with {settings.RENDER_POOL_WORKERS} workers")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=settings.RENDER_POOL_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def _reset_executor(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _record(self, task: str, outcome: str, seconds: float = 0.0) -> None:
+        with self._lock:
+            m = self._metrics.setdefault(task, {
+                "completed": 0, "failed": 0, "timeouts": 0, "rejected": 0,
+                "total_seconds": 0.0, "max_seconds": 0.0,
+            })
+            m[outcome] += 1
+            if outcome == "completed":
+                m["total_seconds"] += seconds
+                m["max_seconds"] = max(m["max_seconds"], seconds)
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def run(self, task: str, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run a named render task and return its result (HTML str or document bytes)."""
+        if task not in RENDER_TASKS:
+            raise KeyError(f"Unknown render task: {task}")
+
+        started = time.perf_counter()
+        if not self.enabled:
+            try:
+                result = _resolve(task)(*args, **kwargs)
+            except Exception:
+                self._record(task, "failed")
+                raise
+            self._record(task, "completed", time.perf_counter() - started)
+            return result
+
+        with self._lock:
+            if self._in_flight >= settings.RENDER_POOL_MAX_QUEUE:
+                rejected = True
+            else:
+                rejected = False
+                self._in_flight += 1
+        if rejected:
+            self._record(task, "rejected")
+            raise HTTPException(
+                status_code=503,
+                detail="Report rendering is busy, please retry shortly",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+
+        executor = self._ensure_executor()
+        try:
+            future = executor.submit(_execute, task, pack(args), pack(kwargs))
+        except Exception:
+            self._release()
+            raise
+        # The slot is freed when the job really finishes, even after a timeout,
+        # so abandoned renders still count against the queue bound.
+        future.add_done_callback(self._release)
+
+        try:
+            result = future.result(timeout=timeout or settings.RENDER_TIMEOUT_SECONDS)
+        except FutureTimeoutError:
+            future.cancel()
+            self._record(task, "timeouts")
+            logger.warning(f"Render task {task} timed out after {time.perf_counter() - started:.1f}s")
+            raise HTTPException(status_code=504, detail="Report rendering timed out")
+        except BrokenProcessPool:
+            self._record(task, "failed")
+            logger.error(f"Render pool broke while running {task}; restarting it")
+            self._reset_executor(executor)
+            raise HTTPException(
+                status_code=503,
+                detail="Report rendering is restarting, please retry shortly",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+        except Exception:
+            self._record(task, "failed")
+            raise
+
+        self._record(task, "completed", time.perf_counter() - started)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            tasks = {
+                name: {
+                    **m,
+                    "avg_seconds": round(m["total_seconds"] / m["completed"], 4) if m["completed"] else 0.0,
+                    "total_seconds": round(m["total_seconds"], 4),
+                    "max_seconds": round(m["max_seconds"], 4),
+                }
+                for name, m in self._metrics.items()
+            }
+            return {
+                "enabled": self.enabled,
+                "workers": settings.RENDER_POOL_WORKERS,
+                "max_queue": settings.RENDER_POOL_MAX_QUEUE,
+                "timeout_seconds": settings.RENDER_TIMEOUT_SECONDS,
+                "in_flight": self._in_flight,
+                "tasks": tasks,
+            }
+
+
+render_pool = RenderPool()
@@ -1,7 +1,10 @@
 # This file is intentionally imported once at app startup
-# to register SQLAlchemy events (audit logging) and create any missing tables
+# to register SQLAlchemy events (audit logging, live dashboard deltas, advance balances, ledger checkpoints) and create any missing tables
 
 import app.core.audit_events  # noqa: F401
+import app.core.live_events  # noqa: F401
+import app.core.advance_balances  # noqa: F401
+import app.core.ledger_checkpoints  # noqa: F401
 
 # Auto-create missing tables (safe: only creates if not present)
 from app.core.db import Base, engine  # noqa: E402
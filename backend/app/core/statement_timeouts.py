@@ -0,0 +1,207 @@
+"""
+Per-route-class statement timeouts and cancellation of abandoned queries.
+
+Every API request runs in a QueryScope (the app-level ``query_scope``
+dependency). Routes pick their class with a second dependency:
+
+    interactive  STATEMENT_TIMEOUT_INTERACTIVE_SECONDS  data entry, lists, lookups (default)
+    report       STATEMENT_TIMEOUT_REPORT_SECONDS       report pages, print templates, silk aggregations
+    export       STATEMENT_TIMEOUT_EXPORT_SECONDS       CSV/XLSX streams (app.services.report_export)
+    admin        STATEMENT_TIMEOUT_ADMIN_SECONDS        /api/admin
+
+Usage:
+    router = APIRouter(prefix="/reports", dependencies=[Depends(report_queries)])
+
+The limit is applied with ``SET LOCAL statement_timeout`` at the start of
+each transaction a session begins during the request, so it ends with the
+transaction and never leaks to the next user of the pooled connection.
+
+While a GET runs, the scope polls for client disconnect and cancels the
+statement in flight (psycopg2 ``cancel()``, sqlite3 ``interrupt()``), so an
+abandoned two-year report gives its pool connection back at once instead of
+running to completion. Writes are left to finish.
+
+A cancelled statement surfaces as an HTTPException: 504 with Retry-After
+and a hint when the limit was hit. Pool checkout timeouts become 503 with
+Retry-After (``pool_timeout_handler``, registered in main.py).
+"""
+import asyncio
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ROUTE_CLASSES = ("interactive", "report", "export", "admin")
+DISCONNECT_POLL_SECONDS = 1.0
+RETRY_AFTER_SECONDS = 30
+
+# SQLSTATE query_canceled: statement_timeout and pg_cancel_backend / cancel()
+QUERY_CANCELED = "57014"
+
+RETRY_HINTS = {
+    "interactive": "please retry shortly",
+    "report": "narrow the date range or download the report as CSV/XLSX",
+    "export": "narrow the date range and retry",
+    "admin": "retry off-peak",
+}
+
+
+def timeout_seconds(route_class: str) -> int:
+    return getattr(settings, f"STATEMENT_TIMEOUT_{route_class.upper()}_SECONDS")
+
+
+def set_statement_timeout(connection: Connection, route_class: str) -> None:
+    """Limit statements in ``connection``'s current transaction to ``route_class``'s timeout."""
+    if connection.dialect.name != "postgresql":
+        return
+    milliseconds = timeout_seconds(route_class) * 1000
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {milliseconds}")
+
+
+class QueryScope:
+    """The route class of one request and the DBAPI connections it has in a transaction."""
+
+    def __init__(self, route_class: str = "interactive"):
+        self.route_class = route_class
+        self.disconnected = False
+        self._lock = threading.Lock()
+        self._connections: Dict[object, List[object]] = {}
+
+    def register(self, transaction, dbapi_connection) -> None:
+        with self._lock:
+            self._connections.setdefault(transaction, []).append(dbapi_connection)
+
+    def unregister(self, transaction) -> None:
+        with self._lock:
+            self._connections.pop(transaction, None)
+
+    def cancel(self) -> int:
+        """Cancel whatever the request's connections are running; returns how many were signalled."""
+        with self._lock:
+            self.disconnected = True
+            connections = [c for group in self._connections.values() for c in group]
+        for dbapi_connection in connections:
+            cancel = getattr(dbapi_connection, "cancel", None) or getattr(dbapi_connection, "interrupt", None)
+            if cancel is None:
+                continue
+            try:
+                cancel()
+            except Exception as e:
+                logger.warning(f"Could not cancel query: {e}")
+        return len(connections)
+
+    def cancelled_error(self) -> HTTPException:
+        if self.disconnected:
+            return HTTPException(status_code=503, detail="Request cancelled: the client disconnected")
+        limit = timeout_seconds(self.route_class)
+        return HTTPException(
+            status_code=504,
+            detail=(
+                f"The query took longer than the {limit}s allowed for {self.route_class} requests; "
+                f"{RETRY_HINTS[self.route_class]}"
+            ),
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+
+
+_current_scope: ContextVar[Optional[QueryScope]] = ContextVar("query_scope", default=None)
+
+
+def current_scope() -> Optional[QueryScope]:
+    return _current_scope.get()
+
+
+# ---------- dependencies ----------
+async def _cancel_on_disconnect(request: Request, scope: QueryScope) -> None:
+    while True:
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+        if await request.is_disconnected():
+            cancelled = await asyncio.to_thread(scope.cancel)
+            logger.info(f"Client left {request.method} {request.url.path}; cancelled {cancelled} running query(s)")
+            return
+
+
+async def query_scope(request: Request):
+    """
+    App-level dependency. Async so the context variable it sets is inherited
+    by the threadpool that runs the sync dependencies and endpoint.
+    """
+    scope = QueryScope()
+    _current_scope.set(scope)
+    watcher = None
+    if request.method in ("GET", "HEAD"):
+        watcher = asyncio.create_task(_cancel_on_disconnect(request, scope))
+    try:
+        yield scope
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+
+def query_class(route_class: str):
+    if route_class not in ROUTE_CLASSES:
+        raise ValueError(f"Unknown route class {route_class!r}")
+
+    def dependency() -> None:
+        scope = _current_scope.get()
+        if scope is not None:
+            scope.route_class = route_class
+
+    return dependency
+
+
+report_queries = query_class("report")
+admin_queries = query_class("admin")
+
+
+# ---------- session / engine hooks ----------
+@event.listens_for(Session, "after_begin")
+def _begin_scoped_transaction(session, transaction, connection):
+    scope = _current_scope.get()
+    if scope is None:
+        return
+    set_statement_timeout(connection, scope.route_class)
+    scope.register(transaction, connection.connection.dbapi_connection)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _end_scoped_transaction(session, transaction):
+    scope = _current_scope.get()
+    if scope is not None:
+        scope.unregister(transaction)
+
+
+@event.listens_for(Engine, "handle_error")
+def _translate_cancelled_statement(context):
+    scope = _current_scope.get()
+    if scope is None:
+        return
+    timed_out = getattr(context.original_exception, "pgcode", None) == QUERY_CANCELED
+    if timed_out or scope.disconnected:
+        if not scope.disconnected:
+            logger.warning(
+                f"Statement cancelled after the {timeout_seconds(scope.route_class)}s "
+                f"{scope.route_class} limit: {context.statement[:200] if context.statement else ''}"
+            )
+        raise scope.cancelled_error() from context.original_exception
+
+
+# ---------- pool exhaustion ----------
+async def pool_timeout_handler(request: Request, exc: Exception):
+    """sqlalchemy.exc.TimeoutError: no pooled connection became free within DB_POOL_TIMEOUT."""
+    logger.warning(f"Connection pool exhausted on {request.method} {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The server is busy, please retry shortly"},
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
@@ -1,8 +1,9 @@
 import logging
 
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.responses import JSONResponse
 from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from app.core.db import engine
 from app.routes.auth import router as auth_router
 from app.routes.settlements import router as settlement_router
@@ -15,9 +16,12 @@ from app.routes import silk
 from app.routes import reports
 from app.routes import sms
 from app.routes import saala
+from app.routes import transactions
 from app.routes import print_templates
 from app.routes import docx_print_templates
 from app.routes import health  # Health check endpoints
+from app.routes import analytics
+from app.routes import jobs
 from app.routes.admin import router as admin_router
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
@@ -28,6 +32,10 @@ from app.core.structured_logging import log_security_event
 from app.core.redis_client import redis_client
 from app.core.request_id_middleware import RequestIDMiddleware
 from app.core.cache_middleware import CacheMiddleware
+from app.core.render_pool import render_pool
+from app.core.jobs import job_pool
+from app.core.live_events import live_events
+from app.core.statement_timeouts import pool_timeout_handler, query_scope
 import uvicorn
 from app.core.db import engine, wait_for_db, Base
 
@@ -45,7 +53,9 @@ app = FastAPI(
     docs_url=None if settings.REQUIRE_SECURE_SECRETS else "/docs",
     redoc_url=None if settings.REQUIRE_SECURE_SECRETS else "/redoc",
     openapi_url=None if settings.REQUIRE_SECURE_SECRETS else "/openapi.json",
-    redirect_slashes=False
+    redirect_slashes=False,
+    # Statement timeout / disconnect cancellation scope for every request
+    dependencies=[Depends(query_scope)],
 )
 
 # Startup and shutdown events
@@ -63,6 +73,15 @@ async def startup_event():
     if not settings.MASTER_ADMIN_USERNAME or not settings.MASTER_ADMIN_PASSWORD_HASH:
         raise RuntimeError("Master admin credentials not configured")
 
+    # ✅ Spawn warm render workers before the first report request
+    render_pool.start()
+
+    # ✅ Background job workers (claim from the jobs table)
+    job_pool.start()
+
+    # ✅ LISTEN for silk dashboard deltas (Postgres only)
+    live_events.start()
+
     logger.info("Application started successfully")
 
 @app.on_event("shutdown")
@@ -71,6 +90,9 @@ async def shutdown_event():
     logger.info("Shutting down application...")
     # Close Redis connection if it was opened
     await redis_client.close()
+    render_pool.shutdown()
+    job_pool.shutdown()
+    live_events.shutdown()
     logger.info("Application shut down successfully")
 
 # Security Middleware Chain (Order matters!)
@@ -98,9 +120,9 @@ app.add_middleware(
     allow_origins=allowed_origins,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Authorization", "Content-Type"],
+    allow_headers=["Authorization", "Content-Type", "If-None-Match"],
     # Security: Expose only necessary headers
-    expose_headers=["X-Request-ID"],
+    expose_headers=["X-Request-ID", "ETag"],
 )
 
 app.include_router(auth_router, prefix="/api")
@@ -118,9 +140,12 @@ app.include_router(silk.router, prefix="/api")
 app.include_router(reports.router, prefix="/api")
 app.include_router(sms.router, prefix="/api")
 app.include_router(saala.router, prefix="/api")
+app.include_router(transactions.router, prefix="/api")
 app.include_router(print_templates.router, prefix="/api")
 app.include_router(docx_print_templates.router, prefix="/api")
 app.include_router(health.router, prefix="/api")
+app.include_router(analytics.router, prefix="/api")
+app.include_router(jobs.router, prefix="/api")
 app.include_router(admin_router, prefix="/api")
 
 
@@ -134,6 +159,10 @@ def legacy_health() -> dict:
     return {"status": "ok"}
 
 
+# Every pooled connection stayed busy for DB_POOL_TIMEOUT: 503 + Retry-After
+app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
+
+
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(request: Request, exc: Exception):
     """Enhanced catch-all handler with proper error logging and optional Sentry integration.
@@ -5,6 +5,8 @@ from app.models.vehicle import Vehicle
 from app.models.collection import Collection
 from app.models.collection_item import CollectionItem
 from app.models.advance import Advance
+from app.models.advance_balance import AdvanceBalance, AdvanceBalanceCheckpoint
+from app.models.ledger_checkpoint import FarmerLedgerCheckpoint, StaleLedgerFarmer
 from app.models.settlement import Settlement
 from app.models.settlement_item import SettlementItem
 from app.models.user import User
@@ -15,3 +17,7 @@ from app.models.silk_physical_digital_entry import SilkPhysicalDigitalEntry
 from app.models.silk_daily_collection import SilkDailyCollection
 from app.models.saala_customer import SaalaCustomer, SaalaTransaction
 
+from app.models.vendor_data_version import VendorDataVersion, VendorSourceVersion
+from app.models.farmer_code_counter import FarmerCodeCounter
+from app.models.job import Job
+from app.models.silk_sync_state import SilkSyncState
@@ -1,9 +1,15 @@
-from sqlalchemy import Column, Integer, Numeric, Text, TIMESTAMP, ForeignKey, func
+from sqlalchemy import Column, Integer, Numeric, Text, TIMESTAMP, ForeignKey, func, Index
 from sqlalchemy.orm import relationship
 from app.core.db import Base
 
 class Advance(Base):
     __tablename__ = "advances"
+    __table_args__ = (
+        # Balance as of a date: one month of a farmer's advances after its checkpoint
+        Index("ix_advances_farmer_created", "farmer_id", "created_at"),
+    )
+    # created_at is read back on insert: the balance hooks file the advance under its month
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
 
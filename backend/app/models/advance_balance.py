@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, Numeric, DATE, TIMESTAMP, ForeignKey, func, Index
+from app.core.db import Base
+
+
+class AdvanceBalance(Base):
+    """
+    Current advance position of a farmer: the running totals of the
+    ``advances`` table, kept up to date from the session flush hooks in
+    app.core.advance_balances. Rebuilt and checked by manage_advances.py.
+    """
+    __tablename__ = "advance_balances"
+    __table_args__ = (
+        Index("ix_advance_balances_vendor_id", "vendor_id"),
+    )
+
+    farmer_id = Column(Integer, ForeignKey("farmers.id", ondelete="CASCADE"), primary_key=True)
+    vendor_id = Column(Integer, ForeignKey("vendors.id", ondelete="CASCADE"), nullable=False)
+
+    given = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")     # Sum of positive amounts
+    deducted = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")  # Sum of negative amounts, as a positive number
+    balance = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")   # given - deducted
+
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+
+class AdvanceBalanceCheckpoint(Base):
+    """
+    Month-end advance position of a farmer. ``given``/``deducted`` are the
+    month's movements, ``closing_balance`` the balance after the last advance
+    of the month. Months without advances (or with only zero amounts) have
+    no row.
+    """
+    __tablename__ = "advance_balance_checkpoints"
+    __table_args__ = (
+        Index("ix_advance_checkpoints_vendor_month", "vendor_id", "month"),
+    )
+
+    farmer_id = Column(Integer, ForeignKey("farmers.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(DATE, primary_key=True)  # First day of the month
+    vendor_id = Column(Integer, ForeignKey("vendors.id", ondelete="CASCADE"), nullable=False)
+
+    given = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")
+    deducted = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")
+    closing_balance = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")
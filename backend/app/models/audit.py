@@ -29,7 +29,9 @@ class Audit(Base):
     before_data = Column(JSON, nullable=True)
     after_data = Column(JSON, nullable=True)
 
-    created_at = Column(TIMESTAMP, server_default=func.now())
+    # Partition key: range-partitioned by month in the database (primary key
+    # (id, created_at)); see app.core.partitions.
+    created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
 
     vendor = relationship("Vendor", backref="audits")
     user = relationship("User", backref="audits")
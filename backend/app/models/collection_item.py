@@ -1,12 +1,15 @@
 from sqlalchemy import (
     Column, Integer, String, Numeric, DATE, Boolean, Text,
-    ForeignKey, TIMESTAMP, func, Index
+    ForeignKey, TIMESTAMP, func, Index, Computed
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from app.core.db import Base
 
 
 class CollectionItem(Base):
+    # Range-partitioned by month on `date` in the database (primary key (id, date));
+    # see app.core.partitions.
     __tablename__ = "collection_items"
     __table_args__ = (
         Index("ix_collection_items_vendor_id", "vendor_id"),
@@ -37,12 +40,31 @@ class CollectionItem(Base):
     coolie_cost = Column(Numeric(12, 2), nullable=True)
     transport_cost = Column(Numeric(12, 2), nullable=True)
 
+    # Stored by the database, exact (not rounded to the paisa), for SUMs
+    gross_amount = Column(Numeric(26, 4), Computed("qty_kg * rate_per_kg", persisted=True))
+    luggage_amount = Column(
+        Numeric(26, 4),
+        Computed("coalesce(qty_kg * labour_per_kg, 0) + coalesce(transport_cost, 0)", persisted=True),
+    )
+
     total_labour = Column(Numeric(12, 2), nullable=True)
     line_total = Column(Numeric(12, 2), nullable=True)
 
     paid_amount = Column(Numeric(12, 2), nullable=True)
     remarks = Column(Text, nullable=True)
 
+    # Stored by the database for GET /transactions/search (GIN index with
+    # vendor_id, see migration search_tsv_column_20260701); not loaded by default
+    search_tsv = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('simple'::regconfig, "
+            "coalesce(vehicle_name, '') || ' ' || coalesce(vehicle_number, '') || ' ' || "
+            "coalesce(item_name, '') || ' ' || coalesce(remarks, ''))",
+            persisted=True,
+        ),
+    ))
+
     sms_sent = Column(Boolean, default=False)
     is_locked = Column(Boolean, default=False, nullable=False)
 
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, BigInteger, ForeignKey
+from app.core.db import Base
+
+
+class FarmerCodeCounter(Base):
+    """
+    Last farmer_code number handed out per vendor (F{vendor}-{NNNN}).
+
+    Advanced atomically by app.services.farmer_code_service; never read and
+    incremented separately.
+    """
+    __tablename__ = "farmer_code_counters"
+
+    vendor_id = Column(
+        Integer,
+        ForeignKey("vendors.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    last_value = Column(BigInteger, nullable=False, default=0, server_default="0")
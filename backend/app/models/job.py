@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, String, Text, Boolean, TIMESTAMP, ForeignKey, JSON, Index, text, func
+from app.core.db import Base
+
+
+class Job(Base):
+    """
+    Background job run by the in-process worker pool (app.core.jobs).
+
+    Workers claim QUEUED rows with SELECT ... FOR UPDATE SKIP LOCKED, so any
+    number of API processes can share the table without a broker. Progress,
+    heartbeat and cancellation are written by short separate transactions so
+    pollers see them while the job's own work is still uncommitted.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+
+    vendor_id = Column(Integer, ForeignKey("vendors.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    # Handler name from app.core.jobs.JOB_HANDLERS and its JSON arguments
+    kind = Column(String(50), nullable=False)
+    params = Column(JSON, nullable=False, default=dict)
+
+    # QUEUED / RUNNING / SUCCEEDED / FAILED / CANCELLED
+    status = Column(String(20), nullable=False, default="QUEUED", server_default="QUEUED")
+    progress = Column(Integer, nullable=True)
+    progress_message = Column(String(255), nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False, server_default=text("false"))
+
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    # File under JOBS_DIR written by the handler (e.g. an export)
+    artifact_path = Column(String(500), nullable=True)
+    artifact_media_type = Column(String(100), nullable=True)
+
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    worker = Column(String(100), nullable=True)
+
+    created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+    started_at = Column(TIMESTAMP, nullable=True)
+    heartbeat_at = Column(TIMESTAMP, nullable=True)
+    finished_at = Column(TIMESTAMP, nullable=True)
+
+    __table_args__ = (
+        # Claim order; only the queue itself is indexed
+        Index("ix_jobs_queued", "id", postgresql_where=text("status = 'QUEUED'")),
+        Index("ix_jobs_vendor_created", "vendor_id", "created_at"),
+    )
@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, Numeric, DATE, TIMESTAMP, ForeignKey, Index, func
+from app.core.db import Base
+
+
+class FarmerLedgerCheckpoint(Base):
+    """
+    Closing position of a farmer's ledger at the end of a month: the totals
+    of every collection line dated up to the end of ``month``, computed the
+    way the ledger report computes them (app.utils.report_rows). Kept up to
+    date from the session flush hooks in app.core.ledger_checkpoints and
+    checked/rebuilt by manage_ledger_checkpoints.py. Months without lines have
+    no row; the money columns of the last earlier row are the opening balance.
+    """
+    __tablename__ = "farmer_ledger_checkpoints"
+    __table_args__ = (
+        Index("ix_ledger_checkpoints_vendor_month", "vendor_id", "month"),
+    )
+
+    farmer_id = Column(Integer, ForeignKey("farmers.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(DATE, primary_key=True)  # First day of the month
+    vendor_id = Column(Integer, ForeignKey("vendors.id", ondelete="CASCADE"), nullable=False)
+
+    line_count = Column(Integer, nullable=False, default=0, server_default="0")  # Lines dated in this month
+
+    # Running totals from the farmer's first line through the end of the month
+    qty = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")
+    gross = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")       # qty x rate
+    commission = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")  # Per line, at the farmer's current rate
+    luggage = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")     # qty x labour_per_kg + transport
+    coolie = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")
+    paid = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")
+    net = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")         # gross - commission
+
+
+class StaleLedgerFarmer(Base):
+    """
+    Farmer whose checkpoints no longer match their lines because their
+    commission rate changed. Marked by the flush hook, which queues a
+    ``ledger_checkpoints_rebuild`` job; the rebuild removes the mark. Until
+    then readers compute the farmer's opening balance from the lines.
+    """
+    __tablename__ = "stale_ledger_farmers"
+
+    farmer_id = Column(Integer, ForeignKey("farmers.id", ondelete="CASCADE"), primary_key=True)
+    vendor_id = Column(Integer, ForeignKey("vendors.id", ondelete="CASCADE"), nullable=False)
+    marked_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
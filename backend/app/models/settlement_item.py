@@ -14,6 +14,8 @@ class SettlementItem(Base):
         nullable=False,
     )
 
+    # The database has no FK constraint here since collection_items became
+    # partitioned (its primary key is (id, date)); kept for the ORM relationship.
     collection_item_id = Column(
         Integer,
         ForeignKey("collection_items.id", ondelete="CASCADE"),
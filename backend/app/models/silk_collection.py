@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, DATE, TIMESTAMP, ForeignKey, func, Index, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Numeric, DATE, TIMESTAMP, ForeignKey, func, Index, UniqueConstraint, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from app.core.db import Base
 import enum
@@ -13,12 +13,13 @@ class CollectionStatus(str, enum.Enum):
 class SilkCollection(Base):
     """
     Daily silk collection record tracking manual payment entries
-    and reconciliation against ledger totals.
+    and reconciliation against ledger totals. One row per vendor and date.
     """
     __tablename__ = "silk_collections"
     __table_args__ = (
         Index("ix_silk_collections_vendor_id", "vendor_id"),
         Index("ix_silk_collections_date", "date"),
+        UniqueConstraint("vendor_id", "date", name="uq_silk_collections_vendor_date"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
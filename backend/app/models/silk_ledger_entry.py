@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, DATE, TIMESTAMP, ForeignKey, func, Index
+from sqlalchemy import Column, Integer, String, Numeric, DATE, TIMESTAMP, ForeignKey, func, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.core.db import Base
 
@@ -7,17 +7,22 @@ class SilkLedgerEntry(Base):
     """
     Silk ledger entries track daily transactions for silk products.
     Each entry represents a transaction with qty (pieces), kg (weight), and rate.
+    Entries created by the sync point back at their collection line.
     """
     __tablename__ = "silk_ledger_entries"
     __table_args__ = (
         Index("ix_silk_ledger_vendor_id", "vendor_id"),
         Index("ix_silk_ledger_customer_id", "customer_id"),
         Index("ix_silk_ledger_date", "date"),
+        UniqueConstraint("collection_item_id", name="uq_silk_ledger_collection_item"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
     vendor_id = Column(Integer, ForeignKey("vendors.id", ondelete="CASCADE"), nullable=False)
     customer_id = Column(Integer, ForeignKey("farmers.id", ondelete="CASCADE"), nullable=False)
+    # Set by the sync; no FK constraint in the database since collection_items
+    # is partitioned (its primary key is (id, date)). Unique: one entry per line.
+    collection_item_id = Column(Integer, ForeignKey("collection_items.id"), nullable=True)
 
     date = Column(DATE, nullable=False)
     qty = Column(Numeric(12, 2), nullable=False)  # Pieces
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, TIMESTAMP, ForeignKey, func
+from app.core.db import Base
+
+
+class SilkSyncState(Base):
+    """
+    High-water mark of the silk ledger sync (app.services.silk_sync_service).
+
+    Every collection line with an id up to ``last_collection_item_id`` has
+    been considered, so the next sync only scans lines added after it.
+    """
+    __tablename__ = "silk_sync_state"
+
+    vendor_id = Column(
+        Integer,
+        ForeignKey("vendors.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    last_collection_item_id = Column(Integer, nullable=False, default=0, server_default="0")
+    synced_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
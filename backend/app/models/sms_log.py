@@ -20,7 +20,9 @@ class SMSLog(Base):
     # SENT / FAILED / DELIVERED
     status = Column(String(20), nullable=False)
 
-    created_at = Column(TIMESTAMP, server_default=func.now())
+    # Partition key: range-partitioned by month in the database (primary key
+    # (id, created_at)); see app.core.partitions.
+    created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
 
     vendor = relationship("Vendor", backref="sms_logs")
     farmer = relationship("Farmer", backref="sms_logs")
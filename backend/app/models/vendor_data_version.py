@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, BigInteger, String, TIMESTAMP, ForeignKey, func
+from app.core.db import Base
+
+
+class VendorDataVersion(Base):
+    """
+    Monotonic per-vendor counter of committed data changes.
+
+    Bumped from the session flush hooks (see app.core.audit_events) whenever a
+    vendor-scoped row is inserted, updated or deleted. Read endpoints derive
+    their ETag from it, so a client revalidation costs one primary key lookup.
+    """
+    __tablename__ = "vendor_data_versions"
+
+    vendor_id = Column(
+        Integer,
+        ForeignKey("vendors.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+
+class VendorSourceVersion(Base):
+    """
+    Per-vendor counter for one master-data table (see app.core.data_version
+    SOURCE_TABLES).
+
+    Unlike VendorDataVersion it only moves when that table is written, so
+    caches built from farmers or the catalog survive the steady stream of
+    collection entries.
+    """
+    __tablename__ = "vendor_source_versions"
+
+    vendor_id = Column(
+        Integer,
+        ForeignKey("vendors.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    source = Column(String(32), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Body, Header
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field, ConfigDict
 from app.core.db import get_db
+from app.core.statement_timeouts import admin_queries
 from app.models.user import User
 from app.models.vendor import Vendor
 from app.core.security import hash_password, verify_password
@@ -16,7 +17,7 @@ import re
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/admin", tags=["Admin"])
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(admin_queries)])
 
 # Master admin token will have 10-minute TTL with special role
 MASTER_ADMIN_TOKEN_TTL = 10  # minutes
@@ -1,9 +1,11 @@
+from datetime import date
 from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, Field, ConfigDict
 from sqlalchemy.orm import Session
 
+from app.core.advance_balances import advance_summary, balance_as_of
 from app.core.db import get_db
 from app.dependencies import get_current_user
 from app.models.farmer import Farmer
@@ -39,6 +41,7 @@ def get_customer_advances(
 
     Response shape is compatible with the existing React AdvanceTracker:
     { given, deducted, balance, logs: [{ id, type, val, date, remarks }...] }.
+    The totals come from the maintained advance balance, not the logs.
     """
 
     farmer = (
@@ -56,18 +59,12 @@ def get_customer_advances(
         .all()
     )
 
-    given = 0.0
-    deducted = 0.0
+    given, deducted, balance = advance_summary(db, user.vendor_id, farmer_id)
     logs: list[dict] = []
 
     for a in rows:
         amt = float(a.amount or 0)
-        if amt >= 0:
-            given += amt
-            direction = "give"
-        else:
-            deducted += -amt
-            direction = "deduct"
+        direction = "give" if amt >= 0 else "deduct"
 
         logs.append(
             {
@@ -79,15 +76,42 @@ def get_customer_advances(
             }
         )
 
-    balance = given - deducted
     return {
-        "given": given,
-        "deducted": deducted,
-        "balance": balance,
+        "given": float(given),
+        "deducted": float(deducted),
+        "balance": float(balance),
         "logs": logs,
     }
 
 
+@router.get("/{farmer_id}/advances/balance")
+def get_customer_advance_balance(
+    farmer_id: int,
+    as_of: date | None = Query(None, description="Balance at the end of this day (YYYY-MM-DD); current if omitted"),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Advance balance of a customer, now or as of a past date."""
+
+    farmer = (
+        db.query(Farmer)
+        .filter(Farmer.id == farmer_id, Farmer.vendor_id == user.vendor_id)
+        .first()
+    )
+    if not farmer:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customer not found")
+
+    if as_of is None:
+        balance = advance_summary(db, user.vendor_id, farmer_id)[2]
+    else:
+        balance = balance_as_of(db, user.vendor_id, farmer_id, as_of)
+    return {
+        "farmer_id": farmer_id,
+        "as_of": as_of.isoformat() if as_of else None,
+        "balance": float(balance),
+    }
+
+
 @router.post("/{farmer_id}/advances/", status_code=status.HTTP_201_CREATED)
 def add_customer_advance(
     farmer_id: int,
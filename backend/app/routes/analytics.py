@@ -0,0 +1,104 @@
+"""
+Historical analytics endpoints, answered by the optional DuckDB engine over
+the latest Parquet snapshot (app.core.analytics) instead of Postgres.
+
+Results are as fresh as the last ``manage_analytics.py export``; every
+response carries the snapshot time. 503 when duckdb is not installed or no
+snapshot exists yet.
+"""
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+import logging
+
+from app.core import analytics as engine
+from app.core.archive import season_bounds, season_of
+from app.dependencies import get_current_user
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Analytics"]
+)
+
+
+def _respond(rows, **params):
+    return {"data": rows, "metadata": {**params, "snapshot_at": engine.analytics.snapshot["exported_at"]}}
+
+
+def _run(query, *args, **kwargs):
+    try:
+        return query(*args, **kwargs)
+    except engine.AnalyticsUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _date_range(from_date: Optional[date], to_date: Optional[date]):
+    """Defaults to the current season so far."""
+    to_date = to_date or date.today()
+    from_date = from_date or season_bounds(season_of(to_date))[0]
+    if from_date > to_date:
+        raise HTTPException(status_code=400, detail="from_date must be on or before to_date")
+    return from_date, to_date
+
+
+# ---------- status ----------
+@router.get("/status")
+def get_analytics_status(user = Depends(get_current_user)):
+    """Current snapshot: export time and row counts."""
+    try:
+        snapshot = engine.analytics.status()
+    except engine.AnalyticsUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {
+        "snapshot_at": snapshot["exported_at"],
+        "tables": snapshot["tables"],
+        "archive_files": len(snapshot["archive_files"]),
+    }
+
+
+# ---------- trends ----------
+@router.get("/item-price-trends")
+def get_item_price_trends(
+    from_date: Optional[date] = Query(None, description="Start date (defaults to the current season start)"),
+    to_date: Optional[date] = Query(None, description="End date (defaults to today)"),
+    bucket: str = Query("month", description="Period: week, month, quarter or year"),
+    item_name: Optional[str] = Query(None, description="Only this item"),
+    user = Depends(get_current_user)
+):
+    """Per item and period: lines, quantity, amount, weighted average rate and min/max rate."""
+    from_date, to_date = _date_range(from_date, to_date)
+    rows = _run(engine.item_price_trends, user.vendor_id, from_date, to_date, bucket, item_name)
+    return _respond(rows, from_date=from_date.isoformat(), to_date=to_date.isoformat(), bucket=bucket)
+
+
+@router.get("/farmer-volume-ranking")
+def get_farmer_volume_ranking(
+    from_date: Optional[date] = Query(None, description="Start date (defaults to the current season start)"),
+    to_date: Optional[date] = Query(None, description="End date (defaults to today)"),
+    limit: int = Query(50, ge=1, le=1000),
+    user = Depends(get_current_user)
+):
+    """Farmers ranked by quantity supplied, with share of the total and settlements in the period."""
+    from_date, to_date = _date_range(from_date, to_date)
+    rows = _run(engine.farmer_volume_ranking, user.vendor_id, from_date, to_date, limit)
+    return _respond(rows, from_date=from_date.isoformat(), to_date=to_date.isoformat(), limit=limit)
+
+
+@router.get("/group-growth")
+def get_group_growth(
+    first_season: Optional[int] = Query(None, description="First season (year it starts in); defaults to 2 seasons back"),
+    last_season: Optional[int] = Query(None, description="Last season; defaults to the current one"),
+    user = Depends(get_current_user)
+):
+    """Per farmer group and season: quantity, amount, active farmers and growth over the previous season."""
+    last_season = last_season if last_season is not None else season_of(date.today())
+    first_season = first_season if first_season is not None else last_season - 2
+    if first_season > last_season:
+        raise HTTPException(status_code=400, detail="first_season must not be after last_season")
+    rows = _run(engine.group_growth, user.vendor_id, first_season, last_season)
+    return _respond(rows, first_season=first_season, last_season=last_season)
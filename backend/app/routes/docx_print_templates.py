@@ -1,25 +1,27 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
 from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
 from datetime import date
 from typing import Optional
 from pathlib import Path
 import os
 
 from app.core.db import get_db
+from app.core.statement_timeouts import report_queries
 from app.dependencies import get_current_user
 from app.models.collection_item import CollectionItem
 from app.models.farmer import Farmer
-from app.models.advance import Advance
+from app.core.advance_balances import current_balances
 from app.models.farmer_group import FarmerGroup
+from app.utils.commission_rates import get_commission_rates
 from app.routes.reports import render_template  # Use shared render_template function
 from app.routes import reports as report_routes  # Reuse new HTML report endpoints
 
 
 router = APIRouter(
     prefix="/print-docx",
-    tags=["DOCX Print Templates"]
+    tags=["DOCX Print Templates"],
+    dependencies=[Depends(report_queries)]
 )
 
 
@@ -29,7 +31,7 @@ def get_ledger_report_pdf(
     farmer_id: int = Query(..., description="Farmer ID"),
     from_date: date = Query(..., description="Start date"),
     to_date: date = Query(..., description="End date"),
-    commission_pct: float = Query(12.0, description="Commission percentage"),
+    commission_pct: Optional[float] = Query(None, description="Commission percentage (defaults to the farmer's rate)"),
     db: Session = Depends(get_db),
     user = Depends(get_current_user)
 ):
@@ -95,6 +97,8 @@ def get_ledger_report_pdf(
             total_paid += paid
         
         # Calculate summary
+        if commission_pct is None:
+            commission_pct = float(get_commission_rates(db, user.vendor_id).farmer_percent(farmer_id))
         commission_rate = commission_pct / 100
         commission = total_amount * commission_rate
         net_amount = total_amount - commission
@@ -149,11 +153,8 @@ def get_ledger_report_pdf(
             total_coolie_sum += coolie
         
         # Prepare template data (include farmer name/address and luggage/coolie totals)
-        # Compute rem_advance (sum of advances) for accurate remaining advance
-        adv_sum = db.query(func.coalesce(func.sum(Advance.amount), 0)).filter(
-            Advance.vendor_id == user.vendor_id,
-            Advance.farmer_id == farmer_id
-        ).scalar() or 0
+        # rem_advance from the maintained advance balance
+        adv_sum = current_balances(db, user.vendor_id, [farmer_id]).get(farmer_id, 0)
 
         template_data = {
             "rows": transformed_rows,
@@ -200,7 +201,7 @@ def get_ledger_report_docx(
     farmer_id: int = Query(..., description="Farmer ID"),
     from_date: date = Query(..., description="Start date"),
     to_date: date = Query(..., description="End date"),
-    commission_pct: float = Query(12.0, description="Commission percentage"),
+    commission_pct: Optional[float] = Query(None, description="Commission percentage (defaults to the farmer's rate)"),
     db: Session = Depends(get_db),
     user = Depends(get_current_user)
 ):
@@ -265,6 +266,8 @@ def get_ledger_report_docx(
             total_paid += paid
         
         # Calculate summary
+        if commission_pct is None:
+            commission_pct = float(get_commission_rates(db, user.vendor_id).farmer_percent(farmer_id))
         commission_rate = commission_pct / 100
         commission = total_amount * commission_rate
         net_amount = total_amount - commission
@@ -352,7 +355,7 @@ def get_ledger_report_docx(
         html_content = template.render(
             name=farmer.name,
             address=farmer.address or "N/A",
-            rem_advance=str(farmer.advance_total or 0),
+            rem_advance=str(current_balances(db, user.vendor_id, [farmer_id]).get(farmer_id, 0)),
             group_name=group_name,
             commission_pct=commission_pct,
             from_date=from_date.strftime("%d-%m-%Y"),
@@ -433,7 +436,7 @@ def get_group_patti_report_docx(
     group_id: int = Query(..., description="Group ID"),
     from_date: date = Query(..., description="Start date"),
     to_date: date = Query(..., description="End date"),
-    commission_pct: float = Query(12.0, description="Commission percentage"),
+    commission_pct: Optional[float] = Query(None, description="Commission percentage (defaults to the farmer's rate)"),
     db: Session = Depends(get_db),
     user = Depends(get_current_user)
 ):
@@ -497,6 +500,7 @@ def get_group_patti_report_docx(
         
         # Create a lookup dict for farmer details
         farmer_lookup = {f.id: f for f in farmers}
+        rates = get_commission_rates(db, user.vendor_id)
         
         for farmer in farmers:
             # Get items for this farmer
@@ -537,8 +541,9 @@ def get_group_patti_report_docx(
                     "amount": f"{(qty * rate + luggage - paid):.2f}"
                 })
             
-            # Calculate commission and net
-            farmer_commission = farmer_gross * (commission_pct / 100)
+            # Calculate commission and net (at the farmer's own rate unless one was given)
+            farmer_pct = commission_pct if commission_pct is not None else float(rates.farmer_percent(farmer.id))
+            farmer_commission = farmer_gross * (farmer_pct / 100)
             farmer_net = farmer_gross - farmer_commission
             farmer_balance = farmer_net + farmer_luggage - farmer_paid
             
@@ -568,7 +573,7 @@ def get_group_patti_report_docx(
             totals['balance'] += farmer_balance
 
         # Calculate commission for totals
-        total_commission = totals['gross'] * (commission_pct / 100)
+        total_commission = totals['commission']
         total_net = totals['gross'] - total_commission
         total_balance = total_net + totals['paid']
 
@@ -617,7 +622,7 @@ def get_group_patti_report_docx(
                 'total_qty': f"{sum(float(c['total_qty']) for c in customers):.2f}" if customers else "0.00",
                 'total_amount': f"{totals['gross']:.2f}"
             },
-            commission_pct=commission_pct,
+            commission_pct=commission_pct if commission_pct is not None else rates.for_group(group.id) / 100,
             from_date=from_date.strftime("%d-%m-%Y"),
             to_date=to_date.strftime("%d-%m-%Y"),
             current_date=__import__('datetime').datetime.now().strftime("%d-%m-%Y"),
@@ -966,6 +971,7 @@ def get_daily_sales_report_docx(
             to_date=to_date,
             item_name=item_name,
             format="html",
+            diagnostics=False,
             db=db,
             user=user,
         )
@@ -8,6 +8,7 @@ from app.models.farmer import Farmer
 from app.models.collection_item import CollectionItem
 from app.schemas.farmer_group import FarmerGroupCreate, FarmerGroupUpdate
 from app.dependencies import get_current_user
+from app.core.conditional_get import reference_data_etag
 
 router = APIRouter(
     prefix="/farmer-groups",
@@ -56,7 +57,7 @@ def create_farmer_group(
     return group
 
 # ---------- READ (LIST) ----------
-@router.get("/")
+@router.get("/", dependencies=[Depends(reference_data_etag)])
 def list_farmer_groups(
     db: Session = Depends(get_db),
     user = Depends(get_current_user)
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, func
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 
 from app.core.db import get_db
 from app.models.farmer import Farmer
@@ -9,6 +10,12 @@ from app.models.farmer_group import FarmerGroup
 from app.schemas.farmer import FarmerCreate, FarmerUpdate
 from fastapi import Body
 from app.dependencies import get_current_user
+from app.core.conditional_get import reference_data_etag
+from app.utils.search_index import search_documents
+from app.services.farmer_code_service import (
+    allocate_farmer_code, is_farmer_code_collision, reserve_farmer_code,
+)
+from app.services.farmer_import_service import import_farmers, iter_import_rows, ImportFileError
 
 router = APIRouter(
     prefix="/farmers",
@@ -25,17 +32,18 @@ def require_admin(user):
 
 # ---------- Helpers ----------
 def _generate_farmer_code(db: Session, vendor_id: int) -> str:
-    """Generate a unique farmer_code within a vendor scope.
+    """Allocate the next farmer_code (F{vendor}-{NNNN}) within a vendor scope."""
+    return allocate_farmer_code(db, vendor_id)
 
-    Uses a simple sequential scheme: F{vendor}-{NNNN} and ensures uniqueness.
-    """
-    base = db.query(Farmer).filter(Farmer.vendor_id == vendor_id).count() + 1
-    while True:
-        code = f"F{vendor_id}-{base:04d}"
-        exists = db.query(Farmer.id).filter(Farmer.farmer_code == code).first()
-        if not exists:
-            return code
-        base += 1
+def _commit_farmer(db: Session) -> None:
+    """Commit a farmer write; a farmer_code collision is a 409 rather than a 500."""
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        if not is_farmer_code_collision(exc):
+            raise
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Farmer code already in use")
 
 # ---------- CREATE ----------
 @router.post("/", status_code=201)
@@ -71,14 +79,14 @@ def create_farmer(
     )
 
     db.add(farmer)
-    db.commit()
+    _commit_farmer(db)
     db.refresh(farmer)
 
     return farmer
 
 
 # ---------- READ (LIST) ----------
-@router.get("/")
+@router.get("/", dependencies=[Depends(reference_data_etag)])
 def list_farmers(
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=1000),
@@ -119,8 +127,32 @@ def list_farmers(
     return items
 
 
+# ---------- BULK IMPORT (CSV / XLSX) ----------
+@router.post("/import")
+def import_farmers_file(
+    file: UploadFile = File(..., description="CSV or XLSX with columns: name, phone, address, group"),
+    dry_run: bool = Query(False, description="Validate only, do not insert"),
+    db: Session = Depends(get_db),
+    user = Depends(get_current_user),
+):
+    """Create many farmers from a spreadsheet.
+
+    Rows with errors are skipped and reported as [{row, errors}] using the
+    spreadsheet row number; all other rows are inserted in one transaction.
+    """
+    require_admin(user)
+
+    try:
+        rows = iter_import_rows(file.file, file.filename)
+        return import_farmers(db, vendor_id=user.vendor_id, user_id=user.id, rows=rows, dry_run=dry_run)
+    except (ImportFileError, UnicodeDecodeError) as e:
+        db.rollback()
+        detail = "File must be UTF-8 encoded" if isinstance(e, UnicodeDecodeError) else str(e)
+        raise HTTPException(status_code=400, detail=detail)
+
+
 # ---------- READ (SELECT UI: by group / search) ----------
-@router.get("/by-group/")
+@router.get("/by-group/", dependencies=[Depends(reference_data_etag)])
 def list_farmers_by_group(
     group_id: int | None = None,
     group_name: str | None = None,
@@ -134,14 +166,18 @@ def list_farmers_by_group(
 
     The payload is shaped for dropdown/autocomplete components:
     [{ id, name, code, label, value, phone }].
+    Served from the search index (see app.utils.search_index), so results are
+    ranked by relevance when q is given and by name otherwise.
     """
     # Hard cap to prevent accidental overload
     size = min(size, 1000)
     offset = (page - 1) * size
-    query = db.query(Farmer)\
-        .options(joinedload(Farmer.group))\
-        .filter(Farmer.vendor_id == user.vendor_id)
+    items, _total = _search_farmers(db, user, group_id, group_name, q, offset, size)
+    return items
 
+
+def _search_farmers(db: Session, user, group_id, group_name, q, offset: int, limit: int):
+    """Run a farmer autocomplete lookup, returning (items, total)."""
     if group_id is None and group_name:
         grp = db.query(FarmerGroup.id).filter(
             FarmerGroup.vendor_id == user.vendor_id,
@@ -150,49 +186,21 @@ def list_farmers_by_group(
         if grp:
             group_id = grp.id if hasattr(grp, "id") else grp[0]
 
-    if group_id is not None:
-        query = query.filter(Farmer.group_id == group_id)
-
-    if q:
-        like = f"%{q}%"
-        query = query.filter(or_(Farmer.name.ilike(like), Farmer.farmer_code.ilike(like)))
+    return search_documents(db, "farmers", user.vendor_id, q, group_id=group_id, offset=offset, limit=limit)
 
-    total = query.count()
-    rows = query.order_by(Farmer.name.asc()).offset(offset).limit(size).all()
 
-    def to_select(f: Farmer):
-        code = f.farmer_code or ""
-        label = f"{code} - {f.name}".strip(" -")
-        return {
-            "id": f.id,
-            "name": f.name,
-            "group_name": f.group.name if f.group else None,
-            "code": code,
-            "farmer_code": code,
-            "label": label,
-            "value": f.id,
-            "phone": f.phone,
-            # Expose address so frontend can show it when a customer is selected.
-            "address": f.address,
-        }
-
-    items = [to_select(f) for f in rows]
-    
-    return items
-
-
-@router.get("/group/{group_id}/")
+@router.get("/group/{group_id}/", dependencies=[Depends(reference_data_etag)])
 def list_farmers_group_path(
     group_id: int,
     q: str | None = None,
     db: Session = Depends(get_db),
     user = Depends(get_current_user),
 ):
-    return list_farmers_by_group(group_id=group_id, group_name=None, q=q, db=db, user=user)
+    return list_farmers_by_group(group_id=group_id, group_name=None, q=q, page=1, size=100, db=db, user=user)
 
 
 # ---------- SELECT2-compatible search ----------
-@router.get("/select2")
+@router.get("/select2", dependencies=[Depends(reference_data_etag)])
 def select2(
     group_id: int | None = None,
     group_name: str | None = None,
@@ -237,16 +245,13 @@ def select2(
     if group_id is None:
         group_id = group
 
-    # If no group is provided, return all farmers for vendor
-    base = list_farmers_by_group(group_id=group_id, group_name=group_name, q=q, db=db, user=user)
-
-    # Simple pagination on the Python side (data sets expected to be small per vendor)
+    # If no group is provided, search all farmers for vendor
+    per_page = max(1, min(per_page, 1000))
     start = max(0, (page - 1) * per_page)
-    end = start + per_page
-    slice_ = base[start:end]
+    slice_, total = _search_farmers(db, user, group_id, group_name, q, start, per_page)
     return {
         "results": [{"id": f["id"], "text": f["label"], "code": f["code"], "name": f["name"]} for f in slice_],
-        "pagination": {"more": end < len(base)},
+        "pagination": {"more": start + per_page < total},
     }
 
 
@@ -254,17 +259,17 @@ def select2(
 customers = APIRouter(prefix="/customers", tags=["Customers"]) 
 
 
-@customers.get("/by-group/")
+@customers.get("/by-group/", dependencies=[Depends(reference_data_etag)])
 def customers_by_group(group_id: int | None = None, group_name: str | None = None, q: str | None = None, db: Session = Depends(get_db), user = Depends(get_current_user)):
-    return list_farmers_by_group(group_id=group_id, group_name=group_name, q=q, db=db, user=user)
+    return list_farmers_by_group(group_id=group_id, group_name=group_name, q=q, page=1, size=100, db=db, user=user)
 
 
-@customers.get("/group/{group_id}/")
+@customers.get("/group/{group_id}/", dependencies=[Depends(reference_data_etag)])
 def customers_group_path(group_id: int, q: str | None = None, db: Session = Depends(get_db), user = Depends(get_current_user)):
     return list_farmers_group_path(group_id=group_id, q=q, db=db, user=user)
 
 
-@customers.get("/select2")
+@customers.get("/select2", dependencies=[Depends(reference_data_etag)])
 def customers_select2(
     group_id: int | None = None,
     group_name: str | None = None,
@@ -296,7 +301,7 @@ def customers_select2(
 
 
 # Root customers endpoint returning select list (no pagination) for UIs that call /customers with optional params
-@customers.get("/")
+@customers.get("/", dependencies=[Depends(reference_data_etag)])
 def customers_root(
     group_id: int | None = None,
     group_name: str | None = None,
@@ -325,6 +330,16 @@ def customers_root(
     )
 
 
+@customers.post("/import")
+def customers_import(
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False),
+    db: Session = Depends(get_db),
+    user = Depends(get_current_user),
+):
+    return import_farmers_file(file=file, dry_run=dry_run, db=db, user=user)
+
+
 # Compatibility create/delete endpoints so legacy /customers API continues to work
 from pydantic import BaseModel, ConfigDict
 
@@ -376,7 +391,7 @@ def create_customer_compat(
     )
 
     db.add(farmer)
-    db.commit()
+    _commit_farmer(db)
     db.refresh(farmer)
 
     # Shape matches list_farmers() output so frontend can reuse it
@@ -480,11 +495,17 @@ def update_farmer(
 
         farmer.group_id = data.group_id
 
+    if data.farmer_code and data.farmer_code != farmer.farmer_code:
+        try:
+            reserve_farmer_code(db, user.vendor_id, data.farmer_code)
+        except ValueError as exc:
+            raise HTTPException(400, str(exc))
+
     # Safe field updates
     for field, value in data.dict(exclude_unset=True).items():
         setattr(farmer, field, value)
 
-    db.commit()
+    _commit_farmer(db)
     db.refresh(farmer)
 
     return farmer
@@ -4,6 +4,8 @@ Health and readiness check endpoints for monitoring and orchestration.
 from fastapi import APIRouter, HTTPException
 from sqlalchemy import text
 from app.core.db import engine
+from app.core.render_pool import render_pool
+from app.core.read_routing import replica_monitor
 import logging
 
 logger = logging.getLogger(__name__)
@@ -94,4 +96,24 @@ async def database_health():
                 "connected": False,
                 "error": str(e)
             }
-        }
\ No newline at end of file
+        }
+
+@router.get("/health/render")
+async def render_pool_health():
+    """
+    Render pool metrics for this API worker: queue depth and per-task
+    completed/failed/timeout/rejected counts with average and max durations.
+    """
+    return render_pool.stats()
+
+
+@router.get("/health/replica")
+def replica_health():
+    """
+    Read replica used for report traffic: replication lag as last probed by
+    this worker and whether reads are currently routed to it.
+    """
+    if replica_monitor is None:
+        return {"configured": False}
+    replica_monitor.usable()
+    return replica_monitor.status()
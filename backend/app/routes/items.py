@@ -5,6 +5,8 @@ from app.core.db import get_db
 from app.dependencies import get_current_user
 from app.models.catalog import Catalog
 from app.schemas.item import ItemCreate, ItemUpdate
+from app.core.conditional_get import reference_data_etag
+from app.utils.search_index import search_documents
 
 router = APIRouter(prefix="/catalog", tags=["Catalog"])
 
@@ -18,7 +20,7 @@ def _to_ui(item: Catalog) -> dict:
     }
 
 
-@router.get("/", operation_id="getCatalogItems")
+@router.get("/", operation_id="getCatalogItems", dependencies=[Depends(reference_data_etag)])
 def list_items(
     q: str | None = None,
     page: int = Query(1, ge=1),
@@ -30,15 +32,9 @@ def list_items(
     size = min(size, 1000)
     offset = (page - 1) * size
     
-    query = db.query(Catalog).filter(Catalog.vendor_id == user.vendor_id)
-    if q:
-        like = f"%{q}%"
-        query = query.filter((Catalog.name.ilike(like)) | (Catalog.code.ilike(like)))
-    
-    total = query.count()
-    rows = query.order_by(Catalog.name.asc()).offset(offset).limit(size).all()
-    
-    return [_to_ui(r) for r in rows]
+    # Served from the search index (ranked when q is given)
+    items, _total = search_documents(db, "catalog", user.vendor_id, q, offset=offset, limit=size)
+    return items
 
 
 @router.post("/", status_code=201, operation_id="createCatalogItem")
@@ -95,7 +91,7 @@ def delete_item(item_id: int, db: Session = Depends(get_db), user=Depends(get_cu
 alias = APIRouter(prefix="/items", tags=["Catalog"])
 
 
-@alias.get("/")
+@alias.get("/", dependencies=[Depends(reference_data_etag)])
 async def list_items_alias(
     q: str | None = None,
     page: int = Query(1, ge=1),
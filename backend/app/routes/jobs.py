@@ -0,0 +1,129 @@
+"""
+Background jobs (app.core.jobs): queue one, poll its progress, cancel it and
+download its artifact. Jobs are only visible to their own vendor.
+"""
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+import logging
+
+from app.core import jobs
+from app.core.db import get_db
+from app.dependencies import get_current_user
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["Jobs"]
+)
+
+
+class JobCreate(BaseModel):
+    kind: str = Field(..., description="Handler name, e.g. report_export or silk_sync")
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+
+def _job_response(job: Job) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "params": job.params,
+        "status": job.status,
+        "progress": job.progress,
+        "progress_message": job.progress_message,
+        "cancel_requested": job.cancel_requested,
+        "result": job.result,
+        "error": job.error,
+        "artifact_url": f"/api/jobs/{job.id}/artifact" if job.artifact_path else None,
+        "attempts": job.attempts,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def _get_job(db: Session, job_id: int, vendor_id: int) -> Job:
+    job = db.execute(
+        select(Job).where(Job.id == job_id, Job.vendor_id == vendor_id)
+    ).scalar_one_or_none()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+# ---------- queue ----------
+@router.post("", status_code=202)
+def create_job(
+    data: JobCreate,
+    db: Session = Depends(get_db),
+    user = Depends(get_current_user)
+):
+    """Queue a job; poll GET /api/jobs/{id} until its status is SUCCEEDED, FAILED or CANCELLED."""
+    try:
+        job = jobs.enqueue(db, user.vendor_id, user.id, data.kind, data.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    db.refresh(job)
+    return _job_response(job)
+
+
+@router.get("")
+def list_jobs(
+    status: Optional[str] = Query(None, description="QUEUED, RUNNING, SUCCEEDED, FAILED or CANCELLED"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    user = Depends(get_current_user)
+):
+    """The vendor's most recent jobs, newest first."""
+    query = select(Job).where(Job.vendor_id == user.vendor_id)
+    if status:
+        query = query.where(Job.status == status.upper())
+    rows = db.execute(query.order_by(Job.id.desc()).limit(limit)).scalars()
+    return [_job_response(job) for job in rows]
+
+
+# ---------- one job ----------
+@router.get("/{job_id}")
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    user = Depends(get_current_user)
+):
+    """Status, progress and - once finished - result, error and artifact link."""
+    return _job_response(_get_job(db, job_id, user.vendor_id))
+
+
+@router.post("/{job_id}/cancel", status_code=202)
+def cancel_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    user = Depends(get_current_user)
+):
+    """Queued jobs are cancelled at once; running ones stop at their next progress report."""
+    job = _get_job(db, job_id, user.vendor_id)
+    if job.status in jobs.FINISHED:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status.lower()}")
+    jobs.cancel(db, job.id)
+    db.commit()
+    db.refresh(job)
+    return _job_response(job)
+
+
+@router.get("/{job_id}/artifact")
+def download_job_artifact(
+    job_id: int,
+    db: Session = Depends(get_db),
+    user = Depends(get_current_user)
+):
+    job = _get_job(db, job_id, user.vendor_id)
+    path = jobs.artifact_file(job)
+    if path is None or not path.is_file():
+        raise HTTPException(status_code=404, detail="This job has no artifact")
+    return FileResponse(path, media_type=job.artifact_media_type, filename=path.name)
@@ -1,20 +1,21 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from datetime import date
 from typing import Optional
 
 from app.core.db import get_db
+from app.core.statement_timeouts import report_queries
 from app.dependencies import get_current_user
 from app.models.collection_item import CollectionItem
 from app.models.farmer import Farmer
 from app.models.farmer_group import FarmerGroup
-from app.models.advance import Advance
+from app.core.advance_balances import current_balances
 from app.services.print_service import PrintService
 
 router = APIRouter(
     prefix="/print",
-    tags=["Print Templates"]
+    tags=["Print Templates"],
+    dependencies=[Depends(report_queries)]
 )
 
 
@@ -87,11 +88,8 @@ def get_ledger_report(
     net_amount = total_amount - commission
     final_total = net_amount + total_luggage - total_paid
     
-    # Compute rem_advance from advances table
-    adv_sum = db.query(func.coalesce(func.sum(Advance.amount), 0)).filter(
-        Advance.vendor_id == user.vendor_id,
-        Advance.farmer_id == farmer_id
-    ).scalar() or 0
+    # rem_advance from the maintained advance balance
+    adv_sum = current_balances(db, user.vendor_id, [farmer_id]).get(farmer_id, 0)
 
     return PrintService.render_ledger_report(
         farmer_name=farmer.name,
@@ -11,21 +11,28 @@ from ..schemas.saala import (
 )
 from ..core.dependencies import get_db, get_current_user
 from ..models.user import User
+from ..utils.search_index import search_documents
 
 router = APIRouter(prefix="/saala", tags=["saala"])
 
 
 @router.get("/customers/", response_model=List[SaalaCustomerResponse])
 def list_saala_customers(
+    q: Optional[str] = Query(None, description="Search by name or contact (optional)"),
+    page: int = Query(1, ge=1),
+    size: Optional[int] = Query(None, ge=1, le=1000, description="Page size (default: all customers)"),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
     """
-    Get all SAALA customers for the current vendor.
+    Get SAALA customers for the current vendor, optionally filtered by q.
+    Served from the search index, ranked by relevance when q is given.
+    Without ``size`` every matching customer is returned, as before paging.
     """
-    customers = db.query(SaalaCustomer).filter(
-        SaalaCustomer.vendor_id == user.vendor_id
-    ).all()
+    offset = (page - 1) * size if size else 0
+    customers, _total = search_documents(
+        db, "saala_customers", user.vendor_id, q, offset=offset, limit=size
+    )
     return customers
 
 
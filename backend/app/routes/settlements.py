@@ -1,15 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
-from datetime import date
+from datetime import date, datetime
 
+from app.core.advance_balances import ZERO, current_balances
 from app.core.db import get_db
+from app.core.ledger_checkpoints import closing_totals, opening_totals
 from app.dependencies import get_current_user
+from app.models.advance import Advance
 from app.models.settlement import Settlement
 from app.models.settlement_item import SettlementItem
 from app.models.collection_item import CollectionItem
 from app.models.farmer import Farmer
 from app.schemas.settlement import SettlementCreate
+from app.utils.commission_rates import get_commission_rates
+from app.utils.report_rows import build_lines
+from app.utils.reports_db import ledger_lines_statement
 
 router = APIRouter(
     prefix="/settlements",
@@ -24,6 +30,64 @@ def require_admin(user):
             detail="Admin access required"
         )
 
+# ---------- Helpers ----------
+def _advance_balance(db: Session, vendor_id: int, farmer_id: int):
+    """Outstanding advance from the maintained balances (app.core.advance_balances)."""
+    return current_balances(db, vendor_id, [farmer_id]).get(farmer_id, ZERO)
+
+def _record_advance(db: Session, settlement: Settlement, amount, note: str) -> None:
+    """Deductions and restorations go into the advances ledger; the balance hooks do the rest."""
+    if amount:
+        db.add(Advance(
+            vendor_id=settlement.vendor_id,
+            farmer_id=settlement.farmer_id,
+            amount=amount,
+            note=note,
+        ))
+
+# ---------- LEDGER STATEMENT ----------
+@router.get("/statement/{farmer_id}")
+def settlement_statement(
+    farmer_id: int,
+    date_from: date,
+    date_to: date,
+    db: Session = Depends(get_db),
+    user = Depends(get_current_user)
+):
+    """
+    Ledger position of a farmer for a settlement period: the opening totals
+    of every earlier line (from the monthly ledger checkpoints), the period's
+    totals and the closing totals. Reads at most one month of lines before
+    ``date_from``.
+    """
+    if date_from > date_to:
+        raise HTTPException(400, "date_from must be on or before date_to")
+
+    farmer = db.query(Farmer).filter(
+        Farmer.id == farmer_id,
+        Farmer.vendor_id == user.vendor_id
+    ).first()
+
+    if not farmer:
+        raise HTTPException(404, "Farmer not found")
+
+    rates = get_commission_rates(db, user.vendor_id)
+    opening = opening_totals(db, user.vendor_id, [farmer.id], date_from, rates)[farmer.id]
+    lines, period = build_lines(
+        db.execute(ledger_lines_statement(user.vendor_id, [farmer.id], date_from, date_to)).all(),
+        rates.for_farmer(farmer.id),
+    )
+
+    return {
+        "farmer_id": farmer.id,
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "line_count": len(lines),
+        "opening": opening.formatted(),
+        "period": period.formatted(),
+        "closing": closing_totals(opening, period).formatted(),
+    }
+
 # ---------- CREATE SETTLEMENT ----------
 @router.post("/", status_code=201)
 def generate_settlement(
@@ -57,7 +121,7 @@ def generate_settlement(
         )
 
     # ---------- FINANCIAL CALCULATIONS ----------
-    gross_amount = sum(i.qty_kg * i.rate_per_kg for i in items)
+    gross_amount = sum(i.gross_amount for i in items)
     total_labour = sum(i.total_labour for i in items)
     total_coolie = sum(i.coolie_cost for i in items)
     total_transport = sum(i.transport_cost for i in items)
@@ -69,11 +133,8 @@ def generate_settlement(
         - total_transport
     )
 
-    commission_percent = (
-        farmer.commission_percent
-        if farmer.commission_percent is not None
-        else farmer.group.commission_percent
-    )
+    # farmer override → group → vendor default
+    commission_percent = get_commission_rates(db, user.vendor_id).farmer_percent(farmer.id)
 
     commission_amount = net_before_commission * (commission_percent / 100)
 
@@ -84,7 +145,7 @@ def generate_settlement(
         data.advance_deduction_percent / 100
     )
 
-    advance_deducted = min(farmer.advance_total, max_advance_allowed)
+    advance_deducted = min(_advance_balance(db, user.vendor_id, farmer.id), max_advance_allowed)
 
     net_payable = net_after_commission - advance_deducted
 
@@ -119,7 +180,10 @@ def generate_settlement(
         item.is_locked = True
 
     # Reduce farmer advance
-    farmer.advance_total -= advance_deducted
+    _record_advance(
+        db, settlement, -advance_deducted,
+        f"Advance adjusted in settlement {data.date_from} to {data.date_to}",
+    )
 
     db.commit()
     db.refresh(settlement)
@@ -145,12 +209,14 @@ def void_settlement(
         raise HTTPException(404, "Active settlement not found")
 
     # Restore farmer advance
-    farmer = settlement.farmer
-    farmer.advance_total += settlement.advance_deducted
+    _record_advance(
+        db, settlement, settlement.advance_deducted,
+        f"Advance restored: settlement {settlement.id} voided",
+    )
 
     # Unlock collection items
     for item in settlement.items:
-        item.is_locked = False
+        item.collection_item.is_locked = False
 
     # Mark settlement voided
     settlement.status = "VOIDED"
@@ -185,9 +251,15 @@ def recalculate_settlement(
         Settlement.date_to == data.date_to
     ).first()
 
+    available_advance = _advance_balance(db, user.vendor_id, farmer.id)
+
     # 🔁 Restore advance if settlement already existed
     if settlement:
-        farmer.advance_total += settlement.advance_deducted
+        _record_advance(
+            db, settlement, settlement.advance_deducted,
+            f"Advance restored: settlement {settlement.id} recalculated",
+        )
+        available_advance += settlement.advance_deducted or ZERO
     else:
         settlement = Settlement(
             vendor_id=user.vendor_id,
@@ -208,24 +280,21 @@ def recalculate_settlement(
     if not items:
         raise HTTPException(400, "No collections found")
 
-    gross = sum(i.qty_kg * i.rate_per_kg for i in items)
+    gross = sum(i.gross_amount for i in items)
     labour = sum(i.total_labour for i in items)
     coolie = sum(i.coolie_cost for i in items)
     transport = sum(i.transport_cost for i in items)
 
     net = gross - labour - coolie - transport
 
-    commission_percent = (
-        farmer.commission_percent
-        if farmer.commission_percent is not None
-        else farmer.group.commission_percent
-    )
+    # farmer override → group → vendor default
+    commission_percent = get_commission_rates(db, user.vendor_id).farmer_percent(farmer.id)
 
     commission = net * (commission_percent / 100)
     net_after_commission = net - commission
 
     advance_deducted = min(
-        farmer.advance_total,
+        available_advance,
         net_after_commission * (data.advance_deduction_percent / 100)
     )
 
@@ -238,7 +307,10 @@ def recalculate_settlement(
     settlement.advance_deducted = advance_deducted
     settlement.net_payable = net_after_commission - advance_deducted
 
-    farmer.advance_total -= advance_deducted
+    _record_advance(
+        db, settlement, -advance_deducted,
+        f"Advance adjusted in settlement {data.date_from} to {data.date_to}",
+    )
 
     db.commit()
     return settlement
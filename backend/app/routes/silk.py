@@ -1,20 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, inspect
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import Optional
 import logging
 from sqlalchemy.exc import IntegrityError
 
 from app.core.db import get_db
+from app.core.read_routing import get_read_db
+from app.core.statement_timeouts import report_queries
+from app.core.jobs import enqueue
+from app.core.live_events import live_events, take_snapshot
 from app.dependencies import get_current_user
-from app.models.silk_ledger_entry import SilkLedgerEntry
 from app.models.silk_collection import SilkCollection, CollectionStatus
 from app.models.silk_physical_digital_entry import SilkPhysicalDigitalEntry
 from app.models.farmer import Farmer
 from app.models.collection_item import CollectionItem
 from app.models.saala_customer import SaalaCustomer, SaalaTransaction
+from app.services.silk_reconciliation_service import MAX_RANGE_DAYS, reconcile_range
+from app.services.silk_sync_service import SYNC_WINDOW_DAYS, sync_silk_ledger
 from pydantic import BaseModel, Field
 
 logger = logging.getLogger(__name__)
@@ -35,6 +42,13 @@ class SilkCollectionCreate(BaseModel):
     upi: float = Field(0, ge=0, description="UPI/PhonePe amount")
 
 
+class SilkCollectionRangeReconcile(BaseModel):
+    """Schema for reconciling silk collections over a date range"""
+    from_date: str = Field(..., description="Start date in YYYY-MM-DD format")
+    to_date: str = Field(..., description="End date in YYYY-MM-DD format")
+    entries: list[SilkCollectionCreate] = Field(default_factory=list, description="Payment inputs for days being entered")
+
+
 class SilkPhysicalDigitalEntryCreate(BaseModel):
     """Schema for creating a silk physical and digital collection entry"""
     date: str = Field(..., description="Date in YYYY-MM-DD format")
@@ -94,10 +108,10 @@ class DailyCreditResponse(BaseModel):
 
 # ========== ENDPOINTS ==========
 
-@router.get("/ledger", response_model=LedgerSummary)
+@router.get("/ledger", response_model=LedgerSummary, dependencies=[Depends(report_queries)])
 def get_silk_ledger_aggregation(
     date: str = Query(..., description="Date in YYYY-MM-DD format"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user = Depends(get_current_user)
 ):
     """
@@ -161,6 +175,42 @@ def get_silk_ledger_aggregation(
     }
 
 
+@router.get("/live")
+async def stream_silk_live(
+    date: str = Query(..., description="Date in YYYY-MM-DD format"),
+    user = Depends(get_current_user)
+):
+    """
+    Server-Sent Events for the reconciliation screen, replacing polls of
+    /ledger, /credit and /daily-collections:
+
+    - ``snapshot``: group kg/amount, credit per customer (and credit_total)
+      and cash/UPI for the date
+    - ``delta``: signed changes to add to the snapshot as rows are committed
+    - ``resync``: the stream fell behind; reconnect for a fresh snapshot
+
+    Read it with fetch rather than EventSource, which cannot send the bearer token.
+    """
+    try:
+        target_date = datetime.strptime(date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    # Subscribe before reading the snapshot so no commit falls in between
+    subscription = live_events.subscribe(user.vendor_id)
+    try:
+        snapshot, txids = await run_in_threadpool(take_snapshot, user.vendor_id, target_date)
+    except Exception:
+        live_events.unsubscribe(subscription)
+        raise
+
+    return StreamingResponse(
+        live_events.stream(subscription, snapshot, txids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/collections", response_model=CollectionResponse)
 def save_silk_collection(
     data: SilkCollectionCreate,
@@ -191,7 +241,7 @@ def save_silk_collection(
 
     # Fetch ledger total for the date from regular transactions
     ledger_total = (
-        db.query(func.sum(CollectionItem.qty_kg * CollectionItem.rate_per_kg))
+        db.query(func.sum(CollectionItem.gross_amount))
         .filter(
             CollectionItem.vendor_id == user.vendor_id,
             CollectionItem.date == target_date
@@ -264,6 +314,49 @@ def save_silk_collection(
     }
 
 
+@router.post("/collections/reconcile")
+def reconcile_silk_collections(
+    data: SilkCollectionRangeReconcile,
+    db: Session = Depends(get_db),
+    user = Depends(get_current_user)
+):
+    """
+    Saves and reconciles a whole date range at once (month-end back-filling).
+
+    - Days listed in ``entries`` are saved with their credit/cash/UPI
+    - Days that already have a collection are re-checked against the ledger
+    - Returns a calendar with every day of the range: MATCHED, MISMATCH,
+      or no status when nothing was entered
+    """
+    try:
+        start = datetime.strptime(data.from_date, "%Y-%m-%d").date()
+        end = datetime.strptime(data.to_date, "%Y-%m-%d").date()
+        entry_dates = [datetime.strptime(entry.date, "%Y-%m-%d").date() for entry in data.entries]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    if start > end:
+        raise HTTPException(status_code=400, detail="from_date must be on or before to_date")
+    if (end - start).days + 1 > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {MAX_RANGE_DAYS} days")
+    if len(set(entry_dates)) != len(entry_dates):
+        raise HTTPException(status_code=400, detail="Each date can only be entered once")
+    if any(d < start or d > end for d in entry_dates):
+        raise HTTPException(status_code=400, detail="Entries must fall within the date range")
+
+    entries = {
+        d: {
+            "credit": Decimal(str(entry.credit)),
+            "cash": Decimal(str(entry.cash)),
+            "upi": Decimal(str(entry.upi)),
+        }
+        for d, entry in zip(entry_dates, data.entries)
+    }
+    calendar = reconcile_range(db, user.vendor_id, user.id, start, end, entries)
+    db.commit()
+    return calendar
+
+
 @router.post("/physical-digital-entries", response_model=SilkPhysicalDigitalResponse)
 def save_silk_physical_digital_entry(
     data: SilkPhysicalDigitalEntryCreate,
@@ -450,6 +543,7 @@ def list_silk_collections(
     
 @router.post("/sync-from-transactions")
 def sync_silk_ledger_from_transactions(
+    background: bool = Query(False, description="Queue as a background job and return its id (poll /api/jobs/{id})"),
     db: Session = Depends(get_db),
     user = Depends(get_current_user)
 ):
@@ -457,43 +551,14 @@ def sync_silk_ledger_from_transactions(
     Sync silk ledger entries from regular collection items.
     Creates silk ledger entries from collection items grouped by customer group.
     """
+    if background:
+        job = enqueue(db, user.vendor_id, user.id, "silk_sync")
+        db.commit()
+        return JSONResponse(status_code=202, content={"job_id": job.id, "status": job.status})
+
     try:
-        # Get all collection items for the user's vendor for the last 30 days
-        from datetime import timedelta
-        thirty_days_ago = datetime.now().date() - timedelta(days=30)
-        
-        collection_items = db.query(CollectionItem).filter(
-            CollectionItem.vendor_id == user.vendor_id,
-            CollectionItem.date >= thirty_days_ago
-        ).all()
-        
-        created_count = 0
-        for item in collection_items:
-            # Skip items without farmer_id or date
-            if not item.farmer_id or not item.date:
-                continue
-                
-            # Check if silk ledger entry already exists for this combination
-            existing_silk = db.query(SilkLedgerEntry).filter(
-                SilkLedgerEntry.vendor_id == user.vendor_id,
-                SilkLedgerEntry.customer_id == item.farmer_id,
-                SilkLedgerEntry.date == item.date,
-                SilkLedgerEntry.kg == item.qty_kg,
-                SilkLedgerEntry.rate == item.rate_per_kg
-            ).first()
-            
-            if not existing_silk:
-                silk_entry = SilkLedgerEntry(
-                    vendor_id=user.vendor_id,
-                    customer_id=item.farmer_id,
-                    date=item.date,
-                    qty=item.qty_kg,  # Using qty_kg as pieces for silk
-                    kg=item.qty_kg,   # Using qty_kg as kg for silk
-                    rate=item.rate_per_kg
-                )
-                db.add(silk_entry)
-                created_count += 1
-        
+        thirty_days_ago = datetime.now().date() - timedelta(days=SYNC_WINDOW_DAYS)
+        created_count = sync_silk_ledger(db, user.vendor_id, thirty_days_ago)
         db.commit()
         return {"message": f"Successfully synced {created_count} silk ledger entries from collection items", "created_count": created_count}
     
@@ -502,11 +567,11 @@ def sync_silk_ledger_from_transactions(
         raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
 
 
-@router.get("/credit", response_model=DailyCreditResponse)
-@router.get("/credit/", response_model=DailyCreditResponse)
+@router.get("/credit", response_model=DailyCreditResponse, dependencies=[Depends(report_queries)])
+@router.get("/credit/", response_model=DailyCreditResponse, dependencies=[Depends(report_queries)])
 def get_silk_daily_credit(
     date: str = Query(..., description="Date in YYYY-MM-DD format"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user = Depends(get_current_user)
 ):
     """
@@ -552,6 +617,8 @@ def get_silk_daily_credit(
                 
                 logger.debug(f"Customer {customer.id}: credit = {daily_credit}")
                 
+            except HTTPException:
+                raise
             except Exception as e:
                 logger.error(f"Error calculating credit for customer {customer.id}: {str(e)}")
                 continue  # Skip this customer and continue with others
@@ -563,16 +630,18 @@ def get_silk_daily_credit(
             "total_credit": total_daily_credit
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in get_silk_daily_credit: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@router.get("/saala-transactions-by-date-range")
+@router.get("/saala-transactions-by-date-range", dependencies=[Depends(report_queries)])
 def get_saala_transactions_by_date_range(
     from_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
     to_date: str = Query(..., description="End date in YYYY-MM-DD format"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user = Depends(get_current_user)
 ):
     """
@@ -645,6 +714,8 @@ def get_saala_transactions_by_date_range(
                     
                     logger.debug(f"Customer {customer.id}: {len(transaction_data)} transactions")
                 
+            except HTTPException:
+                raise
             except Exception as e:
                 logger.error(f"Error fetching transactions for customer {customer.id}: {str(e)}")
                 continue  # Skip this customer and continue with others
@@ -658,6 +729,8 @@ def get_saala_transactions_by_date_range(
             "total_customers": len(result)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in get_saala_transactions_by_date_range: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -0,0 +1,95 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import Optional
+
+from app.core.db import get_db
+from app.dependencies import get_current_user
+from app.models.collection_item import CollectionItem
+from app.models.farmer import Farmer
+from app.utils.text_search import to_prefix_tsquery
+
+router = APIRouter(
+    prefix="/transactions",
+    tags=["Transactions"]
+)
+
+
+# ---------- SEARCH (vehicle / item / remarks) ----------
+@router.get("/search")
+def search_transactions(
+    q: str = Query(..., min_length=1, description="Words to match in vehicle, item or remarks"),
+    from_date: Optional[date] = Query(None, description="Start date (optional)"),
+    to_date: Optional[date] = Query(None, description="End date (optional)"),
+    farmer_id: Optional[int] = Query(None, description="Restrict to one farmer (optional)"),
+    page: int = Query(1, ge=1),
+    size: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    user = Depends(get_current_user)
+):
+    """
+    Full-text search over collection items, newest first.
+
+    Every word in q is matched as a prefix ("ros tn09" finds "Rose" on vehicle
+    "TN09 AB 1234") against the stored ``search_tsv`` column: common words are
+    read newest-first off the (vendor_id, date) index, rare ones through the
+    (vendor_id, search_tsv) GIN index. No total count is computed - ``has_more``
+    tells the UI whether to offer another page. ``benchmark_transaction_search.py``
+    measures both paths.
+    """
+    tsquery = to_prefix_tsquery(q)
+    if tsquery is None:
+        raise HTTPException(status_code=400, detail="Search text must contain letters or digits")
+
+    query = db.query(
+        CollectionItem.id,
+        CollectionItem.date,
+        CollectionItem.farmer_id,
+        Farmer.name,
+        CollectionItem.vehicle_name,
+        CollectionItem.vehicle_number,
+        CollectionItem.item_code,
+        CollectionItem.item_name,
+        CollectionItem.qty_kg,
+        CollectionItem.rate_per_kg,
+        CollectionItem.remarks,
+    ).outerjoin(Farmer, CollectionItem.farmer_id == Farmer.id)\
+     .filter(
+        CollectionItem.vendor_id == user.vendor_id,
+        CollectionItem.search_tsv.op("@@")(tsquery),
+    )
+
+    if from_date:
+        query = query.filter(CollectionItem.date >= from_date)
+    if to_date:
+        query = query.filter(CollectionItem.date <= to_date)
+    if farmer_id is not None:
+        query = query.filter(CollectionItem.farmer_id == farmer_id)
+
+    offset = (page - 1) * size
+    rows = query.order_by(CollectionItem.date.desc(), CollectionItem.id.desc())\
+        .offset(offset).limit(size + 1).all()
+
+    results = [
+        {
+            "id": r.id,
+            "date": r.date.isoformat() if r.date else None,
+            "farmerId": r.farmer_id,
+            "farmerName": r.name or "",
+            "vehicle": r.vehicle_name or r.vehicle_number or "",
+            "vehicleNumber": r.vehicle_number or "",
+            "itemCode": r.item_code or "",
+            "itemName": r.item_name or "",
+            "qty": float(r.qty_kg or 0),
+            "rate": float(r.rate_per_kg or 0),
+            "remarks": r.remarks or "",
+        }
+        for r in rows[:size]
+    ]
+
+    return {
+        "results": results,
+        "page": page,
+        "size": size,
+        "has_more": len(rows) > size,
+    }
@@ -6,6 +6,7 @@ from app.core.db import get_db
 from app.models.vehicle import Vehicle
 from app.dependencies import get_current_user
 from app.schemas.vehicle import VehicleCreate, VehicleUpdate
+from app.core.conditional_get import reference_data_etag
 
 router = APIRouter(
     prefix="/vehicles",
@@ -74,7 +75,7 @@ def create_vehicle(
     }
 
 # ---------- READ (LIST) ----------
-@router.get("/")
+@router.get("/", dependencies=[Depends(reference_data_etag)])
 def list_vehicles(
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=1000),
@@ -28,6 +28,22 @@ class FarmerCreate(BaseModel):
     group_name: str = Field(..., min_length=1, max_length=100)
 
 
+# =========================
+# BULK IMPORT ROW
+# =========================
+# Unlike FarmerCreate, phone, address and group are optional: the columns are
+# nullable, /customers/ already creates farmers without them, and existing
+# registers being migrated in bulk are often missing them for some farmers.
+# Rejecting those rows would only make users invent placeholder values.
+class FarmerImportRow(BaseModel):
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True)
+
+    name: str = Field(..., min_length=1, max_length=100)
+    phone: Optional[str] = Field(None, min_length=5, max_length=20)
+    address: Optional[str] = Field(None, max_length=255)
+    group_name: Optional[str] = Field(None, max_length=100)
+
+
 # =========================
 # UPDATE (PARTIAL)
 # =========================
@@ -16,11 +16,9 @@ from reportlab.lib import colors
 # Get the base directory of the project
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 TEMPLATE_DIR = os.path.join(BASE_DIR, "app", "templates", "docx_templates")
-OUTPUT_DIR = os.path.join(BASE_DIR, "app", "generated_reports")
 
 # Create directories if they don't exist
 os.makedirs(TEMPLATE_DIR, exist_ok=True)
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 
 class DocxPrintService:
@@ -48,7 +46,9 @@ class DocxPrintService:
         template_path: str = None
     ) -> bytes:
         """
-        Generate a DOCX ledger report with dynamic table rows and convert to PDF
+        Generate a DOCX ledger report with dynamic table rows.
+        
+        Returns DOCX bytes; PDFs are rendered by PdfReportService.
         
         Args:
             template_path: Path to .docx template file (if None, uses default)
@@ -91,17 +91,7 @@ class DocxPrintService:
             # Render template
             doc.render(context)
             
-            # Save to temporary file
-            temp_docx_path = os.path.join(OUTPUT_DIR, f"temp_ledger_{datetime.now().timestamp()}.docx")
-            doc.save(temp_docx_path)
-            
-            # Convert to PDF
-            pdf_bytes = DocxPrintService._convert_docx_to_pdf(temp_docx_path)
-            
-            # Clean up temporary file
-            os.remove(temp_docx_path)
-            
-            return pdf_bytes
+            return DocxPrintService._to_bytes(doc)
             
         except Exception as e:
             raise Exception(f"Failed to generate ledger report: {str(e)}")
@@ -116,7 +106,7 @@ class DocxPrintService:
         totals: Dict[str, float],
         template_path: str = None
     ) -> bytes:
-        """Generate a group patti report with dynamic table rows"""
+        """Generate a DOCX group patti report with dynamic table rows (returns DOCX bytes)"""
         try:
             # Use default template if none provided
             if not template_path:
@@ -147,17 +137,7 @@ class DocxPrintService:
             # Render template
             doc.render(context)
             
-            # Save to temporary file
-            temp_docx_path = os.path.join(OUTPUT_DIR, f"temp_group_patti_{datetime.now().timestamp()}.docx")
-            doc.save(temp_docx_path)
-            
-            # Convert to PDF
-            pdf_bytes = DocxPrintService._convert_docx_to_pdf(temp_docx_path)
-            
-            # Clean up temporary file
-            os.remove(temp_docx_path)
-            
-            return pdf_bytes
+            return DocxPrintService._to_bytes(doc)
             
         except Exception as e:
             raise Exception(f"Failed to generate group patti report: {str(e)}")
@@ -269,18 +249,11 @@ class DocxPrintService:
         doc.save(template_path)
     
     @staticmethod
-    def _convert_docx_to_pdf(docx_path: str) -> bytes:
-        """Convert DOCX file to PDF bytes using reportlab"""
-        try:
-            # For now, we'll return the DOCX file as bytes since direct DOCX to PDF
-            # conversion requires more complex setup. In production, you might want
-            # to use libreoffice or unoconv for better conversion quality.
-            
-            with open(docx_path, 'rb') as f:
-                return f.read()
-                
-        except Exception as e:
-            raise Exception(f"Failed to convert DOCX to PDF: {str(e)}")
+    def _to_bytes(doc) -> bytes:
+        """Serialize a rendered document to DOCX bytes in memory."""
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        return buffer.getvalue()
     
     @staticmethod
     def create_dynamic_table(doc: Document, rows: List[Dict[str, Any]], headers: List[str]) -> None:
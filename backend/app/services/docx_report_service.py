@@ -1,8 +1,6 @@
 import os
 from datetime import datetime
 from typing import List, Dict, Any
-from docxtpl import DocxTemplate
-import tempfile
 from fastapi import HTTPException
 from fastapi.responses import Response
 import io
@@ -14,6 +12,8 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 
+from app.core.render_pool import render_pool
+
 # Get the base directory of the project
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 TEMPLATE_DIR = os.path.join(BASE_DIR, "templates")
@@ -21,10 +21,10 @@ CUSTOM_TEMPLATE_PATH = os.path.join(TEMPLATE_DIR, "Report_template.docx")
 
 
 class DocxReportService:
-    """Simplified service for generating DOCX reports with PDF conversion"""
+    """Service for generating DOCX reports (PDFs come from PdfReportService)"""
     
     @staticmethod
-    def generate_ledger_pdf(
+    def generate_ledger_docx(
         farmer_name: str,
         ledger_name: str,
         address: str,
@@ -43,7 +43,7 @@ class DocxReportService:
         paid_amount: float,
         final_total: float
     ) -> Response:
-        """Generate PDF ledger report using DOCX template"""
+        """Generate the ledger report as a DOCX from the template"""
         try:
             # Use your custom template
             template_path = CUSTOM_TEMPLATE_PATH
@@ -55,9 +55,6 @@ class DocxReportService:
             if not os.path.exists(template_path):
                 raise HTTPException(status_code=500, detail=f"Custom template not found at {template_path}. Please upload Report_template.docx to the templates directory.")
             
-            # Load template
-            doc = DocxTemplate(template_path)
-            
             # Prepare context with proper formatting
             context = {
                 'shop_name': 'SREE KRISHNA FLOWER STALL',
@@ -87,20 +84,8 @@ class DocxReportService:
                 'commission_pct': commission_pct
             }
             
-            # Render template
-            doc.render(context)
-            
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as tmp_file:
-                doc.save(tmp_file.name)
-                temp_path = tmp_file.name
-            
-            # For now, return DOCX file (in production, convert to PDF)
-            with open(temp_path, 'rb') as f:
-                content = f.read()
-            
-            # Clean up
-            os.unlink(temp_path)
+            # Render in the render pool
+            content = render_pool.run("docx", template_path, context)
             
             # Return as downloadable file
             return Response(
@@ -111,11 +96,13 @@ class DocxReportService:
                 }
             )
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to generate report: {str(e)}")
     
     @staticmethod
-    def generate_group_patti_pdf(
+    def generate_group_patti_docx(
         group_name: str,
         from_date: str,
         to_date: str,
@@ -123,7 +110,7 @@ class DocxReportService:
         rows: List[Dict[str, Any]],
         totals: Dict[str, float]
     ) -> Response:
-        """Generate PDF group patti report"""
+        """Generate the group patti report as a DOCX from the template"""
         try:
             # Use your custom template for group patti as well
             template_path = CUSTOM_TEMPLATE_PATH
@@ -132,8 +119,6 @@ class DocxReportService:
             if not os.path.exists(template_path):
                 raise HTTPException(status_code=500, detail=f"Custom template not found at {template_path}. Please upload Report_template.docx to the templates directory.")
             
-            doc = DocxTemplate(template_path)
-            
             context = {
                 'shop_name': 'SREE KRISHNA FLOWER STALL',
                 'group_name': group_name,
@@ -149,16 +134,8 @@ class DocxReportService:
                 'total_balance': f"{totals.get('balance', 0):,.2f}"
             }
             
-            doc.render(context)
-            
-            with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as tmp_file:
-                doc.save(tmp_file.name)
-                temp_path = tmp_file.name
-            
-            with open(temp_path, 'rb') as f:
-                content = f.read()
-            
-            os.unlink(temp_path)
+            # Render in the render pool
+            content = render_pool.run("docx", template_path, context)
             
             return Response(
                 content=content,
@@ -168,11 +145,13 @@ class DocxReportService:
                 }
             )
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to generate group patti report: {str(e)}")
     
     @staticmethod
-    def generate_group_total_pdf(
+    def generate_group_total_docx(
         group_name: str,
         from_date: str,
         to_date: str,
@@ -183,7 +162,7 @@ class DocxReportService:
         total_luggage: float,
         group_total: float,
     ) -> Response:
-        """Generate PDF group total report using DOCX template"""
+        """Generate the group total report as a DOCX from the template"""
         try:
             # Use your custom template for group total as well
             template_path = CUSTOM_TEMPLATE_PATH
@@ -192,8 +171,6 @@ class DocxReportService:
             if not os.path.exists(template_path):
                 raise HTTPException(status_code=500, detail=f"Custom template not found at {template_path}. Please upload Report_template.docx to the templates directory.")
             
-            doc = DocxTemplate(template_path)
-            
             # Prepare context for template
             context = {
                 "shop_name": "SREE KRISHNA FLOWER STALL",
@@ -220,20 +197,8 @@ class DocxReportService:
                 "final_total": f"{group_total:,.2f}",  # For compatibility
             }
             
-            # Render the template with context
-            doc.render(context)
-            
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as tmp_file:
-                doc.save(tmp_file.name)
-                temp_path = tmp_file.name
-            
-            # Read the content
-            with open(temp_path, 'rb') as f:
-                content = f.read()
-            
-            # Clean up
-            os.unlink(temp_path)
+            # Render in the render pool
+            content = render_pool.run("docx", template_path, context)
             
             # Create response with proper headers for download
             return Response(
@@ -243,11 +208,13 @@ class DocxReportService:
                     "Content-Disposition": f"attachment; filename=group_total_report_{group_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx"
                 }
             )
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to generate group total report: {str(e)}")
 
     @staticmethod
-    def generate_daily_sales_pdf(
+    def generate_daily_sales_docx(
         from_date: str,
         to_date: str,
         item_name: str,
@@ -255,7 +222,7 @@ class DocxReportService:
         total_qty: float,
         total_amount: float,
     ) -> Response:
-        """Generate PDF daily sales report using DOCX template"""
+        """Generate the daily sales report as a DOCX from the template"""
         try:
             # Use your custom template for daily sales as well
             template_path = CUSTOM_TEMPLATE_PATH
@@ -264,8 +231,6 @@ class DocxReportService:
             if not os.path.exists(template_path):
                 raise HTTPException(status_code=500, detail=f"Custom template not found at {template_path}. Please upload Report_template.docx to the templates directory.")
             
-            doc = DocxTemplate(template_path)
-            
             # Prepare context for template
             context = {
                 "shop_name": "SREE KRISHNA FLOWER STALL",
@@ -292,20 +257,8 @@ class DocxReportService:
                 "final_total": f"{total_amount:,.2f}",  # For compatibility
             }
             
-            # Render the template with context
-            doc.render(context)
-            
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as tmp_file:
-                doc.save(tmp_file.name)
-                temp_path = tmp_file.name
-            
-            # Read the content
-            with open(temp_path, 'rb') as f:
-                content = f.read()
-            
-            # Clean up
-            os.unlink(temp_path)
+            # Render in the render pool
+            content = render_pool.run("docx", template_path, context)
             
             # Create response with proper headers for download
             return Response(
@@ -315,6 +268,8 @@ class DocxReportService:
                     "Content-Disposition": f"attachment; filename=daily_sales_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx"
                 }
             )
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to generate daily sales report: {str(e)}")
 
@@ -0,0 +1,103 @@
+"""
+Farmer code allocation.
+
+Codes follow F{vendor_id}-{NNNN}. Numbers come from the per-vendor
+farmer_code_counters row, advanced with a single UPDATE ... RETURNING, so
+allocation is one round trip regardless of how many farmers a vendor has,
+and concurrent creates serialize on the counter row instead of racing on the
+unique constraint. The counter update belongs to the caller's transaction:
+a rollback returns the numbers. A code set by hand (PUT /farmers/{id}) goes
+through reserve_farmer_code, which raises the counter past it.
+"""
+import re
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+
+_ADVANCE_SQL = text("""
+    UPDATE farmer_code_counters
+    SET last_value = last_value + :count
+    WHERE vendor_id = :vendor_id
+    RETURNING last_value
+""")
+
+# First allocation for a vendor: seed from the highest code already issued so
+# farmers created before the counter existed are never collided with.
+_SEED_SQL = text("""
+    INSERT INTO farmer_code_counters (vendor_id, last_value)
+    SELECT :vendor_id, COALESCE(MAX(CAST(substring(farmer_code FROM '-([0-9]+)$') AS BIGINT)), 0) + :count
+    FROM farmers
+    WHERE vendor_id = :vendor_id
+      AND farmer_code ~ ('^F' || CAST(:vendor_id AS TEXT) || '-[0-9]+$')
+    ON CONFLICT (vendor_id)
+    DO UPDATE SET last_value = farmer_code_counters.last_value + :count
+    RETURNING last_value
+""")
+
+
+# A code set by hand: raise the counter (seeding it as above if missing) so
+# allocation never hands the number out again.
+_RESERVE_SQL = text("""
+    INSERT INTO farmer_code_counters (vendor_id, last_value)
+    SELECT :vendor_id, GREATEST(COALESCE(MAX(CAST(substring(farmer_code FROM '-([0-9]+)$') AS BIGINT)), 0), :number)
+    FROM farmers
+    WHERE vendor_id = :vendor_id
+      AND farmer_code ~ ('^F' || CAST(:vendor_id AS TEXT) || '-[0-9]+$')
+    ON CONFLICT (vendor_id)
+    DO UPDATE SET last_value = GREATEST(farmer_code_counters.last_value, EXCLUDED.last_value)
+""")
+
+_CODE_PATTERN = re.compile(r"^F([0-9]+)-([0-9]+)$")
+
+UNIQUE_VIOLATION = "23505"
+
+
+def format_farmer_code(vendor_id: int, number: int) -> str:
+    return f"F{vendor_id}-{number:04d}"
+
+
+def allocate_farmer_codes(db: Session, vendor_id: int, count: int) -> List[str]:
+    """
+    Reserve ``count`` consecutive farmer codes for a vendor.
+
+    Bulk imports should call this once for the whole batch rather than once
+    per row.
+    """
+    if count < 1:
+        return []
+
+    params = {"vendor_id": vendor_id, "count": count}
+    last = db.execute(_ADVANCE_SQL, params).scalar()
+    if last is None:
+        last = db.execute(_SEED_SQL, params).scalar()
+
+    first = last - count + 1
+    return [format_farmer_code(vendor_id, n) for n in range(first, last + 1)]
+
+
+def allocate_farmer_code(db: Session, vendor_id: int) -> str:
+    """Reserve the next farmer code for a vendor."""
+    return allocate_farmer_codes(db, vendor_id, 1)[0]
+
+
+def reserve_farmer_code(db: Session, vendor_id: int, code: str) -> None:
+    """
+    Account for a farmer code set by hand so allocation skips it.
+
+    Codes outside the F{vendor}-{NNNN} pattern cannot collide with allocated
+    ones and are left alone; codes in another vendor's range raise ValueError.
+    """
+    match = _CODE_PATTERN.match(code)
+    if match is None:
+        return
+    if int(match.group(1)) != vendor_id:
+        raise ValueError(f"Farmer codes F{match.group(1)}-... belong to another vendor")
+    db.execute(_RESERVE_SQL, {"vendor_id": vendor_id, "number": int(match.group(2))})
+
+
+def is_farmer_code_collision(exc: IntegrityError) -> bool:
+    """Whether a failed flush/commit hit the unique index on farmers.farmer_code."""
+    return getattr(exc.orig, "pgcode", None) == UNIQUE_VIOLATION and "farmer_code" in str(exc.orig)
@@ -0,0 +1,220 @@
+"""
+Bulk farmer import from CSV / XLSX.
+
+Rows are parsed lazily from the uploaded file and validated one at a time.
+Valid rows are inserted in batches with a single executemany each; every
+batch gets its farmer codes from one block allocation. Group names are
+resolved against a single query of the vendor's groups. Invalid rows are not
+inserted: they come back in the report with their spreadsheet row number, so
+the user can fix just those lines and re-upload them. A farmer code
+collision (a concurrent writer or a code inserted behind the counter's back)
+fails the whole file, as nothing has been committed yet.
+"""
+import codecs
+import csv
+import logging
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.data_version import bump_versions, bump_source_versions
+from app.models.farmer import Farmer
+from app.models.farmer_group import FarmerGroup
+from app.schemas.farmer import FarmerImportRow
+from app.services.audit_service import log_audit
+from app.services.farmer_code_service import allocate_farmer_codes, is_farmer_code_collision
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+MAX_IMPORT_ROWS = 20000
+NEW_FARMER_COMMISSION_PERCENT = 10  # same as POST /farmers/
+
+# Accepted spellings for each column, compared case-insensitively.
+HEADER_ALIASES = {
+    "name": {"name", "farmer_name", "farmer", "customer_name", "customer"},
+    "phone": {"phone", "contact", "mobile", "phone_number"},
+    "address": {"address", "place", "village"},
+    "group_name": {"group", "group_name", "farmer_group"},
+}
+
+
+class ImportFileError(ValueError):
+    """The file as a whole cannot be imported (bad format, missing columns, too large)."""
+
+
+# ---------- parsing ----------
+def _map_headers(headers: List[Any]) -> Dict[int, str]:
+    mapping = {}
+    for idx, header in enumerate(headers):
+        key = str(header or "").strip().lower().replace(" ", "_")
+        for field, aliases in HEADER_ALIASES.items():
+            if key in aliases and field not in mapping.values():
+                mapping[idx] = field
+    if "name" not in mapping.values():
+        raise ImportFileError("Missing required column: name")
+    return mapping
+
+
+def _rows_from_table(rows: Iterator[Tuple]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (row_number, record) with 1-based spreadsheet row numbers (header = 1)."""
+    try:
+        headers = next(rows)
+    except StopIteration:
+        raise ImportFileError("File is empty")
+    mapping = _map_headers(list(headers))
+
+    for row_number, values in enumerate(rows, start=2):
+        if not values or all(v is None or str(v).strip() == "" for v in values):
+            continue
+        record = {}
+        for idx, field in mapping.items():
+            value = values[idx] if idx < len(values) else None
+            if value is not None:
+                value = str(value).strip()
+                # Phone numbers typed into Excel often come back as 9876543210.0
+                if field == "phone" and value.endswith(".0") and value[:-2].isdigit():
+                    value = value[:-2]
+            record[field] = value or None
+        yield row_number, record
+
+
+def iter_csv_rows(fileobj: BinaryIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    reader = csv.reader(codecs.iterdecode(fileobj, "utf-8-sig"))
+    return _rows_from_table(tuple(r) for r in reader)
+
+
+def iter_xlsx_rows(fileobj: BinaryIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("XLSX import requires openpyxl; upload a CSV instead")
+
+    # read_only streams rows from the sheet XML instead of loading the workbook
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        yield from _rows_from_table(workbook.active.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def iter_import_rows(fileobj: BinaryIO, filename: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    name = (filename or "").lower()
+    if name.endswith(".xlsx"):
+        return iter_xlsx_rows(fileobj)
+    if name.endswith(".csv") or not name:
+        return iter_csv_rows(fileobj)
+    raise ImportFileError("Unsupported file type; upload a .csv or .xlsx file")
+
+
+# ---------- import ----------
+def _insert_batch(db: Session, vendor_id: int, batch: List[Tuple[int, FarmerImportRow, Optional[int]]]) -> int:
+    codes = allocate_farmer_codes(db, vendor_id, len(batch))
+    try:
+        db.execute(
+            insert(Farmer),
+            [
+                {
+                    "vendor_id": vendor_id,
+                    "group_id": group_id,
+                    "farmer_code": code,
+                    "name": row.name,
+                    "phone": row.phone,
+                    "address": row.address,
+                    "commission_percent": NEW_FARMER_COMMISSION_PERCENT,
+                    "advance_total": 0,
+                }
+                for (_, row, group_id), code in zip(batch, codes)
+            ],
+        )
+    except IntegrityError as e:
+        if not is_farmer_code_collision(e):
+            raise
+        raise ImportFileError("Farmer codes collided with existing farmers; nothing was imported, upload the file again")
+    return len(batch)
+
+
+def import_farmers(
+    db: Session,
+    *,
+    vendor_id: int,
+    user_id: Optional[int],
+    rows: Iterator[Tuple[int, Dict[str, Any]]],
+    dry_run: bool = False,
+) -> dict:
+    """
+    Validate and insert farmers; returns a per-row error report.
+
+    Commits once at the end, so either every valid row is stored or (on a
+    farmer code collision, reported as ImportFileError, or an unexpected
+    database error) none are; the caller rolls back. With ``dry_run``
+    nothing is written.
+    """
+    # One query for every group name the file could reference.
+    groups = {
+        name.strip().lower(): gid
+        for gid, name in db.query(FarmerGroup.id, FarmerGroup.name)
+        .filter(FarmerGroup.vendor_id == vendor_id).all()
+    }
+
+    total_rows = 0
+    imported = 0
+    errors: List[dict] = []
+    batch: List[Tuple[int, FarmerImportRow, Optional[int]]] = []
+
+    for row_number, record in rows:
+        total_rows += 1
+        if total_rows > MAX_IMPORT_ROWS:
+            raise ImportFileError(f"Too many rows; split the file into parts of at most {MAX_IMPORT_ROWS}")
+
+        try:
+            row = FarmerImportRow(**record)
+        except ValidationError as e:
+            errors.append({
+                "row": row_number,
+                "errors": [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()],
+            })
+            continue
+
+        group_id = None
+        if row.group_name:
+            group_id = groups.get(row.group_name.lower())
+            if group_id is None:
+                errors.append({"row": row_number, "errors": [f"group_name: Farmer group '{row.group_name}' not found"]})
+                continue
+
+        batch.append((row_number, row, group_id))
+        if len(batch) >= BATCH_SIZE:
+            imported += len(batch) if dry_run else _insert_batch(db, vendor_id, batch)
+            batch = []
+
+    if batch:
+        imported += len(batch) if dry_run else _insert_batch(db, vendor_id, batch)
+
+    if not dry_run and imported:
+        # Core inserts bypass the ORM flush hooks; record the change ourselves.
+        bump_versions(db, {vendor_id})
+        bump_source_versions(db, {(vendor_id, "farmers")})
+        log_audit(
+            db,
+            vendor_id=vendor_id,
+            user_id=user_id,
+            table_name="farmers",
+            record_id=0,
+            action="IMPORT",
+            after_data={"imported": imported, "failed": len(errors)},
+        )
+        db.commit()
+
+    logger.info(f"Farmer import for vendor {vendor_id}: {imported} imported, {len(errors)} failed, dry_run={dry_run}")
+
+    return {
+        "total_rows": total_rows,
+        "imported": imported,
+        "failed": len(errors),
+        "dry_run": dry_run,
+        "errors": errors,
+    }
@@ -0,0 +1,132 @@
+"""
+Background job handlers (app.core.jobs.JOB_HANDLERS).
+
+Each is called as ``handler(ctx, db, **params)`` with the job's JSON params
+and returns a small JSON-able summary that becomes the job's result.
+"""
+import logging
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.jobs import JobContext
+from app.core.ledger_checkpoints import rebuild as rebuild_ledger_checkpoints, stale_farmer_ids
+from app.core.read_routing import open_read_session
+from app.services.report_export import (
+    EXPORT_FORMATS,
+    FETCH_SIZE,
+    MEDIA_TYPES,
+    csv_chunks,
+    daily_sales_export,
+    group_patti_export,
+    group_total_by_group_export,
+    group_total_export,
+    iter_export_rows,
+    ledger_export,
+    xlsx_chunks,
+)
+from app.services.silk_sync_service import SYNC_WINDOW_DAYS, sync_silk_ledger
+from app.utils.commission_rates import get_commission_rates
+
+logger = logging.getLogger(__name__)
+
+EXPORT_REPORTS = ("ledger", "group_total", "group_total_by_group", "group_patti", "daily_sales")
+
+
+# ---------- silk ----------
+def silk_sync(ctx: JobContext, db: Session, days: int = SYNC_WINDOW_DAYS) -> dict:
+    """POST /silk/sync-from-transactions?background=true"""
+    since = date.today() - timedelta(days=days)
+    created_count = sync_silk_ledger(db, ctx.vendor_id, since)
+    return {"created_count": created_count, "since": since.isoformat()}
+
+
+# ---------- ledger checkpoints ----------
+def ledger_checkpoints_rebuild(ctx: JobContext, db: Session, farmer_ids: list) -> dict:
+    """Queued by app.core.ledger_checkpoints when commission rates change."""
+    # Another job may already have rebuilt some of them
+    stale = sorted(stale_farmer_ids(db, farmer_ids))
+    if stale:
+        rebuild_ledger_checkpoints(db, stale, vendor_id=ctx.vendor_id)
+    return {"rebuilt": len(stale)}
+
+
+# ---------- report exports ----------
+def _report_export(
+    db: Session,
+    vendor_id: int,
+    report: str,
+    from_date: date,
+    to_date: date,
+    farmer_id: Optional[int],
+    group_id: Optional[int],
+    group_name: Optional[str],
+    item_name: Optional[str],
+):
+    if report == "ledger" and farmer_id is None:
+        raise ValueError("farmer_id is required for the ledger export")
+    if report in ("group_total_by_group", "group_patti") and group_id is None:
+        raise ValueError(f"group_id is required for the {report} export")
+
+    if report == "ledger":
+        return ledger_export(vendor_id, farmer_id, from_date, to_date, get_commission_rates(db, vendor_id))
+    if report == "group_total":
+        return group_total_export(vendor_id, from_date, to_date, group_name, get_commission_rates(db, vendor_id))
+    if report == "group_total_by_group":
+        return group_total_by_group_export(vendor_id, group_id, from_date, to_date, get_commission_rates(db, vendor_id))
+    if report == "group_patti":
+        return group_patti_export(vendor_id, group_id, from_date, to_date)
+    if report == "daily_sales":
+        return daily_sales_export(vendor_id, from_date, to_date, item_name)
+    raise ValueError(f"Unknown report {report!r}; expected one of {', '.join(EXPORT_REPORTS)}")
+
+
+def report_export(
+    ctx: JobContext,
+    db: Session,
+    report: str,
+    from_date: str,
+    to_date: str,
+    format: str = "csv",
+    farmer_id: Optional[int] = None,
+    group_id: Optional[int] = None,
+    group_name: Optional[str] = None,
+    item_name: Optional[str] = None,
+) -> dict:
+    """
+    A report table as a CSV/XLSX artifact - the same rows as the report's
+    ``format=csv|xlsx`` download, for ranges too long to wait for (a whole
+    season). Reads go to the replica when it is fresh enough.
+    """
+    fmt = format.lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format {format!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+    start, end = date.fromisoformat(from_date), date.fromisoformat(to_date)
+    export = _report_export(db, ctx.vendor_id, report, start, end, farmer_id, group_id, group_name, item_name)
+
+    replica = open_read_session(db, ctx.vendor_id)
+    bind = replica.get_bind() if replica is not None else None
+    if replica is not None:
+        replica.close()
+
+    row_count = 0
+
+    def counted(rows):
+        nonlocal row_count
+        for row in rows:
+            row_count += 1
+            if row_count % FETCH_SIZE == 0:
+                ctx.progress(message=f"{row_count} rows written")
+            yield row
+
+    rows = counted(iter_export_rows(export, bind))
+    chunks = xlsx_chunks(export.title, export.headers, rows) if fmt == "xlsx" else csv_chunks(export.headers, rows)
+    filename = f"{report}_{start.isoformat()}_{end.isoformat()}.{fmt}"
+    size = 0
+    with ctx.artifact(filename, MEDIA_TYPES[fmt]) as f:
+        for chunk in chunks:
+            f.write(chunk)
+            size += len(chunk)
+
+    return {"report": report, "format": fmt, "rows": row_count, "bytes": size, "filename": filename}
@@ -0,0 +1,358 @@
+"""
+Native PDF rendering for the printable reports (ledger, group patti,
+group total, daily sales) using reportlab platypus.
+
+Each ``render_*`` method takes the same ``template_data`` dict that the HTML
+templates receive in app/routes/reports.py and returns PDF bytes built
+entirely in memory - no DOCX intermediate, no temp files.
+
+Fonts, paragraph styles, table styles and the logo are created once per
+process and reused. Long tables are emitted as fixed-size chunks with the
+header repeated, which keeps reportlab's layout work linear in the number of
+rows instead of re-splitting one huge table on every page.
+"""
+import io
+import logging
+import os
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import (
+    Flowable, Image, KeepTogether, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle,
+)
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+LOGO_PATH = os.path.join(BASE_DIR, "static", "images", "SKFS_logo.png")
+
+# Rows per table chunk; each chunk repeats the header row.
+TABLE_CHUNK_ROWS = 50
+
+# Same shop details as the HTML templates
+SHOP_NAME = "SREE KRISHNA FLOWER STALL"
+SHOP_SUB = "Prop. K.C.N & SONS  |  FLOWER MERCHANTS"
+SHOP_ADDRESS = "Shop No: B-32, S.K.R Market, Bangalore-560002"
+SHOP_CONTACT = "PH: 8147848760  |  Mob: 9972878307  |  S.K.F.S"
+
+# TTF fonts with wider glyph coverage, tried in order; Helvetica otherwise.
+_FONT_CANDIDATES = [
+    (os.path.join(BASE_DIR, "static", "fonts", "DejaVuSans.ttf"),
+     os.path.join(BASE_DIR, "static", "fonts", "DejaVuSans-Bold.ttf")),
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+     "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+]
+
+
+@lru_cache(maxsize=1)
+def _fonts() -> tuple:
+    """Register the report font once per process; returns (regular, bold)."""
+    for regular, bold in _FONT_CANDIDATES:
+        if os.path.exists(regular) and os.path.exists(bold):
+            try:
+                pdfmetrics.registerFont(TTFont("ReportSans", regular))
+                pdfmetrics.registerFont(TTFont("ReportSans-Bold", bold))
+                return "ReportSans", "ReportSans-Bold"
+            except Exception as e:
+                logger.warning(f"Could not register report font {regular}: {e}")
+    return "Helvetica", "Helvetica-Bold"
+
+
+@lru_cache(maxsize=1)
+def _styles() -> Dict[str, ParagraphStyle]:
+    regular, bold = _fonts()
+    return {
+        "shop": ParagraphStyle("shop", fontName=bold, fontSize=15, leading=18, alignment=TA_CENTER),
+        "shop_sub": ParagraphStyle("shop_sub", fontName=regular, fontSize=8.5, leading=11, alignment=TA_CENTER),
+        "title": ParagraphStyle("title", fontName=bold, fontSize=11, leading=14, alignment=TA_CENTER, spaceBefore=4),
+        "info": ParagraphStyle("info", fontName=regular, fontSize=9, leading=12, alignment=TA_LEFT),
+        "cell": ParagraphStyle("cell", fontName=regular, fontSize=8, leading=10),
+    }
+
+
+@lru_cache(maxsize=None)
+def _table_style(has_footer: bool, right_from: int) -> TableStyle:
+    """Grid table style; columns from ``right_from`` onwards are right-aligned numbers."""
+    regular, bold = _fonts()
+    commands = [
+        ("FONTNAME", (0, 0), (-1, -1), regular),
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+        ("FONTNAME", (0, 0), (-1, 0), bold),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#dddddd")),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#555555")),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("TOPPADDING", (0, 0), (-1, -1), 2),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+        ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+        ("ALIGN", (right_from, 1), (-1, -1), "RIGHT"),
+    ]
+    if has_footer:
+        commands += [
+            ("FONTNAME", (0, -1), (-1, -1), bold),
+            ("BACKGROUND", (0, -1), (-1, -1), colors.HexColor("#eeeeee")),
+        ]
+    return TableStyle(commands)
+
+
+@lru_cache(maxsize=1)
+def _logo_bytes() -> Optional[bytes]:
+    try:
+        with open(LOGO_PATH, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+# ---------- building blocks ----------
+def _text(value: Any, default: str = "") -> str:
+    """A data value for Paragraph markup (names like "Ram & Sons <A>" are escaped)."""
+    return escape(str(value if value not in (None, "") else default))
+
+
+def _header(title: str, lines: Sequence[str]) -> List[Flowable]:
+    styles = _styles()
+    flowables: List[Flowable] = []
+    logo = _logo_bytes()
+    shop = [
+        Paragraph(SHOP_NAME, styles["shop"]),
+        Paragraph(SHOP_SUB, styles["shop_sub"]),
+        Paragraph(SHOP_ADDRESS, styles["shop_sub"]),
+        Paragraph(SHOP_CONTACT, styles["shop_sub"]),
+    ]
+    if logo:
+        image = Image(io.BytesIO(logo), width=18 * mm, height=18 * mm)
+        banner = Table([[image, shop]], colWidths=[22 * mm, None])
+        banner.setStyle(TableStyle([("VALIGN", (0, 0), (-1, -1), "MIDDLE")]))
+        flowables.append(banner)
+    else:
+        flowables.extend(shop)
+    flowables.append(Paragraph(title, styles["title"]))
+    for line in lines:
+        flowables.append(Paragraph(line, styles["info"]))
+    flowables.append(Spacer(1, 4 * mm))
+    return flowables
+
+
+def _chunked_table(
+    headers: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    col_widths: Sequence[float],
+    footer: Optional[Sequence[Any]] = None,
+    right_from: int = 0,
+) -> Iterator[Flowable]:
+    """Yield the table as chunks of TABLE_CHUNK_ROWS rows, header repeated on each."""
+    headers = list(headers)
+    chunk: List[List[Any]] = []
+
+    def flush(with_footer: bool) -> Table:
+        data = [headers] + chunk + ([list(footer)] if with_footer else [])
+        table = Table(data, colWidths=col_widths, repeatRows=1)
+        table.setStyle(_table_style(with_footer, right_from))
+        return table
+
+    for row in rows:
+        chunk.append(["" if v is None else str(v) for v in row])
+        if len(chunk) >= TABLE_CHUNK_ROWS:
+            yield flush(False)
+            chunk = []
+
+    if chunk or footer is not None:
+        yield flush(footer is not None)
+
+
+def _summary_grid(pairs: Sequence[tuple], columns: int = 3) -> Table:
+    regular, bold = _fonts()
+    cells = [f"{label}: {value}" for label, value in pairs]
+    while len(cells) % columns:
+        cells.append("")
+    data = [cells[i:i + columns] for i in range(0, len(cells), columns)]
+    table = Table(data)
+    table.setStyle(TableStyle([
+        ("FONTNAME", (0, 0), (-1, -1), bold),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("BOX", (0, 0), (-1, -1), 0.75, colors.black),
+        ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#888888")),
+        ("TOPPADDING", (0, 0), (-1, -1), 4),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+    ]))
+    return table
+
+
+def _page_number(canvas, doc) -> None:
+    regular, _ = _fonts()
+    canvas.saveState()
+    canvas.setFont(regular, 7)
+    canvas.drawRightString(doc.pagesize[0] - 10 * mm, 7 * mm, f"Page {doc.page}")
+    canvas.restoreState()
+
+
+def _build(story: Iterable[Flowable], pagesize=A4, title: str = "Report") -> bytes:
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=pagesize,
+        leftMargin=10 * mm,
+        rightMargin=10 * mm,
+        topMargin=10 * mm,
+        bottomMargin=12 * mm,
+        title=title,
+        author=SHOP_NAME,
+    )
+    doc.build(list(story), onFirstPage=_page_number, onLaterPages=_page_number)
+    return buffer.getvalue()
+
+
+def _ledger_story(data: Dict[str, Any]) -> List[Flowable]:
+    totals = data.get("totals", {})
+    story: List[Flowable] = _header("LEDGER REPORT", [
+        f"Name: <b>{_text(data.get('name'))}</b> &nbsp;&nbsp; Address: {_text(data.get('address'))}",
+        f"Group: {_text(data.get('group_name'))} &nbsp;&nbsp; Rem Advance: {_text(data.get('rem_advance'), '0')}",
+        f"Opening Balance: {_text(data.get('opening_balance'), '0.00')} &nbsp;&nbsp; "
+        f"Closing Balance: {_text(data.get('closing_balance'), '0.00')}",
+        f"Period: {_text(data.get('from_date'))} to {_text(data.get('to_date'))} &nbsp;&nbsp; "
+        f"Printed: {_text(data.get('current_date'))}",
+    ])
+    rows = (
+        (r.get("date"), r.get("vehicle"), r.get("product_name"), r.get("qty"), r.get("rate"),
+         r.get("luggage"), r.get("total"), r.get("paid"))
+        for r in data.get("rows", [])
+    )
+    story.extend(_chunked_table(
+        ["Date", "Vehicle", "Item Name", "Qty", "Price", "Luggage", "Total", "Paid"],
+        rows,
+        col_widths=[22 * mm, 26 * mm, 40 * mm, 18 * mm, 18 * mm, 20 * mm, 25 * mm, 21 * mm],
+        footer=["", "", "Total", totals.get("qty"), "", totals.get("luggage"),
+                totals.get("gross_total"), totals.get("paid_total")],
+        right_from=3,
+    ))
+    story.append(Spacer(1, 4 * mm))
+    story.append(KeepTogether(_summary_grid([
+        (f"Commission ({data.get('commission_pct')}%)", totals.get("commission_total")),
+        ("Luggage", totals.get("luggage")),
+        ("Coolie", totals.get("coolie")),
+        ("Total", totals.get("gross_total")),
+        ("Net", totals.get("net_total")),
+        ("Balance", totals.get("balance_total")),
+    ])))
+    return story
+
+
+class PdfReportService:
+    """Render report template data straight to PDF bytes."""
+
+    @staticmethod
+    def render_ledger(data: Dict[str, Any]) -> bytes:
+        return _build(_ledger_story(data), title=f"Ledger - {data.get('name') or ''}")
+
+    @staticmethod
+    def render_ledger_batch(documents: List[Dict[str, Any]]) -> bytes:
+        """Several ledgers in one PDF, each starting on a new page."""
+        def story() -> Iterator[Flowable]:
+            for index, data in enumerate(documents):
+                if index:
+                    yield PageBreak()
+                yield from _ledger_story(data)
+
+        return _build(story(), title="Ledgers")
+
+    @staticmethod
+    def render_group_patti(data: Dict[str, Any]) -> bytes:
+        def story() -> Iterator[Flowable]:
+            for index, customer in enumerate(data.get("customers", [])):
+                if index:
+                    yield PageBreak()
+                yield from _header(f"GROUP PATTI - {_text(data.get('group_name'))}", [
+                    f"Name: <b>{_text(customer.get('name'))}</b> &nbsp;&nbsp; Address: {_text(customer.get('address'))}",
+                    f"Ledger: {_text(customer.get('ledger_name'))} &nbsp;&nbsp; Rem Advance: {_text(customer.get('balance'), '0')}",
+                    f"Opening Balance: {_text(customer.get('opening_balance'), '0.00')} &nbsp;&nbsp; "
+                    f"Closing Balance: {_text(customer.get('closing_balance'), '0.00')}",
+                    f"Period: {_text(data.get('from_date'))} to {_text(data.get('to_date'))} &nbsp;&nbsp; "
+                    f"Printed: {_text(data.get('current_date'))}",
+                ])
+                rows = (
+                    (r.get("date"), r.get("vehicle"), r.get("product_name"), r.get("qty"), r.get("rate"),
+                     r.get("luggage"), r.get("total"), r.get("paid"))
+                    for r in customer.get("transactions", [])
+                )
+                yield from _chunked_table(
+                    ["Date", "Vehicle", "Item Name", "Qty", "Price", "Luggage", "Total", "Paid"],
+                    rows,
+                    col_widths=[22 * mm, 26 * mm, 40 * mm, 18 * mm, 18 * mm, 20 * mm, 25 * mm, 21 * mm],
+                    footer=["", "", "Total", customer.get("total_qty"), "", customer.get("luggage_total"),
+                            customer.get("total_amount"), customer.get("paid_amount")],
+                    right_from=3,
+                )
+                yield Spacer(1, 4 * mm)
+                yield KeepTogether(_summary_grid([
+                    (f"Commission ({data.get('commission_pct')}%)", customer.get("commission")),
+                    ("Luggage", customer.get("luggage_total")),
+                    ("Coolie", customer.get("coolie_total")),
+                    ("Total", customer.get("total_amount")),
+                    ("Net", customer.get("net_amount")),
+                    ("Final", customer.get("final_total")),
+                ]))
+
+        return _build(story(), title=f"Group Patti - {data.get('group_name') or ''}")
+
+    @staticmethod
+    def render_group_total(data: Dict[str, Any]) -> bytes:
+        story: List[Flowable] = _header("GROUP TOTAL REPORT", [
+            f"Group: <b>{_text(data.get('group_name'))}</b>",
+            f"Period: {_text(data.get('from_date'))} to {_text(data.get('to_date'))} &nbsp;&nbsp; "
+            f"Printed: {_text(data.get('current_date'))}",
+        ])
+        rows = (
+            (r.get("ledger_no"), r.get("farmer_name"), r.get("total_net_amount"), r.get("paid_amount"))
+            for r in data.get("rows", [])
+        )
+        story.extend(_chunked_table(
+            ["Ledger No", "Party Name", "Net Amount Payable", "Paid Amount"],
+            rows,
+            col_widths=[25 * mm, 85 * mm, 40 * mm, 40 * mm],
+            footer=["", "Total", data.get("overall_net_amount"), data.get("overall_paid")],
+            right_from=2,
+        ))
+        return _build(story, title=f"Group Total - {data.get('group_name') or ''}")
+
+    @staticmethod
+    def render_daily_sales(data: Dict[str, Any]) -> bytes:
+        totals = data.get("totals", {})
+        story: List[Flowable] = _header("DAILY SALES REPORT", [
+            f"Item: {_text(data.get('item_filter'), 'All Items')} &nbsp;&nbsp; "
+            f"Period: {_text(data.get('from_date'))} to {_text(data.get('to_date'))} &nbsp;&nbsp; "
+            f"Printed: {_text(data.get('current_date'))}",
+        ])
+        rows = (
+            (r.get("date"), r.get("vehicle"), r.get("party"), r.get("item_code"), r.get("product_name"),
+             r.get("qty"), r.get("rate"), r.get("luggage"), r.get("coolie"), r.get("paid"), r.get("total"))
+            for r in data.get("rows", [])
+        )
+        story.extend(_chunked_table(
+            ["Date", "Vehicle", "Party", "Item Code", "Product Name", "Qty", "Rate",
+             "Luggage", "Coolie", "Paid", "Total"],
+            rows,
+            col_widths=[22 * mm, 28 * mm, 40 * mm, 18 * mm, 38 * mm, 18 * mm, 18 * mm,
+                        20 * mm, 18 * mm, 20 * mm, 25 * mm],
+            footer=["", "", f"{totals.get('record_count', 0)} rows", "", "Total", totals.get("total_qty"), "",
+                    totals.get("total_luggage"), totals.get("total_coolie"), totals.get("total_paid"),
+                    totals.get("total_amount")],
+            right_from=5,
+        ))
+        return _build(story, pagesize=landscape(A4), title="Daily Sales")
+
+
+PDF_RENDERERS = {
+    "ledger": PdfReportService.render_ledger,
+    "ledger_batch": PdfReportService.render_ledger_batch,
+    "group_patti": PdfReportService.render_group_patti,
+    "group_total": PdfReportService.render_group_total,
+    "daily_sales": PdfReportService.render_daily_sales,
+}
@@ -3,6 +3,8 @@ from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from datetime import datetime
 
+from app.core.render_pool import render_pool
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 PDF_DIR = os.path.join(BASE_DIR, "static", "settlements")
 
@@ -23,17 +25,54 @@ def generate_settlement_pdf(
     file_name = f"settlement_{settlement.id}.pdf"
     file_path = os.path.join(PDF_DIR, file_name)
 
+    document = settlement_document(
+        settlement=settlement, farmer=farmer, vendor=vendor, settlement_items=settlement_items
+    )
+    render_pool.run("settlement_pdf", file_path, document)
+
+    return f"/static/settlements/{file_name}"
+
+
+def settlement_document(*, settlement, farmer, vendor, settlement_items) -> dict:
+    """
+    Plain values for draw_settlement_pdf (the drawing runs in the render
+    pool). ``settlement_items`` are the settled CollectionItem rows.
+    """
+    return {
+        "vendor_name": vendor.name,
+        "vendor_address": vendor.address or "",
+        "farmer_name": farmer.name,
+        "date_from": str(settlement.date_from),
+        "date_to": str(settlement.date_to),
+        "items": [
+            {
+                "date": str(item.date),
+                "qty_kg": str(item.qty_kg),
+                "rate_per_kg": str(item.rate_per_kg),
+                "line_total": str(item.line_total),
+            }
+            for item in settlement_items
+        ],
+        "total_amount": str(settlement.total_amount),
+        "total_commission": str(settlement.total_commission),
+        "advance_deducted": str(settlement.advance_deducted),
+        "net_payable": str(settlement.net_payable),
+    }
+
+
+def draw_settlement_pdf(file_path: str, document: dict) -> None:
+    """Draw the settlement PDF for the values prepared by generate_settlement_pdf."""
     c = canvas.Canvas(file_path, pagesize=A4)
     width, height = A4
     y = height - 40
 
     # 🟩 HEADER
     c.setFont("Helvetica-Bold", 16)
-    c.drawString(40, y, vendor.name)
+    c.drawString(40, y, document["vendor_name"])
     y -= 20
 
     c.setFont("Helvetica", 10)
-    c.drawString(40, y, vendor.address or "")
+    c.drawString(40, y, document["vendor_address"])
     y -= 30
 
     # 🟦 SETTLEMENT INFO
@@ -42,9 +81,9 @@ def generate_settlement_pdf(
     y -= 20
 
     c.setFont("Helvetica", 10)
-    c.drawString(40, y, f"Farmer: {farmer.name}")
+    c.drawString(40, y, f"Farmer: {document['farmer_name']}")
     y -= 15
-    c.drawString(40, y, f"Period: {settlement.date_from} to {settlement.date_to}")
+    c.drawString(40, y, f"Period: {document['date_from']} to {document['date_to']}")
     y -= 25
 
     # 🧾 TABLE HEADER
@@ -59,35 +98,33 @@ def generate_settlement_pdf(
     c.setFont("Helvetica", 9)
 
     # 📋 ROWS
-    for item in settlement_items:
+    for item in document["items"]:
         if y < 60:
             c.showPage()
             y = height - 40
 
-        c.drawString(40, y, str(item.collection_item.date))
-        c.drawString(150, y, f"{item.collection_item.qty_kg}")
-        c.drawString(220, y, f"₹{item.collection_item.rate_per_kg}")
-        c.drawString(300, y, f"₹{item.line_total}")
+        c.drawString(40, y, item["date"])
+        c.drawString(150, y, item["qty_kg"])
+        c.drawString(220, y, f"₹{item['rate_per_kg']}")
+        c.drawString(300, y, f"₹{item['line_total']}")
         y -= 14
 
     y -= 20
 
     # 🧮 SUMMARY
     c.setFont("Helvetica-Bold", 10)
-    c.drawString(40, y, f"Total Amount: ₹{settlement.total_amount}")
+    c.drawString(40, y, f"Total Amount: ₹{document['total_amount']}")
     y -= 14
-    c.drawString(40, y, f"Commission: ₹{settlement.total_commission}")
+    c.drawString(40, y, f"Commission: ₹{document['total_commission']}")
     y -= 14
-    c.drawString(40, y, f"Advance Deducted: ₹{settlement.advance_deducted}")
+    c.drawString(40, y, f"Advance Deducted: ₹{document['advance_deducted']}")
     y -= 18
 
     c.setFont("Helvetica-Bold", 12)
-    c.drawString(40, y, f"Net Payable: ₹{settlement.net_payable}")
+    c.drawString(40, y, f"Net Payable: ₹{document['net_payable']}")
 
     y -= 30
     c.setFont("Helvetica", 9)
     c.drawString(40, y, f"Generated on {datetime.now().strftime('%d-%m-%Y %H:%M')}")
 
     c.save()
-
-    return f"/static/settlements/{file_name}"
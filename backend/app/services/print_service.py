@@ -3,6 +3,8 @@ from datetime import datetime
 from jinja2 import Environment, FileSystemLoader
 from fastapi.responses import HTMLResponse
 
+from app.core.render_pool import render_pool
+
 # Get the base directory of the project
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 TEMPLATE_DIR = os.path.join(BASE_DIR, "templates")
@@ -42,8 +44,6 @@ class PrintService:
         `ledger_report.html` template expected variable names so both routes
         (`/reports/ledger/...` and `/print/ledger-report`) render correctly.
         """
-        template = env.get_template("ledger_report.html")
-
         # Map incoming rows (which may use different keys) to template expected keys
         mapped_rows = []
         def _num(x):
@@ -125,7 +125,7 @@ class PrintService:
             "generated_at": datetime.now().isoformat(),
         }
 
-        content = template.render(**template_data)
+        content = render_pool.run("print_html", "ledger_report.html", template_data)
         
         # Add print button with JavaScript
         print_button_html = '''
@@ -163,8 +163,7 @@ class PrintService:
         group_total: float,
     ) -> HTMLResponse:
         """Generate HTML for group patti report with individual customer reports"""
-        template = env.get_template("group_patti_report.html")
-        content = template.render(
+        content = render_pool.run("print_html", "group_patti_report.html", dict(
             group_name=group_name,
             from_date=from_date,
             to_date=to_date,
@@ -173,7 +172,7 @@ class PrintService:
             report_datetime=datetime.now().strftime("%d-%m-%Y %H:%M:%S"),
             customer_reports=customer_reports,
             group_total=f"{group_total:.2f}",
-        )
+        ))
         
         # Add print button with JavaScript
         print_button_html = '''
@@ -214,8 +213,7 @@ class PrintService:
         group_total: float,
     ) -> HTMLResponse:
         """Generate HTML for group total report"""
-        template = env.get_template("group_total_report.html")
-        content = template.render(
+        content = render_pool.run("print_html", "group_total_report.html", dict(
             group_name=group_name,
             from_date=from_date,
             to_date=to_date,
@@ -226,7 +224,7 @@ class PrintService:
             total_paid=f"{total_paid:.2f}",
             total_luggage=f"{total_luggage:.2f}",
             group_total=f"{group_total:.2f}",
-        )
+        ))
         
         # Add print button with JavaScript
         print_button_html = '''
@@ -264,8 +262,7 @@ class PrintService:
         total_amount: float,
     ) -> HTMLResponse:
         """Generate HTML for daily sales report"""
-        template = env.get_template("daily_sales_report.html")
-        content = template.render(
+        content = render_pool.run("print_html", "daily_sales_report.html", dict(
             from_date=from_date,
             to_date=to_date,
             item_name=item_name,
@@ -273,7 +270,7 @@ class PrintService:
             rows=rows,
             total_qty=f"{total_qty:.2f}",
             total_amount=f"{total_amount:.2f}",
-        )
+        ))
         
         # Add print button with JavaScript
         print_button_html = '''
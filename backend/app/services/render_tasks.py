@@ -0,0 +1,183 @@
+"""
+Render functions executed by the render pool (app.core.render_pool).
+
+Everything here takes and returns plain data (dicts, lists, strings, bytes)
+so it can run in a worker process; nothing touches the database.
+"""
+import base64
+import html as html_lib
+import io
+import logging
+import os
+from functools import lru_cache
+
+from jinja2 import Template
+
+logger = logging.getLogger(__name__)
+
+LOGO_PATH = os.path.join("static", "images", "SKFS_logo.png")
+
+PAGE_BREAK = '<div style="page-break-after: always;"></div>'
+BATCH_LOGO_ID = "batch-logo"
+BATCH_LOGO_SCRIPT = (
+    "<script>(function(){"
+    f"var src = document.getElementById('{BATCH_LOGO_ID}');"
+    "if (!src) return;"
+    "document.querySelectorAll('img[src$=\"SKFS_logo.png\"]').forEach(function(img){ img.src = src.src; });"
+    "})();</script>"
+)
+
+
+def _url_for(endpoint, **values):
+    """Minimal ``url_for`` for templates rendered outside of Flask."""
+    if endpoint == 'static':
+        filename = values.get('filename', '')
+        # Ensure web-style path separators
+        return '/' + os.path.join('static', filename).replace('\\', '/')
+    # Fallback: return root for unknown endpoints
+    return '/'
+
+
+@lru_cache(maxsize=1)
+def _logo_data_uri():
+    if not os.path.exists(LOGO_PATH):
+        return None
+    try:
+        with open(LOGO_PATH, "rb") as img_file:
+            img_data = base64.b64encode(img_file.read()).decode('utf-8')
+    except Exception as e:
+        logger.error(f"Error converting logo to data URI: {e}")
+        return None
+    # Keep the HTML a reasonable size (less than 1MB)
+    if len(img_data) >= 1000000:
+        logger.warning(f"Logo file too large for data URI ({len(img_data)} bytes), using original path")
+        return None
+    return f"data:image/png;base64,{img_data}"
+
+
+@lru_cache(maxsize=32)
+def _compiled_template(template_path: str, mtime: float) -> Template:
+    # mtime is part of the key so edited templates are picked up
+    with open(template_path, 'r', encoding='utf-8') as f:
+        return Template(f.read())
+
+
+def render_html(template_name: str, data: dict, template_dir: str = "templates", inline_logo: bool = True) -> str:
+    """Render a report template with the logo inlined as a data URI for reliable printing."""
+    template_path = os.path.join(template_dir, template_name)
+
+    if not os.path.exists(template_path):
+        return f"<h1>Template not found: {template_name}</h1>"
+
+    try:
+        template = _compiled_template(template_path, os.path.getmtime(template_path))
+        html = template.render(**data, url_for=_url_for)
+    except Exception as e:
+        logger.error(f"Template rendering error: {e}")
+        return f"<h1>Template rendering error: {str(e)}</h1>"
+
+    logo = _logo_data_uri() if inline_logo else None
+    if logo:
+        html = html.replace('src="/static/images/SKFS_logo.png"', f'src="{logo}"')
+        html = html.replace('src="SKFS_logo.png"', f'src="{logo}"')
+    return html
+
+
+def _split_document(html: str) -> tuple:
+    """Split a rendered page into (head up to <body>, body content, trailing scripts and </body>)."""
+    body_start = html.find("<body>")
+    head_end = body_start + len("<body>") if body_start >= 0 else 0
+    tail_start = html.rfind("<script>")
+    if tail_start < head_end:
+        tail_start = html.rfind("</body>")
+    if tail_start < head_end:
+        tail_start = len(html)
+    return html[:head_end], html[head_end:tail_start], html[tail_start:]
+
+
+def render_html_batch(
+    template_name: str,
+    documents: list,
+    template_dir: str = "templates",
+    with_head: bool = False,
+    with_tail: bool = False,
+) -> str:
+    """
+    Render several documents with one template as one part of a combined page.
+
+    Sections are separated by page breaks. The first part (``with_head``)
+    carries the <head> and a single hidden copy of the logo; the last part
+    (``with_tail``) closes the page and points every logo <img> at that copy,
+    so the logo data URI (several hundred KB) is sent once instead of once per
+    document.
+    """
+    parts = []
+    tail = ""
+    for index, data in enumerate(documents):
+        head, body, tail = _split_document(render_html(template_name, data, template_dir, inline_logo=False))
+        if index == 0 and with_head:
+            logo = _logo_data_uri()
+            parts.append(head)
+            if logo:
+                parts.append(f'<img id="{BATCH_LOGO_ID}" src="{logo}" alt="" style="display:none">')
+        else:
+            parts.append(PAGE_BREAK)
+        parts.append(body)
+    if with_tail:
+        parts.append(BATCH_LOGO_SCRIPT)
+        parts.append(tail or "</body>\n</html>")
+    return "".join(parts)
+
+
+def render_html_batch_error(message: str) -> str:
+    """
+    Close a streamed batch page early with a visible error.
+
+    Used once the 200 headers have gone out and a later part cannot be
+    rendered: the page must not just stop silently as if it were complete.
+    """
+    return (
+        PAGE_BREAK
+        + '<div style="margin:2em;padding:1em;border:2px solid #c00;color:#c00;font-weight:bold;">'
+        + f"{html_lib.escape(message)}</div>"
+        + BATCH_LOGO_SCRIPT
+        + "</body>\n</html>"
+    )
+
+
+def render_print_html(template_name: str, data: dict) -> str:
+    """Render a template from the print service's Jinja environment."""
+    from app.services.print_service import env
+    return env.get_template(template_name).render(**data)
+
+
+def render_pdf(kind: str, data: dict) -> bytes:
+    """Render report template data to PDF with PdfReportService (kind: ledger, group_patti, ...)."""
+    from app.services.pdf_report_service import PDF_RENDERERS
+    return PDF_RENDERERS[kind](data)
+
+
+def render_docx(template_path: str, context: dict) -> bytes:
+    """Render a docxtpl template and return the DOCX bytes."""
+    from docxtpl import DocxTemplate
+    doc = DocxTemplate(template_path)
+    doc.render(context)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def warm_up() -> None:
+    """Prime per-process caches so the first real job does not pay for them."""
+    from app.services.pdf_report_service import _fonts, _styles, _logo_bytes
+    from app.services.print_service import env
+
+    _fonts()
+    _styles()
+    _logo_bytes()
+    _logo_data_uri()
+    for name in env.list_templates(extensions=["html"]):
+        try:
+            env.get_template(name)
+        except Exception as e:
+            logger.warning(f"Could not precompile template {name}: {e}")
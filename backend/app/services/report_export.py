@@ -0,0 +1,213 @@
+"""
+CSV / XLSX export of report tables.
+
+Each export is one of the report statements from app.utils.reports_db plus
+a builder that turns batches of rows into the same typed report objects the
+HTML/JSON/PDF pages use (app.utils.report_rows); cells come from the
+report's Columns, so every format shows the same figures. Rows are read
+through a server-side cursor on a dedicated connection and written out as
+they arrive, so memory stays flat however long the date range is and no
+HTML is rendered. The connection belongs to the stream (the request session
+is already released by the time the body is sent) and is closed when the
+stream finishes or the client goes away. It is taken from the engine the
+request session was routed to, so exports follow the read replica
+(app.core.read_routing), and runs under the export statement timeout
+(app.core.statement_timeouts).
+
+Detail reports (ledger, patti, daily sales) stream one object per line.
+Per-farmer reports keep one running total per farmer and write them once
+the cursor is exhausted.
+"""
+import csv
+import io
+import logging
+import tempfile
+from functools import partial
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Engine
+
+from app.core.db import engine
+from app.core.statement_timeouts import set_statement_timeout
+from app.utils.commission_rates import CommissionRates
+from app.utils.money_columns import DEFAULT_COMMISSION_PERCENT
+from app.utils.report_rows import (
+    DAILY_SALES_COLUMNS,
+    GROUP_TOTAL_BY_GROUP_COLUMNS,
+    GROUP_TOTAL_COLUMNS,
+    LEDGER_COLUMNS,
+    PATTI_EXPORT_COLUMNS,
+    Column,
+    FarmerTotalsBuilder,
+    build_lines,
+    export_headers,
+    export_values,
+)
+from app.utils.reports_db import (
+    daily_sales_statement,
+    group_patti_statement,
+    group_total_by_group_statement,
+    group_total_statement,
+    ledger_lines_statement,
+)
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("csv", "xlsx")
+FETCH_SIZE = 2000
+CSV_CHUNK_BYTES = 64 * 1024
+XLSX_SPOOL_BYTES = 8 * 1024 * 1024
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+Batches = Iterable[Sequence[Any]]
+
+
+class ReportExport:
+    """A report table to export: sheet title, columns, statement and object builder."""
+
+    __slots__ = ("title", "columns", "statement", "build")
+
+    def __init__(self, title: str, columns: Sequence[Column], statement, build: Callable[[Batches], Iterable[Any]]):
+        self.title = title
+        self.columns = tuple(columns)
+        self.statement = statement
+        self.build = build
+
+    @property
+    def headers(self):
+        return export_headers(self.columns)
+
+
+def _lines(batches: Batches, commission_percent: int = DEFAULT_COMMISSION_PERCENT) -> Iterator[Any]:
+    for batch in batches:
+        yield from build_lines(batch, commission_percent)[0]
+
+
+def _farmer_totals(batches: Batches, rates: Optional[CommissionRates] = None) -> Iterator[Any]:
+    builder = FarmerTotalsBuilder(rates)
+    for batch in batches:
+        builder.add(batch)
+    yield from builder.finish()
+
+
+# ---------- report definitions ----------
+# Commission rates are passed in (app.utils.commission_rates) because the
+# stream runs after the request session is released.
+def ledger_export(
+    vendor_id: int, farmer_id: int, from_date, to_date, rates: Optional[CommissionRates] = None
+) -> ReportExport:
+    commission_percent = rates.for_farmer(farmer_id) if rates else DEFAULT_COMMISSION_PERCENT
+    return ReportExport(
+        "Ledger",
+        LEDGER_COLUMNS,
+        ledger_lines_statement(vendor_id, [farmer_id], from_date, to_date),
+        partial(_lines, commission_percent=commission_percent),
+    )
+
+
+def group_total_export(
+    vendor_id: int, from_date, to_date, group_name: Optional[str] = None, rates: Optional[CommissionRates] = None
+) -> ReportExport:
+    return ReportExport(
+        "Group Total",
+        GROUP_TOTAL_COLUMNS,
+        group_total_statement(vendor_id, from_date, to_date, group_name),
+        partial(_farmer_totals, rates=rates),
+    )
+
+
+def group_total_by_group_export(
+    vendor_id: int, group_id: int, from_date, to_date, rates: Optional[CommissionRates] = None
+) -> ReportExport:
+    return ReportExport(
+        "Group Total",
+        GROUP_TOTAL_BY_GROUP_COLUMNS,
+        group_total_by_group_statement(vendor_id, group_id, from_date, to_date),
+        partial(_farmer_totals, rates=rates),
+    )
+
+
+def group_patti_export(vendor_id: int, group_id: int, from_date, to_date) -> ReportExport:
+    return ReportExport(
+        "Group Patti", PATTI_EXPORT_COLUMNS, group_patti_statement(vendor_id, group_id, from_date, to_date), _lines
+    )
+
+
+def daily_sales_export(vendor_id: int, from_date, to_date, item_name: Optional[str] = None) -> ReportExport:
+    return ReportExport(
+        "Daily Sales", DAILY_SALES_COLUMNS, daily_sales_statement(vendor_id, from_date, to_date, item_name), _lines
+    )
+
+
+# ---------- streaming ----------
+def iter_export_rows(export: ReportExport, bind: Optional[Engine] = None) -> Iterator[Sequence[Any]]:
+    """Yield export cells from a server-side cursor on a connection owned by the iterator."""
+    with (bind or engine).connect() as conn:
+        set_statement_timeout(conn, "export")
+        result = conn.execution_options(stream_results=True, yield_per=FETCH_SIZE).execute(export.statement)
+        for item in export.build(result.partitions()):
+            yield export_values(item, export.columns)
+
+
+def csv_chunks(headers: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so Excel opens the file as UTF-8
+    buffer.write("﻿")
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CSV_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def xlsx_chunks(title: str, headers: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """
+    Write an XLSX with openpyxl's write-only mode (rows are flushed to the
+    sheet XML as they are appended), then stream the finished zip.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31])
+    sheet.append(list(headers))
+    for row in rows:
+        sheet.append(list(row))
+
+    with tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_BYTES) as spool:
+        workbook.save(spool)
+        spool.seek(0)
+        while True:
+            chunk = spool.read(CSV_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+
+def export_response(
+    export: ReportExport, fmt: str, filename: str, bind: Optional[Engine] = None
+) -> StreamingResponse:
+    """
+    StreamingResponse for ``fmt`` (csv or xlsx); ``filename`` is given without
+    extension. Rows are read through ``bind`` (default: the primary engine).
+    """
+    fmt = fmt.lower()
+    rows = iter_export_rows(export, bind)
+    if fmt == "xlsx":
+        body = xlsx_chunks(export.title, export.headers, rows)
+    else:
+        body = csv_chunks(export.headers, rows)
+    logger.info(f"Streaming {fmt} export {filename}")
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -1,6 +1,7 @@
 from datetime import date
 from sqlalchemy.orm import Session
 
+from app.core.advance_balances import ZERO, current_balances
 from app.models.collection_item import CollectionItem
 from app.models.settlement import Settlement
 from app.models.settlement_item import SettlementItem
@@ -8,6 +9,7 @@ from app.models.farmer import Farmer
 from app.models.advance import Advance
 from app.models.vendor import Vendor
 
+from app.utils.commission_rates import get_commission_rates
 from app.utils.serializer import serialize_model
 from app.services.sms_service import send_sms
 from app.services.sms_templates import settlement_template, get_settlement_dlt_variables
@@ -86,12 +88,8 @@ def calculate_settlement(
     # -------------------------------------------------
     # 5️⃣ Commission logic
     # -------------------------------------------------
-    if farmer.commission_percent is not None:
-        commission_percent = farmer.commission_percent
-    elif farmer.group and farmer.group.commission_percent is not None:
-        commission_percent = farmer.group.commission_percent
-    else:
-        commission_percent = 0
+    # farmer override → group → vendor default
+    commission_percent = get_commission_rates(db, vendor_id).farmer_percent(farmer_id)
 
     total_commission = (total_amount * commission_percent) / 100
 
@@ -104,7 +102,7 @@ def calculate_settlement(
         else DEFAULT_ADVANCE_DEDUCTION_PERCENT
     )
 
-    advance_balance = farmer.advance_total or 0
+    advance_balance = current_balances(db, vendor_id, [farmer_id]).get(farmer_id, ZERO)
     max_deductible = (total_amount * deduction_percent) / 100
     advance_deducted = min(advance_balance, max_deductible)
 
@@ -166,7 +164,6 @@ def calculate_settlement(
                 note=f"Advance adjusted in settlement {date_from} to {date_to}",
             )
         )
-        farmer.advance_total -= advance_deducted
 
     # -------------------------------------------------
     # 1️⃣1️⃣ PDF generation
@@ -0,0 +1,93 @@
+"""
+Silk ledger sync: create SilkLedgerEntry rows for collection lines that have
+none yet. Used by POST /silk/sync-from-transactions and the ``silk_sync``
+background job.
+
+The sync is one set-based statement. Each entry records its line in the
+unique ``silk_ledger_entries.collection_item_id``, and ``silk_sync_state``
+keeps a per-vendor high-water mark on ``collection_items.id``, so a re-sync
+only scans lines added since the previous one and inserts with
+ON CONFLICT DO NOTHING.
+
+The mark never passes a line created less than SYNC_SETTLE_SECONDS ago: a
+line with a lower id may still be in an uncommitted transaction, and the
+mark must not skip it once it commits. Recent lines are rescanned instead,
+which the unique key makes harmless. Lines dated before the sync window
+when first scanned are passed over for good, as before.
+"""
+import logging
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.data_version import bump_versions
+
+logger = logging.getLogger(__name__)
+
+SYNC_WINDOW_DAYS = 30
+SYNC_SETTLE_SECONDS = 600
+
+SYNC_SQL = text("""
+    WITH state AS (
+        SELECT COALESCE(MAX(last_collection_item_id), 0) AS high_water
+        FROM silk_sync_state
+        WHERE vendor_id = :vendor_id
+    ),
+    scanned AS (
+        SELECT ci.id, ci.farmer_id, ci.date, ci.qty_kg, ci.rate_per_kg, ci.created_at
+        FROM collection_items ci, state
+        WHERE ci.vendor_id = :vendor_id
+          AND ci.id > state.high_water
+    ),
+    inserted AS (
+        INSERT INTO silk_ledger_entries (vendor_id, customer_id, collection_item_id, date, qty, kg, rate)
+        SELECT :vendor_id, farmer_id, id, date, qty_kg, qty_kg, rate_per_kg
+        FROM scanned
+        WHERE farmer_id IS NOT NULL
+          AND date >= :since
+          AND qty_kg IS NOT NULL
+          AND rate_per_kg IS NOT NULL
+        ON CONFLICT (collection_item_id) DO NOTHING
+        RETURNING 1
+    ),
+    marked AS (
+        INSERT INTO silk_sync_state (vendor_id, last_collection_item_id, synced_at)
+        SELECT :vendor_id,
+               COALESCE(
+                   MIN(id) FILTER (WHERE created_at > now() - make_interval(secs => :settle_seconds)) - 1,
+                   MAX(id),
+                   (SELECT high_water FROM state)
+               ),
+               now()
+        FROM scanned
+        ON CONFLICT (vendor_id) DO UPDATE
+        SET last_collection_item_id = GREATEST(silk_sync_state.last_collection_item_id,
+                                               EXCLUDED.last_collection_item_id),
+            synced_at = EXCLUDED.synced_at
+    )
+    SELECT
+        (SELECT count(*) FROM inserted) AS created_count,
+        (SELECT count(*) FROM scanned) AS scanned_count
+""")
+
+
+def sync_silk_ledger(db: Session, vendor_id: int, since: date) -> int:
+    """
+    Add ledger entries for ``vendor_id``'s new collection lines dated
+    ``since`` or later; returns how many were created. The caller commits.
+    """
+    created_count, scanned_count = db.execute(
+        SYNC_SQL,
+        {"vendor_id": vendor_id, "since": since, "settle_seconds": SYNC_SETTLE_SECONDS},
+    ).one()
+
+    if created_count:
+        # Core inserts bypass the ORM flush hooks; record the change ourselves.
+        bump_versions(db, {vendor_id})
+
+    logger.info(
+        f"Silk sync for vendor {vendor_id} since {since}: "
+        f"{scanned_count} new lines scanned, {created_count} entries created"
+    )
+    return created_count
@@ -0,0 +1,127 @@
+"""
+Effective commission rates per farmer, resolved in bulk.
+
+A farmer's rate is their own override, else their group's rate, else the
+vendor default (settings.DEFAULT_COMMISSION_PERCENT). Every report,
+settlement and settlement SMS asks this module instead of walking
+``farmer.group`` or querying Farmer/FarmerGroup per farmer.
+
+All of a vendor's farmer and group rates are loaded with one query and kept
+in memory, tagged with the vendor's farmers and farmer_groups versions
+(app.core.data_version SOURCE_TABLES), as the search indexes are: the next
+lookup after a write to either table reloads them, other writes (collection
+lines, advances, ...) leave them cached, and every worker process agrees on
+when to reload.
+
+Rates are held in hundredths of a percent (12.50 % -> 1250), the scale of
+app.utils.money_columns.
+"""
+import logging
+import threading
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import literal, null, select, union_all
+from sqlalchemy.orm import Session
+
+from app.core.data_version import get_source_versions
+from app.models.farmer import Farmer
+from app.models.farmer_group import FarmerGroup
+from app.utils.money_columns import DEFAULT_COMMISSION_PERCENT, to_scaled
+
+logger = logging.getLogger(__name__)
+
+_FARMER_ROW = 0
+_GROUP_ROW = 1
+
+
+class CommissionRates:
+    """Scaled commission rates of one vendor's farmers and groups."""
+
+    __slots__ = ("default", "farmers", "groups")
+
+    def __init__(self, farmers: Dict[int, int], groups: Dict[int, int], default: int = DEFAULT_COMMISSION_PERCENT):
+        self.default = default
+        self.farmers = farmers  # farmer id -> effective rate (override or group rate); unset farmers are absent
+        self.groups = groups    # group id -> group rate; groups without a rate are absent
+
+    def for_farmer(self, farmer_id: Optional[int]) -> int:
+        return self.farmers.get(farmer_id, self.default)
+
+    def for_group(self, group_id: Optional[int]) -> int:
+        return self.groups.get(group_id, self.default)
+
+    def farmer_percent(self, farmer_id: Optional[int]) -> Decimal:
+        """Effective rate as a Decimal percentage, for Numeric columns (1250 -> Decimal("12.50"))."""
+        return Decimal(self.for_farmer(farmer_id)).scaleb(-2)
+
+
+def _rates_statement(vendor_id: int, farmer_ids: Optional[Iterable[int]] = None):
+    farmers = select(
+        literal(_FARMER_ROW).label("kind"),
+        Farmer.id.label("id"),
+        Farmer.commission_percent.label("own"),
+        FarmerGroup.commission_percent.label("group_rate"),
+    ).select_from(Farmer).outerjoin(
+        FarmerGroup, FarmerGroup.id == Farmer.group_id
+    ).where(
+        Farmer.vendor_id == vendor_id,
+        (Farmer.commission_percent.isnot(None)) | (FarmerGroup.commission_percent.isnot(None)),
+    )
+    if farmer_ids is not None:
+        farmers = farmers.where(Farmer.id.in_(list(farmer_ids)))
+    groups = select(
+        literal(_GROUP_ROW).label("kind"),
+        FarmerGroup.id.label("id"),
+        FarmerGroup.commission_percent.label("own"),
+        null().label("group_rate"),
+    ).where(
+        FarmerGroup.vendor_id == vendor_id,
+        FarmerGroup.commission_percent.isnot(None),
+    )
+    return union_all(farmers, groups)
+
+
+def load_commission_rates(db: Session, vendor_id: int, farmer_ids: Optional[Iterable[int]] = None) -> CommissionRates:
+    """
+    Read every farmer and group rate of a vendor (one query, no cache), or
+    only ``farmer_ids``' rates; reads the current transaction's values.
+    """
+    farmers: Dict[int, int] = {}
+    groups: Dict[int, int] = {}
+    for row in db.execute(_rates_statement(vendor_id, farmer_ids)):
+        rate = row.own if row.own is not None else row.group_rate
+        (farmers if row.kind == _FARMER_ROW else groups)[row.id] = to_scaled(rate)
+    return CommissionRates(farmers, groups)
+
+
+# Tables the rates are read from (their per-vendor versions tag the cache)
+RATE_TABLES = ("farmers", "farmer_groups")
+
+_rates: Dict[int, Tuple[Tuple[int, ...], CommissionRates]] = {}
+_lock = threading.Lock()
+
+
+def get_commission_rates(db: Session, vendor_id: int) -> CommissionRates:
+    """Return the vendor's rates, reloading them if their farmers or groups changed."""
+    version = get_source_versions(db, vendor_id, RATE_TABLES)
+
+    with _lock:
+        cached = _rates.get(vendor_id)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    rates = load_commission_rates(db, vendor_id)
+    with _lock:
+        _rates[vendor_id] = (version, rates)
+    logger.debug(
+        f"Loaded commission rates for vendor {vendor_id} at version {version} "
+        f"({len(rates.farmers)} farmers, {len(rates.groups)} groups)"
+    )
+    return rates
+
+
+def clear_commission_rates() -> None:
+    """Drop every cached rate table (tests / admin tooling)."""
+    with _lock:
+        _rates.clear()
@@ -0,0 +1,184 @@
+"""
+Fixed-point column arithmetic for report rows.
+
+Every quantity and money column on collection_items is NUMERIC(12, 2), so
+the value times 100 is an exact integer. Report queries select those columns
+already scaled (``scaled(CollectionItem.qty_kg)``), the driver hands back
+plain ints, and a report's numbers are kept as int64 NumPy columns in
+hundredths (paise for money, 10 g for quantities). Amount, luggage,
+commission, net and balance are computed for all rows at once, and values
+are turned into strings once, by ``fmt``/``fmt_column``, when the template
+data is built.
+
+Rounding rules:
+- A product of two 2-decimal values (qty x rate, qty x labour) and a
+  percentage of an amount are rounded to the paisa, half to even - the same
+  result as ``Decimal.quantize(Decimal("0.01"))`` in the default context.
+- Totals are sums of the rounded line values, so printed lines always add up
+  to the printed total.
+"""
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import Any, Iterable, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import BigInteger, cast, func
+
+from app.core.config import settings
+from app.models.collection_item import CollectionItem
+
+SCALE = 100
+# Vendor default rate (12.00 % -> 1200); see app.utils.commission_rates for per-farmer rates
+DEFAULT_COMMISSION_PERCENT = round(settings.DEFAULT_COMMISSION_PERCENT * SCALE)
+
+# Products of two scaled columns fall back to Python ints above this bound
+# instead of overflowing int64 (needs values beyond ~3 crore on both sides).
+_SAFE_PRODUCT = 2 ** 62
+# Columns with larger values are formatted with integer arithmetic
+_EXACT_FLOAT_FORMAT = 2 ** 49
+
+
+# ---------- loading ----------
+def scaled(column, name: str = None):
+    """SQL expression for a NUMERIC(12, 2) column as a BIGINT count of hundredths (NULL -> 0)."""
+    return cast(func.coalesce(column, 0) * SCALE, BigInteger).label(name or column.key)
+
+
+# Money columns of a collection line, in the order MoneyLines.from_rows reads them
+LINE_MONEY_COLUMNS = (
+    scaled(CollectionItem.qty_kg),
+    scaled(CollectionItem.rate_per_kg),
+    scaled(CollectionItem.labour_per_kg),
+    scaled(CollectionItem.transport_cost),
+    scaled(CollectionItem.coolie_cost, "coolie"),
+    scaled(CollectionItem.paid_amount),
+)
+
+
+def to_scaled(value: Any) -> int:
+    """Scalar Decimal/float/str/None to hundredths, e.g. Decimal("12.50") -> 1250."""
+    if value is None or value == "":
+        return 0
+    return int(Decimal(str(value)).scaleb(2).to_integral_value(ROUND_HALF_EVEN))
+
+
+def column(values: Iterable[int], count: int = -1) -> np.ndarray:
+    return np.fromiter(values, dtype=np.int64, count=count)
+
+
+# ---------- arithmetic ----------
+def _round_div(numerator: np.ndarray, denominator: int) -> np.ndarray:
+    """Integer division rounded half to even (exact for negative values too)."""
+    # floor division/modulo rather than np.divmod so object arrays work too
+    quotient = numerator // denominator
+    remainder = numerator % denominator
+    twice = remainder * 2
+    round_up = (twice > denominator) | ((twice == denominator) & (quotient % 2 == 1))
+    return (quotient + round_up).astype(np.int64)
+
+
+def _product(a: np.ndarray, b) -> np.ndarray:
+    peak_a = int(np.abs(a).max()) if a.size else 0
+    peak_b = int(np.abs(b).max()) if np.size(b) else 0
+    if peak_a * peak_b >= _SAFE_PRODUCT:
+        return np.asarray(a, dtype=object) * np.asarray(b, dtype=object)
+    return a * b
+
+
+def mul(a: np.ndarray, b) -> np.ndarray:
+    """Product of two scaled columns (or a column and a scaled scalar), rounded back to hundredths."""
+    return _round_div(_product(a, b), SCALE)
+
+
+def percent(amount: np.ndarray, percent_scaled) -> np.ndarray:
+    """``amount * percent / 100`` with the percentage scaled too (12.5 % -> 1250)."""
+    return _round_div(_product(amount, percent_scaled), SCALE * 100)
+
+
+def group_index(keys: Sequence[Any]) -> Tuple[list, np.ndarray]:
+    """
+    Map keys to positions in order of first appearance.
+
+    Returns (unique keys, position of each row's key) for use with sum_by().
+    """
+    positions = {}
+    inverse = np.fromiter(
+        (positions.setdefault(key, len(positions)) for key in keys),
+        dtype=np.int64,
+        count=len(keys),
+    )
+    return list(positions), inverse
+
+
+def sum_by(inverse: np.ndarray, size: int, values: np.ndarray) -> np.ndarray:
+    """Exact per-group sums of a column (see group_index)."""
+    totals = np.zeros(size, dtype=np.int64)
+    np.add.at(totals, inverse, values)
+    return totals
+
+
+# ---------- formatting ----------
+def fmt(value) -> str:
+    """Hundredths to a 2-decimal string: 123456 -> "1234.56", -5 -> "-0.05"."""
+    value = int(value)
+    sign = "-" if value < 0 else ""
+    whole, cents = divmod(abs(value), SCALE)
+    return f"{sign}{whole}.{cents:02d}"
+
+
+def fmt_column(values: np.ndarray) -> List[str]:
+    """Format a whole column; same strings as fmt() for every value."""
+    if values.size and int(np.abs(values).max()) >= _EXACT_FLOAT_FORMAT:
+        return [fmt(v) for v in values.tolist()]
+    # Below the bound value / 100 is within far less than half a paisa of
+    # the exact decimal, so float formatting gives the same digits, faster.
+    return list(map("{:.2f}".format, (values / SCALE).tolist()))
+
+
+# ---------- collection lines ----------
+class MoneyLines:
+    """
+    Scaled int64 columns for a list of collection lines, in row order.
+
+    Build with ``from_rows`` from rows that include LINE_MONEY_COLUMNS.
+    """
+
+    __slots__ = ("qty", "rate", "amount", "luggage", "coolie", "paid")
+
+    def __init__(self, qty, rate, labour, transport, coolie, paid):
+        self.qty = qty
+        self.rate = rate
+        self.amount = mul(qty, rate)
+        # Luggage is total labour (qty x labour_per_kg) plus any transport cost
+        self.luggage = mul(qty, labour) + transport
+        self.coolie = coolie
+        self.paid = paid
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Any]) -> "MoneyLines":
+        n = len(rows)
+        return cls(
+            column((r.qty_kg for r in rows), n),
+            column((r.rate_per_kg for r in rows), n),
+            column((r.labour_per_kg for r in rows), n),
+            column((r.transport_cost for r in rows), n),
+            column((r.coolie for r in rows), n),
+            column((r.paid_amount for r in rows), n),
+        )
+
+    @classmethod
+    def empty(cls) -> "MoneyLines":
+        return cls.from_rows([])
+
+    def __len__(self) -> int:
+        return len(self.qty)
+
+    def take(self, index) -> "MoneyLines":
+        """Subset of the lines (slice, boolean mask or index array)."""
+        lines = object.__new__(MoneyLines)
+        for name in self.__slots__:
+            setattr(lines, name, getattr(self, name)[index])
+        return lines
+
+    def commission(self, percent_scaled: int = DEFAULT_COMMISSION_PERCENT) -> np.ndarray:
+        """Commission per line, rounded to the paisa."""
+        return percent(self.amount, percent_scaled)
@@ -0,0 +1,77 @@
+"""
+Request-scoped query diagnostics for reports.
+
+Report data functions take an optional ``QueryDiagnostics``. Without one
+they run only the queries the report needs. With one (admins passing
+``diagnostics=true``) each query goes through ``run()``, which records
+its SQL, row count, wall time and ``EXPLAIN (ANALYZE, BUFFERS)`` plan.
+Extra sanity checks (how much data the vendor has, in which dates) are
+recorded with ``check()``. ``as_metadata()`` is returned in the JSON
+response metadata.
+
+EXPLAIN ANALYZE executes the statement a second time, so a diagnostics
+request costs roughly twice the queries it reports on. It is never enabled
+on the default path.
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class QueryDiagnostics:
+    """Plans, row counts and timings collected while serving one request."""
+
+    __slots__ = ("queries", "checks", "_started")
+
+    def __init__(self):
+        self.queries: List[Dict[str, Any]] = []
+        self.checks: Dict[str, Any] = {}
+        self._started = time.perf_counter()
+
+    def run(self, db: Session, label: str, statement) -> list:
+        """Execute ``statement`` and return its rows, recording rows, time and plan."""
+        started = time.perf_counter()
+        rows = db.execute(statement).all()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        entry: Dict[str, Any] = {"label": label, "rows": len(rows), "ms": round(elapsed_ms, 2)}
+        compiled = statement.compile(dialect=db.get_bind().dialect)
+        entry["sql"] = str(compiled)
+        entry["params"] = {key: str(value) for key, value in compiled.params.items()}
+        try:
+            # Savepoint, so a failed EXPLAIN does not abort the request's transaction
+            with db.begin_nested():
+                entry["plan"] = explain_plan(db, statement)
+        except Exception as e:
+            logger.warning(f"EXPLAIN failed for {label}: {e}")
+            entry["plan_error"] = str(e)
+        self.queries.append(entry)
+        return rows
+
+    def check(self, name: str, value: Any) -> None:
+        self.checks[name] = value
+
+    def as_metadata(self) -> Dict[str, Any]:
+        return {
+            "queries": self.queries,
+            "checks": self.checks,
+            "query_ms": round(sum(q["ms"] for q in self.queries), 2),
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 2),
+        }
+
+
+def explain_plan(db: Session, statement, analyze: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    JSON plan of a SQLAlchemy statement: ``EXPLAIN (ANALYZE, BUFFERS)``, or a
+    plain ``EXPLAIN`` (planning only, nothing executed) when ``analyze`` is false.
+    """
+    compiled = statement.compile(dialect=db.get_bind().dialect)
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    # Driver-level execution: the compiled SQL already uses the DBAPI paramstyle
+    result = db.connection().exec_driver_sql(f"EXPLAIN ({options}) {compiled}", compiled.params).scalar()
+    # One JSON document per statement: [{"Plan": ..., "Planning Time": ..., ...}]
+    return result[0] if result else None
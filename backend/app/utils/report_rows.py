@@ -0,0 +1,329 @@
+"""
+Typed report rows shared by every report output.
+
+Reports are built from two kinds of objects, created once per request in a
+single pass over the query result:
+
+- ReportLine: one collection line with its text fields and every derived
+  money value (amount, luggage, commission, net, due, balance);
+- FarmerTotal: one farmer's totals over a set of lines.
+
+Money is held in hundredths (app.utils.money_columns). HTML, JSON and PDF
+turn the objects into template dicts with ``template_rows``; the CSV/XLSX
+export turns the same objects into cells with ``export_values``. Both go
+through a per-report tuple of Columns, so every format shows the same
+figures and nothing parses its own output back.
+
+Field meanings:
+    amount      qty x rate
+    luggage     qty x labour_per_kg + transport_cost
+    commission  commission on amount
+    net         amount - commission
+    due         amount - paid - luggage - coolie
+    balance     net - paid - luggage - coolie
+"""
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.money_columns import (
+    DEFAULT_COMMISSION_PERCENT,
+    MoneyLines,
+    fmt,
+    fmt_column,
+    group_index,
+    percent,
+    sum_by,
+)
+
+MONEY_FIELDS = frozenset((
+    "qty", "rate", "amount", "luggage", "coolie", "paid", "commission", "net", "due", "balance",
+))
+TOTAL_FIELDS = ("qty", "amount", "luggage", "coolie", "paid", "commission", "net", "due", "balance")
+
+
+class Column(NamedTuple):
+    """One output column: template dict key, object attribute, export header, text default."""
+    key: str
+    field: str
+    header: str
+    default: str = "N/A"
+
+
+class ReportLine:
+    __slots__ = (
+        "farmer_id", "date", "vehicle", "item_code", "item_name", "remarks", "party", "address", "code",
+        "qty", "rate", "amount", "luggage", "coolie", "paid", "commission", "net", "due", "balance",
+    )
+
+    def __init__(self, row, qty, rate, amount, luggage, coolie, paid, commission):
+        self.farmer_id = getattr(row, "farmer_id", None)
+        # Format date as DD-MM-YYYY
+        self.date = row.date.strftime("%d-%m-%Y") if row.date else None
+        self.vehicle = row.vehicle_name or row.vehicle_number
+        self.item_code = row.item_code
+        self.item_name = row.item_name
+        self.remarks = row.remarks
+        self.party = getattr(row, "farmer_name", None)
+        self.address = getattr(row, "farmer_address", None)
+        self.code = getattr(row, "farmer_code", None)
+        self.qty = qty
+        self.rate = rate
+        self.amount = amount
+        self.luggage = luggage
+        self.coolie = coolie
+        self.paid = paid
+        self.commission = commission
+        self.net = amount - commission
+        self.due = amount - paid - luggage - coolie
+        self.balance = self.due - commission
+
+
+class Totals:
+    """Sums of the money fields of a set of lines."""
+
+    __slots__ = ("count",) + TOTAL_FIELDS
+
+    def __init__(self):
+        self.count = 0
+        for name in TOTAL_FIELDS:
+            setattr(self, name, 0)
+
+    def add(self, count: int, sums: Dict[str, int]) -> None:
+        self.count += count
+        for name, value in sums.items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def charge_on_total(self, commission_percent: int) -> None:
+        """Replace per-line commission by commission on the total amount (patti style)."""
+        self.commission = int(percent(np.array([self.amount], dtype=np.int64), commission_percent)[0])
+        self.net = self.amount - self.commission
+        self.balance = self.due - self.commission
+
+    def formatted(self) -> Dict[str, str]:
+        return {name: fmt(getattr(self, name)) for name in TOTAL_FIELDS}
+
+
+class FarmerTotal(Totals):
+    __slots__ = ("farmer_id", "party", "address", "code", "group_name")
+
+    def __init__(self, farmer_id, party=None, address=None, code=None, group_name=None):
+        super().__init__()
+        self.farmer_id = farmer_id
+        self.party = party
+        self.address = address
+        self.code = code
+        self.group_name = group_name
+
+
+# ---------- building ----------
+def _line_values(money: MoneyLines, commission_percent) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    commission = money.commission(commission_percent)
+    net = money.amount - commission
+    due = money.amount - money.paid - money.luggage - money.coolie
+    return commission, {
+        "qty": money.qty, "amount": money.amount, "luggage": money.luggage, "coolie": money.coolie,
+        "paid": money.paid, "commission": commission, "net": net, "due": due, "balance": due - commission,
+    }
+
+
+def build_lines(
+    rows: Sequence[Any],
+    commission_percent: int = DEFAULT_COMMISSION_PERCENT,
+) -> Tuple[List[ReportLine], Totals]:
+    """
+    ReportLines and their Totals for query rows that include LINE_MONEY_COLUMNS
+    and the text columns (date, vehicle_name/number, item_code, item_name,
+    remarks; optionally farmer_id, farmer_name, farmer_address, farmer_code).
+    """
+    money = MoneyLines.from_rows(rows)
+    commission, values = _line_values(money, commission_percent)
+    lines = [
+        ReportLine(row, *numbers)
+        for row, *numbers in zip(
+            rows,
+            money.qty.tolist(), money.rate.tolist(), money.amount.tolist(), money.luggage.tolist(),
+            money.coolie.tolist(), money.paid.tolist(), commission.tolist(),
+        )
+    ]
+    totals = Totals()
+    totals.add(len(rows), {name: int(column.sum()) for name, column in values.items()})
+    return lines, totals
+
+
+class FarmerTotalsBuilder:
+    """
+    Accumulate per-farmer totals over one or more batches of line rows
+    (rows need farmer_id plus LINE_MONEY_COLUMNS; farmer_name, farmer_address,
+    farmer_code and group_name are taken from a farmer's first row).
+    Commission is charged per line, as on the ledger, at each farmer's rate
+    from ``rates`` (app.utils.commission_rates.CommissionRates) or at the
+    default rate when no rates are given.
+    """
+
+    def __init__(self, rates=None):
+        self.rates = rates
+        self._farmers: Dict[Any, FarmerTotal] = {}
+
+    def add(self, rows: Sequence[Any]) -> None:
+        if not rows:
+            return
+        farmer_ids, inverse = group_index([row.farmer_id for row in rows])
+        size = len(farmer_ids)
+        if self.rates is None:
+            commission_percent = DEFAULT_COMMISSION_PERCENT
+        else:
+            farmer_rates = np.fromiter((self.rates.for_farmer(f) for f in farmer_ids), dtype=np.int64, count=size)
+            commission_percent = farmer_rates[inverse]
+        _, values = _line_values(MoneyLines.from_rows(rows), commission_percent)
+        counts = sum_by(inverse, size, 1).tolist()
+        sums = {name: sum_by(inverse, size, column).tolist() for name, column in values.items()}
+        first_rows = {}
+        for row in rows:
+            first_rows.setdefault(row.farmer_id, row)
+        for i, farmer_id in enumerate(farmer_ids):
+            total = self._farmers.get(farmer_id)
+            if total is None:
+                row = first_rows[farmer_id]
+                total = self._farmers[farmer_id] = FarmerTotal(
+                    farmer_id,
+                    getattr(row, "farmer_name", None),
+                    getattr(row, "farmer_address", None),
+                    getattr(row, "farmer_code", None),
+                    getattr(row, "group_name", None),
+                )
+            total.add(counts[i], {name: column[i] for name, column in sums.items()})
+
+    def finish(self) -> List[FarmerTotal]:
+        """Farmer totals in order of first appearance."""
+        return list(self._farmers.values())
+
+
+def sum_totals(items: Iterable[Totals]) -> Totals:
+    overall = Totals()
+    for item in items:
+        overall.add(item.count, {name: getattr(item, name) for name in TOTAL_FIELDS})
+    return overall
+
+
+# ---------- output ----------
+def template_rows(items: Sequence[Any], columns: Sequence[Column], **extra) -> List[Dict[str, Any]]:
+    """Template dicts (money as 2-decimal strings) for HTML, JSON and PDF; ``extra`` keys are added to every row."""
+    formatted = {
+        c.field: fmt_column(np.fromiter((getattr(item, c.field) for item in items), dtype=np.int64, count=len(items)))
+        for c in columns if c.field in MONEY_FIELDS
+    }
+    rows = []
+    for index, item in enumerate(items):
+        row = {}
+        for c in columns:
+            if c.field in MONEY_FIELDS:
+                row[c.key] = formatted[c.field][index]
+            else:
+                value = getattr(item, c.field)
+                row[c.key] = c.default if value is None or value == "" else value
+        row.update(extra)
+        rows.append(row)
+    return rows
+
+
+def export_values(item: Any, columns: Sequence[Column]) -> Tuple[Any, ...]:
+    """Spreadsheet cells for one object: money as 2-place Decimals, text as in the templates."""
+    values = []
+    for c in columns:
+        value = getattr(item, c.field)
+        if c.field in MONEY_FIELDS:
+            values.append(Decimal(value).scaleb(-2))
+        else:
+            values.append(c.default if value is None or value == "" else value)
+    return tuple(values)
+
+
+def export_headers(columns: Sequence[Column]) -> List[str]:
+    return [c.header for c in columns]
+
+
+# ---------- per-report columns ----------
+LEDGER_COLUMNS = (
+    Column("date", "date", "Date"),
+    Column("vehicle", "vehicle", "Vehicle"),
+    Column("item_code", "item_code", "Item Code"),
+    Column("product_name", "item_name", "Item Name"),
+    Column("qty", "qty", "Qty"),
+    Column("rate", "rate", "Rate"),
+    Column("luggage", "luggage", "Luggage"),
+    Column("coolie", "coolie", "Coolie"),
+    Column("total", "amount", "Amount"),
+    Column("commission", "commission", "Commission"),
+    Column("net", "net", "Net"),
+    Column("paid", "paid", "Paid"),
+    Column("balance", "balance", "Balance"),
+    Column("remarks", "remarks", "Remarks"),
+)
+
+PATTI_LINE_COLUMNS = (
+    Column("date", "date", "Date"),
+    Column("vehicle", "vehicle", "Vehicle"),
+    Column("item_code", "item_code", "Item Code"),
+    Column("product_name", "item_name", "Item Name"),
+    Column("qty", "qty", "Qty"),
+    Column("rate", "rate", "Rate"),
+    Column("luggage", "luggage", "Luggage"),
+    Column("coolie", "coolie", "Coolie"),
+    Column("total", "amount", "Amount"),
+    Column("paid", "paid", "Paid"),
+    Column("amount", "due", "Due"),
+    Column("remarks", "remarks", "Remarks"),
+)
+
+# Patti export: one sheet, so each line also names its farmer
+PATTI_EXPORT_COLUMNS = (
+    Column("customer", "party", "Party"),
+    Column("ledger_name", "code", "Ledger"),
+) + PATTI_LINE_COLUMNS
+
+DAILY_SALES_COLUMNS = (
+    Column("date", "date", "Date"),
+    Column("vehicle", "vehicle", "Vehicle"),
+    Column("party", "party", "Party", "Unknown"),
+    Column("address", "address", "Address"),
+    Column("item_code", "item_code", "Item Code"),
+    Column("product_name", "item_name", "Item Name", "Unspecified"),
+    Column("qty", "qty", "Qty"),
+    Column("rate", "rate", "Rate"),
+    Column("luggage", "luggage", "Luggage"),
+    Column("coolie", "coolie", "Coolie"),
+    Column("paid", "paid", "Paid"),
+    Column("total", "amount", "Total"),
+)
+
+GROUP_TOTAL_COLUMNS = (
+    Column("group_name", "group_name", "Group"),
+    Column("ledger_no", "farmer_id", "Ledger No"),
+    Column("farmer_name", "party", "Party Name", "Unknown"),
+    Column("total_qty", "qty", "Qty"),
+    Column("total_amount", "amount", "Amount"),
+    Column("total_commission", "commission", "Commission"),
+    Column("total_net_amount", "net", "Net Amount Payable"),
+    Column("paid_amount", "paid", "Paid Amount"),
+)
+
+GROUP_TOTAL_BY_GROUP_COLUMNS = (
+    Column("ledger_no", "farmer_id", "Ledger No"),
+    Column("farmer_name", "party", "Party Name", "Unknown"),
+    Column("address", "address", "Address"),
+    Column("total_qty", "qty", "Qty"),
+    Column("total_price", "amount", "Total Price"),
+    Column("total_commission", "commission", "Commission"),
+    Column("total_luggage", "luggage", "Luggage"),
+    Column("total_coolie", "coolie", "Coolie"),
+    Column("total_net_amount", "net", "Net Amount"),
+    Column("paid_amount", "paid", "Paid Amount"),
+)
+
+# The page template also reads these older keys
+GROUP_TOTAL_BY_GROUP_TEMPLATE_COLUMNS = GROUP_TOTAL_BY_GROUP_COLUMNS + (
+    Column("total_paid", "paid", "Paid Amount"),
+    Column("total_amount", "net", "Net Amount"),
+)
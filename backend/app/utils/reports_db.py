@@ -2,19 +2,33 @@
 Database query functions for report generation.
 Handles data aggregation, filtering, and commission calculations.
 Uses FastAPI dependency-injected SQLAlchemy sessions.
+
+Numeric columns are selected pre-scaled to hundredths and each report is
+returned as typed ReportLine / FarmerTotal / Totals objects (see
+app.utils.report_rows), computed once; the routes only format them.
+
+Every statement goes through ``with_archive``, so ranges reaching back into
+archived seasons also read the vendor's Parquet archive (app.core.archive).
 """
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import List, Dict, Any, Optional
 from collections import defaultdict
+from fastapi import HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, literal, select
 from app.models.silk_ledger_entry import SilkLedgerEntry
 from app.models.farmer import Farmer
 from app.models.farmer_group import FarmerGroup
 from app.models.collection_item import CollectionItem
 from app.models.saala_customer import SaalaCustomer, SaalaTransaction
-from app.models.advance import Advance
+from app.core.advance_balances import current_balances
+from app.core.archive import with_archive
+from app.core.ledger_checkpoints import closing_totals, opening_totals
+from app.utils.commission_rates import get_commission_rates
+from app.utils.money_columns import DEFAULT_COMMISSION_PERCENT, LINE_MONEY_COLUMNS, scaled, to_scaled
+from app.utils.query_diagnostics import QueryDiagnostics
+from app.utils.report_rows import FarmerTotalsBuilder, Totals, build_lines, sum_totals
 
 
 def get_default_date_range() -> tuple:
@@ -29,21 +43,26 @@ def calculate_commission(
     commission_percent: Optional[Decimal] = None,
     farmer_id: Optional[int] = None,
     group_id: Optional[int] = None,
-    db: Optional[Session] = None
+    db: Optional[Session] = None,
+    vendor_id: Optional[int] = None
 ) -> Decimal:
     """
     Calculate commission with priority order:
     1. Passed commission_percent (highest priority)
-    2. Farmer's commission_percent override
+    2. Farmer's effective rate (override, else their group's rate)
     3. Group's commission_percent
-    4. Default 5%
+    4. Vendor default (settings.DEFAULT_COMMISSION_PERCENT)
+    
+    Rates come from the cached per-vendor table in app.utils.commission_rates,
+    so no query is run per call.
     
     Args:
         amount: Transaction amount
         commission_percent: Direct commission percentage (overrides everything)
-        farmer_id: Farmer ID to fetch their commission override
-        group_id: Group ID to fetch group commission
-        db: Database session for queries
+        farmer_id: Farmer ID to use the rate of
+        group_id: Group ID to use the rate of
+        db: Database session
+        vendor_id: Vendor owning the farmer/group
     
     Returns:
         Commission amount
@@ -55,22 +74,132 @@ def calculate_commission(
     if commission_percent is not None and commission_percent > 0:
         return (amount * commission_percent / 100).quantize(Decimal("0.01"))
     
-    # Priority 2: Get farmer's commission override
-    if db and farmer_id:
-        farmer = db.query(Farmer).filter(Farmer.id == farmer_id).first()
-        if farmer and farmer.commission_percent:
-            return (amount * farmer.commission_percent / 100).quantize(Decimal("0.01"))
-    
-    # Priority 3: Get group commission
-    if db and group_id:
-        group = db.query(FarmerGroup).filter(FarmerGroup.id == group_id).first()
-        if group and group.commission_percent:
-            return (amount * group.commission_percent / 100).quantize(Decimal("0.01"))
-    
-    # Priority 4: Default 12%
-    return (amount * Decimal("12") / 100).quantize(Decimal("0.01"))
+    rate = DEFAULT_COMMISSION_PERCENT
+    if db and vendor_id:
+        rates = get_commission_rates(db, vendor_id)
+        if farmer_id:
+            rate = rates.for_farmer(farmer_id)
+        elif group_id:
+            rate = rates.for_group(group_id)
+    return (amount * Decimal(rate).scaleb(-2) / 100).quantize(Decimal("0.01"))
+
+
+# Text columns of a collection line shown on every detail report
+LINE_TEXT_COLUMNS = (
+    CollectionItem.id,
+    CollectionItem.date,
+    CollectionItem.vehicle_name,
+    CollectionItem.vehicle_number,
+    CollectionItem.item_code,
+    CollectionItem.item_name,
+    CollectionItem.remarks,
+)
+
+# Columns of CollectionItem used by ledger rows (ledger, batch ledger, patti)
+LEDGER_ENTRY_COLUMNS = LINE_TEXT_COLUMNS + LINE_MONEY_COLUMNS
+
+
+# ---------- statements ----------
+# Shared by the report pages (run on the request session) and the CSV/XLSX
+# export (streamed on its own connection), so both see the same rows.
+def ledger_lines_statement(vendor_id: int, farmer_ids: List[int], from_date: date, to_date: date):
+    statement = select(CollectionItem.farmer_id, *LEDGER_ENTRY_COLUMNS).where(
+        CollectionItem.vendor_id == vendor_id,
+        CollectionItem.farmer_id.in_(farmer_ids),
+        CollectionItem.date >= from_date,
+        CollectionItem.date <= to_date
+    ).order_by(CollectionItem.farmer_id, CollectionItem.date.asc(), CollectionItem.id.asc())
+    return with_archive(statement, vendor_id, from_date, to_date, farmer_ids=farmer_ids)
+
+
+def group_total_statement(vendor_id: int, from_date: date, to_date: date, group_name: Optional[str] = None):
+    statement = select(
+        FarmerGroup.name.label("group_name"),
+        Farmer.id.label("farmer_id"),
+        Farmer.name.label("farmer_name"),
+        *LINE_MONEY_COLUMNS
+    ).select_from(FarmerGroup).join(
+        Farmer, Farmer.group_id == FarmerGroup.id
+    ).join(
+        CollectionItem, CollectionItem.farmer_id == Farmer.id
+    ).where(
+        FarmerGroup.vendor_id == vendor_id,
+        CollectionItem.vendor_id == vendor_id,
+        CollectionItem.date >= from_date,
+        CollectionItem.date <= to_date
+    ).order_by(FarmerGroup.name.asc(), Farmer.name.asc(), Farmer.id.asc())
+    if group_name:
+        statement = statement.where(FarmerGroup.name == group_name)
+    return with_archive(statement, vendor_id, from_date, to_date)
+
+
+def group_total_by_group_statement(vendor_id: int, group_id: int, from_date: date, to_date: date):
+    # This report has always charged luggage as transport_cost per kg (no
+    # labour), i.e. qty x transport_cost; keep the figures identical.
+    statement = select(
+        Farmer.id.label("farmer_id"),
+        Farmer.name.label("farmer_name"),
+        Farmer.address.label("farmer_address"),
+        scaled(CollectionItem.qty_kg),
+        scaled(CollectionItem.rate_per_kg),
+        scaled(CollectionItem.transport_cost, "labour_per_kg"),
+        literal(0).label("transport_cost"),
+        scaled(CollectionItem.coolie_cost, "coolie"),
+        scaled(CollectionItem.paid_amount),
+    ).select_from(Farmer).join(
+        CollectionItem, CollectionItem.farmer_id == Farmer.id
+    ).where(
+        Farmer.group_id == group_id,
+        CollectionItem.vendor_id == vendor_id,
+        CollectionItem.date >= from_date,
+        CollectionItem.date <= to_date
+    ).order_by(Farmer.name.asc(), Farmer.id.asc())
+    return with_archive(statement, vendor_id, from_date, to_date)
+
+
+def group_patti_statement(vendor_id: int, group_id: int, from_date: date, to_date: date):
+    statement = select(
+        CollectionItem.farmer_id,
+        Farmer.name.label("farmer_name"),
+        Farmer.farmer_code,
+        *LEDGER_ENTRY_COLUMNS
+    ).select_from(Farmer).join(
+        CollectionItem, CollectionItem.farmer_id == Farmer.id
+    ).where(
+        Farmer.group_id == group_id,
+        Farmer.vendor_id == vendor_id,
+        CollectionItem.vendor_id == vendor_id,
+        CollectionItem.date >= from_date,
+        CollectionItem.date <= to_date
+    ).order_by(Farmer.name.asc(), Farmer.id.asc(), CollectionItem.date.asc(), CollectionItem.id.asc())
+    return with_archive(statement, vendor_id, from_date, to_date)
+
+
+def daily_sales_statement(vendor_id: int, from_date: date, to_date: date, item_name: Optional[str] = None):
+    # Outer join so lines without a farmer are still listed
+    statement = select(
+        *LINE_TEXT_COLUMNS,
+        Farmer.name.label("farmer_name"),
+        Farmer.address.label("farmer_address"),
+        *LINE_MONEY_COLUMNS
+    ).select_from(CollectionItem).outerjoin(
+        Farmer, CollectionItem.farmer_id == Farmer.id
+    ).where(
+        CollectionItem.vendor_id == vendor_id,
+        CollectionItem.date >= from_date,
+        CollectionItem.date <= to_date
+    ).order_by(CollectionItem.date.asc(), Farmer.name.asc(), CollectionItem.id.asc())
+    if item_name:
+        statement = statement.where(CollectionItem.item_name == item_name)
+    return with_archive(statement, vendor_id, from_date, to_date)
 
 
+def _advance_totals(db: Session, vendor_id: int, farmer_ids: List[int]) -> Dict[int, Any]:
+    """Advance balance per farmer from the maintained balances, one query."""
+    return current_balances(db, vendor_id, farmer_ids)
+
+
+# ---------- report data ----------
 def get_ledger_data(
     vendor_id: int,
     customer_id: int,
@@ -90,279 +219,140 @@ def get_ledger_data(
         db: Database session
     
     Returns:
-        Dictionary with ledger data and metadata
+        Dictionary with customer info, ReportLines and their Totals
     """
     if not db:
-        return {"entries": [], "total_qty": "0", "total_kg": "0", "total_amount": "0", "customer": None}
+        return {"customer": None, "lines": [], "totals": Totals(), "record_count": 0}
     
     if from_date is None or to_date is None:
         from_date, to_date = get_default_date_range()
     
-    # Fetch customer/farmer info
-    customer = db.query(Farmer).filter(
-        Farmer.id == customer_id,
-        Farmer.vendor_id == vendor_id
-    ).first()
+    ledgers = get_ledger_batch_data(vendor_id, farmer_ids=[customer_id], from_date=from_date, to_date=to_date, db=db)
+    if not ledgers:
+        return {"customer": None, "lines": [], "totals": Totals(), "record_count": 0}
+    return ledgers[0]
+
+
+def get_ledger_batch_data(
+    vendor_id: int,
+    farmer_ids: Optional[List[int]] = None,
+    group_id: Optional[int] = None,
+    from_date: date = None,
+    to_date: date = None,
+    db: Session = None
+) -> List[Dict[str, Any]]:
+    """
+    Ledger data for many farmers at once, in the same shape as get_ledger_data().
     
-    if not customer:
-        return {"entries": [], "total_qty": "0", "total_kg": "0", "total_amount": "0", "customer": None}
-    
-    # Get group name
-    group_name = "N/A"
-    if customer.group_id:
-        group = db.query(FarmerGroup).filter(FarmerGroup.id == customer.group_id).first()
-        if group:
-            group_name = group.name
-    
-    # Fetch collection items (transactions) with all required fields
-    entries = db.query(
-        CollectionItem.id,
-        CollectionItem.date,
-        CollectionItem.vehicle_name,
-        CollectionItem.vehicle_number,
-        CollectionItem.item_code,
-        CollectionItem.item_name,
-        CollectionItem.qty_kg,
-        CollectionItem.rate_per_kg,
-        CollectionItem.labour_per_kg.label("labour_per_kg"),
-        CollectionItem.transport_cost.label("transport_cost"),
-        CollectionItem.coolie_cost.label("coolie"),
-        CollectionItem.paid_amount,
-        CollectionItem.remarks
-    ).filter(
-        CollectionItem.vendor_id == vendor_id,
-        CollectionItem.farmer_id == customer_id,
-        CollectionItem.date >= from_date,
-        CollectionItem.date <= to_date
-    ).order_by(CollectionItem.date.asc()).all()
-    
-    # Calculate aggregates
-    total_qty = Decimal("0")
-    total_amount = Decimal("0")
-    total_paid = Decimal("0")
-    total_luggage = Decimal("0")
-    total_coolie = Decimal("0")
-    
-    entries_list = []
-    for entry in entries:
-        qty = Decimal(str(entry.qty_kg)) if entry.qty_kg is not None else Decimal("0")
-        rate = Decimal(str(entry.rate_per_kg)) if entry.rate_per_kg is not None else Decimal("0")
-        amount = qty * rate
-        paid = Decimal(str(entry.paid_amount)) if entry.paid_amount is not None else Decimal("0")
-        # Compute luggage as total labour (qty * labour_per_kg) plus any transport_cost
-        labour_per_kg = Decimal(str(entry.labour_per_kg)) if getattr(entry, "labour_per_kg", None) is not None else Decimal("0")
-        transport_cost = Decimal(str(entry.transport_cost)) if getattr(entry, "transport_cost", None) is not None else Decimal("0")
-        luggage = (qty * labour_per_kg) + transport_cost
-        coolie = Decimal(str(entry.coolie)) if entry.coolie is not None else Decimal("0")
-        
-        total_qty += qty
-        total_amount += amount
-        total_paid += paid
-        total_luggage += luggage
-        total_coolie += coolie
-        
-        # Format date as DD-MM-YYYY
-        date_str = entry.date.strftime("%d-%m-%Y") if entry.date else "N/A"
-        
-        # Get vehicle info
-        vehicle_info = entry.vehicle_name or entry.vehicle_number or "N/A"
-        
-        entries_list.append({
-            "id": entry.id,
-            "date": date_str,
-            "vehicle": vehicle_info,
-            "item_code": entry.item_code or "N/A",
-            "item_name": entry.item_name or "N/A",
-            "qty": str(qty),
-            "rate": str(rate),
-            "luggage": str(luggage),
-            "coolie": str(coolie),
-            "amount": str(amount),
-            "paid": str(paid),
-            "remarks": entry.remarks or "N/A"
+    Selects farmers by explicit ids and/or group and always runs five queries
+    (farmers with group names, collection items, advance balances, and the
+    opening balances: last ledger checkpoints plus the first month's earlier
+    lines), however many farmers are included. Farmers come back ordered by
+    name; ids that do not belong to the vendor are skipped.
+    """
+    if not db or (not farmer_ids and group_id is None):
+        return []
+    
+    if from_date is None or to_date is None:
+        from_date, to_date = get_default_date_range()
+    
+    # 1. Farmers with their group names
+    farmer_query = db.query(Farmer, FarmerGroup.name.label("group_name")).outerjoin(
+        FarmerGroup, FarmerGroup.id == Farmer.group_id
+    ).filter(Farmer.vendor_id == vendor_id)
+    if farmer_ids:
+        farmer_query = farmer_query.filter(Farmer.id.in_(farmer_ids))
+    if group_id is not None:
+        farmer_query = farmer_query.filter(Farmer.group_id == group_id)
+    farmers = farmer_query.order_by(Farmer.name.asc(), Farmer.id.asc()).all()
+    if not farmers:
+        return []
+    ids = [farmer.id for farmer, _ in farmers]
+    
+    # 2. Every collection item in range for those farmers
+    entries_by_farmer: Dict[int, list] = defaultdict(list)
+    for entry in db.execute(ledger_lines_statement(vendor_id, ids, from_date, to_date)):
+        entries_by_farmer[entry.farmer_id].append(entry)
+    
+    # 3. Advance balances per farmer (commission rates are cached per vendor)
+    advances = _advance_totals(db, vendor_id, ids)
+    rates = get_commission_rates(db, vendor_id)
+    
+    # 4. Ledger totals before the range, from the monthly checkpoints
+    openings = opening_totals(db, vendor_id, ids, from_date, rates)
+    
+    results = []
+    for farmer, group_name in farmers:
+        commission_percent = rates.for_farmer(farmer.id)
+        lines, totals = build_lines(entries_by_farmer.get(farmer.id, []), commission_percent)
+        opening = openings[farmer.id]
+        results.append({
+            "customer": {
+                "id": farmer.id,
+                "name": farmer.name,
+                "code": farmer.farmer_code,
+                "address": farmer.address or "N/A",
+                "advance_total": str(advances.get(farmer.id, 0)),
+                "group_name": group_name or "N/A",
+                "commission_percent": commission_percent
+            },
+            "lines": lines,
+            "totals": totals,
+            "opening": opening,
+            "closing": closing_totals(opening, totals),
+            "record_count": len(lines)
         })
     
-    # Compute rem advance from advances table (given - deducted)
-    adv_sum = db.query(func.coalesce(func.sum(Advance.amount), 0)).filter(
-        Advance.vendor_id == vendor_id,
-        Advance.farmer_id == customer_id
-    ).scalar() or 0
-
-    return {
-        "customer": {
-            "id": customer.id,
-            "name": customer.name,
-            "code": customer.farmer_code,
-            "address": customer.address or "N/A",
-            "advance_total": str(adv_sum),
-            "group_name": group_name
-        },
-        "entries": entries_list,
-        "total_qty": str(total_qty),
-        "total_amount": str(total_amount),
-        "total_paid": str(total_paid),
-        "total_luggage": str(total_luggage),
-        "total_coolie": str(total_coolie),
-        "record_count": len(entries_list)
-    }
+    return results
 
 
 def get_group_total_data(
     vendor_id: int,
     from_date: date = None,
     to_date: date = None,
+    group_name: Optional[str] = None,
     db: Session = None
 ) -> Dict[str, Any]:
     """
-    Get aggregated totals for all farmer groups using CollectionItem data.
-    This provides proper date and vehicle information.
+    Per-farmer totals for all farmer groups (or only ``group_name``), using
+    CollectionItem data.
     
-    Returns grouped data with:
-    - Group name
-    - Total qty, amount per group
-    - Customer breakdown with date and vehicle info
+    Returns FarmerTotals ordered by group name and farmer name, plus their
+    overall Totals.
     """
     if not db:
-        return {"groups": [], "entries": [], "grand_total_amount": "0"}
+        return {"farmers": [], "totals": Totals(), "group_count": 0}
     
     if from_date is None or to_date is None:
         from_date, to_date = get_default_date_range()
     
-    # Query: get all collection items with group information and all required fields
-    results = db.query(
-        FarmerGroup.id.label("group_id"),
-        FarmerGroup.name.label("group_name"),
-        Farmer.id.label("farmer_id"),
-        Farmer.name.label("farmer_name"),
-        Farmer.address.label("farmer_address"),
-        
-        CollectionItem.date,
-        CollectionItem.vehicle_name,
-        CollectionItem.vehicle_number,
-        CollectionItem.item_code,
-        CollectionItem.item_name,
-        CollectionItem.qty_kg,
-        CollectionItem.rate_per_kg,
-        CollectionItem.labour_per_kg.label("labour_per_kg"),
-        CollectionItem.transport_cost.label("transport_cost"),
-        CollectionItem.coolie_cost.label("coolie"),
-        CollectionItem.paid_amount,
-        CollectionItem.remarks
-    ).join(
-        Farmer, Farmer.group_id == FarmerGroup.id
-    ).join(
-        CollectionItem, CollectionItem.farmer_id == Farmer.id
-    ).filter(
-        FarmerGroup.vendor_id == vendor_id,
-        CollectionItem.vendor_id == vendor_id,
-        CollectionItem.date >= from_date,
-        CollectionItem.date <= to_date
-    ).order_by(
-        FarmerGroup.name.asc(),
-        CollectionItem.date.asc()
-    ).all()
-    
-    # Group data by group_id
-    grouped_data = defaultdict(list)
-    
-    grand_total = Decimal("0")
-    grand_total_luggage = Decimal("0")
-    grand_total_coolie = Decimal("0")
-    entries_list = []
-    
-    for row in results:
-        qty = Decimal(str(row.qty_kg or 0))
-        rate = Decimal(str(row.rate_per_kg or 0))
-        amount = qty * rate
-        paid = Decimal(str(row.paid_amount or 0))
-        labour_per_kg = Decimal(str(row.labour_per_kg)) if getattr(row, 'labour_per_kg', None) is not None else Decimal("0")
-        transport_cost = Decimal(str(row.transport_cost)) if getattr(row, 'transport_cost', None) is not None else Decimal("0")
-        luggage = (qty * labour_per_kg) + transport_cost
-        coolie = Decimal(str(row.coolie or 0))
-        
-        # Format date as DD-MM-YYYY
-        date_str = row.date.strftime("%d-%m-%Y") if row.date else "N/A"
-        
-        # Get vehicle info
-        vehicle_info = row.vehicle_name or row.vehicle_number or "N/A"
-        
-        # Add to grouped data
-        grouped_data[row.group_id].append({
-            "group_id": row.group_id,
-            "group_name": row.group_name,
-            "farmer_id": row.farmer_id,
-            "customer_name": row.farmer_name,
-            "customer_address": row.farmer_address or "N/A",
-            "date": date_str,
-            "vehicle": vehicle_info,
-            "item_code": row.item_code or "N/A",
-            "item_name": row.item_name or "N/A",
-            "qty": str(qty),
-            "rate": str(rate),
-            "luggage": str(luggage),
-            "coolie": str(coolie),
-            "amount": str(amount),
-            "paid": str(paid),
-            "remarks": row.remarks or "N/A"
-        })
-        
-        grand_total += amount
-        grand_total_luggage += luggage
-        grand_total_coolie += coolie
-        
-        # Add to entries list for detailed view
-        entries_list.append({
-            "group_id": row.group_id,
-            "group_name": row.group_name,
-            "farmer_id": row.farmer_id,
-            "customer_name": row.farmer_name,
-            "customer_address": row.farmer_address or "N/A",
-            "date": date_str,
-            "vehicle": vehicle_info,
-            "item_code": row.item_code or "N/A",
-            "item_name": row.item_name or "N/A",
-            "qty": str(qty),
-            "rate": str(rate),
-            "luggage": str(luggage),
-            "coolie": str(coolie),
-            "amount": str(amount),
-            "paid": str(paid),
-            "remarks": row.remarks or "N/A"
-        })
-    
-    # Create group summaries
-    groups_list = []
-    for group_id, group_entries in grouped_data.items():
-        if not group_entries:
-            continue
-            
-        group_name = group_entries[0]["group_name"]
-        total_qty = sum(Decimal(e["qty"]) for e in group_entries)
-        total_amount = sum(Decimal(e["amount"]) for e in group_entries)
-        total_paid = sum(Decimal(e["paid"]) for e in group_entries)
-        
-        groups_list.append({
-            "id": group_id,
-            "name": group_name,
-            "total_qty": str(total_qty),
-            "total_amount": str(total_amount),
-            "total_paid": str(total_paid),
-            "customer_count": len(set(e["farmer_id"] for e in group_entries)),
-            "entry_count": len(group_entries)
-        })
+    builder = FarmerTotalsBuilder(get_commission_rates(db, vendor_id))
+    builder.add(db.execute(group_total_statement(vendor_id, from_date, to_date, group_name)).all())
+    farmers = builder.finish()
     
     return {
-        "groups": groups_list,
-        "entries": entries_list,
-        "grand_total_amount": str(grand_total),
-        "grand_total_luggage": str(grand_total_luggage),
-        "grand_total_coolie": str(grand_total_coolie),
-        "group_count": len(groups_list),
+        "farmers": farmers,
+        "totals": sum_totals(farmers),
+        "group_count": len({farmer.group_name for farmer in farmers}),
         "from_date": from_date.isoformat(),
         "to_date": to_date.isoformat()
     }
 
 
+def get_group_total_by_group_data(
+    vendor_id: int,
+    group_id: int,
+    from_date: date,
+    to_date: date,
+    db: Session
+) -> Dict[str, Any]:
+    """Per-farmer totals for one group (the group-total-by-group report)."""
+    builder = FarmerTotalsBuilder(get_commission_rates(db, vendor_id))
+    builder.add(db.execute(group_total_by_group_statement(vendor_id, group_id, from_date, to_date)).all())
+    farmers = builder.finish()
+    return {"farmers": farmers, "totals": sum_totals(farmers)}
+
+
 def get_group_patti_data(
     vendor_id: int,
     group_id: int,
@@ -375,18 +365,19 @@ def get_group_patti_data(
     Shows all farmers in a group with their ledger entries.
     
     Returns structure:
-    - Group header info
-    - List of farmers with their entries
-    - Farmer subtotals and group grand total
+    - Group header info and the group's commission percent (hundredths)
+    - List of farmers with their ReportLines and Totals; commission is
+      charged on each farmer's total amount at the farmer's effective rate.
+      Each farmer's ``opening`` Totals cover every earlier line, ledger style
+      (commission per line)
+    - Group grand Totals
+    
+    Runs five queries (group and farmers, collection items, advance balances,
+    opening checkpoints and the first month's earlier lines) however many
+    farmers the group has.
     """
     if not db:
-        return {
-            "group": None,
-            "farmers": [],
-            "grand_total_amount": "0",
-            "grand_total_qty": "0",
-            "entry_count": 0
-        }
+        return {"group": None, "farmers": [], "totals": Totals(), "entry_count": 0}
     
     if from_date is None or to_date is None:
         from_date, to_date = get_default_date_range()
@@ -398,150 +389,113 @@ def get_group_patti_data(
     ).first()
     
     if not group:
-        return {
-            "group": None,
-            "farmers": [],
-            "grand_total_amount": "0",
-            "grand_total_qty": "0",
-            "entry_count": 0
-        }
+        return {"group": None, "farmers": [], "totals": Totals(), "entry_count": 0}
+    
+    rates = get_commission_rates(db, vendor_id)
     
     # Fetch all farmers in group
     farmers = db.query(Farmer).filter(
         Farmer.group_id == group_id,
         Farmer.vendor_id == vendor_id
-    ).order_by(Farmer.name.asc()).all()
+    ).order_by(Farmer.name.asc(), Farmer.id.asc()).all()
     
-    farmers_list = []
-    grand_total_qty = Decimal("0")
-    grand_total_amount = Decimal("0")
-    total_entry_count = 0
+    entries_by_farmer: Dict[int, list] = defaultdict(list)
+    for entry in db.execute(group_patti_statement(vendor_id, group_id, from_date, to_date)):
+        entries_by_farmer[entry.farmer_id].append(entry)
+    advances = _advance_totals(db, vendor_id, [farmer.id for farmer in farmers])
+    openings = opening_totals(db, vendor_id, [farmer.id for farmer in farmers], from_date, rates)
     
+    farmers_list = []
     for farmer in farmers:
-        # Get this farmer's collection items (transactions) with all required fields
-        entries = db.query(
-            CollectionItem.id,
-            CollectionItem.date,
-            CollectionItem.vehicle_name,
-            CollectionItem.vehicle_number,
-            CollectionItem.item_code,
-            CollectionItem.item_name,
-            CollectionItem.qty_kg,
-            CollectionItem.rate_per_kg,
-            CollectionItem.labour_per_kg.label("labour_per_kg"),
-            CollectionItem.transport_cost.label("transport_cost"),
-            CollectionItem.coolie_cost.label("coolie"),
-            CollectionItem.paid_amount,
-            CollectionItem.remarks
-        ).filter(
-            CollectionItem.vendor_id == vendor_id,
-            CollectionItem.farmer_id == farmer.id,
-            CollectionItem.date >= from_date,
-            CollectionItem.date <= to_date
-        ).order_by(CollectionItem.date.asc()).all()
-                
-        farmer_total_qty = Decimal("0")
-        farmer_total_amount = Decimal("0")
-        farmer_total_paid = Decimal("0")
-        farmer_total_luggage = Decimal("0")
-        farmer_total_coolie = Decimal("0")
-        entries_list = []
-                
-        for entry in entries:
-            qty = Decimal(str(entry.qty_kg)) if entry.qty_kg is not None else Decimal("0")
-            rate = Decimal(str(entry.rate_per_kg)) if entry.rate_per_kg is not None else Decimal("0")
-            amount = qty * rate
-            paid = Decimal(str(entry.paid_amount)) if entry.paid_amount is not None else Decimal("0")
-            labour_per_kg = Decimal(str(entry.labour_per_kg)) if getattr(entry, 'labour_per_kg', None) is not None else Decimal("0")
-            transport_cost = Decimal(str(entry.transport_cost)) if getattr(entry, 'transport_cost', None) is not None else Decimal("0")
-            luggage = (qty * labour_per_kg) + transport_cost
-            coolie = Decimal(str(entry.coolie)) if entry.coolie is not None else Decimal("0")
-                    
-            farmer_total_qty += qty
-            farmer_total_amount += amount
-            farmer_total_paid += paid
-            farmer_total_luggage += luggage
-            farmer_total_coolie += coolie
-                    
-            # Format date as DD-MM-YYYY
-            date_str = entry.date.strftime("%d-%m-%Y") if entry.date else "N/A"
-                    
-            # Get vehicle info
-            vehicle_info = entry.vehicle_name or entry.vehicle_number or "N/A"
-                    
-            entries_list.append({
-                "id": entry.id,
-                "date": date_str,
-                "vehicle": vehicle_info,
-                "item_code": entry.item_code or "N/A",
-                "item_name": entry.item_name or "N/A",
-                "qty": str(qty),
-                "rate": str(rate),
-                "luggage": str(luggage),
-                "coolie": str(coolie),
-                "amount": str(amount),
-                "paid": str(paid),
-                "remarks": entry.remarks or "N/A"
-            })
-                
-        grand_total_qty += farmer_total_qty
-        grand_total_amount += farmer_total_amount
-        total_entry_count += len(entries_list)
-                
-        # Calculate farmer's commission (using default 12% as requested)
-        farmer_commission = (farmer_total_amount * Decimal("12") / 100).quantize(Decimal("0.01"))
-                
+        commission_percent = rates.for_farmer(farmer.id)
+        lines, totals = build_lines(entries_by_farmer.get(farmer.id, []), commission_percent)
+        totals.charge_on_total(commission_percent)
         farmers_list.append({
             "id": farmer.id,
             "name": farmer.name,
             "code": farmer.farmer_code,
             "address": farmer.address or "N/A",
-            
-            "entries": entries_list,
-            "total_qty": str(farmer_total_qty),
-            "total_amount": str(farmer_total_amount),
-            "total_paid": str(farmer_total_paid),
-            "total_luggage": str(farmer_total_luggage),
-            "total_coolie": str(farmer_total_coolie),
-            "commission": str(farmer_commission),
-            "entry_count": len(entries_list)
+            "advance_total": to_scaled(advances.get(farmer.id, 0)),
+            "commission_percent": commission_percent,
+            "lines": lines,
+            "totals": totals,
+            "opening": openings[farmer.id],
+            "entry_count": len(lines)
         })
     
     return {
         "group": {
             "id": group.id,
             "name": group.name,
-            "commission_percent": str(group.commission_percent) if group.commission_percent else "5.00"
+            "commission_percent": rates.for_group(group.id)
         },
         "farmers": farmers_list,
-        "grand_total_qty": str(grand_total_qty),
-        "grand_total_amount": str(grand_total_amount),
+        "totals": sum_totals(f["totals"] for f in farmers_list),
         "farmer_count": len(farmers_list),
-        "entry_count": total_entry_count,
+        "entry_count": sum(f["entry_count"] for f in farmers_list),
         "from_date": from_date.isoformat(),
         "to_date": to_date.isoformat()
     }
 
 
+def _daily_sales_checks(
+    db: Session,
+    diagnostics: QueryDiagnostics,
+    vendor_id: int,
+    from_date: date,
+    to_date: date,
+    empty: bool
+) -> None:
+    """Diagnostics-only facts that explain an empty or surprising daily sales report."""
+    span = diagnostics.run(db, "vendor_items", select(
+        func.count(CollectionItem.id).label("item_count"),
+        func.min(CollectionItem.date).label("min_date"),
+        func.max(CollectionItem.date).label("max_date")
+    ).where(CollectionItem.vendor_id == vendor_id))[0]
+    diagnostics.check("vendor_item_count", span.item_count)
+    diagnostics.check("vendor_date_range", {
+        "from": span.min_date.isoformat() if span.min_date else None,
+        "to": span.max_date.isoformat() if span.max_date else None
+    })
+    if empty:
+        # Items just outside the requested range
+        outside = diagnostics.run(db, "items_outside_range", select(
+            CollectionItem.date, CollectionItem.farmer_id, CollectionItem.qty_kg
+        ).where(
+            CollectionItem.vendor_id == vendor_id,
+            or_(CollectionItem.date < from_date, CollectionItem.date > to_date)
+        ).limit(5))
+        diagnostics.check("items_outside_range", [
+            {"date": row.date.isoformat() if row.date else None, "farmer_id": row.farmer_id, "qty": str(row.qty_kg)}
+            for row in outside
+        ])
+
+
 def get_daily_sales_data(
     vendor_id: int,
     from_date: date = None,
     to_date: date = None,
     item_name: Optional[str] = None,
-    db: Session = None
+    db: Session = None,
+    diagnostics: Optional[QueryDiagnostics] = None
 ) -> Dict[str, Any]:
     """
     Get daily collection/sales data with vehicle information.
     Uses CollectionItem data for complete information including vehicle details.
     
-    Returns data with date, vehicle, party, item, qty, rate, and amount.
+    Returns ReportLines (date, vehicle, party, item, qty, rate, amount, ...)
+    and their Totals.
+    
+    Runs a single query. With ``diagnostics`` the query's plan, row count and
+    timing are recorded, along with the vendor's total item count and date
+    span (and a sample of items outside the range when nothing matched).
     """
     import logging
     logger = logging.getLogger(__name__)
     
     if not db:
         logger.error("Database session is None")
-        return {"entries": [], "grand_total_qty": "0", "grand_total_amount": "0"}
+        return {"lines": [], "totals": Totals(), "record_count": 0}
     
     if from_date is None or to_date is None:
         from_date, to_date = get_default_date_range()
@@ -550,196 +504,38 @@ def get_daily_sales_data(
     logger.info(f"Querying daily sales - vendor_id: {vendor_id}, from: {from_date}, to: {to_date}, item: {item_name}")
     
     try:
-        # First, let's debug: Check if there are ANY collection items for this vendor
-        total_items_count = db.query(CollectionItem).filter(
-            CollectionItem.vendor_id == vendor_id
-        ).count()
-        logger.info(f"DEBUG: Total CollectionItems in DB for vendor {vendor_id}: {total_items_count}")
-        
-        # Check date range of available data
-        min_max_dates = db.query(
-            func.min(CollectionItem.date).label('min_date'),
-            func.max(CollectionItem.date).label('max_date')
-        ).filter(
-            CollectionItem.vendor_id == vendor_id
-        ).first()
-        
-        if min_max_dates and min_max_dates.min_date:
-            logger.info(f"DEBUG: Available date range in DB: {min_max_dates.min_date} to {min_max_dates.max_date}")
-            logger.info(f"DEBUG: Requested date range: {from_date} to {to_date}")
+        statement = daily_sales_statement(vendor_id, from_date, to_date, item_name)
+        if diagnostics is None:
+            results = db.execute(statement).all()
         else:
-            logger.warning(f"DEBUG: No CollectionItems found for vendor {vendor_id}")
-        
-        # Query collection items with vehicle information and all required fields
-        # IMPORTANT: Use outerjoin but apply filters correctly to avoid excluding NULL farmer records
-        query = db.query(
-            CollectionItem.date,
-            CollectionItem.vehicle_name,
-            CollectionItem.vehicle_number,
-            Farmer.name.label("party_name"),
-            Farmer.address.label("party_address"),
-            
-            CollectionItem.item_code,
-            CollectionItem.item_name,
-            CollectionItem.qty_kg,
-            CollectionItem.rate_per_kg,
-            CollectionItem.labour_per_kg.label("labour_per_kg"),
-            CollectionItem.transport_cost.label("transport_cost"),
-            CollectionItem.coolie_cost.label("coolie"),
-            CollectionItem.paid_amount,
-            CollectionItem.remarks
-        ).outerjoin(
-            Farmer, CollectionItem.farmer_id == Farmer.id
-        ).where(
-            # Use .where() instead of .filter() for clarity - same behavior but clearer intent
-            CollectionItem.vendor_id == vendor_id,
-            CollectionItem.date >= from_date,
-            CollectionItem.date <= to_date
-        )
-        
-        # Optional: filter by item name
-        if item_name:
-            logger.info(f"Filtering by item_name: {item_name}")
-            query = query.where(CollectionItem.item_name == item_name)
-        
-        logger.info(f"Executing query...")
-        
-        # Log the SQL query for debugging
-        try:
-            compiled_query = str(query)
-            logger.info(f"SQL Query: {compiled_query}")
-            logger.info(f"SQL Parameters: vendor_id={vendor_id}, from_date={from_date}, to_date={to_date}")
-        except Exception as compile_error:
-            logger.warning(f"Could not compile query for logging: {compile_error}")
-        
-        results = query.order_by(
-            CollectionItem.date.asc(),
-            Farmer.name.asc()
-        ).all()
+            results = diagnostics.run(db, "daily_sales", statement)
+            _daily_sales_checks(db, diagnostics, vendor_id, from_date, to_date, empty=not results)
         
         logger.info(f"Query returned {len(results)} results")
         
-        # If no results, log more details
-        if len(results) == 0:
-            logger.warning(f"No results found! Checking if data exists outside date range...")
-            # Check if there are items just outside our range
-            nearby_items = db.query(CollectionItem).filter(
-                CollectionItem.vendor_id == vendor_id,
-                or_(
-                    CollectionItem.date < from_date,
-                    CollectionItem.date > to_date
-                )
-            ).limit(5).all()
-            
-            if nearby_items:
-                logger.warning(f"Found {len(nearby_items)} items OUTSIDE the requested date range:")
-                for idx, item in enumerate(nearby_items):
-                    logger.warning(f"  Item {idx+1}: date={item.date}, farmer_id={item.farmer_id}, qty={item.qty_kg}")
-            else:
-                logger.warning(f"No CollectionItems found at all for vendor {vendor_id}")
-        
-        entries_list = []
-        grand_total_qty = Decimal("0")
-        grand_total_amount = Decimal("0")
-        grand_total_luggage = Decimal("0")
-        grand_total_coolie = Decimal("0")
-        
-        for idx, row in enumerate(results):
-            try:
-                # Safely convert numeric values
-                try:
-                    qty = Decimal(str(row.qty_kg)) if row.qty_kg is not None else Decimal("0")
-                except (ValueError, TypeError, Exception) as e:
-                    logger.warning(f"Invalid qty_kg at index {idx}: {row.qty_kg}, error: {e}")
-                    qty = Decimal("0")
-                
-                try:
-                    rate = Decimal(str(row.rate_per_kg)) if row.rate_per_kg is not None else Decimal("0")
-                except (ValueError, TypeError, Exception) as e:
-                    logger.warning(f"Invalid rate_per_kg at index {idx}: {row.rate_per_kg}, error: {e}")
-                    rate = Decimal("0")
-                
-                amount = qty * rate
-                
-                try:
-                    paid = Decimal(str(row.paid_amount)) if row.paid_amount is not None else Decimal("0")
-                except (ValueError, TypeError, Exception) as e:
-                    logger.warning(f"Invalid paid_amount at index {idx}: {row.paid_amount}, error: {e}")
-                    paid = Decimal("0")
-                
-                try:
-                    # Prefer computing luggage from labour_per_kg * qty + transport_cost when available
-                    labour_per_kg = Decimal(str(row.labour_per_kg)) if getattr(row, 'labour_per_kg', None) is not None else Decimal("0")
-                    transport_cost = Decimal(str(row.transport_cost)) if getattr(row, 'transport_cost', None) is not None else Decimal("0")
-                    luggage = (qty * labour_per_kg) + transport_cost
-                except (ValueError, TypeError, Exception) as e:
-                    logger.warning(f"Invalid luggage at index {idx}: labour_per_kg={getattr(row, 'labour_per_kg', None)}, transport_cost={getattr(row, 'transport_cost', None)}, error: {e}")
-                    luggage = Decimal("0")
-                
-                try:
-                    coolie = Decimal(str(row.coolie)) if row.coolie is not None else Decimal("0")
-                except (ValueError, TypeError, Exception) as e:
-                    logger.warning(f"Invalid coolie at index {idx}: {row.coolie}, error: {e}")
-                    coolie = Decimal("0")
-                
-                # Format date as DD-MM-YYYY
-                try:
-                    date_str = row.date.strftime("%d-%m-%Y") if row.date else "N/A"
-                except Exception as e:
-                    logger.warning(f"Invalid date at index {idx}: {row.date}, error: {e}")
-                    date_str = "N/A"
-                
-                # Get vehicle info
-                vehicle_info = row.vehicle_name or row.vehicle_number or "N/A"
-                
-                grand_total_qty += qty
-                grand_total_amount += amount
-                grand_total_luggage += luggage
-                grand_total_coolie += coolie
-                
-                entries_list.append({
-                    "date": date_str,
-                    "vehicle": vehicle_info,
-                    "vehicle_name": vehicle_info,  # For backward compatibility
-                    "party": row.party_name or "Unknown",
-                    "party_address": row.party_address or "N/A",
-                    
-                    "item_code": row.item_code or "N/A",
-                    "item": row.item_name or "Unspecified",
-                    "qty": str(qty),
-                    "rate": str(rate),
-                    "luggage": str(luggage),
-                    "coolie": str(coolie),
-                    "amount": str(amount),
-                    "paid": str(paid),
-                    "remarks": row.remarks or "N/A"
-                })
-            except Exception as row_error:
-                logger.warning(f"Error processing row {idx}: {row_error}")
-                # Skip this row and continue
-                continue
-        
-        logger.info(f"Successfully processed {len(entries_list)} entries")
+        lines, totals = build_lines(results)
+        logger.info(f"Successfully processed {len(lines)} entries")
         
         return {
-            "entries": entries_list,
-            "grand_total_qty": str(grand_total_qty),
-            "grand_total_amount": str(grand_total_amount),
-            "grand_total_luggage": str(grand_total_luggage),
-            "grand_total_coolie": str(grand_total_coolie),
-            "record_count": len(entries_list),
+            "lines": lines,
+            "totals": totals,
+            "record_count": len(lines),
             "from_date": from_date.isoformat(),
             "to_date": to_date.isoformat()
         }
         
+    except HTTPException:
+        # Statement timeout (504) / client disconnect (503) from
+        # app.core.statement_timeouts: an empty 200 report would hide them
+        raise
     except Exception as e:
         logger.error(f"Database query failed: {e}")
         import traceback
         logger.error(traceback.format_exc())
         # Return empty data instead of crashing
         return {
-            "entries": [],
-            "grand_total_qty": "0",
-            "grand_total_amount": "0",
+            "lines": [],
+            "totals": Totals(),
+            "record_count": 0,
             "error": str(e)
         }
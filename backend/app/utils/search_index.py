@@ -0,0 +1,407 @@
+"""
+In-process, per-vendor search index for autocomplete.
+
+Dropdowns for farmers, SAALA customers and catalog items used to run
+``ILIKE '%q%'`` on every keystroke, which cannot use a B-tree index. This module
+keeps a small index per (kind, vendor) in memory instead:
+
+- a prefix trie over the full name, each name word and the code, answering
+  "starts with" lookups by walking len(q) nodes;
+- an n-gram (1..3 character) posting list, answering "contains" lookups by
+  intersecting the postings of the query's grams and verifying the survivors.
+
+Results keep ILIKE '%q%' semantics (every match contains q in name or code)
+but are ranked: exact code, code prefix, exact name, name prefix, word
+prefix, then plain substring; ties fall back to name order.
+
+Freshness comes from app.core.data_version: each cached index remembers the
+per-table versions of the tables it reads (farmers and farmer_groups, the
+catalog, or saala_customers) and is rebuilt lazily on the next lookup after a
+write to one of them. Writes elsewhere (collection lines, advances, ...) leave
+it alone. Every worker process keeps its own copy, and because the versions
+live in the database they all agree on when to rebuild.
+
+Set SEARCH_BACKEND=database to answer the same lookups from Postgres instead
+(pg_trgm GIN indexes), with identical payloads, ranking and pagination.
+"""
+import heapq
+import logging
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.data_version import get_source_versions
+from app.models.catalog import Catalog
+from app.models.farmer import Farmer
+from app.models.farmer_group import FarmerGroup
+from app.models.saala_customer import SaalaCustomer
+from app.utils.text_search import contains_pattern, escape_like
+
+logger = logging.getLogger(__name__)
+
+MAX_PREFIX_DEPTH = 20
+MAX_GRAM = 3
+
+_WORD_SPLIT = re.compile(r"[\s\-_/.,]+")
+
+
+def normalize(text: Optional[str]) -> str:
+    """Case-fold and collapse whitespace so lookups are case-insensitive like ILIKE."""
+    if not text:
+        return ""
+    return " ".join(str(text).casefold().split())
+
+
+class SearchDocument:
+    """One searchable row. ``payload`` is what the endpoint returns for it."""
+
+    __slots__ = ("id", "name", "code", "group_id", "payload", "name_key", "code_key")
+
+    def __init__(self, id: int, name: str, code: Optional[str], payload: Any, group_id: Optional[int] = None):
+        self.id = id
+        self.name = name or ""
+        self.code = code or ""
+        self.group_id = group_id
+        self.payload = payload
+        self.name_key = normalize(self.name)
+        self.code_key = normalize(self.code)
+
+
+class _TrieNode:
+    __slots__ = ("children", "positions")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.positions: Set[int] = set()
+
+
+class SearchIndex:
+    """Immutable index over a list of documents; rebuild rather than mutate."""
+
+    def __init__(self, documents: Iterable[SearchDocument]):
+        self._docs: List[SearchDocument] = sorted(documents, key=lambda d: (d.name_key, d.id))
+        self._trie = _TrieNode()
+        self._grams: Dict[str, Set[int]] = {}
+
+        for pos, doc in enumerate(self._docs):
+            for key in self._prefix_keys(doc):
+                self._insert_prefix(key, pos)
+            for field in (doc.name_key, doc.code_key):
+                for gram in self._grams_of(field):
+                    self._grams.setdefault(gram, set()).add(pos)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # ---------- build helpers ----------
+    @staticmethod
+    def _prefix_keys(doc: SearchDocument) -> Set[str]:
+        keys = {doc.name_key, doc.code_key}
+        keys.update(w for w in _WORD_SPLIT.split(doc.name_key) if w)
+        keys.update(w for w in _WORD_SPLIT.split(doc.code_key) if w)
+        keys.discard("")
+        return keys
+
+    def _insert_prefix(self, key: str, pos: int) -> None:
+        node = self._trie
+        for ch in key[:MAX_PREFIX_DEPTH]:
+            node = node.children.setdefault(ch, _TrieNode())
+            node.positions.add(pos)
+
+    @staticmethod
+    def _grams_of(text: str) -> Set[str]:
+        grams = set()
+        for n in range(1, MAX_GRAM + 1):
+            for i in range(len(text) - n + 1):
+                grams.add(text[i:i + n])
+        return grams
+
+    # ---------- lookup ----------
+    def _prefix_positions(self, needle: str) -> Set[int]:
+        node = self._trie
+        for ch in needle[:MAX_PREFIX_DEPTH]:
+            node = node.children.get(ch)
+            if node is None:
+                return set()
+        if len(needle) <= MAX_PREFIX_DEPTH:
+            return node.positions
+        # Deeper than the trie: verify the remaining characters directly.
+        return {p for p in node.positions if self._contains(self._docs[p], needle)}
+
+    def _infix_positions(self, needle: str) -> Set[int]:
+        n = min(len(needle), MAX_GRAM)
+        grams = {needle[i:i + n] for i in range(len(needle) - n + 1)}
+        postings = []
+        for gram in grams:
+            posting = self._grams.get(gram)
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return candidates
+        if len(needle) <= MAX_GRAM:
+            return candidates
+        return {p for p in candidates if self._contains(self._docs[p], needle)}
+
+    @staticmethod
+    def _contains(doc: SearchDocument, needle: str) -> bool:
+        return needle in doc.name_key or needle in doc.code_key
+
+    @staticmethod
+    def _score(doc: SearchDocument, needle: str) -> int:
+        if doc.code_key == needle:
+            return 0
+        if doc.code_key.startswith(needle):
+            return 1
+        if doc.name_key == needle:
+            return 2
+        if doc.name_key.startswith(needle):
+            return 3
+        if any(w.startswith(needle) for w in _WORD_SPLIT.split(doc.name_key)):
+            return 4
+        return 5
+
+    def search(
+        self,
+        q: Optional[str] = None,
+        group_id: Optional[int] = None,
+        offset: int = 0,
+        limit: Optional[int] = 20,
+    ) -> Tuple[List[Any], int]:
+        """
+        Return ``(payloads, total)`` for one page of ranked matches.
+
+        With no query every document (optionally restricted to ``group_id``)
+        matches, in name order. ``limit=None`` returns every match from
+        ``offset`` on.
+        """
+        needle = normalize(q)
+        end = None if limit is None else offset + limit
+
+        if not needle:
+            positions = range(len(self._docs))
+            if group_id is not None:
+                positions = [p for p in positions if self._docs[p].group_id == group_id]
+            total = len(positions)
+            return [self._docs[p].payload for p in positions[offset:end]], total
+
+        matches = self._prefix_positions(needle) | self._infix_positions(needle)
+        if group_id is not None:
+            matches = {p for p in matches if self._docs[p].group_id == group_id}
+
+        # Only the requested page needs ordering, not every match.
+        rank = lambda p: (self._score(self._docs[p], needle), p)
+        ranked = sorted(matches, key=rank) if end is None else heapq.nsmallest(end, matches, key=rank)
+        return [self._docs[p].payload for p in ranked[offset:end]], len(matches)
+
+
+# ---------- sources ----------
+class _Source:
+    """How to fetch one kind of searchable row, for either backend."""
+
+    def __init__(self, query, tables, name_col, code_col, to_document, group_col=None):
+        self.query = query            # (db, vendor_id) -> Query of row tuples
+        self.tables = tables          # SOURCE_TABLES the rows are read from
+        self.name_col = name_col      # () -> column
+        self.code_col = code_col      # () -> column
+        self.group_col = group_col    # () -> column, optional
+        self.to_document = to_document
+
+
+_sources: Dict[str, _Source] = {}
+_indexes: Dict[Tuple[str, int], Tuple[Tuple[int, ...], SearchIndex]] = {}
+_lock = threading.Lock()
+
+
+def register_source(kind: str, **kwargs):
+    """Decorator registering the query that yields rows for ``kind``."""
+    def decorator(query):
+        _sources[kind] = _Source(query, **kwargs)
+        return query
+    return decorator
+
+
+def get_index(db: Session, kind: str, vendor_id: int) -> SearchIndex:
+    """Return the current index for a vendor, rebuilding it if its tables changed."""
+    source = _sources[kind]
+    version = get_source_versions(db, vendor_id, source.tables)
+    key = (kind, vendor_id)
+
+    with _lock:
+        cached = _indexes.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    index = SearchIndex(source.to_document(row) for row in source.query(db, vendor_id).all())
+    with _lock:
+        _indexes[key] = (version, index)
+    logger.debug(f"Rebuilt {kind} search index for vendor {vendor_id} at version {version} ({len(index)} docs)")
+    return index
+
+
+def clear_indexes() -> None:
+    """Drop every cached index (tests / admin tooling)."""
+    with _lock:
+        _indexes.clear()
+
+
+def _search_sql(
+    db: Session,
+    kind: str,
+    vendor_id: int,
+    q: Optional[str],
+    group_id: Optional[int],
+    offset: int,
+    limit: Optional[int],
+) -> Tuple[List[Any], int]:
+    """
+    Same contract and ranking as SearchIndex.search, evaluated in Postgres.
+
+    The ``ILIKE '%q%'`` filters are served by the pg_trgm GIN indexes from the
+    trigram_search_indexes_20260212 migration.
+    """
+    source = _sources[kind]
+    name_col, code_col = source.name_col(), source.code_col()
+    query = source.query(db, vendor_id)
+    if group_id is not None and source.group_col is not None:
+        query = query.filter(source.group_col() == group_id)
+
+    needle = normalize(q)
+    if not needle:
+        total = query.count()
+        rows = query.order_by(name_col.asc()).offset(offset).limit(limit).all()
+        return [source.to_document(r).payload for r in rows], total
+
+    pattern = contains_pattern(needle)
+    prefix = f"{escape_like(needle)}%"
+    query = query.filter(or_(
+        name_col.ilike(pattern, escape="\\"),
+        code_col.ilike(pattern, escape="\\"),
+    ))
+    rank = case(
+        (func.lower(code_col) == needle, 0),
+        (code_col.ilike(prefix, escape="\\"), 1),
+        (func.lower(name_col) == needle, 2),
+        (name_col.ilike(prefix, escape="\\"), 3),
+        (name_col.ilike(f"% {prefix}", escape="\\"), 4),
+        else_=5,
+    )
+    total = query.count()
+    rows = query.order_by(rank, name_col.asc()).offset(offset).limit(limit).all()
+    return [source.to_document(r).payload for r in rows], total
+
+
+def search_documents(
+    db: Session,
+    kind: str,
+    vendor_id: int,
+    q: Optional[str] = None,
+    group_id: Optional[int] = None,
+    offset: int = 0,
+    limit: Optional[int] = 20,
+) -> Tuple[List[Any], int]:
+    """
+    Autocomplete lookup returning ``(payloads, total)``.
+
+    Uses the in-process index unless SEARCH_BACKEND=database, which is meant
+    for deployments where holding every vendor's rows in each worker is not
+    an option.
+    """
+    if settings.SEARCH_BACKEND == "database":
+        return _search_sql(db, kind, vendor_id, q, group_id, offset, limit)
+    return get_index(db, kind, vendor_id).search(q, group_id=group_id, offset=offset, limit=limit)
+
+
+# ---------- farmers ----------
+def _farmer_document(row) -> SearchDocument:
+    id_, name, code, phone, address, group_id, group_name = row
+    code = code or ""
+    payload = {
+        "id": id_,
+        "name": name,
+        "group_name": group_name,
+        "code": code,
+        "farmer_code": code,
+        "label": f"{code} - {name}".strip(" -"),
+        "value": id_,
+        "phone": phone,
+        "address": address,
+    }
+    return SearchDocument(id_, name, code, payload, group_id=group_id)
+
+
+@register_source(
+    "farmers",
+    tables=("farmers", "farmer_groups"),
+    name_col=lambda: Farmer.name,
+    code_col=lambda: Farmer.farmer_code,
+    group_col=lambda: Farmer.group_id,
+    to_document=_farmer_document,
+)
+def _farmers_query(db: Session, vendor_id: int):
+    return db.query(
+        Farmer.id, Farmer.name, Farmer.farmer_code, Farmer.phone, Farmer.address,
+        Farmer.group_id, FarmerGroup.name,
+    ).outerjoin(FarmerGroup, Farmer.group_id == FarmerGroup.id)\
+     .filter(Farmer.vendor_id == vendor_id)
+
+
+# ---------- SAALA customers ----------
+def _saala_customer_document(row) -> SearchDocument:
+    id_, vendor_id, name, contact, address, created_at, updated_at = row
+    payload = {
+        "id": id_,
+        "vendor_id": vendor_id,
+        "name": name,
+        "contact": contact,
+        "address": address,
+        "created_at": created_at,
+        "updated_at": updated_at,
+    }
+    return SearchDocument(id_, name, contact, payload)
+
+
+@register_source(
+    "saala_customers",
+    tables=("saala_customers",),
+    name_col=lambda: SaalaCustomer.name,
+    code_col=lambda: SaalaCustomer.contact,
+    to_document=_saala_customer_document,
+)
+def _saala_customers_query(db: Session, vendor_id: int):
+    return db.query(
+        SaalaCustomer.id, SaalaCustomer.vendor_id, SaalaCustomer.name, SaalaCustomer.contact,
+        SaalaCustomer.address, SaalaCustomer.created_at, SaalaCustomer.updated_at,
+    ).filter(SaalaCustomer.vendor_id == vendor_id)
+
+
+# ---------- catalog ----------
+def _catalog_document(row) -> SearchDocument:
+    id_, code, name, rate = row
+    payload = {
+        "id": id_,
+        "itemCode": code,
+        "itemName": name,
+        "rate": float(rate or 0),
+    }
+    return SearchDocument(id_, name, code, payload)
+
+
+@register_source(
+    "catalog",
+    tables=("catalog",),
+    name_col=lambda: Catalog.name,
+    code_col=lambda: Catalog.code,
+    to_document=_catalog_document,
+)
+def _catalog_query(db: Session, vendor_id: int):
+    return db.query(Catalog.id, Catalog.code, Catalog.name, Catalog.rate)\
+        .filter(Catalog.vendor_id == vendor_id)
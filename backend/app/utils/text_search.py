@@ -0,0 +1,34 @@
+"""
+SQL-side search helpers backed by pg_trgm and full-text indexes.
+
+ILIKE patterns use the trigram indexes of the ``trigram_search_indexes_20260212``
+migration; prefix tsqueries run against the stored
+``collection_items.search_tsv`` column (``search_tsv_column_20260701``).
+"""
+import re
+from typing import Optional
+
+from sqlalchemy import func
+
+_TSQUERY_TOKEN = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input is matched literally (use with escape='\\\\')."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def contains_pattern(value: str) -> str:
+    """``%value%`` with wildcards escaped - the shape pg_trgm GIN indexes accelerate."""
+    return f"%{escape_like(value)}%"
+
+
+def to_prefix_tsquery(q: Optional[str]):
+    """
+    Build a ``to_tsquery`` where every word is a prefix match, e.g. "ros tn09"
+    becomes ``ros:* & tn09:*``. Returns None when q has no searchable words.
+    """
+    tokens = _TSQUERY_TOKEN.findall((q or "").lower())
+    if not tokens:
+        return None
+    return func.to_tsquery("simple", " & ".join(f"{t}:*" for t in tokens))
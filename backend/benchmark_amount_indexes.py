@@ -0,0 +1,170 @@
+"""
+Benchmark: collection_items amount aggregation and date indexes, before/after
+the amount_columns_brin_20260315 migration.
+
+Measures, on the configured database:
+- the size of every index on collection_items, audits and sms_logs (summed
+  over partitions);
+- the median latency of the aggregate queries the app runs (per-vendor day
+  and range totals, per-farmer range totals, audit/SMS log date ranges) and
+  whether Postgres answered them with an index-only scan.
+
+Before the migration the amounts are computed per row (qty_kg * rate_per_kg,
+...); after it the generated gross_amount / luggage_amount columns are read.
+
+Run from backend/:
+    python benchmark_amount_indexes.py --vendor 1 --from 2026-01-01 --to 2026-01-31 --json before.json
+    alembic upgrade head && psql -c "VACUUM ANALYZE collection_items"
+    python benchmark_amount_indexes.py --vendor 1 --from 2026-01-01 --to 2026-01-31 --json after.json
+    python benchmark_amount_indexes.py --compare before.json after.json
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.core.db import engine
+
+TABLES = ("collection_items", "audits", "sms_logs")
+
+COMPUTED_AMOUNTS = {
+    "gross": "qty_kg * rate_per_kg",
+    "luggage": "coalesce(qty_kg * labour_per_kg, 0) + coalesce(transport_cost, 0)",
+}
+STORED_AMOUNTS = {"gross": "gross_amount", "luggage": "luggage_amount"}
+
+QUERIES = {
+    "vendor_day_gross": """
+        SELECT sum({gross}) FROM collection_items
+        WHERE vendor_id = :vendor AND date = :to_date
+    """,
+    "vendor_range_totals": """
+        SELECT sum({gross}), sum({luggage}), sum(coolie_cost), sum(paid_amount), sum(qty_kg)
+        FROM collection_items
+        WHERE vendor_id = :vendor AND date BETWEEN :from_date AND :to_date
+    """,
+    "farmer_range_totals": """
+        SELECT farmer_id, sum({gross}), sum({luggage}), sum(coolie_cost), sum(paid_amount)
+        FROM collection_items
+        WHERE farmer_id IN (SELECT id FROM farmers WHERE vendor_id = :vendor)
+          AND date BETWEEN :from_date AND :to_date
+        GROUP BY farmer_id
+    """,
+    "audits_range": """
+        SELECT count(*) FROM audits WHERE created_at >= :from_date AND created_at < :to_date + 1
+    """,
+    "sms_logs_range": """
+        SELECT count(*) FROM sms_logs WHERE created_at >= :from_date AND created_at < :to_date + 1
+    """,
+}
+
+
+def _day(value: str):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def index_sizes(conn):
+    rows = conn.execute(text("""
+        SELECT i.tablename, i.indexname,
+               (SELECT coalesce(sum(pg_relation_size(t.relid)), 0)
+                FROM pg_partition_tree(CAST(i.indexname AS regclass)) t) AS bytes
+        FROM pg_indexes i
+        WHERE i.schemaname = current_schema() AND i.tablename = ANY(:tables)
+        ORDER BY i.tablename, i.indexname
+    """), {"tables": list(TABLES)}).fetchall()
+    return {f"{r.tablename}.{r.indexname}": int(r.bytes) for r in rows}
+
+
+def _plan_nodes(plan):
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.get("Plans", []))
+
+
+def time_queries(conn, params, repeat):
+    stored = conn.execute(text("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'collection_items' AND column_name = 'gross_amount'
+    """)).scalar() is not None
+    amounts = STORED_AMOUNTS if stored else COMPUTED_AMOUNTS
+
+    results = {}
+    for label, sql in QUERIES.items():
+        sql = sql.format(**amounts)
+        conn.execute(text(sql), params).fetchall()  # warm the cache
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(text(sql), params).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()[0]["Plan"]
+        scans = sorted({n["Node Type"] for n in _plan_nodes(plan) if "Scan" in n["Node Type"]})
+        results[label] = {"median_ms": round(statistics.median(timings), 3), "scans": scans}
+    return {"stored_amounts": stored, "queries": results}
+
+
+def _mb(size) -> str:
+    return f"{size / 1024 / 1024:8.2f} MB" if size is not None else f"{'-':>11}"
+
+
+def compare(before_path: str, after_path: str):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    print("Index sizes")
+    for table in TABLES:
+        old = sum(v for k, v in before["indexes"].items() if k.startswith(f"{table}."))
+        new = sum(v for k, v in after["indexes"].items() if k.startswith(f"{table}."))
+        print(f"  {table:<18} {_mb(old)} -> {_mb(new)}")
+    for name in sorted(set(before["indexes"]) | set(after["indexes"])):
+        old, new = before["indexes"].get(name), after["indexes"].get(name)
+        if old != new:
+            print(f"    {name:<55} {_mb(old)} -> {_mb(new)}")
+
+    print("Median latency")
+    for label in QUERIES:
+        old, new = before["queries"][label], after["queries"][label]
+        print(f"  {label:<22} {old['median_ms']:9.3f} ms -> {new['median_ms']:9.3f} ms   "
+              f"{', '.join(old['scans'])} -> {', '.join(new['scans'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vendor", type=int)
+    parser.add_argument("--from", dest="from_date", type=_day)
+    parser.add_argument("--to", dest="to_date", type=_day)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="also write the measurements to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if not (args.vendor and args.from_date and args.to_date):
+        parser.error("--vendor, --from and --to are required")
+
+    params = {"vendor": args.vendor, "from_date": args.from_date, "to_date": args.to_date}
+    with engine.connect() as conn:
+        measurements = {"indexes": index_sizes(conn), **time_queries(conn, params, args.repeat)}
+
+    for name, size in measurements["indexes"].items():
+        print(f"{name:<60} {_mb(size)}")
+    print(f"amounts: {'stored columns' if measurements['stored_amounts'] else 'computed per row'}")
+    for label, result in measurements["queries"].items():
+        print(f"{label:<22} {result['median_ms']:9.3f} ms  {', '.join(result['scans'])}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(measurements, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
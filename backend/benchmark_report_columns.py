@@ -0,0 +1,135 @@
+"""
+Benchmark: Decimal report loops vs. fixed-point report columns.
+
+Compares the per-row work of building ledger template rows for N collection
+lines (no database involved):
+
+- decimal: the previous pipeline - Decimal(str(value)) per column and str()
+  in reports_db, then float() parsing, commission/net/balance and "%.2f"
+  formatting in the route.
+- columns: app.utils.money_columns - ints in hundredths (as selected with
+  scaled()), vectorized amount/luggage/commission/net/balance, one
+  formatting pass.
+
+Run from backend/:
+    python benchmark_report_columns.py [rows]
+"""
+import random
+import sys
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.utils.money_columns import DEFAULT_COMMISSION_PERCENT, MoneyLines, fmt, fmt_column
+
+
+def make_rows(count: int):
+    rng = random.Random(42)
+    scaled_rows, decimal_rows = [], []
+    for _ in range(count):
+        values = dict(
+            qty_kg=rng.randint(1, 50000),
+            rate_per_kg=rng.randint(1000, 50000),
+            labour_per_kg=rng.choice((0, 50, 100, 150)),
+            transport_cost=rng.choice((0, 0, 2500, 5000)),
+            coolie=rng.choice((0, 1000, 2000)),
+            paid_amount=rng.choice((0, 0, 10000, 50000)),
+        )
+        scaled_rows.append(SimpleNamespace(**values))
+        decimal_rows.append(SimpleNamespace(**{k: Decimal(v).scaleb(-2) for k, v in values.items()}))
+    return scaled_rows, decimal_rows
+
+
+def decimal_pipeline(rows):
+    # reports_db: Decimal per column, str() per value
+    entries = []
+    for r in rows:
+        qty = Decimal(str(r.qty_kg)) if r.qty_kg is not None else Decimal("0")
+        rate = Decimal(str(r.rate_per_kg)) if r.rate_per_kg is not None else Decimal("0")
+        amount = qty * rate
+        paid = Decimal(str(r.paid_amount)) if r.paid_amount is not None else Decimal("0")
+        labour = Decimal(str(r.labour_per_kg)) if r.labour_per_kg is not None else Decimal("0")
+        transport = Decimal(str(r.transport_cost)) if r.transport_cost is not None else Decimal("0")
+        luggage = qty * labour + transport
+        coolie = Decimal(str(r.coolie)) if r.coolie is not None else Decimal("0")
+        entries.append({
+            "qty": str(qty), "rate": str(rate), "luggage": str(luggage), "coolie": str(coolie),
+            "amount": str(amount), "paid": str(paid),
+        })
+    # route: float() back, compute, format
+    out = []
+    gross_total = net_total = balance_total = 0
+    for e in entries:
+        total = float(e["amount"])
+        commission = total * 0.12
+        net = total - commission
+        paid = float(e["paid"])
+        luggage = float(e["luggage"])
+        coolie = float(e["coolie"])
+        qty = float(e["qty"])
+        balance = net - paid - luggage - coolie
+        out.append({
+            "qty": f"{qty:.2f}", "rate": e["rate"], "luggage": f"{luggage:.2f}", "coolie": f"{coolie:.2f}",
+            "total": f"{total:.2f}", "commission": f"{commission:.2f}", "net": f"{net:.2f}",
+            "paid": f"{paid:.2f}", "balance": f"{balance:.2f}",
+        })
+        gross_total += total
+        net_total += net
+        balance_total += balance
+    return out, f"{gross_total:.2f}"
+
+
+def column_pipeline(rows):
+    lines = MoneyLines.from_rows(rows)
+    commission = lines.commission(DEFAULT_COMMISSION_PERCENT)
+    net = lines.amount - commission
+    balance = net - lines.paid - lines.luggage - lines.coolie
+    out = [
+        {
+            "qty": q, "rate": r, "luggage": l, "coolie": c, "total": t,
+            "commission": cm, "net": n, "paid": p, "balance": b,
+        }
+        for q, r, l, c, t, cm, n, p, b in zip(
+            fmt_column(lines.qty), fmt_column(lines.rate), fmt_column(lines.luggage),
+            fmt_column(lines.coolie), fmt_column(lines.amount), fmt_column(commission),
+            fmt_column(net), fmt_column(lines.paid), fmt_column(balance),
+        )
+    ]
+    return out, fmt(lines.amount.sum())
+
+
+def best_of(func, rows, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(rows)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    scaled_rows, decimal_rows = make_rows(count)
+
+    decimal_seconds, (_, decimal_total) = best_of(decimal_pipeline, decimal_rows)
+    column_seconds, (_, column_total) = best_of(column_pipeline, scaled_rows)
+
+    # Only the computation core (no row dicts / string formatting)
+    core_seconds, _ = best_of(
+        lambda rows: MoneyLines.from_rows(rows).commission(DEFAULT_COMMISSION_PERCENT), scaled_rows
+    )
+
+    print(f"rows: {count}  (numpy {np.__version__})")
+    print(f"decimal loops : {decimal_seconds * 1000:9.1f} ms   gross total {decimal_total}")
+    print(f"fixed-point   : {column_seconds * 1000:9.1f} ms   gross total {column_total}")
+    print(f"  core only   : {core_seconds * 1000:9.1f} ms")
+    print(f"speed-up      : {decimal_seconds / column_seconds:9.1f}x")
+    # Line amounts are rounded to the paisa before summing, so the totals can
+    # differ from the unrounded float sum by at most half a paisa per line.
+
+
+if __name__ == "__main__":
+    main()
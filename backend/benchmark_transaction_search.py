@@ -0,0 +1,150 @@
+"""
+Benchmark: GET /transactions/search, before/after the search_tsv_column_20260701
+migration.
+
+Measures, on the configured database, for a set of search words from one
+letter up to multi-word queries:
+- how many of the vendor's collection items match;
+- the median latency of the first page (the route's query: prefix tsquery,
+  newest first, LIMIT size + 1) and the scans Postgres used for it.
+
+Before the migration the tsvector is computed per row from vehicle, item and
+remarks; after it the stored search_tsv column is read.
+
+Run from backend/:
+    python benchmark_transaction_search.py --vendor 1 --json before.json
+    alembic upgrade head && psql -c "VACUUM ANALYZE collection_items"
+    python benchmark_transaction_search.py --vendor 1 --json after.json
+    python benchmark_transaction_search.py --compare before.json after.json
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.core.db import engine
+
+COMPUTED_VECTOR = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(ci.vehicle_name, '') || ' ' || coalesce(ci.vehicle_number, '') || ' ' || "
+    "coalesce(ci.item_name, '') || ' ' || coalesce(ci.remarks, ''))"
+)
+STORED_VECTOR = "ci.search_tsv"
+
+# Short prefixes match most rows, longer and multi-word ones fewer
+TERMS = ["r", "ro", "rose", "tn", "tn09", "10", "1008", "route 4", "jasmine tn09", "tn 9", "zzz"]
+
+SEARCH = """
+    SELECT ci.id, ci.date, ci.farmer_id, f.name, ci.vehicle_name, ci.vehicle_number,
+           ci.item_code, ci.item_name, ci.qty_kg, ci.rate_per_kg, ci.remarks
+    FROM collection_items ci LEFT JOIN farmers f ON ci.farmer_id = f.id
+    WHERE ci.vendor_id = :vendor AND {vector} @@ to_tsquery('simple', :tsquery){dates}
+    ORDER BY ci.date DESC, ci.id DESC
+    LIMIT :limit
+"""
+MATCHES = """
+    SELECT count(*) FROM collection_items ci
+    WHERE ci.vendor_id = :vendor AND {vector} @@ to_tsquery('simple', :tsquery){dates}
+"""
+
+
+def _day(value: str):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _tsquery(term: str) -> str:
+    # Same shape as app.utils.text_search.to_prefix_tsquery
+    return " & ".join(f"{word}:*" for word in term.lower().split())
+
+
+def _plan_nodes(plan):
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.get("Plans", []))
+
+
+def time_searches(conn, params, terms, repeat):
+    stored = conn.execute(text("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'collection_items' AND column_name = 'search_tsv'
+    """)).scalar() is not None
+    vector = STORED_VECTOR if stored else COMPUTED_VECTOR
+    dates = ""
+    if params["from_date"]:
+        dates += " AND ci.date >= :from_date"
+    if params["to_date"]:
+        dates += " AND ci.date <= :to_date"
+    search = SEARCH.format(vector=vector, dates=dates)
+
+    results = {}
+    for term in terms:
+        term_params = {**params, "tsquery": _tsquery(term)}
+        matches = conn.execute(text(MATCHES.format(vector=vector, dates=dates)), term_params).scalar()
+        conn.execute(text(search), term_params).fetchall()  # warm the cache
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(text(search), term_params).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {search}"), term_params).scalar()[0]["Plan"]
+        scans = sorted({
+            f"{n['Node Type']} {n.get('Index Name', '')}".strip()
+            for n in _plan_nodes(plan) if "Scan" in n["Node Type"] and n.get("Relation Name") != "farmers"
+        })
+        results[term] = {"matches": matches, "median_ms": round(statistics.median(timings), 3), "scans": scans}
+    return {"stored_vector": stored, "searches": results}
+
+
+def compare(before_path: str, after_path: str):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    print("Median latency of the first page")
+    for term in before["searches"]:
+        if term not in after["searches"]:
+            continue
+        old, new = before["searches"][term], after["searches"][term]
+        print(f"  {term!r:<16} {old['matches']:>9} matches  {old['median_ms']:9.3f} ms -> {new['median_ms']:9.3f} ms   "
+              f"{', '.join(old['scans'])} -> {', '.join(new['scans'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vendor", type=int)
+    parser.add_argument("--from", dest="from_date", type=_day)
+    parser.add_argument("--to", dest="to_date", type=_day)
+    parser.add_argument("--term", action="append", help="search text to time (repeatable; default: TERMS)")
+    parser.add_argument("--size", type=int, default=50, help="page size, as the route's size parameter")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="also write the measurements to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if not args.vendor:
+        parser.error("--vendor is required")
+
+    params = {"vendor": args.vendor, "from_date": args.from_date, "to_date": args.to_date, "limit": args.size + 1}
+    with engine.connect() as conn:
+        measurements = time_searches(conn, params, args.term or TERMS, args.repeat)
+
+    print(f"tsvector: {'stored search_tsv column' if measurements['stored_vector'] else 'computed per row'}")
+    for term, result in measurements["searches"].items():
+        print(f"{term!r:<16} {result['matches']:>9} matches  {result['median_ms']:9.3f} ms  {', '.join(result['scans'])}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(measurements, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
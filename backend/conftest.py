@@ -9,6 +9,12 @@ from unittest.mock import patch
 # Disable caching in test environment
 os.environ['CACHE_ENABLED'] = 'False'
 
+# Database-backed tests run only against a disposable Postgres database given
+# as TEST_DATABASE_URL (every table is truncated); otherwise they are skipped.
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+if TEST_DATABASE_URL:
+    os.environ['DATABASE_URL'] = TEST_DATABASE_URL
+
 
 @pytest.fixture(autouse=True)
 def disable_cache_globally():
@@ -20,4 +26,34 @@ def disable_cache_globally():
         with patch('app.utils.cache.cache.set', return_value=None):
             with patch('app.utils.cache.cached_per_request', lambda *args, **kwargs: lambda f: f):
                 with patch('app.utils.cache.cached', lambda *args, **kwargs: lambda f: f):
-                    yield
\ No newline at end of file
+                    yield
+
+
+@pytest.fixture
+def pg_db():
+    """
+    Session on an emptied TEST_DATABASE_URL database with the flush hooks
+    registered and one vendor (id 1).
+    """
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    import app.core.startup  # noqa: F401  (flush hooks + create_all)
+    from app.core.db import SessionLocal, engine
+    from app.utils.commission_rates import clear_commission_rates
+    from app.utils.search_index import clear_indexes
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("TRUNCATE vendors CASCADE")
+        conn.exec_driver_sql(
+            "INSERT INTO vendors (id, name, owner_name, phone, email, password_hash) "
+            "VALUES (1, 'Test Vendor', 'Owner', '9999999999', 'vendor@example.com', 'x')"
+        )
+    clear_commission_rates()
+    clear_indexes()
+
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
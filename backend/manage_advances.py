@@ -0,0 +1,74 @@
+"""
+Check the maintained advance balances against the advances table.
+
+Run from backend/ (e.g. nightly from cron):
+    python manage_advances.py verify [--vendor 1] [--fix]
+    python manage_advances.py rebuild [--vendor 1] [--farmer 12 ...]
+
+``verify`` lists every farmer whose balance or monthly checkpoint differs
+from what its advances add up to and exits with status 1 if any do; with
+--fix those farmers are rebuilt. ``rebuild`` recomputes unconditionally.
+"""
+import argparse
+import sys
+
+from app.core.advance_balances import find_drift, rebuild
+from app.core.db import SessionLocal
+
+
+def cmd_verify(db, args):
+    drift = find_drift(db, args.vendor)
+    if not drift:
+        print("Advance balances match the advances table")
+        db.rollback()
+        return
+
+    for entry in drift:
+        where = f"checkpoint {entry['month'].strftime('%Y-%m')}" if entry["month"] else "balance"
+        print(f"  farmer {entry['farmer_id']:>6} {where:<18} expected {entry['expected'] or 0:>12} stored {entry['stored'] or 0:>12}")
+    farmer_ids = sorted({entry["farmer_id"] for entry in drift})
+    print(f"{len(drift)} difference(s) for {len(farmer_ids)} farmer(s)")
+
+    if args.fix:
+        rebuild(db, farmer_ids)
+        db.commit()
+        print(f"Rebuilt {len(farmer_ids)} farmer(s)")
+    else:
+        db.rollback()
+        sys.exit(1)
+
+
+def cmd_rebuild(db, args):
+    rebuild(db, args.farmer or None, vendor_id=args.vendor)
+    db.commit()
+    print("Rebuilt advance balances")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    verify = commands.add_parser("verify", help="report balances that drifted from the advances table")
+    verify.add_argument("--fix", action="store_true", help="rebuild the farmers that drifted")
+    verify.set_defaults(handler=cmd_verify)
+
+    rebuild_parser = commands.add_parser("rebuild", help="recompute balances and checkpoints")
+    rebuild_parser.add_argument("--farmer", type=int, action="append", help="only this farmer (repeatable)")
+    rebuild_parser.set_defaults(handler=cmd_rebuild)
+
+    for sub in (verify, rebuild_parser):
+        sub.add_argument("--vendor", type=int)
+
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        args.handler(db, args)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Export the Parquet snapshot read by the /api/analytics endpoints.
+
+Run from backend/ (e.g. nightly from cron, off-peak):
+    python manage_analytics.py export
+    python manage_analytics.py status
+
+The export streams collection_items, farmers, farmer_groups, settlements and
+saala_transactions out of Postgres in one REPEATABLE READ transaction; API
+workers pick the new snapshot up on their next analytics query.
+"""
+import argparse
+import time
+
+from app.core.analytics import analytics, export_snapshot, AnalyticsUnavailable
+from app.core.config import settings
+from app.core.db import engine
+
+
+def cmd_export(args):
+    started = time.perf_counter()
+    snapshot = export_snapshot(engine)
+    print(f"Snapshot {snapshot['path']} in {settings.ANALYTICS_DIR} ({time.perf_counter() - started:.1f}s)")
+    for table, rows in snapshot["tables"].items():
+        print(f"  {table:<20} {rows:>10} rows")
+    print(f"  + {len(snapshot['archive_files'])} archived collection_items file(s)")
+
+
+def cmd_status(args):
+    try:
+        snapshot = analytics.status()
+    except AnalyticsUnavailable as e:
+        raise SystemExit(str(e))
+    print(f"Snapshot {snapshot['path']} exported at {snapshot['exported_at']}")
+    for table, rows in snapshot["tables"].items():
+        print(f"  {table:<20} {rows:>10} rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("export", help="write a new snapshot and make it current").set_defaults(handler=cmd_export)
+    commands.add_parser("status", help="show the current snapshot").set_defaults(handler=cmd_status)
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Move closed seasons of collection_items into the Parquet cold archive.
+
+Run from backend/:
+    python manage_archive.py archive --through 2023 [--vendor 1]
+    python manage_archive.py status [--vendor 1]
+
+``--through 2023`` archives everything dated up to the end of the 2023
+season (with the default April start: 2024-03-31). Without --vendor every
+vendor is archived. Reports keep showing archived rows (app.core.archive).
+"""
+import argparse
+import sys
+
+from sqlalchemy import select
+
+from app.core.archive import TABLE, archive_vendor, load_manifest, season_bounds, vendor_dir
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.models.vendor import Vendor
+
+
+def _vendor_ids(db, vendor_id):
+    if vendor_id is not None:
+        return [vendor_id]
+    return list(db.execute(select(Vendor.id).order_by(Vendor.id)).scalars())
+
+
+def cmd_archive(db, args):
+    start, end = season_bounds(args.through)
+    print(f"Archiving {TABLE} up to {end.isoformat()} (season {args.through}: {start.isoformat()}..{end.isoformat()})")
+    for vendor_id in _vendor_ids(db, args.vendor):
+        try:
+            entries = archive_vendor(db, vendor_id, args.through)
+        except ValueError as e:
+            sys.exit(str(e))
+        rows = sum(entry["rows"] for entry in entries)
+        print(f"  vendor {vendor_id}: {len(entries)} file(s), {rows} rows")
+
+
+def cmd_status(db, args):
+    print(f"Archive directory: {settings.ARCHIVE_DIR}")
+    for vendor_id in _vendor_ids(db, args.vendor):
+        manifest = load_manifest(vendor_id)
+        if not manifest:
+            continue
+        table = manifest["tables"][TABLE]
+        print(f"vendor {vendor_id}: archived through {table['archived_through']} ({vendor_dir(vendor_id)})")
+        for entry in table["files"]:
+            print(
+                f"  {entry['file']:<64} {entry['rows']:>9} rows  {entry['row_groups']:>3} row groups  "
+                f"{entry['bytes'] / 1024:>10.1f} KB"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    archive = commands.add_parser("archive", help="archive every season up to and including --through")
+    archive.add_argument("--through", type=int, required=True, help="last season to archive (year it starts in)")
+    archive.add_argument("--vendor", type=int)
+    archive.set_defaults(handler=cmd_archive)
+
+    status = commands.add_parser("status", help="show archived files per vendor")
+    status.add_argument("--vendor", type=int)
+    status.set_defaults(handler=cmd_status)
+
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        args.handler(db, args)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
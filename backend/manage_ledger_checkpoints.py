@@ -0,0 +1,78 @@
+"""
+Check the monthly farmer ledger checkpoints against the collection lines.
+
+Run from backend/ (e.g. nightly from cron):
+    python manage_ledger_checkpoints.py verify [--vendor 1] [--fix]
+    python manage_ledger_checkpoints.py rebuild [--vendor 1] [--farmer 12 ...]
+
+``verify`` lists every farmer whose monthly checkpoint differs from what its
+collection lines (including archived seasons) add up to at the current
+commission rates and exits with status 1 if any do; with --fix those farmers
+are rebuilt. ``rebuild`` recomputes unconditionally.
+"""
+import argparse
+import sys
+
+from app.core.db import SessionLocal
+from app.core.ledger_checkpoints import find_drift, rebuild
+
+
+def cmd_verify(db, args):
+    drift = find_drift(db, args.vendor)
+    if not drift:
+        print("Ledger checkpoints match the collection lines")
+        db.rollback()
+        return
+
+    for entry in drift:
+        print(
+            f"  farmer {entry['farmer_id']:>6} {entry['month'].strftime('%Y-%m')} {entry['field']:<10} "
+            f"expected {entry['expected'] if entry['expected'] is not None else '-':>12} "
+            f"stored {entry['stored'] if entry['stored'] is not None else '-':>12}"
+        )
+    farmer_ids = sorted({entry["farmer_id"] for entry in drift})
+    print(f"{len(drift)} checkpoint(s) differ for {len(farmer_ids)} farmer(s)")
+
+    if args.fix:
+        rebuild(db, farmer_ids)
+        db.commit()
+        print(f"Rebuilt {len(farmer_ids)} farmer(s)")
+    else:
+        db.rollback()
+        sys.exit(1)
+
+
+def cmd_rebuild(db, args):
+    rebuild(db, args.farmer or None, vendor_id=args.vendor)
+    db.commit()
+    print("Rebuilt ledger checkpoints")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    verify = commands.add_parser("verify", help="report checkpoints that drifted from the collection lines")
+    verify.add_argument("--fix", action="store_true", help="rebuild the farmers that drifted")
+    verify.set_defaults(handler=cmd_verify)
+
+    rebuild_parser = commands.add_parser("rebuild", help="recompute checkpoints")
+    rebuild_parser.add_argument("--farmer", type=int, action="append", help="only this farmer (repeatable)")
+    rebuild_parser.set_defaults(handler=cmd_rebuild)
+
+    for sub in (verify, rebuild_parser):
+        sub.add_argument("--vendor", type=int)
+
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        args.handler(db, args)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
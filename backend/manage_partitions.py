@@ -0,0 +1,121 @@
+"""
+Maintain the monthly partitions of collection_items, audits and sms_logs.
+
+Run from backend/ (e.g. daily from cron):
+    python manage_partitions.py create [--months-ahead 3]
+    python manage_partitions.py detach --before 2024-01 [--archive] [--table audits]
+    python manage_partitions.py list
+    python manage_partitions.py pruning-report --vendor 1 --from 2026-01-01 --to 2026-01-31 [--group 4] [--analyze]
+
+``detach`` removes old months from the application's view; with --archive
+they are kept in the ``archive`` schema, otherwise as plain tables next to
+the parent. Drop them by hand once they are no longer needed.
+"""
+import argparse
+import sys
+from datetime import date, datetime
+
+from app.core.db import SessionLocal
+from app.core.partitions import (
+    MONTHS_AHEAD,
+    PARTITIONED_TABLES,
+    create_partitions,
+    detach_partitions,
+    is_partitioned,
+    list_partitions,
+    pruning_report,
+)
+
+
+def _month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def _day(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _tables(db, table):
+    tables = [table] if table else list(PARTITIONED_TABLES)
+    missing = [t for t in tables if not is_partitioned(db, t)]
+    if missing:
+        sys.exit(f"Not partitioned: {', '.join(missing)} (run alembic upgrade head)")
+    return tables
+
+
+def cmd_create(db, args):
+    for table in _tables(db, args.table):
+        created = create_partitions(db, table, months_ahead=args.months_ahead)
+        print(f"{table}: {', '.join(created) if created else 'up to date'}")
+    db.commit()
+
+
+def cmd_detach(db, args):
+    for table in _tables(db, args.table):
+        detached = detach_partitions(db, table, args.before, archive=args.archive)
+        print(f"{table}: {', '.join(detached) if detached else 'nothing to detach'}")
+    db.commit()
+
+
+def cmd_list(db, args):
+    for table in _tables(db, args.table):
+        print(table)
+        for partition in list_partitions(db, table):
+            print(f"  {partition['name']:<32} {partition['estimated_rows']:>10}  {partition['bounds']}")
+
+
+def cmd_pruning_report(db, args):
+    _tables(db, "collection_items")
+    report = pruning_report(db, args.vendor, args.from_date, args.to_date, group_id=args.group, analyze=args.analyze)
+    for entry in report:
+        timing = f", {entry['execution_ms']:.1f} ms" if entry["execution_ms"] is not None else ""
+        status = "ok" if entry["only_range"] else "READS OUTSIDE RANGE"
+        print(
+            f"{entry['query']:<22} scans {len(entry['scanned'])}/{entry['partitions']} partitions "
+            f"(pruned {entry['pruned']}, removed at run time {entry['runtime_removed']}{timing}) {status}"
+        )
+        for name in entry["scanned"]:
+            print(f"    {name}")
+    db.rollback()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="create partitions for the coming months")
+    create.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD)
+    create.set_defaults(handler=cmd_create)
+
+    detach = commands.add_parser("detach", help="detach partitions of months before a cutoff")
+    detach.add_argument("--before", type=_month, required=True, help="first month to keep, YYYY-MM")
+    detach.add_argument("--archive", action="store_true", help="move detached partitions to the archive schema")
+    detach.set_defaults(handler=cmd_detach)
+
+    listing = commands.add_parser("list", help="show partitions, bounds and estimated rows")
+    listing.set_defaults(handler=cmd_list)
+
+    for sub in (create, detach, listing):
+        sub.add_argument("--table", choices=sorted(PARTITIONED_TABLES))
+
+    report = commands.add_parser("pruning-report", help="show which partitions the report queries read")
+    report.add_argument("--vendor", type=int, required=True)
+    report.add_argument("--from", dest="from_date", type=_day, required=True)
+    report.add_argument("--to", dest="to_date", type=_day, required=True)
+    report.add_argument("--group", type=int, help="also plan the group patti / group total by group queries")
+    report.add_argument("--analyze", action="store_true", help="execute the queries (EXPLAIN ANALYZE)")
+    report.set_defaults(handler=cmd_pruning_report)
+
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        args.handler(db, args)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Tests for advance balances and their monthly checkpoints (app.core.advance_balances).
+
+Advances are written through the ORM so the flush hooks maintain the
+balances; ``find_drift`` recomputes them from the advances table and must
+find nothing. Needs TEST_DATABASE_URL (see conftest.py).
+
+Run with: TEST_DATABASE_URL=postgresql://... pytest backend/test_advance_balances.py
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.advance_balances import advance_summary, balance_as_of, find_drift
+from app.models.advance import Advance
+from app.models.collection_item import CollectionItem
+from app.models.farmer import Farmer
+from app.models.settlement import Settlement
+from app.models.settlement_item import SettlementItem
+from app.routes.settlements import void_settlement
+
+
+def _advance(farmer_id, amount, day):
+    return Advance(vendor_id=1, farmer_id=farmer_id, amount=Decimal(amount), created_at=day)
+
+
+@pytest.fixture
+def advances(pg_db):
+    db = pg_db
+    db.add_all([
+        Farmer(id=1, vendor_id=1, farmer_code="F1", name="Ram"),
+        Farmer(id=2, vendor_id=1, farmer_code="F2", name="Shyam"),
+    ])
+    db.commit()
+    rows = [
+        _advance(1, "100.00", datetime(2026, 1, 5)),
+        _advance(1, "-30.50", datetime(2026, 3, 10)),
+        _advance(1, "20.00", datetime(2026, 2, 1)),
+        _advance(2, "50.00", datetime(2026, 2, 14)),
+    ]
+    db.add_all(rows)
+    db.commit()
+    return db, rows
+
+
+def test_inserts_keep_balances_in_sync(advances):
+    db, _ = advances
+    assert find_drift(db) == []
+    assert advance_summary(db, 1, 1) == (Decimal("120.00"), Decimal("30.50"), Decimal("89.50"))
+    assert balance_as_of(db, 1, 1, date(2026, 2, 28)) == Decimal("120.00")
+    assert balance_as_of(db, 1, 1, date(2026, 3, 10)) == Decimal("89.50")
+
+
+def test_updates_keep_balances_in_sync(advances):
+    db, rows = advances
+    rows[0].amount = Decimal("80.00")                 # object expired by the commit
+    rows[2].created_at = datetime(2026, 4, 1)         # moves to another month
+    rows[3].farmer_id = 1                             # moves to another farmer
+    db.commit()
+    assert find_drift(db) == []
+    assert advance_summary(db, 1, 2) == (Decimal("0"), Decimal("0"), Decimal("0"))
+
+
+def test_deletes_keep_balances_in_sync(advances):
+    db, rows = advances
+    db.delete(rows[2])                                # farmer 1's only February advance
+    db.commit()
+    assert find_drift(db) == []
+    assert balance_as_of(db, 1, 1, date(2026, 2, 28)) == Decimal("100.00")
+
+
+def test_zero_amounts_keep_no_checkpoint(advances):
+    db, _ = advances
+    db.add(_advance(2, "0", datetime(2026, 5, 3)))
+    db.commit()
+    assert find_drift(db) == []
+
+
+def test_void_settlement_restores_through_the_ledger(advances):
+    db, _ = advances
+    line = CollectionItem(
+        vendor_id=1, farmer_id=1, date=date(2026, 3, 12), qty_kg=Decimal("10"), rate_per_kg=Decimal("20"),
+        is_locked=True,
+    )
+    settlement = Settlement(
+        vendor_id=1, farmer_id=1, date_from=date(2026, 3, 1), date_to=date(2026, 3, 31),
+        total_qty=Decimal("10"), total_amount=Decimal("200"), commission_percent=Decimal("10"),
+        total_commission=Decimal("20"), advance_deducted=Decimal("40.00"), net_payable=Decimal("140"),
+    )
+    db.add_all([line, settlement, _advance(1, "-40.00", datetime(2026, 4, 1))])
+    db.flush()
+    db.add(SettlementItem(settlement_id=settlement.id, collection_item_id=line.id, line_total=Decimal("200")))
+    db.commit()
+    assert advance_summary(db, 1, 1)[2] == Decimal("49.50")
+
+    user = SimpleNamespace(vendor_id=1, id=None, role="vendor_admin")
+    void_settlement(settlement.id, "wrong period", db=db, user=user)
+
+    assert advance_summary(db, 1, 1)[2] == Decimal("89.50")
+    assert find_drift(db) == []
+    assert db.get(Settlement, settlement.id).status == "VOIDED"
+    assert line.is_locked is False
@@ -0,0 +1,124 @@
+"""
+Tests for the collection_items cold archive (app.core.archive).
+
+Needs TEST_DATABASE_URL (see conftest.py).
+
+Run with: TEST_DATABASE_URL=postgresql://... pytest backend/test_archive.py
+"""
+import json
+import select
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import archive, jobs
+from app.core.archive import archive_vendor, archived_through
+from app.core.config import settings
+from app.core.ledger_checkpoints import find_drift, opening_totals, stale_farmer_ids
+from app.core.live_events import live_events
+from app.models.collection_item import CollectionItem
+from app.models.farmer import Farmer
+from app.utils.commission_rates import get_commission_rates
+from app.utils.reports_db import daily_sales_statement, ledger_lines_statement
+
+TODAY = date(2026, 6, 1)
+
+
+def _line(day, qty="10.00", rate="25.50"):
+    return CollectionItem(
+        vendor_id=1, farmer_id=1, date=day, qty_kg=Decimal(qty), rate_per_kg=Decimal(rate), is_locked=False,
+    )
+
+
+@pytest.fixture
+def lines(pg_db, tmp_path, monkeypatch):
+    """Lines in the 2024 season (archived by the tests) and the 2025 one."""
+    monkeypatch.setattr(settings, "ARCHIVE_DIR", str(tmp_path))
+    archive.clear_manifests()
+    db = pg_db
+    db.add(Farmer(id=1, vendor_id=1, farmer_code="F1-0001", name="Ram"))
+    db.commit()
+    db.add_all([
+        _line(date(2024, 4, 2)),
+        _line(date(2025, 3, 31), qty="3.35", rate="7.15"),
+        _line(date(2025, 4, 1), qty="12.05", rate="33.33"),
+        _line(date(2025, 6, 30), qty="0.55", rate="99.99"),
+    ])
+    db.commit()
+    yield db
+    archive.clear_manifests()
+
+
+def _notifications(connection):
+    payloads = []
+    while select.select([connection], [], [], 0.5) != ([], [], []):
+        connection.poll()
+        while connection.notifies:
+            payloads.append(json.loads(connection.notifies.pop(0).payload))
+        if payloads:
+            break
+    return payloads
+
+
+def test_archive_delete_tells_live_subscribers_to_resync(lines):
+    db = lines
+    listener = live_events._connect()
+    try:
+        archive_vendor(db, 1, 2024, today=TODAY)
+        assert [(p["vendor_id"], p["type"]) for p in _notifications(listener)] == [(1, "resync")]
+    finally:
+        listener.close()
+
+    assert archived_through(1) == date(2025, 3, 31)
+    assert db.query(CollectionItem).count() == 2
+
+
+def _reports(db, from_date, to_date):
+    return [
+        [tuple(row) for row in db.execute(statement).all()]
+        for statement in (
+            ledger_lines_statement(1, [1], from_date, to_date),
+            daily_sales_statement(1, from_date, to_date),
+        )
+    ]
+
+
+def test_range_across_the_boundary_reads_both_tiers(lines):
+    db = lines
+    before = _reports(db, date(2025, 3, 1), date(2025, 4, 30))
+    assert [len(rows) for rows in before] == [2, 2]
+
+    archive_vendor(db, 1, 2024, today=TODAY)
+    assert _reports(db, date(2025, 3, 1), date(2025, 4, 30)) == before
+    assert _reports(db, date(2024, 1, 1), date(2026, 1, 1))[0][0][2] == date(2024, 4, 2)
+
+
+def test_checkpoints_add_archived_lines_in_python(lines, monkeypatch):
+    """Stale farmers' openings and the rebuild read whole histories, past the statement cap."""
+    db = lines
+    db.get(Farmer, 1).commission_percent = Decimal("9.50")
+    db.commit()
+    rates = get_commission_rates(db, 1)
+    before = opening_totals(db, 1, [1], date(2025, 6, 15), rates)[1].formatted()
+
+    archive_vendor(db, 1, 2024, today=TODAY)
+    monkeypatch.setattr(settings, "ARCHIVE_MAX_ROWS_PER_STATEMENT", 1)
+    assert stale_farmer_ids(db, [1]) == {1}
+    assert opening_totals(db, 1, [1], date(2025, 6, 15), rates)[1].formatted() == before
+
+    assert jobs.run_pending() == 1
+    assert find_drift(db) == []
+    assert opening_totals(db, 1, [1], date(2025, 6, 15), rates)[1].formatted() == before
+
+
+def test_reports_refuse_too_many_archived_lines(lines, monkeypatch):
+    db = lines
+    archive_vendor(db, 1, 2024, today=TODAY)
+    monkeypatch.setattr(settings, "ARCHIVE_MAX_ROWS_PER_STATEMENT", 1)
+
+    assert len(db.execute(ledger_lines_statement(1, [1], date(2025, 3, 1), date(2025, 4, 30))).all()) == 2
+    with pytest.raises(HTTPException) as raised:
+        ledger_lines_statement(1, [1], date(2024, 4, 1), date(2025, 4, 30))
+    assert raised.value.status_code == 413
@@ -0,0 +1,60 @@
+"""
+Tests for the per-vendor commission rate cache (app.utils.commission_rates).
+
+Needs TEST_DATABASE_URL (see conftest.py).
+
+Run with: TEST_DATABASE_URL=postgresql://... pytest backend/test_commission_rates.py
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models.collection_item import CollectionItem
+from app.models.farmer import Farmer
+from app.models.farmer_group import FarmerGroup
+from app.utils.commission_rates import get_commission_rates
+from app.utils.money_columns import DEFAULT_COMMISSION_PERCENT
+
+
+@pytest.fixture
+def farmers(pg_db):
+    db = pg_db
+    db.add(FarmerGroup(id=1, vendor_id=1, name="Group A", commission_percent=Decimal("8.50")))
+    db.flush()
+    db.add_all([
+        Farmer(id=1, vendor_id=1, farmer_code="F1", name="Ram", group_id=1),
+        Farmer(id=2, vendor_id=1, farmer_code="F2", name="Shyam", group_id=1, commission_percent=Decimal("11.25")),
+        Farmer(id=3, vendor_id=1, farmer_code="F3", name="Mohan"),
+    ])
+    db.commit()
+    return db
+
+
+def test_effective_rates(farmers):
+    rates = get_commission_rates(farmers, 1)
+    assert [rates.for_farmer(farmer_id) for farmer_id in (1, 2, 3)] == [850, 1125, DEFAULT_COMMISSION_PERCENT]
+
+
+def test_other_writes_keep_the_cache(farmers):
+    db = farmers
+    rates = get_commission_rates(db, 1)
+    db.add(CollectionItem(
+        vendor_id=1, farmer_id=1, date=date(2026, 1, 5), qty_kg=Decimal("1"), rate_per_kg=Decimal("2"), is_locked=False,
+    ))
+    db.commit()
+    assert get_commission_rates(db, 1) is rates
+
+
+def test_rate_changes_reload(farmers):
+    db = farmers
+    rates = get_commission_rates(db, 1)
+    db.get(FarmerGroup, 1).commission_percent = Decimal("6")
+    db.commit()
+    reloaded = get_commission_rates(db, 1)
+    assert reloaded is not rates
+    assert reloaded.for_farmer(1) == 600
+
+    db.get(Farmer, 3).commission_percent = Decimal("9.99")
+    db.commit()
+    assert get_commission_rates(db, 1).for_farmer(3) == 999
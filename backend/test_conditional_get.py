@@ -0,0 +1,103 @@
+"""
+Tests for ETag / If-None-Match handling (app.core.conditional_get).
+
+Run with: pytest backend/test_conditional_get.py
+"""
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.core import conditional_get
+from app.core.conditional_get import etag_matches, make_etag, reference_data_etag, report_etag
+from app.models.farmer import Farmer
+
+USER = SimpleNamespace(vendor_id=1, id=None)
+
+
+class _VersionSession:
+    """Stands in for the session get_data_version reads the counter from."""
+
+    def __init__(self, version):
+        self.version = version
+
+    def execute(self, *args, **kwargs):
+        return SimpleNamespace(scalar=lambda: self.version)
+
+
+def _request(path="/api/reports/daily-sales", query="", if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({
+        "type": "http", "method": "GET", "path": path, "query_string": query.encode(),
+        "headers": headers,
+    })
+
+
+def _etag(dependency, db, **kwargs):
+    request = _request(**kwargs)
+    dependency(request, db=db, user=USER)
+    return request.state.etag
+
+
+def test_etag_depends_on_url_and_version():
+    request = _request(query="from_date=2026-01-01")
+    assert make_etag(1, 5, request) == make_etag(1, 5, _request(query="from_date=2026-01-01"))
+    assert make_etag(1, 5, request) != make_etag(1, 6, request)
+    assert make_etag(1, 5, request) != make_etag(1, 5, _request(query="from_date=2026-01-02"))
+
+
+def test_weak_comparison():
+    assert etag_matches('W/"1-5-abc"', 'W/"1-5-abc"')
+    assert etag_matches('"1-5-abc", W/"1-4-abc"', 'W/"1-5-abc"')
+    assert etag_matches("*", 'W/"1-5-abc"')
+    assert not etag_matches('W/"1-4-abc"', 'W/"1-5-abc"')
+    assert not etag_matches(None, 'W/"1-5-abc"')
+
+
+def test_matching_etag_answers_304():
+    etag = _etag(report_etag, _VersionSession(7))
+    with pytest.raises(HTTPException) as raised:
+        report_etag(_request(if_none_match=etag), db=_VersionSession(7), user=USER)
+    assert raised.value.status_code == 304
+    assert raised.value.headers["ETag"] == etag
+
+
+def test_write_invalidates_etag():
+    etag = _etag(report_etag, _VersionSession(7))
+    request = _request(if_none_match=etag)
+    report_etag(request, db=_VersionSession(8), user=USER)  # no 304
+    assert request.state.etag != etag
+
+
+def test_report_etag_changes_with_the_date(monkeypatch):
+    """Reports default their range to today, so yesterday's copy is stale."""
+    class _Date(date):
+        day_ = date(2026, 3, 1)
+
+        @classmethod
+        def today(cls):
+            return cls.day_
+
+    monkeypatch.setattr(conditional_get, "date", _Date)
+    first = _etag(report_etag, _VersionSession(7))
+    master = _etag(reference_data_etag, _VersionSession(7))
+    _Date.day_ = date(2026, 3, 2)
+    assert _etag(report_etag, _VersionSession(7)) != first
+    assert _etag(reference_data_etag, _VersionSession(7)) == master
+
+
+def test_write_through_the_orm_invalidates_etag(pg_db):
+    """A committed write bumps the vendor's data version (app.core.audit_events)."""
+    etag = _etag(reference_data_etag, pg_db, path="/api/farmers/")
+    with pytest.raises(HTTPException) as raised:
+        reference_data_etag(_request(path="/api/farmers/", if_none_match=etag), db=pg_db, user=USER)
+    assert raised.value.status_code == 304
+
+    pg_db.add(Farmer(vendor_id=1, farmer_code="F1", name="Ram"))
+    pg_db.commit()
+
+    request = _request(path="/api/farmers/", if_none_match=etag)
+    reference_data_etag(request, db=pg_db, user=USER)  # no 304
+    assert request.state.etag != etag
@@ -0,0 +1,94 @@
+"""
+Tests for farmer code allocation (app.services.farmer_code_service) and the
+code collisions the farmers routes turn into 409s.
+
+Needs TEST_DATABASE_URL (see conftest.py).
+
+Run with: TEST_DATABASE_URL=postgresql://... pytest backend/test_farmer_codes.py
+"""
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.farmer import Farmer
+from app.models.farmer_group import FarmerGroup
+from app.routes.farmers import create_farmer, update_farmer
+from app.schemas.farmer import FarmerCreate, FarmerUpdate
+from app.services.farmer_code_service import allocate_farmer_code, allocate_farmer_codes
+
+ADMIN = SimpleNamespace(vendor_id=1, id=None, role="vendor_admin")
+
+
+@pytest.fixture
+def group(pg_db):
+    pg_db.add(FarmerGroup(id=1, vendor_id=1, name="Group A"))
+    pg_db.commit()
+    return pg_db
+
+
+def _create(db, name="Ram"):
+    data = FarmerCreate(name=name, phone="9999900000", address="Hosur", group_name="Group A")
+    return create_farmer(data, db=db, user=ADMIN)
+
+
+def test_allocation_is_consecutive(pg_db):
+    assert allocate_farmer_codes(pg_db, 1, 3) == ["F1-0001", "F1-0002", "F1-0003"]
+    assert allocate_farmer_code(pg_db, 1) == "F1-0004"
+    assert allocate_farmer_codes(pg_db, 1, 0) == []
+
+
+def test_rollback_returns_the_numbers(pg_db):
+    allocate_farmer_codes(pg_db, 1, 5)
+    pg_db.rollback()
+    assert allocate_farmer_code(pg_db, 1) == "F1-0001"
+
+
+def test_seeds_from_existing_codes(pg_db):
+    pg_db.add_all([
+        Farmer(vendor_id=1, farmer_code="F1-0041", name="Ram"),
+        Farmer(vendor_id=1, farmer_code="F1-0007", name="Shyam"),
+        Farmer(vendor_id=1, farmer_code="LEGACY-99", name="Mohan"),
+    ])
+    pg_db.commit()
+    assert allocate_farmer_codes(pg_db, 1, 2) == ["F1-0042", "F1-0043"]
+
+
+def test_code_set_by_hand_is_skipped(group):
+    db = group
+    farmer = _create(db)
+    assert farmer.farmer_code == "F1-0001"
+
+    update_farmer(farmer.id, FarmerUpdate(farmer_code="F1-0050"), db=db, user=ADMIN)
+    assert _create(db, "Shyam").farmer_code == "F1-0051"
+
+    # Lower numbers do not move the counter back
+    update_farmer(farmer.id, FarmerUpdate(farmer_code="F1-0010"), db=db, user=ADMIN)
+    assert _create(db, "Mohan").farmer_code == "F1-0052"
+
+
+def test_code_set_before_the_first_allocation_keeps_the_seed(pg_db):
+    pg_db.add_all([
+        Farmer(id=1, vendor_id=1, farmer_code="F1-0200", name="Ram"),
+        Farmer(id=2, vendor_id=1, farmer_code="OLD-2", name="Shyam"),
+    ])
+    pg_db.commit()
+    update_farmer(2, FarmerUpdate(farmer_code="F1-0020"), db=pg_db, user=ADMIN)
+    assert allocate_farmer_code(pg_db, 1) == "F1-0201"
+
+
+def test_collisions(group):
+    db = group
+    first = _create(db)
+    second = _create(db, "Shyam")
+
+    with pytest.raises(HTTPException) as raised:
+        update_farmer(second.id, FarmerUpdate(farmer_code=first.farmer_code), db=db, user=ADMIN)
+    assert raised.value.status_code == 409
+
+    with pytest.raises(HTTPException) as raised:
+        update_farmer(second.id, FarmerUpdate(farmer_code="F2-0001"), db=db, user=ADMIN)
+    assert raised.value.status_code == 400
+
+    assert db.get(Farmer, second.id).farmer_code == "F1-0002"
+    assert _create(db, "Mohan").farmer_code == "F1-0003"
@@ -0,0 +1,129 @@
+"""
+Tests for the bulk farmer import (app.services.farmer_import_service).
+
+Parsing runs without a database; the import tests need TEST_DATABASE_URL
+(see conftest.py).
+
+Run with: TEST_DATABASE_URL=postgresql://... pytest backend/test_farmer_import.py
+"""
+import io
+
+import pytest
+from openpyxl import Workbook
+
+from app.models.farmer import Farmer
+from app.models.farmer_group import FarmerGroup
+from app.services.farmer_code_service import allocate_farmer_code
+from app.services.farmer_import_service import (
+    NEW_FARMER_COMMISSION_PERCENT,
+    ImportFileError,
+    import_farmers,
+    iter_import_rows,
+)
+
+CSV = (
+    "\ufeffFarmer Name,Mobile,Village,Group\n"
+    "Ram,9876543210,Hosur,group a\n"
+    ",,,\n"
+    "Shyam,,,\n"
+)
+
+
+def _csv(text=CSV):
+    return io.BytesIO(text.encode("utf-8"))
+
+
+def _xlsx(rows):
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def _import(db, text, dry_run=False):
+    return import_farmers(db, vendor_id=1, user_id=None, rows=iter_import_rows(_csv(text), "f.csv"), dry_run=dry_run)
+
+
+# ---------- parsing ----------
+def test_csv_rows():
+    assert list(iter_import_rows(_csv(), "farmers.CSV")) == [
+        (2, {"name": "Ram", "phone": "9876543210", "address": "Hosur", "group_name": "group a"}),
+        (4, {"name": "Shyam", "phone": None, "address": None, "group_name": None}),
+    ]
+
+
+def test_xlsx_rows():
+    fileobj = _xlsx([
+        ["Name", "Phone", "Notes"],
+        ["Ram", 9876543210.0, "ignored"],
+        [None, None, None],
+        ["  Shyam ", None],
+    ])
+    assert list(iter_import_rows(fileobj, "farmers.xlsx")) == [
+        (2, {"name": "Ram", "phone": "9876543210"}),
+        (4, {"name": "Shyam", "phone": None}),
+    ]
+
+
+@pytest.mark.parametrize("fileobj, filename, message", [
+    (_csv(""), "f.csv", "File is empty"),
+    (_csv("phone,address\n1,2\n"), "f.csv", "Missing required column: name"),
+    (_csv(), "f.xls", "Unsupported file type"),
+])
+def test_file_errors(fileobj, filename, message):
+    with pytest.raises(ImportFileError, match=message):
+        list(iter_import_rows(fileobj, filename))
+
+
+# ---------- import ----------
+@pytest.fixture
+def groups(pg_db):
+    pg_db.add_all([
+        FarmerGroup(id=1, vendor_id=1, name="Group A"),
+        FarmerGroup(id=2, vendor_id=1, name="Group B"),
+    ])
+    pg_db.commit()
+    return pg_db
+
+
+def test_resolves_groups_and_reports_errors(groups):
+    db = groups
+    report = _import(db, (
+        "name,phone,group\n"
+        "Ram,9876543210, group a \n"
+        ",9876543210,Group A\n"
+        "Shyam,123,Group B\n"
+        "Mohan,,Group C\n"
+        "Gopal,,\n"
+    ))
+    assert report["total_rows"] == 5
+    assert report["imported"] == 2
+    assert report["failed"] == 3
+    assert [error["row"] for error in report["errors"]] == [3, 4, 5]
+    assert report["errors"][2]["errors"] == ["group_name: Farmer group 'Group C' not found"]
+
+    farmers = db.query(Farmer).order_by(Farmer.farmer_code).all()
+    assert [(f.farmer_code, f.name, f.group_id) for f in farmers] == [("F1-0001", "Ram", 1), ("F1-0002", "Gopal", None)]
+    assert farmers[0].commission_percent == NEW_FARMER_COMMISSION_PERCENT
+
+
+def test_dry_run_writes_nothing(groups):
+    db = groups
+    report = _import(db, "name,group\nRam,Group A\n", dry_run=True)
+    assert (report["imported"], report["dry_run"]) == (1, True)
+    assert db.query(Farmer).count() == 0
+
+
+def test_code_collision_fails_the_file(groups):
+    db = groups
+    allocate_farmer_code(db, 1)                                      # counter at 1
+    db.add(Farmer(vendor_id=1, farmer_code="F1-0003", name="Old"))   # behind its back
+    db.commit()
+
+    with pytest.raises(ImportFileError, match="nothing was imported"):
+        _import(db, "name\nRam\nShyam\n")
+    db.rollback()
+    assert db.query(Farmer).count() == 1
@@ -0,0 +1,131 @@
+"""
+Tests for the monthly farmer ledger checkpoints (app.core.ledger_checkpoints).
+
+Every write goes through the ORM so the flush hooks maintain the checkpoints;
+``find_drift`` then recomputes them from the collection lines and must find
+nothing. Needs TEST_DATABASE_URL (see conftest.py).
+
+Run with: TEST_DATABASE_URL=postgresql://... pytest backend/test_ledger_checkpoints.py
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.core import jobs
+from app.core.ledger_checkpoints import find_drift, opening_totals, stale_farmer_ids
+from app.models.collection_item import CollectionItem
+from app.models.farmer import Farmer
+from app.models.farmer_group import FarmerGroup
+from app.utils.commission_rates import clear_commission_rates, get_commission_rates
+from app.utils.report_rows import TOTAL_FIELDS, build_lines
+from app.utils.reports_db import ledger_lines_statement
+
+
+def _line(farmer_id, day, qty="10.00", rate="25.50", **extra):
+    return CollectionItem(
+        vendor_id=1, farmer_id=farmer_id, date=day, qty_kg=Decimal(qty), rate_per_kg=Decimal(rate),
+        is_locked=False, **extra,
+    )
+
+
+@pytest.fixture
+def ledger(pg_db):
+    """Two farmers in a group (one on the group rate, one on their own) and lines over three months."""
+    db = pg_db
+    db.add(FarmerGroup(id=1, vendor_id=1, name="Group A", commission_percent=Decimal("8.50")))
+    db.flush()
+    db.add_all([
+        Farmer(id=1, vendor_id=1, farmer_code="F1", name="Ram", group_id=1),
+        Farmer(id=2, vendor_id=1, farmer_code="F2", name="Shyam", group_id=1, commission_percent=Decimal("11.25")),
+    ])
+    db.commit()
+    lines = [
+        _line(1, date(2026, 1, 5), labour_per_kg=Decimal("1.25"), transport_cost=Decimal("15")),
+        _line(1, date(2026, 1, 20), qty="3.35", rate="7.15", paid_amount=Decimal("20")),
+        _line(1, date(2026, 2, 2), coolie_cost=Decimal("4.50")),
+        _line(2, date(2026, 2, 14), qty="12.05", rate="33.33"),
+        _line(2, date(2026, 3, 31), qty="0.55", rate="99.99"),
+        _line(None, date(2026, 3, 1)),
+    ]
+    db.add_all(lines)
+    db.commit()
+    return db, lines
+
+
+def _full_history_openings(db, day):
+    clear_commission_rates()
+    rates = get_commission_rates(db, 1)
+    expected = {}
+    for farmer_id in (1, 2):
+        rows = db.execute(ledger_lines_statement(1, [farmer_id], date(2000, 1, 1), day - timedelta(days=1))).all()
+        expected[farmer_id] = build_lines(rows, rates.for_farmer(farmer_id))[1]
+    return rates, expected
+
+
+def _assert_openings_match_lines(db):
+    for day in (date(2026, 1, 1), date(2026, 1, 21), date(2026, 2, 1), date(2026, 3, 15), date(2026, 5, 1)):
+        rates, expected = _full_history_openings(db, day)
+        openings = opening_totals(db, 1, [1, 2], day, rates)
+        for farmer_id in (1, 2):
+            for name in TOTAL_FIELDS:
+                assert getattr(openings[farmer_id], name) == getattr(expected[farmer_id], name), (day, farmer_id, name)
+
+
+def test_inserts_keep_checkpoints_in_sync(ledger):
+    db, _ = ledger
+    assert find_drift(db) == []
+    _assert_openings_match_lines(db)
+
+
+def test_updates_keep_checkpoints_in_sync(ledger):
+    db, lines = ledger
+    lines[0].qty_kg = Decimal("7.77")          # value change (object expired by the commit)
+    lines[1].date = date(2026, 3, 3)           # moves to another month
+    lines[2].farmer_id = 2                     # moves to another farmer
+    lines[3].is_locked = True                  # no tracked change
+    db.commit()
+    assert find_drift(db) == []
+
+    lines[4].farmer_id = None                  # leaves the ledger
+    lines[5].farmer_id = 1                     # joins it
+    db.commit()
+    assert find_drift(db) == []
+    _assert_openings_match_lines(db)
+
+
+def test_deletes_keep_checkpoints_in_sync(ledger):
+    db, lines = ledger
+    db.delete(lines[2])                        # farmer 1's only February line
+    db.commit()
+    assert find_drift(db) == []
+
+    db.delete(lines[0])
+    db.delete(lines[1])
+    db.commit()
+    assert find_drift(db) == []
+    _assert_openings_match_lines(db)
+
+
+@pytest.mark.parametrize("change", ["farmer_rate", "group_rate", "group_move"])
+def test_rate_changes_rebuild_in_a_job(ledger, change):
+    db, _ = ledger
+    if change == "farmer_rate":
+        db.get(Farmer, 2).commission_percent = Decimal("9.99")
+        stale = {2}
+    elif change == "group_rate":
+        db.get(FarmerGroup, 1).commission_percent = Decimal("6")
+        stale = {1}  # farmer 2 has a rate of their own
+    else:
+        db.get(Farmer, 1).group_id = None
+        stale = {1}
+    db.commit()
+
+    assert stale_farmer_ids(db, [1, 2]) == stale
+    assert {entry["farmer_id"] for entry in find_drift(db)} == stale
+    # Readers do not wait for the rebuild
+    _assert_openings_match_lines(db)
+
+    assert jobs.run_pending() == 1
+    assert stale_farmer_ids(db, [1, 2]) == set()
+    assert find_drift(db) == []
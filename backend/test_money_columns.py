@@ -0,0 +1,76 @@
+"""
+Tests for fixed-point report arithmetic (app.utils.money_columns).
+
+Every rounded value must equal Decimal.quantize(Decimal("0.01")) in the
+default (half to even) context.
+
+Run with: pytest backend/test_money_columns.py
+"""
+import random
+from decimal import Decimal, ROUND_HALF_EVEN
+
+import numpy as np
+import pytest
+
+from app.utils.money_columns import column, fmt, fmt_column, mul, percent, to_scaled
+
+CENT = Decimal("0.01")
+
+
+def _quantize(value: Decimal) -> int:
+    return int(value.quantize(CENT, rounding=ROUND_HALF_EVEN).scaleb(2))
+
+
+def _decimal(hundredths: int) -> Decimal:
+    return Decimal(hundredths).scaleb(-2)
+
+
+def _random_values(seed: int, count: int = 2000, high: int = 10_000_000):
+    rnd = random.Random(seed)
+    return [rnd.randint(-high, high) for _ in range(count)]
+
+
+@pytest.mark.parametrize("a, b", [
+    (125, 50),      # 1.25 x 0.50 = 0.625   -> 0.62
+    (135, 50),      # 1.35 x 0.50 = 0.675   -> 0.68
+    (-125, 50),     # -0.625                -> -0.62
+    (-135, 50),     # -0.675                -> -0.68
+    (1, 50),        # 0.005                 -> 0.00
+    (3, 50),        # 0.015                 -> 0.02
+    (0, 999),
+])
+def test_mul_ties_round_half_even(a, b):
+    expected = _quantize(_decimal(a) * _decimal(b))
+    assert mul(column([a]), b).tolist() == [expected]
+
+
+def test_mul_matches_decimal_quantize():
+    a, b = _random_values(1), _random_values(2, high=100_000)
+    expected = [_quantize(_decimal(x) * _decimal(y)) for x, y in zip(a, b)]
+    assert mul(column(a), column(b)).tolist() == expected
+
+
+def test_mul_products_beyond_int64():
+    """The product overflows int64 (> 2**63), the rounded result does not."""
+    a = [4_000_000_005, -4_000_000_015]
+    b = [3_000_000_050, 3_000_000_050]
+    expected = [_quantize(_decimal(x) * _decimal(y)) for x, y in zip(a, b)]
+    assert mul(column(a), column(b)).tolist() == expected
+
+
+@pytest.mark.parametrize("percent_scaled", [1200, 1125, 850, 999, 0, 10000])
+def test_percent_matches_decimal_quantize(percent_scaled):
+    amounts = _random_values(3) + [50, 150, 250, -50, -150]
+    rate = _decimal(percent_scaled)
+    expected = [_quantize(_decimal(amount) * rate / 100) for amount in amounts]
+    assert percent(column(amounts), percent_scaled).tolist() == expected
+
+
+def test_to_scaled_rounds_half_even():
+    assert [to_scaled(v) for v in ("1.005", "1.015", "-1.005", None, "", 12.5)] == [100, 102, -100, 0, 0, 1250]
+
+
+def test_fmt_column_matches_fmt():
+    values = _random_values(4) + [0, -5, 5, 99, -100, 2 ** 50 + 7, -(2 ** 50) - 3]
+    assert fmt_column(column(values)) == [fmt(v) for v in values]
+    assert fmt_column(np.array(values[:10], dtype=np.int64)) == [str(_decimal(v)) for v in values[:10]]
@@ -0,0 +1,61 @@
+"""
+Tests for the native PDF report renderer (app.services.pdf_report_service).
+
+Run with: pytest backend/test_pdf_reports.py
+"""
+import pytest
+
+from app.services.pdf_report_service import PdfReportService
+
+NAME = "Ram & Sons <A>"
+PERIOD = {"from_date": "01-01-2026", "to_date": "31-01-2026", "current_date": "01-02-2026"}
+ROW = {"date": "05-01-2026", "vehicle": NAME, "product_name": NAME, "qty": "10.00", "rate": "20.00",
+       "luggage": "5.00", "total": "200.00", "paid": "0.00"}
+
+
+def _ledger():
+    return {
+        **PERIOD, "name": NAME, "address": NAME, "group_name": NAME, "rem_advance": "0",
+        "opening_balance": "10.00", "closing_balance": "20.00", "commission_pct": 10,
+        "rows": [ROW], "totals": {"qty": "10.00", "gross_total": "200.00", "balance_total": "10.00"},
+    }
+
+
+def _group_patti():
+    return {
+        **PERIOD, "group_name": NAME, "commission_pct": 10,
+        "customers": [{"name": NAME, "address": NAME, "ledger_name": NAME, "balance": "0",
+                       "transactions": [ROW], "total_qty": "10.00", "total_amount": "200.00"}],
+    }
+
+
+def _group_total():
+    return {
+        **PERIOD, "group_name": NAME,
+        "rows": [{"ledger_no": "F1", "farmer_name": NAME, "total_net_amount": "180.00", "paid_amount": "0.00"}],
+        "overall_net_amount": "180.00", "overall_paid": "0.00",
+    }
+
+
+def _daily_sales():
+    return {
+        **PERIOD, "item_filter": NAME,
+        "rows": [{**ROW, "party": NAME, "item_code": "R1", "coolie": "0.00"}],
+        "totals": {"record_count": 1, "total_qty": "10.00", "total_amount": "200.00"},
+    }
+
+
+@pytest.mark.parametrize("render, data", [
+    (PdfReportService.render_ledger, _ledger),
+    (PdfReportService.render_group_patti, _group_patti),
+    (PdfReportService.render_group_total, _group_total),
+    (PdfReportService.render_daily_sales, _daily_sales),
+])
+def test_markup_characters_in_names_render(render, data):
+    """Names with &, < and > are text, not Paragraph markup."""
+    pdf = render(data())
+    assert pdf.startswith(b"%PDF")
+
+
+def test_ledger_batch_renders_markup_characters():
+    assert PdfReportService.render_ledger_batch([_ledger(), _ledger()]).startswith(b"%PDF")
@@ -0,0 +1,50 @@
+"""
+Tests for the settlement PDF (app.services.pdf_service).
+
+Run with: pytest backend/test_settlement_pdf.py
+"""
+from datetime import date
+from decimal import Decimal
+
+import app.models  # noqa: F401  (resolve model relationships)
+from app.models.collection_item import CollectionItem
+from app.models.farmer import Farmer
+from app.models.settlement import Settlement
+from app.models.vendor import Vendor
+from app.services.pdf_service import draw_settlement_pdf, settlement_document
+
+
+def _settlement_inputs():
+    items = [
+        CollectionItem(date=date(2026, 1, 5), qty_kg=Decimal("10.50"), rate_per_kg=Decimal("20.00"),
+                       line_total=Decimal("210.00")),
+        CollectionItem(date=date(2026, 1, 9), qty_kg=Decimal("3.25"), rate_per_kg=Decimal("31.10"),
+                       line_total=Decimal("101.08")),
+    ]
+    settlement = Settlement(
+        id=7, date_from=date(2026, 1, 1), date_to=date(2026, 1, 31),
+        total_amount=Decimal("311.08"), total_commission=Decimal("37.33"),
+        advance_deducted=Decimal("50.00"), net_payable=Decimal("223.75"),
+    )
+    return dict(
+        settlement=settlement,
+        farmer=Farmer(name="Ram & Sons"),
+        vendor=Vendor(name="K.C.N & SONS", address=None),
+        settlement_items=items,
+    )
+
+
+def test_document_reads_collection_item_rows():
+    document = settlement_document(**_settlement_inputs())
+    assert document["items"] == [
+        {"date": "2026-01-05", "qty_kg": "10.50", "rate_per_kg": "20.00", "line_total": "210.00"},
+        {"date": "2026-01-09", "qty_kg": "3.25", "rate_per_kg": "31.10", "line_total": "101.08"},
+    ]
+    assert document["vendor_address"] == ""
+    assert document["net_payable"] == "223.75"
+
+
+def test_draws_pdf(tmp_path):
+    path = tmp_path / "settlement.pdf"
+    draw_settlement_pdf(str(path), settlement_document(**_settlement_inputs()))
+    assert path.read_bytes().startswith(b"%PDF")
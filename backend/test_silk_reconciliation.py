@@ -0,0 +1,83 @@
+"""
+Tests for the date-range silk reconciliation (app.services.silk_reconciliation_service).
+
+Needs TEST_DATABASE_URL (see conftest.py).
+
+Run with: TEST_DATABASE_URL=postgresql://... pytest backend/test_silk_reconciliation.py
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models.collection_item import CollectionItem
+from app.models.farmer import Farmer
+from app.models.silk_collection import CollectionStatus, SilkCollection
+from app.services.silk_reconciliation_service import reconcile_range
+
+
+def _entry(credit, cash="0", upi="0"):
+    return {"credit": Decimal(credit), "cash": Decimal(cash), "upi": Decimal(upi)}
+
+
+def _saved(day, credit, ledger_total="0"):
+    credit, ledger_total = Decimal(credit), Decimal(ledger_total)
+    return SilkCollection(
+        vendor_id=1, date=day, credit_amount=credit, total_entered=credit, ledger_total=ledger_total,
+        difference=credit - ledger_total, status=CollectionStatus.MISMATCH,
+    )
+
+
+@pytest.fixture
+def days(pg_db):
+    """Ledger lines on Jan 1-3; saved days Jan 1 and 3 (stale), and Jan 10 outside the range."""
+    db = pg_db
+    db.add(Farmer(id=1, vendor_id=1, farmer_code="F1-0001", name="Ram"))
+    db.commit()
+    db.add_all([
+        CollectionItem(vendor_id=1, farmer_id=1, date=day, qty_kg=Decimal("10.00"), rate_per_kg=Decimal(rate),
+                       is_locked=False)
+        for day, rate in [(date(2026, 1, 1), "10.00"), (date(2026, 1, 2), "25.50"), (date(2026, 1, 3), "30.00")]
+    ])
+    db.add_all([
+        _saved(date(2026, 1, 1), "100.00"),
+        _saved(date(2026, 1, 3), "300.00"),
+        _saved(date(2026, 1, 10), "50.00"),
+    ])
+    db.commit()
+    return db
+
+
+def _rows(db):
+    return {
+        row.date: (row.id, row.total_entered, row.ledger_total, row.status)
+        for row in db.query(SilkCollection).order_by(SilkCollection.date)
+    }
+
+
+def test_range_with_new_and_existing_days(days):
+    db = days
+    before = _rows(db)
+    entries = {
+        date(2026, 1, 2): _entry("200.00", cash="50.00", upi="5.00"),   # new day
+        date(2026, 1, 3): _entry("250.00"),                              # replaces the saved one
+    }
+
+    result = reconcile_range(db, 1, None, date(2026, 1, 1), date(2026, 1, 4), entries)
+    db.commit()
+    assert (result["matched"], result["mismatched"], result["missing"]) == (2, 1, 1)
+    assert [day["status"] for day in result["days"]] == ["MATCHED", "MATCHED", "MISMATCH", None]
+
+    after = _rows(db)
+    assert list(after) == [date(2026, 1, 1), date(2026, 1, 2), date(2026, 1, 3), date(2026, 1, 10)]
+    # Existing days keep their row (and, without an entry, their amounts); only the check is redone
+    assert after[date(2026, 1, 1)] == (before[date(2026, 1, 1)][0], 100, 100, CollectionStatus.MATCHED)
+    assert after[date(2026, 1, 2)][1:] == (255, 255, CollectionStatus.MATCHED)
+    assert after[date(2026, 1, 3)] == (before[date(2026, 1, 3)][0], 250, 300, CollectionStatus.MISMATCH)
+    assert after[date(2026, 1, 10)] == before[date(2026, 1, 10)]
+    assert [day["id"] for day in result["days"][:3]] == [after[date(2026, 1, d)][0] for d in (1, 2, 3)]
+
+    # Reconciling again upserts the same rows
+    reconcile_range(db, 1, None, date(2026, 1, 1), date(2026, 1, 4), {})
+    db.commit()
+    assert _rows(db) == after
@@ -0,0 +1,94 @@
+"""
+Tests for the silk ledger sync (app.services.silk_sync_service).
+
+Needs TEST_DATABASE_URL (see conftest.py).
+
+Run with: TEST_DATABASE_URL=postgresql://... pytest backend/test_silk_sync.py
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, text
+
+from app.models.collection_item import CollectionItem
+from app.models.farmer import Farmer
+from app.models.silk_ledger_entry import SilkLedgerEntry
+from app.models.silk_sync_state import SilkSyncState
+from app.services.silk_sync_service import sync_silk_ledger
+
+SINCE = date(2026, 1, 1)
+
+
+def _line(day=date(2026, 1, 5), farmer_id=1):
+    return CollectionItem(
+        vendor_id=1, farmer_id=farmer_id, date=day, qty_kg=Decimal("10.00"), rate_per_kg=Decimal("25.50"),
+        is_locked=False,
+    )
+
+
+@pytest.fixture
+def farmer(pg_db):
+    pg_db.add(Farmer(id=1, vendor_id=1, farmer_code="F1-0001", name="Ram"))
+    pg_db.commit()
+    return pg_db
+
+
+def _sync(db):
+    created = sync_silk_ledger(db, 1, SINCE)
+    db.commit()
+    return created
+
+
+def _entries(db):
+    return sorted(item_id for (item_id,) in db.query(SilkLedgerEntry.collection_item_id))
+
+
+def _age_lines(db):
+    db.execute(text("UPDATE collection_items SET created_at = now() - interval '1 hour'"))
+    db.commit()
+
+
+def test_resync_adds_no_duplicates(farmer):
+    db = farmer
+    lines = [_line(), _line(date(2026, 1, 6)), _line(farmer_id=None), _line(date(2025, 12, 31))]
+    db.add_all(lines)
+    db.commit()
+
+    assert _sync(db) == 2
+    assert _entries(db) == [lines[0].id, lines[1].id]
+
+    # Lines this recent are scanned again; the unique key keeps one entry each
+    assert _sync(db) == 0
+    assert _entries(db) == [lines[0].id, lines[1].id]
+
+    new = _line(date(2026, 1, 7))
+    db.add(new)
+    db.commit()
+    assert _sync(db) == 1
+    assert _entries(db) == [lines[0].id, lines[1].id, new.id]
+    assert db.query(func.count(SilkLedgerEntry.id)).scalar() == 3
+
+
+def test_mark_stops_below_recent_lines(farmer):
+    db = farmer
+    settled = [_line(), _line()]
+    db.add_all(settled)
+    db.commit()
+    _age_lines(db)
+
+    recent = _line()
+    db.add(recent)
+    db.commit()
+    assert _sync(db) == 3
+    assert db.get(SilkSyncState, 1).last_collection_item_id == recent.id - 1
+
+    # Settled lines are behind the mark and not scanned again; the recent one is
+    db.query(SilkLedgerEntry).delete()
+    db.commit()
+    assert _sync(db) == 1
+    assert _entries(db) == [recent.id]
+
+    _age_lines(db)
+    assert _sync(db) == 0
+    assert db.get(SilkSyncState, 1).last_collection_item_id == recent.id
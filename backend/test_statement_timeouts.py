@@ -0,0 +1,33 @@
+"""
+Tests for statement timeouts reaching the client (app.core.statement_timeouts).
+
+Run with: pytest backend/test_statement_timeouts.py
+"""
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.reports_db import get_daily_sales_data
+
+
+class _FailingSession:
+    def __init__(self, error):
+        self.error = error
+
+    def execute(self, *args, **kwargs):
+        raise self.error
+
+
+@pytest.mark.parametrize("status_code", [503, 504])
+def test_daily_sales_reraises_cancelled_statement(status_code):
+    """A cancelled/timed-out query must not become an empty 200 report."""
+    with pytest.raises(HTTPException) as raised:
+        get_daily_sales_data(1, date(2024, 1, 1), date(2025, 12, 31), db=_FailingSession(HTTPException(status_code)))
+    assert raised.value.status_code == status_code
+
+
+def test_daily_sales_other_errors_still_return_empty_report():
+    data = get_daily_sales_data(1, date(2024, 1, 1), date(2024, 1, 31), db=_FailingSession(RuntimeError("boom")))
+    assert data["record_count"] == 0
+    assert data["error"] == "boom"